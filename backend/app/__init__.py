@@ -4,11 +4,13 @@ from flask import Flask
 from flask_cors import CORS
 from dotenv import load_dotenv
 
-from app.extensions import socketio, action_logger_service
+from app.extensions import socketio, action_logger_service, SOCKETIO_ASYNC_MODE
 from app.api.topology import topology_bp
 from app.api.device_updates import device_bp
 from app.events.socket_events import register_socket_events
 from app.services.monitor_service import start_monitoring_service
+from app.services.ingest_server import start_ingest_server
+from app.services.dashboard_broadcaster import start_dashboard_broadcaster
 from app.utils.logger import get_logger
 
 load_dotenv()
@@ -29,13 +31,12 @@ def create_app():
 
     # Socket.IO Configuration
     socketio_cors = os.getenv('SOCKETIO_CORS_ALLOWED_ORIGINS', '*')
-    async_mode = os.getenv('SOCKETIO_ASYNC_MODE', 'eventlet')
-    
     socketio.init_app(
         app, 
-        async_mode=async_mode, 
+        async_mode=SOCKETIO_ASYNC_MODE, 
         cors_allowed_origins=socketio_cors
     )
+    logger.info(f">>> Socket.IO async_mode: {socketio.server.eio.async_mode}")
 
     # ========================================
     # ✅ FIX: ATTACH SOCKETIO TRƯỚC KHI REGISTER BLUEPRINT
@@ -63,6 +64,10 @@ def create_app():
     
     # Start Background Services
     start_monitoring_service()
+    # network_batch_update theo chu kỳ cố định, không theo tốc độ ingest
+    start_dashboard_broadcaster()
+    # Kênh telemetry riêng cho Mininet (INGEST_LISTEN), tách khỏi server của dashboard
+    start_ingest_server()
 
     logger.info(">>> Flask App initialized successfully!")
     return app
\ No newline at end of file
@@ -18,13 +18,17 @@ FLOW:
 """
 
 from flask import Blueprint, jsonify, request
-from app.extensions import digital_twin, socketio, data_lock, action_logger_service
+from app.extensions import (
+    digital_twin, socketio, data_lock, action_logger_service, link_update_coalescer
+)
 from app.models.action_log import ActionType, ActionStatus
 from app.schemas.control_schemas import (
     IMPORT_TOPOLOGY_SCHEMA,
     TOGGLE_DEVICE_SCHEMA,
     TOGGLE_LINK_SCHEMA,
     UPDATE_LINK_SCHEMA,
+    BULK_CONTROL_SCHEMA,
+    CHECKPOINT_SCHEMA,
     validate_request_data
 )
 from app.utils.logger import get_logger
@@ -42,6 +46,8 @@ def import_topology():
     """
     Nhập topology mới từ JSON (thay thế toàn bộ mạng hiện tại)
     
+    Mininet chỉ thêm/xóa phần khác biệt → thời gian reload tỉ lệ với số thay đổi
+    
     Request Body:
         {
             "topology": {
@@ -96,9 +102,18 @@ def import_topology():
     
     logger.info(f"[CONTROL] Import topology action created: {action.action_id}")
     
-    # STEP 3: [TODO] Gửi lệnh tới Mininet (phức tạp, implement sau)
-    # Hiện tại chỉ log action, không thực hiện reload
-    logger.warning(f"[CONTROL] Import topology not implemented yet: {action.action_id}")
+    # STEP 3: Gửi lệnh tới Mininet qua WebSocket
+    # Mininet chỉ áp phần khác biệt so với mạng đang chạy (reload tại chỗ),
+    # rồi tự đẩy diff lên /api/init/topology/diff
+    socketio.emit('execute_command', {
+        'action_id': action.action_id,
+        'command': 'reload_topology',
+        'data': {
+            'topology': topology
+        }
+    })
+    
+    logger.info(f"[CONTROL] Command sent to Mininet: reload_topology | Action: {action.action_id}")
     
     # STEP 5: Return ngay (non-blocking)
     return jsonify({
@@ -432,18 +447,27 @@ def update_link_conditions(link_id):
     )
     
     # STEP 4: Gửi lệnh tới Mininet qua WebSocket
-    socketio.emit('execute_command', {
-        'action_id': action.action_id,
-        'command': 'update_link_conditions',
-        'data': {
+    # (qua CommandCoalescer: các update cùng link trong cửa sổ ngắn được gộp
+    #  thành 1 lệnh với giá trị mới nhất, action cũ → COALESCED)
+    coalesced = link_update_coalescer.submit(
+        key=link_id,
+        action_id=action.action_id,
+        command='update_link_conditions',
+        data={
             'link_id': link_id,
             'node1': node1,
             'node2': node2,
             'conditions': requested_conditions
         }
-    })
+    )
+    
+    if coalesced['coalesced']:
+        action_logger_service.update_parameters(action.action_id, {
+            "requested_conditions": coalesced['conditions'],
+            "coalesced_from": coalesced['coalesced']
+        })
     
-    logger.info(f"[CONTROL] Command sent to Mininet: update_link_conditions | Action: {action.action_id}")
+    logger.info(f"[CONTROL] Command queued for Mininet: update_link_conditions | Action: {action.action_id}")
     
     # STEP 6: Return ngay
     return jsonify({
@@ -453,13 +477,338 @@ def update_link_conditions(link_id):
         "link": {
             "id": link_id,
             "current_conditions": current_conditions,
-            "requested_conditions": requested_conditions
+            "requested_conditions": coalesced['conditions'],
+            "coalesced_action_ids": coalesced['coalesced']
         }
     }), 202
 
 
 # ========================================
-# 5. GET ACTION HISTORY
+# 5. BULK CONTROL (NHIỀU THAO TÁC TRONG 1 REQUEST)
+# ========================================
+# Map op trong request → (command gửi Mininet, ActionType của child action)
+_BULK_OPS = {
+    'toggle_device': ('toggle_device', ActionType.TOGGLE_DEVICE),
+    'toggle_link': ('toggle_link', ActionType.TOGGLE_LINK),
+    'update_link': ('update_link_conditions', ActionType.UPDATE_LINK),
+}
+
+
+def _resolve_bulk_operation(index, op):
+    """
+    Kiểm tra 1 operation trong bulk request có trỏ tới thiết bị/link tồn tại không
+    
+    ⚠️ Phải gọi trong context của data_lock
+    
+    Returns:
+        tuple: (command_data dict, parameters dict, error str hoặc None)
+    """
+    op_type = op['op']
+    target = op['target']
+    
+    if op_type == 'toggle_device':
+        device = digital_twin.get_host(target)
+        device_type = "host"
+        if not device:
+            device = digital_twin.get_switch(target)
+            device_type = "switch"
+        if not device:
+            return None, None, f"operations[{index}]: Device '{target}' not found in Digital Twin"
+        
+        command_data = {'device_name': target, 'action': op['action']}
+        parameters = {
+            "action": op['action'],
+            "device_type": device_type,
+            "current_status": device.status
+        }
+        return command_data, parameters, None
+    
+    # toggle_link / update_link
+    parts = target.split('-')
+    if len(parts) != 2:
+        return None, None, f"operations[{index}]: Invalid link_id '{target}'. Expected: 'node1-node2'"
+    
+    node1, node2 = parts[0], parts[1]
+    link = digital_twin.get_link(node1, node2)
+    if not link:
+        return None, None, f"operations[{index}]: Link '{target}' not found in Digital Twin"
+    
+    if op_type == 'toggle_link':
+        command_data = {'link_id': target, 'node1': node1, 'node2': node2, 'action': op['action']}
+        parameters = {"action": op['action'], "current_status": link.status}
+    else:
+        command_data = {'link_id': target, 'node1': node1, 'node2': node2, 'conditions': op['conditions']}
+        parameters = {
+            # Link model chỉ lưu bandwidth (delay/loss đang áp không được theo dõi)
+            "current_conditions": {"bandwidth": link.bandwidth_capacity},
+            "requested_conditions": op['conditions']
+        }
+    
+    return command_data, parameters, None
+
+
+@control_bp.route('/control/bulk', methods=['POST'])
+def bulk_control():
+    """
+    Thực hiện nhiều thao tác điều khiển trong 1 request
+    
+    - Tạo 1 parent action (BULK) + 1 child action cho mỗi operation
+    - Gửi TẤT CẢ tới Mininet trong 1 lệnh 'bulk' (Mininet chạy song song)
+    - Tiến độ từng item được stream về qua event 'command_progress'
+    
+    Request Body:
+        {
+            "operations": [
+                {"op": "update_link", "target": "h1-s1", "conditions": {"bandwidth": 10, "loss": 5}},
+                {"op": "toggle_link", "target": "h2-s1", "action": "down"},
+                {"op": "toggle_device", "target": "h3", "action": "disable"}
+            ]
+        }
+    
+    Response (202):
+        {
+            "status": "success",
+            "action_id": "act_01J...",          // parent action
+            "message": "Bulk operation with 3 items initiated",
+            "operations": [
+                {"index": 0, "op": "update_link", "target": "h1-s1", "action_id": "act_01J..."},
+                ...
+            ]
+        }
+    """
+    data = request.get_json(silent=True)
+    
+    if not data:
+        return jsonify({
+            "status": "error",
+            "message": "No JSON data provided"
+        }), 400
+    
+    # STEP 1: Validate schema
+    is_valid, error = validate_request_data(data, BULK_CONTROL_SCHEMA)
+    if not is_valid:
+        return jsonify({
+            "status": "error",
+            "message": "Invalid request data",
+            "error": error
+        }), 400
+    
+    operations = data['operations']
+    
+    # STEP 2: Kiểm tra tất cả target tồn tại (all-or-nothing)
+    resolved = []
+    errors = []
+    with data_lock:
+        for index, op in enumerate(operations):
+            command_data, parameters, op_error = _resolve_bulk_operation(index, op)
+            if op_error:
+                errors.append(op_error)
+            else:
+                resolved.append((op, command_data, parameters))
+    
+    if errors:
+        logger.warning(f"[CONTROL] Bulk request rejected: {len(errors)} invalid operations")
+        return jsonify({
+            "status": "error",
+            "message": "Some operations reference unknown devices/links",
+            "errors": errors
+        }), 404
+    
+    # STEP 3: Tạo parent action + child actions
+    op_counts = {}
+    for op in operations:
+        op_counts[op['op']] = op_counts.get(op['op'], 0) + 1
+    
+    parent = action_logger_service.create_action(
+        action_type=ActionType.BULK,
+        target=f"bulk:{len(operations)}",
+        parameters={
+            "operations_count": len(operations),
+            "op_counts": op_counts
+        }
+    )
+    
+    children = []
+    items = []
+    for index, (op, command_data, parameters) in enumerate(resolved):
+        command, action_type = _BULK_OPS[op['op']]
+        parameters['parent_action_id'] = parent.action_id
+        
+        child = action_logger_service.create_action(
+            action_type=action_type,
+            target=op['target'],
+            parameters=parameters
+        )
+        children.append({
+            'action_id': child.action_id,
+            'command': command,
+            'data': command_data
+        })
+        items.append({
+            "index": index,
+            "op": op['op'],
+            "target": op['target'],
+            "action_id": child.action_id
+        })
+    
+    logger.info(
+        f"[CONTROL] Bulk action created: {parent.action_id} | "
+        f"Items: {len(children)} | Ops: {op_counts}"
+    )
+    
+    # STEP 4: Gửi 1 lệnh duy nhất tới Mininet
+    socketio.emit('execute_command', {
+        'action_id': parent.action_id,
+        'command': 'bulk',
+        'data': {
+            'operations': children
+        }
+    })
+    
+    logger.info(f"[CONTROL] Command sent to Mininet: bulk ({len(children)} items) | Action: {parent.action_id}")
+    
+    # STEP 5: Return ngay
+    return jsonify({
+        "status": "success",
+        "action_id": parent.action_id,
+        "message": f"Bulk operation with {len(children)} items initiated",
+        "operations": items
+    }), 202
+
+
+# ========================================
+# 6. CHECKPOINTS (CHỤP / RESET NHANH TRẠNG THÁI EMULATION)
+# ========================================
+def _send_checkpoint_command(action_type, command, name):
+    """Tạo Action Log + gửi lệnh checkpoint_* tới Mininet"""
+    action = action_logger_service.create_action(
+        action_type=action_type,
+        target=name,
+        parameters={"name": name}
+    )
+    
+    socketio.emit('execute_command', {
+        'action_id': action.action_id,
+        'command': command,
+        'data': {'name': name}
+    })
+    
+    logger.info(f"[CONTROL] Command sent to Mininet: {command} | Action: {action.action_id}")
+    return action
+
+
+@control_bp.route('/control/checkpoints', methods=['GET'])
+def list_checkpoints():
+    """
+    Danh sách checkpoint đang có bên Mininet ('baseline' được chụp lúc khởi động)
+    
+    Response (200):
+        {
+            "status": "success",
+            "checkpoints": [
+                {"name": "baseline", "created_at": 1736412000.5, "interfaces": 1000,
+                 "interfaces_down": 0, "shaped_interfaces": 1000,
+                 "blackholed_switches": [], "switches": 20}
+            ]
+        }
+    """
+    with data_lock:
+        checkpoints = sorted(digital_twin.checkpoints.values(), key=lambda cp: cp.get('created_at', 0))
+    
+    return jsonify({
+        "status": "success",
+        "checkpoints": checkpoints
+    })
+
+
+@control_bp.route('/control/checkpoints', methods=['POST'])
+def create_checkpoint():
+    """
+    Chụp trạng thái emulation hiện tại (tc, link up/down, switch disable, flow table)
+    
+    Request Body:
+        {"name": "before-failover-test"}
+    
+    Response (202):
+        {"status": "success", "action_id": "act_123...", "message": "..."}
+    """
+    data = request.get_json(silent=True)
+    
+    if not data:
+        return jsonify({
+            "status": "error",
+            "message": "No JSON data provided"
+        }), 400
+    
+    is_valid, error = validate_request_data(data, CHECKPOINT_SCHEMA)
+    if not is_valid:
+        return jsonify({
+            "status": "error",
+            "message": "Invalid request data",
+            "error": error
+        }), 400
+    
+    action = _send_checkpoint_command(ActionType.CHECKPOINT_CREATE, 'checkpoint_create', data['name'])
+    
+    return jsonify({
+        "status": "success",
+        "action_id": action.action_id,
+        "message": f"Checkpoint '{data['name']}' creation initiated"
+    }), 202
+
+
+@control_bp.route('/control/checkpoints/<name>/restore', methods=['POST'])
+def restore_checkpoint(name):
+    """
+    Reset emulation về checkpoint, Mininet chỉ áp phần khác biệt
+    (không restart → lab 500 link reset trong vài giây)
+    
+    Response (202):
+        {"status": "success", "action_id": "act_123...", "message": "..."}
+    
+    Kết quả (changes, duration_ms, timings) về qua action_completed / control_result
+    """
+    with data_lock:
+        exists = name in digital_twin.checkpoints
+    
+    if not exists:
+        return jsonify({
+            "status": "error",
+            "message": f"Checkpoint '{name}' not found"
+        }), 404
+    
+    action = _send_checkpoint_command(ActionType.CHECKPOINT_RESTORE, 'checkpoint_restore', name)
+    
+    return jsonify({
+        "status": "success",
+        "action_id": action.action_id,
+        "message": f"Checkpoint '{name}' restore initiated"
+    }), 202
+
+
+@control_bp.route('/control/checkpoints/<name>', methods=['DELETE'])
+def delete_checkpoint(name):
+    """Xóa 1 checkpoint bên Mininet"""
+    with data_lock:
+        exists = name in digital_twin.checkpoints
+    
+    if not exists:
+        return jsonify({
+            "status": "error",
+            "message": f"Checkpoint '{name}' not found"
+        }), 404
+    
+    action = _send_checkpoint_command(ActionType.CHECKPOINT_DELETE, 'checkpoint_delete', name)
+    
+    return jsonify({
+        "status": "success",
+        "action_id": action.action_id,
+        "message": f"Checkpoint '{name}' deletion initiated"
+    }), 202
+
+
+# ========================================
+# 7. GET ACTION HISTORY
 # ========================================
 @control_bp.route('/control/actions/history', methods=['GET'])
 def get_action_history():
@@ -468,11 +817,15 @@ def get_action_history():
     
     Query Parameters:
         limit (int): Số lượng actions trả về (default: 50)
-        offset (int): Vị trí bắt đầu (default: 0)
+        offset (int): Vị trí bắt đầu (default: 0, bỏ qua nếu có cursor)
+        cursor (str): Cursor của trang tiếp theo (lấy từ 'next_cursor')
         status (str): Filter theo status (SUCCESS, FAILED, PENDING)
+        target (str): Filter theo thiết bị/link (vd: h1, h1-s1)
+        type (str): Filter theo loại hành động (vd: TOGGLE_DEVICE)
     
     Example Request:
         GET /api/control/actions/history?limit=10&status=FAILED
+        GET /api/control/actions/history?limit=10&cursor=MjAyNS0wMS0xMVQx...
     
     Response (200):
         {
@@ -480,6 +833,7 @@ def get_action_history():
             "total": 123,
             "limit": 10,
             "offset": 0,
+            "next_cursor": "MjAyNS0wMS0xMVQx..." (null nếu hết),
             "actions": [...]
         }
     """
@@ -487,7 +841,10 @@ def get_action_history():
         # Parse query parameters
         limit = int(request.args.get('limit', 50))
         offset = int(request.args.get('offset', 0))
+        cursor = request.args.get('cursor')
         status_filter = request.args.get('status')  # SUCCESS, FAILED, PENDING
+        target = request.args.get('target')
+        action_type = request.args.get('type')
         
         # Validate limit (tránh request quá lớn)
         if limit > 200:
@@ -496,21 +853,32 @@ def get_action_history():
         if limit < 1:
             limit = 1
         
+        if offset < 0:
+            offset = 0
+        
         # Lấy history từ ActionLogger
-        history = action_logger_service.get_history(
+        page = action_logger_service.get_history_page(
             limit=limit,
             offset=offset,
-            status_filter=status_filter
+            status_filter=status_filter,
+            cursor=cursor,
+            target=target,
+            action_type=action_type
         )
         
-        total = action_logger_service.get_total_count(status_filter)
+        total = action_logger_service.get_total_count(
+            status_filter,
+            target=target,
+            action_type=action_type
+        )
         
         return jsonify({
             "status": "success",
             "total": total,
             "limit": limit,
-            "offset": offset,
-            "actions": history
+            "offset": 0 if cursor else offset,
+            "next_cursor": page['next_cursor'],
+            "actions": page['actions']
         })
     
     except ValueError as e:
@@ -530,7 +898,7 @@ def get_action_history():
 
 
 # ========================================
-# 6. HEALTH CHECK
+# 8. HEALTH CHECK
 # ========================================
 @control_bp.route('/control/health', methods=['GET'])
 def control_health():
@@ -545,7 +913,114 @@ def control_health():
                 "total_actions": 123,
                 "pending_actions": 5,
                 "success_actions": 100,
-                "failed_actions": 18
+                "failed_actions": 18,
+                "coalesced_actions": 40
+            },
+            "emulator": {
+                "executor": {
+                    "queue_depth": 0,
+                    "in_flight": 1,
+                    "exec_ms_avg": 420.5,
+                    "timeouts": 0,
+                    ...
+                },
+                "collectors": {
+                    "workers": 4,
+                    "alive": 4,
+                    "last_ms": 3.4,
+                    "worker_ms_max": 2.9,
+                    "timeouts": 0,
+                    "respawns": 0
+                },
+                "transport": {
+                    "seq": 1842,
+                    "window": 3.4,
+                    "max_window": 4,
+                    "in_flight": 1,
+                    "acked": 1838,
+                    "lost": 2,
+                    "deferred": 5,
+                    "rtt_ms": 12.7,
+                    "backend_gaps": 0,
+                    ...
+                },
+                "ingest": {
+                    "received": 1840,
+                    "gaps": 0,
+                    "missing_batches": 0,
+                    "duplicates": 0,
+                    "unstored": 3,
+                    "lag_ms": 41.5,
+                    "lag_ms_max": 380.2,
+                    "replayed": 120,
+                    "replay_rejected": 0,
+                    "sources": {"ingest:10.0.0.5:41402": 1842},
+                    "listener": {
+                        "listen": "tcp://0.0.0.0:5001",
+                        "clients": 1,
+                        "queue_depth": 0,
+                        "frames": 1962,
+                        "decode_ms": 0.86,
+                        "apply_ms": 0.68,
+                        ...
+                    }
+                },
+                "spool": {
+                    "segments": 1,
+                    "bytes": 48211,
+                    "pending": 35,
+                    "replaying": true,
+                    "spooled": 155,
+                    "replayed": 120,
+                    "dropped_records": 0,
+                    ...
+                },
+                "delta": {
+                    "base": 12,
+                    "keyframes": 12,
+                    "deltas": 348,
+                    "resync_requests": 1,
+                    "last_sent": 37,
+                    "last_suppressed": 1466,
+                    "roster": {"hosts": 500, "links": 540, "switches": 40}
+                },
+                "bringup": {
+                    "mode": "fast",
+                    "nodes_ms": 2100.4,
+                    "veth_ms": 310.2,
+                    ...
+                    "total_ms": 4820.9
+                },
+                "affinity": {
+                    "enabled": true,
+                    "cpus": 32,
+                    "partitions": {"collector": "15,31", "ovs": "0-3,16-19", "hosts": "4-14,20-30"},
+                    "pinned": {"collector_threads": 9, "ovs_threads": 41, "hosts": 64, ...},
+                    "cgroup_hosts": [],
+                    "errors": []
+                },
+                "fidelity": {
+                    "alarm": false,
+                    "links_evaluated": 48,
+                    "links_underdelivering": 2,
+                    "expected_mbps": 812.4,
+                    "measured_mbps": 790.1,
+                    "delivery_ratio": 0.973,
+                    "worst_links": [...]
+                },
+                "self_monitor": {
+                    "level": "degraded",
+                    "reasons": ["steal=7.2≥5.0"],
+                    "degraded_since": 1736612345.6,
+                    "cpu_busy": 71.4,
+                    "steal": 7.2,
+                    "softirq": 9.8,
+                    "run_queue": 0.9,
+                    "overrun": 0.41,
+                    "traffic_scale": 0.5,
+                    "sync_interval": 1.5,
+                    "probe_budget": 5
+                }
             }
         }
     """
@@ -554,13 +1029,18 @@ def control_health():
             "total_actions": action_logger_service.get_total_count(),
             "pending_actions": action_logger_service.get_total_count('PENDING'),
             "success_actions": action_logger_service.get_total_count('SUCCESS'),
-            "failed_actions": action_logger_service.get_total_count('FAILED')
+            "failed_actions": action_logger_service.get_total_count('FAILED'),
+            "coalesced_actions": action_logger_service.get_total_count('COALESCED')
         }
         
+        with data_lock:
+            emulator = dict(digital_twin.emulator_stats)
+        
         return jsonify({
             "status": "healthy",
             "message": "Control API is operational",
-            "statistics": stats
+            "statistics": stats,
+            "emulator": emulator
         })
     
     except Exception as e:
@@ -1,13 +1,47 @@
 
 from flask import Blueprint, jsonify, request
 import json
-from app.extensions import digital_twin, socketio
+import time
+from app.extensions import digital_twin, socketio, data_lock
 from app.utils.logger import get_logger
+from app.services.telemetry_codec import telemetry_decoder
 
 logger = get_logger()
 
 topology_bp = Blueprint('topology', __name__)
 
+def _broadcast_initial_state():
+    """Gửi snapshot mới cho tất cả client (sau init / diff topology)"""
+    try:
+        # Telemetry áp dụng vào twin trong native thread (offload) → đọc snapshot trong data_lock
+        with data_lock:
+            snapshot = digital_twin.get_network_snapshot()
+
+        # ✅ FIX: FORCE TẤT CẢ NODES VỀ STATUS 'UP' KHI KHỞI ĐỘNG
+        for node in snapshot['graph_data']['nodes']:
+            if 'details' in node and 'status' in node['details']:
+                # Force status về 'up' nếu không phải 'offline'
+                if node['details']['status'] != 'offline':
+                    node['details']['status'] = 'up'
+
+                # Force group đúng
+                if node['group'] and node['group'].startswith('host'):
+                    if node['details']['status'] == 'offline':
+                        node['group'] = 'host-offline'
+                    else:
+                        node['group'] = 'host'
+                elif node['group'] and node['group'].startswith('switch'):
+                    if node['details']['status'] == 'offline':
+                        node['group'] = 'switch-offline'
+                    else:
+                        node['group'] = 'switch'
+
+        socketio.emit('initial_state', snapshot)
+        logger.info(">>> Đã broadcast initial_state (forced UP status) qua WebSocket")
+    except Exception as emit_error:
+        logger.warning(f"[CẢNH BÁO] Không thể emit WebSocket: {emit_error}")
+
+
 @topology_bp.route('/init/topology', methods=['POST'])
 def init_topology():
     """API để Mininet gửi toàn bộ topology lên Backend"""
@@ -16,80 +50,124 @@ def init_topology():
         return jsonify({"status": "error", "message": "No data provided"}), 400
 
     logger.info(">>> Nhận yêu cầu khởi tạo topology từ Mininet...")
-    
-    # Xóa toàn bộ topology cũ
-    digital_twin.hosts.clear()
-    digital_twin.switches.clear()
-    digital_twin.links.clear()
 
     try:
-        # Thêm tất cả Hosts
-        for host_data in data.get('hosts', []):
-            digital_twin.add_host(
-                host_data['name'],
-                host_data['ip'],
-                host_data.get('mac', '00:00:00:00:00:00')
-            )
-
-        # Thêm tất cả Switches
-        for switch_data in data.get('switches', []):
-            digital_twin.add_switch(
-                switch_data['name'],
-                switch_data.get('dpid', '0000000000000001')
-            )
+        # Dựng + validate model mới bên ngoài, chỉ swap trong data_lock
+        # → telemetry đang chạy không bao giờ thấy twin dựng dở
+        start = time.perf_counter()
+        counts = digital_twin.load_topology(data, lock=data_lock)
+        # emulator_stats / checkpoints cũng được telemetry (offload) ghi và /control/* đọc trong data_lock
+        with data_lock:
+            if data.get('bringup'):
+                digital_twin.update_emulator_stats('bringup', data['bringup'])
+            if data.get('affinity'):
+                digital_twin.update_emulator_stats('affinity', data['affinity'])
+            if 'checkpoints' in data:
+                digital_twin.checkpoints = {cp['name']: cp for cp in data['checkpoints']}
+        # Dictionary entity cho telemetry nhị phân (không có → Mininet gửi JSON)
+        telemetry_format = 'json'
+        if data.get('telemetry_dictionary'):
+            telemetry_format = telemetry_decoder.set_dictionary(data['telemetry_dictionary'])
+        elapsed_ms = (time.perf_counter() - start) * 1000
 
-        # Thêm tất cả Links
-        for link_data in data.get('links', []):
-            bandwidth_capacity = link_data.get('bandwidth', 100)
-            if bandwidth_capacity <= 0: 
-                bandwidth_capacity = 100
-            digital_twin.add_link(
-                link_data['node1'],
-                link_data['node2'],
-                bandwidth_capacity
+        logger.info(
+            f">>> 'Mồi' topology thành công: {counts['hosts']} hosts, "
+            f"{counts['switches']} switches, {counts['links']} links ({elapsed_ms:.1f}ms)"
+        )
+        if counts['skipped']:
+            logger.warning(
+                f"[CẢNH BÁO] Init Topology: bỏ qua {len(counts['skipped'])} phần tử: "
+                f"{'; '.join(counts['skipped'][:20])}"
             )
-
-        logger.info(f">>> 'Mồi' topology thành công: {len(digital_twin.hosts)} hosts, {len(digital_twin.switches)} switches")
         
         # GỬI INITIAL STATE CHO TẤT CẢ CLIENT QUA SOCKET
-        try:
-            snapshot = digital_twin.get_network_snapshot()
-            
-            # ✅ FIX: FORCE TẤT CẢ NODES VỀ STATUS 'UP' KHI KHỞI ĐỘNG
-            for node in snapshot['graph_data']['nodes']:
-                if 'details' in node and 'status' in node['details']:
-                    # Force status về 'up' nếu không phải 'offline'
-                    if node['details']['status'] != 'offline':
-                        node['details']['status'] = 'up'
-                    
-                    # Force group đúng
-                    if node['group'] and node['group'].startswith('host'):
-                        if node['details']['status'] == 'offline':
-                            node['group'] = 'host-offline'
-                        else:
-                            node['group'] = 'host'
-                    elif node['group'] and node['group'].startswith('switch'):
-                        if node['details']['status'] == 'offline':
-                            node['group'] = 'switch-offline'
-                        else:
-                            node['group'] = 'switch'
-            
-            socketio.emit('initial_state', snapshot)
-            logger.info(">>> Đã broadcast initial_state (forced UP status) qua WebSocket")
-        except Exception as emit_error:
-            logger.warning(f"[CẢNH BÁO] Không thể emit WebSocket: {emit_error}")
+        _broadcast_initial_state()
         
-        return jsonify({"status": "success", "message": "Topology initialized"})
+        return jsonify({"status": "success", "message": "Topology initialized", "telemetry_format": telemetry_format,
+                        "skipped": counts['skipped']})
     
+    except (KeyError, ValueError) as e:
+        logger.error(f"[LỖI] Init Topology: invalid topology: {e}")
+        return jsonify({"status": "error", "message": f"Invalid topology: {e}"}), 400
     except Exception as e:
         logger.error(f"[LỖI] Init Topology: {e}")
         return jsonify({"status": "error", "message": str(e)}), 500
 
 
+@topology_bp.route('/init/topology/diff', methods=['POST'])
+def apply_topology_diff():
+    """
+    API để Mininet gửi PHẦN THAY ĐỔI topology sau reload_topology tại chỗ
+    
+    Chỉ thêm/xóa/sửa các phần tử trong diff → metrics/trạng thái của phần
+    không đổi được giữ nguyên (không clear toàn bộ như /init/topology)
+    """
+    data = request.json
+    if not data:
+        return jsonify({"status": "error", "message": "No data provided"}), 400
+
+    try:
+        with data_lock:
+            # Xóa trước (link → node), rồi mới thêm
+            for link_data in data.get('links_removed', []):
+                digital_twin.remove_link(link_data['node1'], link_data['node2'])
+            for name in data.get('hosts_removed', []):
+                digital_twin.remove_host(name)
+            for name in data.get('switches_removed', []):
+                digital_twin.remove_switch(name)
+
+            for host_data in data.get('hosts_added', []):
+                digital_twin.add_host(
+                    host_data['name'],
+                    host_data.get('ip', '').split('/')[0],
+                    host_data.get('mac', '00:00:00:00:00:00')
+                )
+            for switch_data in data.get('switches_added', []):
+                digital_twin.add_switch(
+                    switch_data['name'],
+                    switch_data.get('dpid', '0000000000000001')
+                )
+            for link_data in data.get('links_added', []):
+                bandwidth_capacity = link_data.get('bandwidth', 100)
+                if bandwidth_capacity <= 0:
+                    bandwidth_capacity = 100
+                digital_twin.add_link(link_data['node1'], link_data['node2'], bandwidth_capacity)
+
+            for host_data in data.get('hosts_updated', []):
+                host = digital_twin.get_host(host_data['name'])
+                if host:
+                    if host_data.get('ip'):
+                        host.ip_address = host_data['ip'].split('/')[0]
+                    if host_data.get('mac'):
+                        host.mac_address = host_data['mac']
+            for link_data in data.get('links_updated', []):
+                link = digital_twin.get_link(link_data['node1'], link_data['node2'])
+                if link and link_data.get('bandwidth', 0) > 0:
+                    link.bandwidth_capacity = link_data['bandwidth']
+                    link.utilization = link.get_utilization()
+
+        telemetry_format = 'json'
+        if data.get('telemetry_dictionary'):
+            telemetry_format = telemetry_decoder.set_dictionary(data['telemetry_dictionary'])
+
+        changes = {key: len(value) for key, value in data.items() if isinstance(value, list)}
+        logger.info(f">>> Áp topology diff: {changes}")
+
+        _broadcast_initial_state()
+
+        return jsonify({"status": "success", "message": "Topology diff applied", "changes": changes,
+                        "telemetry_format": telemetry_format})
+
+    except Exception as e:
+        logger.error(f"[LỖI] Topology diff: {e}")
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+
 @topology_bp.route('/network/status')
 def get_network_status():
     """API endpoint để Frontend lấy snapshot"""
-    snapshot = digital_twin.get_network_snapshot()
+    with data_lock:
+        snapshot = digital_twin.get_network_snapshot()
     return jsonify(snapshot)
 
 
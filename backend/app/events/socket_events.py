@@ -4,8 +4,17 @@ from flask import request
 from flask_socketio import emit
 from app.extensions import digital_twin, data_lock, action_logger_service  # ← Thêm import
 from app.models.action_log import ActionStatus  # ← Thêm import
+from app.models.switch import Switch
 from app.utils.logger import get_logger
 from app.services.influx_service import influx_service
+from app.services.fidelity_service import fidelity_service
+from app.services.telemetry_codec import telemetry_decoder
+from app.services.telemetry_delta import telemetry_delta
+from app.services.telemetry_ingest import ingest_tracker
+from app.services.ingest_server import ingest_server
+from app.services.dashboard_broadcaster import dashboard_broadcaster
+from app.utils.green import offload
+from datetime import datetime
 import queue
 import time
 
@@ -72,13 +81,15 @@ def register_socket_events(socketio):
         logger.info(f"Client connected: {request.sid}")
         
         # Gửi trạng thái ban đầu cho client mới
-        snapshot = digital_twin.get_network_snapshot()
+        with data_lock:
+            snapshot = digital_twin.get_network_snapshot()
         emit('initial_state', snapshot)
 
     @socketio.on('disconnect')
     def handle_disconnect():
         """Xử lý khi client ngắt kết nối"""
         logger.info(f"Client disconnected: {request.sid}")
+        ingest_tracker.forget(request.sid)
     # ========================================
     # ✅ FIX: THÊM HANDLER CHO SWITCH_UPDATED VÀ HOST_UPDATED
     # ========================================
@@ -138,185 +149,364 @@ def register_socket_events(socketio):
 
     @socketio.on('mininet_telemetry')
     def handle_mininet_telemetry(data):
-        # --- A. Đẩy data vào queue (với timeout) ---
+        """Telemetry JSON (định dạng mặc định / fallback)"""
+        _apply_telemetry(data, request.sid, emit)
+
+    @socketio.on('mininet_telemetry_bin')
+    def handle_mininet_telemetry_bin(frame):
+        """
+        Telemetry nhị phân dạng cột (services/telemetry_codec.py)
+        Không giải mã được (Backend restart mất dictionary, epoch lạ...) → yêu cầu Mininet quay về JSON
+        """
         try:
-            # Chỉ chờ 0.1 giây, nếu queue đầy thì drop data
-            telemetry_queue.put(data, block=True, timeout=0.1)
+            data = telemetry_decoder.decode(frame)
+        except (ValueError, TypeError) as e:
+            logger.warning(f"[TELEMETRY] Cannot decode binary telemetry: {e} → requesting JSON")
+            emit('telemetry_format', {'format': 'json', 'reason': str(e)})
+            return
+        _apply_telemetry(data, request.sid, emit)
+
+    @socketio.on('mininet_telemetry_replay')
+    def handle_mininet_telemetry_replay(data):
+        """
+        Batch LỊCH SỬ từ spool của Mininet (ghi lúc mất kết nối, mininet_twin/services/telemetry_spool.py)
+        Chỉ ghi InfluxDB theo timestamp gốc: KHÔNG cập nhật Digital Twin, KHÔNG broadcast live
+
+        Returns:
+            dict: Ack cho sio.call phía Mininet ({'stored': False} → Mininet lùi lại rồi gửi lại)
+        """
+        return {'stored': _store_replay(data)}
+
+    def _store_replay(data):
+        """Đưa batch lịch sử vào queue ghi InfluxDB; False nếu queue vẫn đầy"""
+        data['historical'] = True
+        try:
+            # Chờ lâu hơn batch live: Mininet đã giới hạn tốc độ phát lại và chờ ack
+            telemetry_queue.put(data, block=True, timeout=1.0)
+            stored = True
         except queue.Full:
-            # Queue đầy → Không ghi được vào DB → Log cảnh báo
-            logger.warning("⚠️ QUEUE ĐẦY! Đã bỏ qua 1 batch dữ liệu để tránh tràn RAM")
-            # Không crash, tiếp tục xử lý bình thường
+            stored = False
+        ingest_tracker.record_replay(stored)
+        return stored
+
+    def _link_of(l_data):
+        """Link của 1 entry telemetry ('nodes' có sẵn khi đi qua codec nhị phân)"""
+        nodes = l_data.get('nodes') or l_data['id'].split('-')
+        if len(nodes) != 2:
+            return None
+        return digital_twin.get_link(nodes[0], nodes[1])
+
+    def _fill_unchanged(data, unchanged):
+        """
+        Batch để ghi InfluxDB: batch delta + entity không đổi lấy giá trị cuối trong twin
+
+        ⚠️ Phải gọi trong data_lock, SAU khi đã áp dụng batch vào twin
+
+        Returns:
+            dict: Chính data nếu không có gì để bù, ngược lại bản sao đã bù
+        """
+        if not any(unchanged.values()):
+            return data
         
-        with data_lock:
-            batch_timestamp = data.get('timestamp')
-            
-            # --- B. Cập nhật Digital Twin (từ raw data) ---
-            # ========================================
-            # ✅ FIX: XỬ LÝ HOST ĐÚNG LOGIC
-            # ========================================
-            for h_data in data.get('hosts', []):
-                host = digital_twin.get_host(h_data['name'])
-                if host:
-                    # CASE 1: Mininet gửi rõ ràng status=offline
-                    if 'status' in h_data and h_data['status'] == 'offline':
-                        was_up = (host.status == 'up')
-                        host.set_status('offline')
-                        
-                        # Broadcast ngay lập tức nếu status thay đổi
-                        if was_up:
-                            socketio.emit('host_updated', host.to_json())
-                            logger.info(f"🔴 Host {host.name} → OFFLINE (immediate broadcast)")
+        hosts = list(data.get('hosts', []))
+        for entry in unchanged['hosts']:
+            host = digital_twin.get_host(entry['name'])
+            if not host:
+                continue
+            if host.status == 'offline':
+                hosts.append({'name': host.name, 'cpu': 0.0, 'mem': 0.0, 'status': 'offline'})
+            else:
+                hosts.append({'name': host.name, 'cpu': host.cpu_utilization, 'mem': host.memory_usage})
+        
+        links = list(data.get('links', []))
+        for entry in unchanged['links']:
+            link = _link_of(entry)
+            if link:
+                links.append({'id': entry['id'], 'bw': link.current_throughput})
+        
+        latency = list(data.get('latency', []))
+        for entry in unchanged.get('latency', []):
+            path = digital_twin.paths.get(entry['pair'])
+            if path:
+                latency.append({'pair': entry['pair'], 'latency': path['latency'],
+                                'loss': path['packet_loss'], 'jitter': path['jitter']})
+        
+        # Switch không được ghi InfluxDB → không cần bù
+        return {**data, 'hosts': hosts, 'links': links, 'latency': latency}
+
+    def _apply_to_twin(data):
+        """
+        Áp dụng 1 batch vào Digital Twin - phần CPU-bound của _apply_telemetry
+
+        ⚠️ Chạy qua offload() (native thread khi chạy eventlet) trong lúc greenthread gọi
+        giữ data_lock → KHÔNG emit / logger / ghi queue ở đây (app/utils/green.py):
+        trả về để _apply_telemetry làm tiếp trên hub
+
+        Returns:
+            dict: {'events': [(event, payload, log)], 'warnings': [log], 'db_batch', 'need_keyframe',
+                   'fidelity': (report, transition), 'emulator': (state, previous_level)}
+        """
+        # Chuyển trạng thái cần broadcast ngay: (event, payload, log)
+        events = []
+        # Cảnh báo chỉ log (không emit), log trên hub sau offload
+        warnings = []
+        batch_timestamp = data.get('timestamp')
+        
+        # --- B. Cập nhật Digital Twin (từ raw data) ---
+        # ========================================
+        # ✅ FIX: XỬ LÝ HOST ĐÚNG LOGIC
+        # ========================================
+        for h_data in data.get('hosts', []):
+            host = digital_twin.get_host(h_data['name'])
+            if host:
+                # CASE 1: Mininet gửi rõ ràng status=offline
+                if 'status' in h_data and h_data['status'] == 'offline':
+                    was_up = (host.status == 'up')
+                    host.set_status('offline')
                     
-                    # CASE 2: Mininet KHÔNG gửi status=offline → Host đang UP
-                    # ← ĐÂY LÀ NHÁNH QUAN TRỌNG NHẤT
-                    else:
-                        was_offline = (host.status == 'offline')
-                        
-                        # ✅ FIX: Set UP và cập nhật metrics
-                        host.set_status('up')
-                        host.update_resource_metrics(h_data['cpu'], h_data['mem'], timestamp=batch_timestamp)
-                        
-                        # ✅ FIX: Nếu host vừa hồi sinh từ offline → Broadcast ngay
-                        if was_offline:
-                            socketio.emit('host_updated', host.to_json())
-                            logger.info(f"🟢 Host {host.name} → UP (recovered from offline)")
-            
-            for l_data in data.get('links', []):
-                parts = l_data['id'].split('-')
-                if len(parts) == 2:
-                    link = digital_twin.get_link(parts[0], parts[1])
-                    if link:
-                        previous_status = link.status                       
-
-                        # Cập nhật metrics (hàm này đã tự set status)
-                        link.update_performance_metrics(
-                            l_data['bw'], 0, timestamp=batch_timestamp
-                        )
-                        
-                        # ========================================
-                        # [QUAN TRỌNG] Phát hiện thay đổi status
-                        # ========================================
-                        if previous_status != link.status:
-                            # Status thay đổi → Broadcast ngay lập tức
-                            logger.info(f"🔄 Link {link.id} status: {previous_status} → {link.status}")
-                            socketio.emit('link_updated', link.to_json())
-
-            # ========================================
-            # ✅ FIX: XỬ LÝ SWITCH VỚI STATUS CHECKING V2
-            # ========================================
-            for s_data in data.get('switches', []):
-                # Parse s_data (có thể là string hoặc dict)
-                if isinstance(s_data, str):
-                    s_name = s_data
-                    s_ports = {}
-                    s_status = None  # ← Không có status (dữ liệu cũ)
-                else:
-                    s_name = s_data.get('name')
-                    s_ports = s_data.get('ports', {})
-                    s_status = s_data.get('status')  # ← Lấy status từ Mininet
+                    # Broadcast ngay lập tức nếu status thay đổi
+                    if was_up:
+                        events.append(('host_updated', host.to_json(),
+                                       f"🔴 Host {host.name} → OFFLINE (immediate broadcast)"))
                 
-                switch = digital_twin.get_switch(s_name)
-                if switch:
-                    previous_status = switch.status  # ← Lưu trạng thái cũ
-                    
-                    # ========================================
-                    # ✅ FIX: LOGIC XỬ LÝ STATUS
-                    # ========================================
-                    if s_status == 'offline':
-                        # CASE 1: Mininet gửi rõ ràng offline
-                        switch.set_status('offline')
-                        
-                        # Broadcast nếu status thay đổi
-                        if previous_status != 'offline':
-                            socketio.emit('switch_updated', switch.to_json())
-                            logger.info(f"🔴 Switch {s_name} → OFFLINE (from Mininet)")
+                # CASE 2: Mininet KHÔNG gửi status=offline → Host đang UP
+                # ← ĐÂY LÀ NHÁNH QUAN TRỌNG NHẤT
+                else:
+                    was_offline = (host.status == 'offline')
                     
-                    elif s_status == 'up':
-                        # CASE 2: Mininet gửi rõ ràng up
-                        was_offline = (previous_status == 'offline')
-                        
-                        switch.set_status('up')
-                        switch.heartbeat(timestamp=batch_timestamp)
-                        if s_ports:
-                            switch.update_port_stats(s_ports, timestamp=batch_timestamp)
-                        
-                        # Broadcast nếu vừa hồi sinh
-                        if was_offline:
-                            socketio.emit('switch_updated', switch.to_json())
-                            logger.info(f"🟢 Switch {s_name} → UP (recovered from offline)")
+                    # ✅ FIX: Set UP và cập nhật metrics
+                    host.set_status('up')
+                    host.update_resource_metrics(h_data['cpu'], h_data['mem'], timestamp=batch_timestamp)
                     
-                    else:
-                        # CASE 3: Không có status (dữ liệu cũ) → Chỉ heartbeat
-                        # ← KHÔNG đổi status, giữ nguyên
-                        switch.heartbeat(timestamp=batch_timestamp)
-                        if s_ports:
-                            switch.update_port_stats(s_ports, timestamp=batch_timestamp)
-                        
-                        logger.debug(f"[BATCH] Switch {s_name} heartbeat (status unchanged: {switch.status})")
-            
-            for item in data.get('latency', []):
-                pair_id = item.get('pair')
-                latency_val = item.get('latency')
-                loss_val = item.get('loss', 0.0)
-                jitter_val = item.get('jitter', 0.0)
+                    # ✅ FIX: Nếu host vừa hồi sinh từ offline → Broadcast ngay
+                    if was_offline:
+                        events.append(('host_updated', host.to_json(),
+                                       f"🟢 Host {host.name} → UP (recovered from offline)"))
+        
+        for l_data in data.get('links', []):
+            link = _link_of(l_data)
+            if link:
+                previous_status = link.status                       
+
+                # Cập nhật metrics (hàm này đã tự set status)
+                link.update_performance_metrics(
+                    l_data['bw'], 0, timestamp=batch_timestamp
+                )
                 
-                if pair_id:
-                    parts = pair_id.split('-')
-                    if len(parts) == 2:
-                        src, dst = parts[0], parts[1]
-                        digital_twin.update_path_metrics(src, dst, latency_val, loss_val, jitter_val)
+                # ========================================
+                # [QUAN TRỌNG] Phát hiện thay đổi status
+                # ========================================
+                if previous_status != link.status:
+                    # Status thay đổi → Broadcast ngay lập tức
+                    events.append(('link_updated', link.to_json(),
+                                   f"🔄 Link {link.id} status: {previous_status} → {link.status}"))
+
+        # ========================================
+        # ✅ FIX: XỬ LÝ SWITCH VỚI STATUS CHECKING V2
+        # ========================================
+        for s_data in data.get('switches', []):
+            # Parse s_data (có thể là string hoặc dict)
+            if isinstance(s_data, str):
+                s_name = s_data
+                s_ports = {}
+                s_status = None  # ← Không có status (dữ liệu cũ)
+            else:
+                s_name = s_data.get('name')
+                s_ports = s_data.get('ports', {})
+                s_status = s_data.get('status')  # ← Lấy status từ Mininet
             
-            # --- C. Tạo SNAPSHOT MỚI từ Digital Twin ---
-            # Đây là cách CHUẨN NHẤT: Tạo representation mới từ state hiện tại
-            frontend_data = {
-                'timestamp': batch_timestamp,
-                'hosts': [
-                    {
-                        'name': h_data['name'],
-                        'cpu': h_data['cpu'],
-                        'mem': h_data['mem'],
-                        'status': digital_twin.get_host(h_data['name']).status
-                            if digital_twin.get_host(h_data['name']) else 'unknown'
-                    }
-                    for h_data in data.get('hosts', [])
-                ],
-                'links': [
-                    {
-                        'id': l_data['id'],
-                        'bw': l_data['bw'],
-                        'status': digital_twin.get_link(
-                            l_data['id'].split('-')[0],
-                            l_data['id'].split('-')[1]
-                        ).status if len(l_data['id'].split('-')) == 2
-                            and digital_twin.get_link(
-                                l_data['id'].split('-')[0],
-                                l_data['id'].split('-')[1]
-                            ) else 'unknown'
-                    }
-                    for l_data in data.get('links', [])
-                ],
+            switch = digital_twin.get_switch(s_name)
+            if switch:
+                previous_status = switch.status  # ← Lưu trạng thái cũ
+                previous_dropped = switch.total_dropped
+                
                 # ========================================
-                # ✅ FIX: BUILD SWITCHES VỚI STATUS THẬT
+                # ✅ FIX: LOGIC XỬ LÝ STATUS
                 # ========================================
-                'switches': [
-                    {
-                        'name': s_data if isinstance(s_data, str) else s_data.get('name'),
-                        'status': digital_twin.get_switch(
-                            s_data if isinstance(s_data, str) else s_data.get('name')
-                        ).status if digital_twin.get_switch(
-                            s_data if isinstance(s_data, str) else s_data.get('name')
-                        ) else 'unknown',
-                        'ports': s_data.get('ports', {}) if isinstance(s_data, dict) else {}
-                    }
-                    for s_data in data.get('switches', [])
-                ],
-                'latency': data.get('latency', [])     # Giữ nguyên
-            }
+                if s_status == 'offline':
+                    # CASE 1: Mininet gửi rõ ràng offline
+                    switch.set_status('offline')
+                    
+                    # Broadcast nếu status thay đổi
+                    if previous_status != 'offline':
+                        events.append(('switch_updated', switch.to_json(),
+                                       f"🔴 Switch {s_name} → OFFLINE (from Mininet)"))
+                
+                elif s_status == 'up':
+                    # CASE 2: Mininet gửi rõ ràng up
+                    was_offline = (previous_status == 'offline')
+                    
+                    switch.set_status('up')
+                    switch.heartbeat(timestamp=batch_timestamp)
+                    if s_ports:
+                        switch.update_port_stats(s_ports, timestamp=batch_timestamp)
+                    
+                    # Broadcast nếu vừa hồi sinh
+                    if was_offline:
+                        events.append(('switch_updated', switch.to_json(),
+                                       f"🟢 Switch {s_name} → UP (recovered from offline)"))
+                
+                else:
+                    # CASE 3: Không có status (dữ liệu cũ) → Chỉ heartbeat
+                    # ← KHÔNG đổi status, giữ nguyên
+                    switch.heartbeat(timestamp=batch_timestamp)
+                    if s_ports:
+                        switch.update_port_stats(s_ports, timestamp=batch_timestamp)
+                
+                # Chỉ cảnh báo lúc vượt ngưỡng (counter cộng dồn → không spam mỗi batch)
+                if previous_dropped <= Switch.DROP_WARNING_THRESHOLD < switch.total_dropped:
+                    warnings.append(f"[Cảnh báo] Switch {s_name} đang bị rớt gói: {switch.total_dropped}")
         
-        # --- D. Emit snapshot mới ---
-        socketio.emit('network_batch_update', frontend_data)
+        for item in data.get('latency', []):
+            pair_id = item.get('pair')
+            latency_val = item.get('latency')
+            loss_val = item.get('loss', 0.0)
+            jitter_val = item.get('jitter', 0.0)
+            
+            if pair_id:
+                parts = pair_id.split('-')
+                if len(parts) == 2:
+                    src, dst = parts[0], parts[1]
+                    digital_twin.update_path_metrics(src, dst, latency_val, loss_val, jitter_val)
+        
+        # Delta telemetry: entity KHÔNG ĐỔI (thuộc roster keyframe, không 'missing')
+        # chỉ làm mới last_update_time → reaper không đánh offline
+        unchanged, need_keyframe = telemetry_delta.resolve(data)
+        # Batch ghi InfluxDB phải ĐẦY ĐỦ như khi không bật delta (không thì lịch sử
+        # thủng, link rảnh chỉ có 1 điểm 0) → bù entity không đổi bằng giá trị trong twin
+        db_batch = _fill_unchanged(data, unchanged)
+        if data.get('delta'):
+            heartbeat_time = datetime.fromtimestamp(batch_timestamp) if batch_timestamp else datetime.now()
+            for entry in unchanged['hosts']:
+                host = digital_twin.get_host(entry['name'])
+                if host:
+                    host.last_update_time = heartbeat_time
+            for entry in unchanged['switches']:
+                switch = digital_twin.get_switch(entry['name'])
+                if switch:
+                    switch.last_update_time = heartbeat_time
+            for entry in unchanged['links']:
+                link = _link_of(entry)
+                if link:
+                    link.last_update_time = heartbeat_time
+            digital_twin.update_emulator_stats('delta', telemetry_delta.metrics())
+        
+        # Metrics của CommandEngine bên Mininet
+        if data.get('executor'):
+            digital_twin.update_emulator_stats('executor', data['executor'])
+        
+        # Collector worker pool (COLLECTOR_WORKERS > 0)
+        if data.get('collectors'):
+            digital_twin.update_emulator_stats('collectors', data['collectors'])
+        
+        # Spool đĩa phía Mininet (đang chờ / đang phát lại)
+        if data.get('spool'):
+            digital_twin.update_emulator_stats('spool', data['spool'])
+        
+        # Cửa sổ gửi / RTT phía Mininet (services/flow_control.py)
+        if data.get('transport'):
+            digital_twin.update_emulator_stats('transport', data['transport'])
+        
+        # Self-monitor của máy emulator (cấp giảm tải + CPU steal/softirq/run-queue)
+        emulator_state, emulator_transition = data.get('emulator'), None
+        if emulator_state:
+            previous = digital_twin.emulator_stats.get('self_monitor') or {}
+            if previous.get('level', 'normal') != emulator_state.get('level'):
+                emulator_transition = previous.get('level', 'normal')
+            digital_twin.update_emulator_stats('self_monitor', emulator_state)
+        
+        # Expected (ledger traffic) vs measured từng link
+        fidelity_report, fidelity_transition = None, None
+        if data.get('traffic'):
+            fidelity_report, fidelity_transition = fidelity_service.evaluate(
+                digital_twin,
+                data['traffic'],
+                # Từ twin (không phải batch): link không đổi bị delta lược bỏ khỏi batch
+                {link_id: link.current_throughput for link_id, link in digital_twin.links.items()},
+                timestamp=batch_timestamp
+            )
+            digital_twin.update_emulator_stats('fidelity', fidelity_report)
+        
+        digital_twin.update_emulator_stats('ingest', {
+            **ingest_tracker.metrics(),
+            'listener': ingest_server.metrics() if ingest_server.listening else None,
+            'dashboard': dashboard_broadcaster.metrics()
+        })
+        
+        return {
+            'events': events,
+            'warnings': warnings,
+            'db_batch': db_batch,
+            'need_keyframe': need_keyframe,
+            'fidelity': (fidelity_report, fidelity_transition),
+            'emulator': (emulator_state, emulator_transition)
+        }
+
+    def _apply_telemetry(data, source, reply):
+        """
+        Áp dụng 1 batch telemetry vào Digital Twin + báo dashboard
+
+        Args:
+            source (str): Nguồn gửi (sid Socket.IO / kết nối ingest) để theo dõi seq
+            reply (callable): reply(event, payload) gửi về ĐÚNG nguồn đó
+                              (emit của Socket.IO hoặc IngestConnection.send)
+        """
+        # Seq của batch → đếm batch bị thiếu / trùng theo từng nguồn gửi
+        ingest_tracker.observe(source, data.get('seq'))
+        
+        # Greenthread này chỉ giữ data_lock và chờ: áp dụng batch chạy trong native thread
+        # → hub vẫn phục vụ dashboard / REST, greenthread khác cần data_lock thì chờ kiểu green
+        with data_lock:
+            outcome = offload(_apply_to_twin, data)
+        
+        # Chuyển trạng thái → broadcast ngay (không chờ snapshot định kỳ)
+        for event, payload, message in outcome['events']:
+            socketio.emit(event, payload)
+            logger.info(message)
+        for message in outcome['warnings']:
+            logger.warning(message)
+        
+        # --- A. Đẩy batch đầy đủ vào queue ghi InfluxDB (với timeout, ngoài data_lock) ---
+        stored = True
+        try:
+            # Chỉ chờ 0.1 giây, nếu queue đầy thì drop data
+            telemetry_queue.put(outcome['db_batch'], block=True, timeout=0.1)
+        except queue.Full:
+            # Queue đầy → Không ghi được vào DB → Log cảnh báo
+            logger.warning("⚠️ QUEUE ĐẦY! Đã bỏ qua 1 batch dữ liệu để tránh tràn RAM")
+            # Không crash, tiếp tục xử lý bình thường; ack báo stored=False cho Mininet
+            stored = False
         
-        logger.info(f"Đã nhận telemetry từ Mininet: {len(frontend_data['hosts'])} hosts")
+        # Đã áp dụng xong vào Digital Twin → ack (seq, lag end-to-end, gap)
+        ack = ingest_tracker.complete(
+            source, data, stored=stored, queue_ratio=telemetry_queue.qsize() / MAX_QUEUE_SIZE
+        )
+        
+        # Ack về đúng Mininet đã gửi → bên gửi điều chỉnh cửa sổ AIMD
+        if ack:
+            reply('telemetry_ack', ack)
+        
+        # --- C. Dashboard: chỉ đánh dấu entity, snapshot phát theo chu kỳ cố định ---
+        fidelity_report, fidelity_transition = outcome['fidelity']
+        emulator_state, emulator_transition = outcome['emulator']
+        dashboard_broadcaster.publish(data, fidelity=fidelity_report, emulator=emulator_state)
+        
+        # Không có roster cho batch delta → yêu cầu Mininet gửi keyframe
+        need_keyframe = outcome['need_keyframe']
+        if need_keyframe:
+            logger.info(f"[TELEMETRY] Requesting keyframe: {need_keyframe}")
+            reply('telemetry_keyframe', {'reason': need_keyframe})
+        
+        # Alarm chỉ emit khi bật / tắt (không spam mỗi tick)
+        if fidelity_transition:
+            fidelity_service.log_transition(fidelity_report, fidelity_transition)
+            socketio.emit('fidelity_alarm', {**fidelity_report, 'transition': fidelity_transition})
+        
+        # Cấp giảm tải đổi → dashboard đánh dấu giai đoạn fidelity bị giảm
+        if emulator_transition:
+            socketio.emit('emulator_load', {**emulator_state, 'previous_level': emulator_transition})
+        
+        logger.info(f"Đã nhận telemetry từ Mininet: {len(data.get('hosts', []))} hosts")
     
     # ========================================
     # [MỚI] XỬ LÝ COMMAND RESULT TỪ MININET
@@ -351,7 +541,19 @@ def register_socket_events(socketio):
             logger.warning("[CONTROL] Command result missing action_id")
             return
         
-        # Cập nhật Action Log
+        # Lệnh bulk: chốt các child action chưa nhận được command_progress
+        if command == 'bulk' and result_data:
+            _finalize_bulk_items(result_data.get('items', []))
+        
+        # Danh sách checkpoint bên Mininet thay đổi (/control/checkpoints đọc trong data_lock)
+        if success and command == 'checkpoint_create' and result_data:
+            with data_lock:
+                digital_twin.checkpoints[result_data['name']] = result_data
+        elif success and command == 'checkpoint_delete' and result_data:
+            with data_lock:
+                digital_twin.checkpoints.pop(result_data['name'], None)
+        
+        # Cập nhật Action Log (tra cứu O(1) qua hash index của ActionLogger)
         if success:
             action_logger_service.update_action(
                 action_id=action_id,
@@ -379,6 +581,68 @@ def register_socket_events(socketio):
             'result': result_data
         })
     # ========================================
+    # TIẾN ĐỘ TỪNG ITEM CỦA LỆNH BULK
+    # ========================================
+    def _apply_bulk_item(item):
+        """Cập nhật child action theo kết quả 1 item (bỏ qua nếu đã chốt)"""
+        child_id = item.get('action_id')
+        if not child_id:
+            return None
+        
+        child = action_logger_service.get_action(child_id)
+        if not child or child.status != ActionStatus.PENDING.value:
+            return None
+        
+        if item.get('success'):
+            return action_logger_service.update_action(
+                action_id=child_id,
+                status=ActionStatus.SUCCESS,
+                result_data=item.get('result')
+            )
+        return action_logger_service.update_action(
+            action_id=child_id,
+            status=ActionStatus.FAILED,
+            error_message=item.get('error')
+        )
+    
+    def _finalize_bulk_items(items):
+        for item in items:
+            _apply_bulk_item(item)
+    
+    @socketio.on('command_progress')
+    def handle_command_progress(data):
+        """
+        Nhận kết quả từng item của lệnh bulk (Mininet stream về khi item chạy xong)
+        
+        Args:
+            data (dict): {
+                'action_id': 'act_...',          # parent (bulk) action
+                'item': {
+                    'action_id': 'act_...',      # child action
+                    'command': 'update_link_conditions',
+                    'success': True/False,
+                    'error': '...',
+                    'result': {...}
+                },
+                'completed': 3,
+                'total': 10
+            }
+        """
+        parent_id = data.get('action_id')
+        item = data.get('item') or {}
+        
+        _apply_bulk_item(item)
+        
+        socketio.emit('bulk_progress', {
+            'action_id': parent_id,
+            'item_action_id': item.get('action_id'),
+            'success': item.get('success', False),
+            'error': item.get('error'),
+            'completed': data.get('completed'),
+            'total': data.get('total')
+        })
+    
+    # ========================================
     # ✅ THÊM: HANDLER CHO LINK_UPDATED TỪ MININET
     # ========================================
     @socketio.on('link_updated')
@@ -428,4 +692,7 @@ def register_socket_events(socketio):
                 logger.warning(f"[EVENT] Link {link_id} not found in Digital Twin")
 
 
-    
\ No newline at end of file
+    
+
+    # Kênh ingest riêng (INGEST_LISTEN) dùng chung đường xử lý với các event ở trên
+    ingest_server.bind(apply_telemetry=_apply_telemetry, store_replay=_store_replay)
@@ -1,13 +1,19 @@
+import os
 from flask_socketio import SocketIO
 from threading import Lock
 
 
 from app.models.network_model import NetworkModel
 from app.services.action_logger import action_logger_service
+from app.services.command_coalescer import CommandCoalescer
+# async_mode PHẢI khớp với run.py (eventlet.monkey_patch) → 1 nguồn cấu hình duy nhất,
+# dùng cả ở đây lẫn socketio.init_app (app/__init__.py)
+SOCKETIO_ASYNC_MODE = os.getenv('SOCKETIO_ASYNC_MODE', 'eventlet')
+
 #  Khởi tạo SocketIO (Chưa gắn app, chỉ tạo object)
 socketio = SocketIO(
     cors_allowed_origins="*", 
-    async_mode='threading',
+    async_mode=SOCKETIO_ASYNC_MODE,
     logger=True,
     engineio_logger=True
 )
@@ -16,4 +22,10 @@ socketio = SocketIO(
 digital_twin = NetworkModel("Main Digital Twin")
 
 # Khởi tạo Lock
-data_lock = Lock()
\ No newline at end of file
+data_lock = Lock()
+
+# Gộp các update liên tiếp của cùng 1 link (kéo slider) thành 1 lệnh Mininet
+link_update_coalescer = CommandCoalescer(
+    emit=lambda payload: socketio.emit('execute_command', payload),
+    on_superseded=action_logger_service.mark_coalesced
+)
\ No newline at end of file
@@ -7,9 +7,9 @@ MỤC ĐÍCH:
 - Giống như "nhật ký" ghi lại ai đã làm gì, lúc nào, thành công hay thất bại
 
 CẤU TRÚC DỮ LIỆU:
-- action_id: ID duy nhất (vd: "act_1234567890")
+- action_id: ID duy nhất, sắp xếp được theo thời gian (vd: "act_01JHB3Q4ZK8X2N6M0T9V5W7YAC")
 - timestamp: Thời gian thực hiện (ISO format)
-- action_type: Loại hành động (IMPORT_TOPOLOGY, TOGGLE_DEVICE, TOGGLE_LINK, UPDATE_LINK)
+- action_type: Loại hành động (IMPORT_TOPOLOGY, TOGGLE_DEVICE, TOGGLE_LINK, UPDATE_LINK, BULK)
 - target: Thiết bị/link bị tác động (vd: "h1", "s1-s2")
 - parameters: Thông số (dict) - vd: {"bandwidth": 50, "delay": "10ms"}
 - status: Trạng thái (SUCCESS, FAILED, PENDING)
@@ -17,17 +17,75 @@ CẤU TRÚC DỮ LIỆU:
 - user: Người thực hiện (optional - để sau này thêm authentication)
 """
 
+import os
+import threading
 import time
 from datetime import datetime
 from enum import Enum
 
 
+# ========================================
+# ACTION ID (ULID-STYLE)
+# ========================================
+# 128 bit = 48 bit timestamp (ms) + 80 bit ngẫu nhiên, mã hóa Crockford Base32 (26 ký tự)
+# - Sắp xếp theo chuỗi = sắp xếp theo thời gian tạo
+# - Nhiều action trong CÙNG 1 ms: phần ngẫu nhiên được +1 (monotonic) → không trùng
+# - Nhiều process: 80 bit ngẫu nhiên từ os.urandom → xác suất trùng không đáng kể
+
+_CROCKFORD_ALPHABET = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+_RANDOM_BITS = 80
+_RANDOM_MAX = (1 << _RANDOM_BITS) - 1
+
+_id_lock = threading.Lock()
+_last_ms = -1
+_last_random = 0
+
+
+def _encode_crockford(value, length=26):
+    chars = []
+    for _ in range(length):
+        chars.append(_CROCKFORD_ALPHABET[value & 0x1F])
+        value >>= 5
+    return "".join(reversed(chars))
+
+
+def generate_action_id():
+    """
+    Tạo action_id duy nhất, tăng dần theo thời gian (ULID monotonic)
+    
+    Returns:
+        str: vd "act_01JHB3Q4ZK8X2N6M0T9V5W7YAC"
+    """
+    global _last_ms, _last_random
+    
+    with _id_lock:
+        now_ms = int(time.time() * 1000)
+        
+        if now_ms > _last_ms:
+            _last_ms = now_ms
+            _last_random = int.from_bytes(os.urandom(10), "big")
+        else:
+            # Cùng ms (hoặc đồng hồ bị lùi) → tăng phần ngẫu nhiên để giữ thứ tự
+            _last_random += 1
+            if _last_random > _RANDOM_MAX:
+                _last_ms += 1
+                _last_random = int.from_bytes(os.urandom(10), "big")
+        
+        value = (_last_ms << _RANDOM_BITS) | _last_random
+    
+    return f"act_{_encode_crockford(value)}"
+
+
 class ActionType(Enum):
     """Các loại hành động có thể thực hiện"""
     IMPORT_TOPOLOGY = "IMPORT_TOPOLOGY"       # Nhập topology mới từ JSON
     TOGGLE_DEVICE = "TOGGLE_DEVICE"           # Bật/tắt host hoặc switch
     TOGGLE_LINK = "TOGGLE_LINK"               # Bật/tắt link
     UPDATE_LINK = "UPDATE_LINK"               # Thay đổi bandwidth/delay/loss của link
+    BULK = "BULK"                             # Nhiều thao tác trong 1 request (parent action)
+    CHECKPOINT_CREATE = "CHECKPOINT_CREATE"   # Chụp trạng thái emulation
+    CHECKPOINT_RESTORE = "CHECKPOINT_RESTORE" # Reset emulation về checkpoint
+    CHECKPOINT_DELETE = "CHECKPOINT_DELETE"   # Xóa checkpoint
 
 
 class ActionStatus(Enum):
@@ -35,6 +93,7 @@ class ActionStatus(Enum):
     PENDING = "PENDING"       # Đang chờ xử lý
     SUCCESS = "SUCCESS"       # Thành công
     FAILED = "FAILED"         # Thất bại
+    COALESCED = "COALESCED"   # Bị gộp vào action mới hơn (không gửi Mininet)
 
 
 class ActionLog:
@@ -69,7 +128,7 @@ class ActionLog:
             parameters (dict): Thông số kèm theo (vd: {"bandwidth": 50})
             user (str): Người thực hiện (optional)
         """
-        self.action_id = f"act_{int(time.time() * 1000)}"  # ID duy nhất dựa trên timestamp
+        self.action_id = generate_action_id()               # ID duy nhất (ULID, sắp xếp theo thời gian)
         self.timestamp = datetime.now().isoformat()         # Thời gian tạo (ISO 8601)
         self.action_type = action_type.value                # Loại hành động (string)
         self.target = target                                # Thiết bị/link
@@ -96,6 +155,40 @@ class ActionLog:
         self.completed_at = datetime.now().isoformat()
         self.error_message = error_message
     
+    def mark_coalesced(self, superseded_by):
+        """
+        Đánh dấu hành động đã bị gộp vào action mới hơn cùng target
+        
+        Args:
+            superseded_by (str): action_id của action mang giá trị cuối cùng
+        """
+        self.status = ActionStatus.COALESCED.value
+        self.completed_at = datetime.now().isoformat()
+        self.parameters["superseded_by"] = superseded_by
+    
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Khôi phục ActionLog từ dictionary (vd: khi đọc lại từ storage)
+        
+        Args:
+            data (dict): Dictionary có cùng format với to_dict()
+        
+        Returns:
+            ActionLog: Object đã khôi phục (giữ nguyên action_id, timestamp...)
+        """
+        action = cls.__new__(cls)
+        action.action_id = data["action_id"]
+        action.timestamp = data["timestamp"]
+        action.action_type = data["action_type"]
+        action.target = data.get("target")
+        action.parameters = data.get("parameters") or {}
+        action.status = data.get("status", ActionStatus.PENDING.value)
+        action.error_message = data.get("error_message")
+        action.user = data.get("user")
+        action.completed_at = data.get("completed_at")
+        return action
+    
     def to_dict(self):
         """
         Chuyển object thành dictionary (để gửi qua API/WebSocket)
@@ -28,8 +28,9 @@ class Host:
 
     def set_status(self, new_status):
         if new_status in ['up', 'unknown', 'offline', 'high-load']:
+            # Không print: được gọi mỗi batch telemetry trong offload (giống Link.set_status);
+            # chuyển trạng thái được log ở nơi gọi
             self.status = new_status
-            print(f"[{self.name}] Cập nhật trạng thái: {self.status}")
         else:
             print(f"[Lỗi] Trạng thái '{new_status}' không hợp lệ cho {self.name}.")
 
@@ -6,15 +6,16 @@ class Link:
     THRESHOLD_CRITICAL = 90.0 
     THROUGHPUT_DOWN_THRESHOLD = 0.1
 
-    def __init__(self, node1, node2, bandwidth_capacity):
+    def __init__(self, node1, node2, bandwidth_capacity, link_id=None):
         """
             node1 (str): Tên của thiết bị 1 
             node2 (str): Tên của thiết bị 2 
             bandwidth_capacity (float): Băng thông tối đa (dung lượng)
                                         của link (tính bằng Mbps).
+            link_id (str): ID đã tính sẵn (bulk load), mặc định tự sort tên 2 node
         """
 
-        self.id = "-".join(sorted([node1, node2]))
+        self.id = link_id or "-".join(sorted([node1, node2]))
         self.node1 = node1
         self.node2 = node2
         self.bandwidth_capacity = bandwidth_capacity  
@@ -2,8 +2,17 @@ from .host import Host
 from .switch import Switch
 from .link import Link
 import json
+from contextlib import nullcontext
 from datetime import datetime
 
+
+def make_link_id(node1_name, node2_name):
+    """ID link không phụ thuộc chiều: 'h1-s1' == 's1-h1'"""
+    if node1_name <= node2_name:
+        return f"{node1_name}-{node2_name}"
+    return f"{node2_name}-{node1_name}"
+
+
 class NetworkModel:
     """
     Là nơi lưu trữ và quản lý tất cả các đối tượng Host, Switch, và Link.
@@ -18,7 +27,16 @@ class NetworkModel:
         
         self.links = {}
 
+        # node name → set(link_id) nối tới node (tra link của 1 node O(degree))
+        self.adjacency = {}
+
         self.paths = {}
+
+        # Metrics của chính emulator (vd: 'executor' = CommandEngine bên Mininet)
+        self.emulator_stats = {}
+
+        # Checkpoint đang có bên Mininet: name → summary (CheckpointManager.summary())
+        self.checkpoints = {}
         
         print(f"Khởi tạo NetworkModel: {self.name}")
 
@@ -35,6 +53,12 @@ class NetworkModel:
             "last_updated": datetime.now().isoformat()
         }
 
+    def update_emulator_stats(self, section, stats):
+        self.emulator_stats[section] = {
+            **stats,
+            "last_updated": datetime.now().isoformat()
+        }
+
     def add_host(self, name, ip_address, mac_address):
         if name in self.hosts:
             print(f"[Lỗi] Host '{name}' đã tồn tại.")
@@ -56,7 +80,7 @@ class NetworkModel:
         return new_switch
 
     def add_link(self, node1_name, node2_name, bandwidth_capacity=100.0):
-        link_id = "-".join(sorted([node1_name, node2_name]))
+        link_id = make_link_id(node1_name, node2_name)
         if link_id  in self.links:
             print(f"[Lỗi] Link giữa '{node1_name}' và '{node2_name}' đã tồn tại.")
             return None
@@ -66,11 +90,149 @@ class NetworkModel:
             print(f"[Lỗi] Không thể tạo link. Node '{node1_name}' hoặc '{node2_name}' không tồn tại.")
             return None
 
-        new_link = Link(node1_name, node2_name, bandwidth_capacity)
+        new_link = Link(node1_name, node2_name, bandwidth_capacity, link_id)
         self.links[link_id] = new_link
+        self.adjacency.setdefault(node1_name, set()).add(link_id)
+        self.adjacency.setdefault(node2_name, set()).add(link_id)
         print(f"[{self.name}] Đã thêm Link: {link_id}")
         return new_link
 
+    def remove_link(self, node1_name, node2_name):
+        link_id = make_link_id(node1_name, node2_name)
+        link = self.links.pop(link_id, None)
+        if link:
+            self.adjacency.get(link.node1, set()).discard(link_id)
+            self.adjacency.get(link.node2, set()).discard(link_id)
+        return link
+
+    def remove_host(self, name):
+        """Xóa host + toàn bộ link nối tới host"""
+        self._remove_links_of(name)
+        return self.hosts.pop(name, None)
+
+    def remove_switch(self, name):
+        """Xóa switch + toàn bộ link nối tới switch"""
+        self._remove_links_of(name)
+        return self.switches.pop(name, None)
+
+    def _remove_links_of(self, node_name):
+        for link_id in self.adjacency.pop(node_name, set()):
+            link = self.links.pop(link_id, None)
+            if link:
+                other = link.node2 if link.node1 == node_name else link.node1
+                self.adjacency.get(other, set()).discard(link_id)
+
+    def get_links_of(self, node_name):
+        """Tất cả link nối tới 1 node (qua adjacency index)"""
+        return [self.links[lid] for lid in self.adjacency.get(node_name, ()) if lid in self.links]
+
+    # ========================================
+    # BULK LOAD: DỰNG MODEL MỚI BÊN NGOÀI → SWAP 1 LẦN
+    # ========================================
+    @staticmethod
+    def build_topology(data):
+        """
+        Dựng hosts/switches/links + adjacency MỚI từ payload /init/topology
+        (không đụng tới state đang được đọc, không print từng phần tử)
+        
+        Args:
+            data (dict): {'hosts': [...], 'switches': [...], 'links': [{'node1', 'node2', 'bandwidth'}]}
+        
+        Phần tử lỗi (trùng tên, link tới node không tồn tại, link trùng) bị BỎ QUA
+        như add_host/add_switch/add_link trước đây, không làm hỏng cả payload
+
+        Returns:
+            dict: {'hosts', 'switches', 'links', 'adjacency', 'skipped': [lý do...]}
+                  sẵn sàng để swap_topology()
+        
+        Raises:
+            KeyError: Phần tử thiếu trường bắt buộc (name, ip, node1, node2)
+        """
+        skipped = []
+
+        hosts = {}
+        for host_data in data.get('hosts', []):
+            name = host_data['name']
+            if name in hosts:
+                skipped.append(f"host '{name}': duplicate name")
+                continue
+            hosts[name] = Host(name, host_data['ip'], host_data.get('mac', '00:00:00:00:00:00'))
+
+        switches = {}
+        for switch_data in data.get('switches', []):
+            name = switch_data['name']
+            if name in switches or name in hosts:
+                skipped.append(f"switch '{name}': duplicate name")
+                continue
+            switches[name] = Switch(name, switch_data.get('dpid', '0000000000000001'))
+
+        links = {}
+        adjacency = {name: set() for name in hosts}
+        adjacency.update({name: set() for name in switches})
+
+        for link_data in data.get('links', []):
+            node1, node2 = link_data['node1'], link_data['node2']
+            if node1 not in adjacency or node2 not in adjacency:
+                skipped.append(f"link '{node1}-{node2}': node does not exist")
+                continue
+
+            link_id = make_link_id(node1, node2)
+            if link_id in links:
+                # Cùng 1 dây gửi 2 chiều → giữ bản đầu tiên
+                skipped.append(f"link '{link_id}': duplicate link")
+                continue
+
+            bandwidth_capacity = link_data.get('bandwidth', 100)
+            if bandwidth_capacity <= 0:
+                bandwidth_capacity = 100
+
+            links[link_id] = Link(node1, node2, bandwidth_capacity, link_id)
+            adjacency[node1].add(link_id)
+            adjacency[node2].add(link_id)
+
+        return {'hosts': hosts, 'switches': switches, 'links': links, 'adjacency': adjacency,
+                'skipped': skipped}
+
+    def swap_topology(self, staged):
+        """
+        Publish model đã dựng bằng cách gán lại các dict (không clear tại chỗ)
+        
+        Reader đang duyệt dict cũ (vd: monitor_service) vẫn thấy 1 topology đầy đủ,
+        không bao giờ thấy trạng thái dựng dở
+        """
+        self.hosts = staged['hosts']
+        self.switches = staged['switches']
+        self.links = staged['links']
+        self.adjacency = staged['adjacency']
+        # Path metrics giữa các host của topology CŨ → bỏ, telemetry tiếp theo đo lại
+        self.paths = {}
+
+    def load_topology(self, data, lock=None):
+        """
+        Build + validate bên ngoài lock, chỉ giữ lock trong lúc swap
+        
+        Args:
+            data (dict): Payload /init/topology
+            lock: Lock bảo vệ model (data_lock), None = không khóa
+        
+        Returns:
+            dict: Số lượng {'hosts', 'switches', 'links'} + 'skipped' (phần tử bị bỏ qua)
+        
+        Raises:
+            KeyError: Phần tử thiếu trường bắt buộc (model hiện tại giữ nguyên)
+        """
+        staged = self.build_topology(data)
+
+        with lock if lock is not None else nullcontext():
+            self.swap_topology(staged)
+
+        return {
+            'hosts': len(staged['hosts']),
+            'switches': len(staged['switches']),
+            'links': len(staged['links']),
+            'skipped': staged['skipped']
+        }
+
     def get_host(self, name):
         return self.hosts.get(name)
 
@@ -78,7 +240,7 @@ class NetworkModel:
         return self.switches.get(name)
 
     def get_link(self, node1_name, node2_name):
-        link_id = "-".join(sorted([node1_name, node2_name]))
+        link_id = make_link_id(node1_name, node2_name)
         return self.links.get(link_id)
 
     def get_all_nodes(self):
@@ -136,6 +298,7 @@ class NetworkModel:
                 'nodes': nodes_for_graph,
                 'edges': edges_for_graph
             },
-            'path_metrics': self.paths
+            # Bản sao: update_path_metrics thêm cặp mới trong lúc snapshot đang được serialize
+            'path_metrics': dict(self.paths)
         }
         return snapshot
\ No newline at end of file
@@ -1,5 +1,8 @@
 from datetime import datetime
 class Switch:
+
+    DROP_WARNING_THRESHOLD = 100
+
     def __init__(self, name, dpid):
         """
             name (str): Tên của switch
@@ -24,11 +27,14 @@ class Switch:
 
         # Kho chứa thống kê từng port
         self.port_stats = {}
+        # Tổng gói rớt trên mọi port (theo port_stats mới nhất)
+        self.total_dropped = 0
 
     def set_status(self, new_status):
         if new_status in ['up', 'unknown', 'offline', 'high-load']:
+            # Không print: được gọi mỗi batch telemetry trong offload (giống Link.set_status);
+            # chuyển trạng thái được log ở nơi gọi
             self.status = new_status
-            print(f"[{self.name}] Cập nhật trạng thái: {self.status}")
         else:
             print(f"[Lỗi] Trạng thái '{new_status}' không hợp lệ cho {self.name}.")
 
@@ -64,10 +70,8 @@ class Switch:
             
         self.port_stats = stats_data
         
-
-        total_dropped = sum(p['dropped'] for p in self.port_stats.values())
-        if total_dropped > 100:
-            print(f"[Cảnh báo] Switch {self.name} đang bị rớt gói: {total_dropped}")
+        # Cảnh báo rớt gói do nơi gọi log khi vượt DROP_WARNING_THRESHOLD (không print ở đây)
+        self.total_dropped = sum(p['dropped'] for p in self.port_stats.values())
 
     def heartbeat(self, timestamp = None):
         if timestamp:
@@ -125,6 +125,78 @@ UPDATE_LINK_SCHEMA = {
 }
 
 
+# ========================================
+# SCHEMA 5: BULK CONTROL (NHIỀU THAO TÁC TRONG 1 REQUEST)
+# ========================================
+MAX_BULK_OPERATIONS = 1000
+
+BULK_CONTROL_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "operations": {
+            "type": "array",
+            "minItems": 1,
+            "maxItems": MAX_BULK_OPERATIONS,
+            "items": {
+                "oneOf": [
+                    {
+                        # Bật/tắt host hoặc switch
+                        "type": "object",
+                        "properties": {
+                            "op": {"const": "toggle_device"},
+                            "target": {"type": "string", "minLength": 1},
+                            "action": TOGGLE_DEVICE_SCHEMA["properties"]["action"]
+                        },
+                        "required": ["op", "target", "action"],
+                        "additionalProperties": False
+                    },
+                    {
+                        # Bật/tắt link
+                        "type": "object",
+                        "properties": {
+                            "op": {"const": "toggle_link"},
+                            "target": {"type": "string", "minLength": 1},
+                            "action": TOGGLE_LINK_SCHEMA["properties"]["action"]
+                        },
+                        "required": ["op", "target", "action"],
+                        "additionalProperties": False
+                    },
+                    {
+                        # Thay đổi bandwidth/delay/loss của link
+                        "type": "object",
+                        "properties": {
+                            "op": {"const": "update_link"},
+                            "target": {"type": "string", "minLength": 1},
+                            "conditions": UPDATE_LINK_SCHEMA
+                        },
+                        "required": ["op", "target", "conditions"],
+                        "additionalProperties": False
+                    }
+                ]
+            }
+        }
+    },
+    "required": ["operations"],
+    "additionalProperties": False
+}
+
+
+# ========================================
+# SCHEMA 6: CHECKPOINT
+# ========================================
+CHECKPOINT_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "name": {
+            "type": "string",
+            "pattern": "^[A-Za-z0-9_.-]{1,64}$"  # Dùng được trong URL path
+        }
+    },
+    "required": ["name"],
+    "additionalProperties": False
+}
+
+
 # ========================================
 # HELPER FUNCTION: VALIDATE REQUEST DATA
 # ========================================
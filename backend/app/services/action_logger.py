@@ -9,7 +9,8 @@ MỤC ĐÍCH:
 
 STORAGE:
 - Phase 1: In-Memory (List) - Đơn giản, nhanh
-- Phase 2: SQLite - Professional, persistent
+- Phase 2: SQLite (WAL) - Persistent, có index + cursor pagination
+  → Xem app/services/action_store.py
 
 ARCHITECTURE:
     Frontend Request
@@ -24,18 +25,43 @@ ARCHITECTURE:
          ↓
     ActionLogger.update_action()  ← Update SUCCESS/FAILED
          ↓
+    Outbox queue  ← Chỉ append dưới lock, KHÔNG emit dưới lock
+         ↓
+    Broadcaster thread  ← Gom nhiều event cùng 1 tick thành 1 emit
+         ↓
     Broadcast tới Frontend
+
+BROADCAST OUTBOX:
+- create_action/update_action chỉ đẩy event vào self._outbox (rất nhanh)
+- 1 thread broadcaster duy nhất lấy event ra theo thứ tự FIFO
+  → Thứ tự theo từng action luôn đúng (action_started trước action_completed)
+- Nếu có nhiều event chờ cùng lúc → emit 1 lần event 'action_batch':
+    [{"event": "action_started", "data": {...}}, {"event": "action_completed", ...}]
 """
 
+import os
+import queue
 import threading
+import time
+from collections import OrderedDict
 from typing import List, Optional, Dict, Any
 from datetime import datetime
 
 from app.models.action_log import ActionLog, ActionType, ActionStatus
+from app.services.action_store import SQLiteActionStore
 from app.utils.logger import get_logger
 
 logger = get_logger()
 
+# Số event tối đa gom vào 1 lần emit 'action_batch'
+MAX_BROADCAST_BATCH = int(os.getenv('ACTION_BROADCAST_MAX_BATCH', 200))
+
+# Cửa sổ gom event (giây). 0 = chỉ gom những event đã nằm sẵn trong outbox
+BROADCAST_TICK = float(os.getenv('ACTION_BROADCAST_TICK_MS', 0)) / 1000.0
+
+# Số action gần nhất giữ trong hash index (RAM) để tra cứu O(1) theo action_id
+ACTION_INDEX_SIZE = int(os.getenv('ACTION_INDEX_SIZE', 10000))
+
 
 class ActionLoggerService:
     """
@@ -72,16 +98,20 @@ class ActionLoggerService:
     history = action_logger.get_history(limit=10)
     """
     
-    def __init__(self, socketio=None):
+    def __init__(self, socketio=None, store=None):
         """
         Khởi tạo Action Logger
         
         Args:
             socketio: Flask-SocketIO instance (để broadcast)
+            store: Storage backend (mặc định: SQLiteActionStore)
         """
-        # Storage: In-Memory List (Phase 1)
-        # Sau này sẽ thay bằng SQLite
-        self._actions: List[ActionLog] = []
+        # Storage: SQLite (Phase 2)
+        self._store = store or SQLiteActionStore()
+        
+        # Hash index: action_id → ActionLog (các action gần nhất, LRU)
+        # Giúp update_action() khi nhận command_result không phải query DB
+        self._index: "OrderedDict[str, ActionLog]" = OrderedDict()
         
         # Lock để đảm bảo thread-safe
         self._lock = threading.Lock()
@@ -89,7 +119,16 @@ class ActionLoggerService:
         # SocketIO instance để broadcast
         self.socketio = socketio
         
-        logger.info(">>> ActionLoggerService initialized (In-Memory storage)")
+        # Outbox: hàng đợi event chờ broadcast (drain bởi broadcaster thread)
+        self._outbox = queue.Queue()
+        self._broadcaster_thread = None
+        
+        # Các action còn PENDING từ lần chạy trước sẽ không bao giờ có kết quả
+        stale = self._store.fail_pending("Backend restarted before command result was received")
+        if stale:
+            logger.warning(f"[ActionLogger] Marked {stale} stale PENDING actions as FAILED")
+        
+        logger.info(">>> ActionLoggerService initialized (SQLite storage)")
     
     def set_socketio(self, socketio):
         """
@@ -97,6 +136,7 @@ class ActionLoggerService:
         (Dùng khi socketio được init sau ActionLogger)
         """
         self.socketio = socketio
+        self._start_broadcaster()
         logger.info(">>> SocketIO instance attached to ActionLogger")
     
     def create_action(
@@ -134,15 +174,16 @@ class ActionLoggerService:
                 user=user
             )
             
-            # Thêm vào storage
-            self._actions.append(action)
+            # Thêm vào storage + index
+            self._store.save(action)
+            self._index_action(action)
             
             logger.info(
                 f"[ActionLogger] Created: {action.action_id} | "
                 f"Type: {action_type.value} | Target: {target}"
             )
             
-            # Broadcast qua WebSocket (action_started event)
+            # Đưa vào outbox → broadcaster emit action_started (ngoài lock)
             self._broadcast_action(action, event_name='action_started')
             
             return action
@@ -194,18 +235,66 @@ class ActionLoggerService:
             elif status == ActionStatus.FAILED:
                 action.mark_failed(error_message or "Unknown error")
             
+            self._store.save(action)
+            
             logger.info(
                 f"[ActionLogger] Updated: {action_id} | "
                 f"Status: {status.value} | "
                 f"Error: {error_message or 'None'}"
             )
             
-            # Broadcast qua WebSocket
+            # Đưa vào outbox → broadcaster emit (ngoài lock)
             event_name = 'action_completed' if status == ActionStatus.SUCCESS else 'action_failed'
             self._broadcast_action(action, event_name=event_name, result_data=result_data)
             
             return action
     
+    def mark_coalesced(self, action_id: str, superseded_by: str) -> Optional[ActionLog]:
+        """
+        Đánh dấu action đã bị gộp (CommandCoalescer) vào action mới hơn
+        
+        Args:
+            action_id: ID của action bị gộp
+            superseded_by: ID của action thay thế
+        
+        Returns:
+            ActionLog or None: Action đã update, hoặc None nếu không tìm thấy
+        """
+        with self._lock:
+            action = self._find_action_by_id(action_id)
+            
+            if not action:
+                logger.warning(f"[ActionLogger] Action not found: {action_id}")
+                return None
+            
+            action.mark_coalesced(superseded_by)
+            self._store.save(action)
+            
+            logger.debug(f"[ActionLogger] Coalesced: {action_id} → {superseded_by}")
+            
+            self._broadcast_action(action, event_name='action_coalesced')
+            
+            return action
+    
+    def update_parameters(self, action_id: str, updates: Dict[str, Any]) -> Optional[ActionLog]:
+        """
+        Cập nhật (merge) parameters của action, không đổi status
+        
+        Returns:
+            ActionLog or None: Action đã update, hoặc None nếu không tìm thấy
+        """
+        with self._lock:
+            action = self._find_action_by_id(action_id)
+            
+            if not action:
+                logger.warning(f"[ActionLogger] Action not found: {action_id}")
+                return None
+            
+            action.parameters.update(updates)
+            self._store.save(action)
+            
+            return action
+    
     def get_action(self, action_id: str) -> Optional[ActionLog]:
         """
         Lấy 1 action theo ID
@@ -223,15 +312,21 @@ class ActionLoggerService:
         self, 
         limit: int = 50, 
         offset: int = 0,
-        status_filter: Optional[str] = None
+        status_filter: Optional[str] = None,
+        cursor: Optional[str] = None,
+        target: Optional[str] = None,
+        action_type: Optional[str] = None
     ) -> List[Dict[str, Any]]:
         """
         Lấy danh sách Action Logs
         
         Args:
             limit: Số lượng actions trả về (default: 50)
-            offset: Vị trí bắt đầu (default: 0)
+            offset: Vị trí bắt đầu (default: 0, bị bỏ qua nếu có cursor)
             status_filter: Filter theo status (SUCCESS/FAILED/PENDING)
+            cursor: Cursor từ trang trước (xem get_history_page)
+            target: Filter theo thiết bị/link (vd: "h1", "h1-s1")
+            action_type: Filter theo loại hành động (vd: "TOGGLE_DEVICE")
         
         Returns:
             List of action dictionaries
@@ -246,37 +341,79 @@ class ActionLoggerService:
                 status_filter='FAILED'
             )
         """
-        with self._lock:
-            # Copy list để tránh race condition
-            actions = list(self._actions)
+        return self.get_history_page(
+            limit=limit,
+            offset=offset,
+            status_filter=status_filter,
+            cursor=cursor,
+            target=target,
+            action_type=action_type
+        )['actions']
+    
+    def get_history_page(
+        self,
+        limit: int = 50,
+        offset: int = 0,
+        status_filter: Optional[str] = None,
+        cursor: Optional[str] = None,
+        target: Optional[str] = None,
+        action_type: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Giống get_history() nhưng trả về kèm cursor của trang tiếp theo
         
-        # Filter theo status nếu có
-        if status_filter:
-            actions = [a for a in actions if a.status == status_filter]
+        Returns:
+            dict: {
+                'actions': [...],
+                'next_cursor': 'MjAyNS0w...' hoặc None nếu đã hết
+            }
         
-        # Sắp xếp theo thời gian (mới nhất trước)
-        actions.sort(key=lambda a: a.timestamp, reverse=True)
+        Raises:
+            ValueError: Nếu cursor không hợp lệ
         
-        # Pagination
-        paginated = actions[offset:offset + limit]
+        Example:
+            page = action_logger.get_history_page(limit=100)
+            while page['next_cursor']:
+                page = action_logger.get_history_page(
+                    limit=100, cursor=page['next_cursor']
+                )
+        """
+        actions, next_cursor = self._store.query(
+            limit=limit,
+            offset=offset,
+            cursor=cursor,
+            status=status_filter,
+            target=target,
+            action_type=action_type
+        )
         
-        # Convert sang dictionary
-        return [action.to_dict() for action in paginated]
+        return {
+            'actions': [action.to_dict() for action in actions],
+            'next_cursor': next_cursor
+        }
     
-    def get_total_count(self, status_filter: Optional[str] = None) -> int:
+    def get_total_count(
+        self,
+        status_filter: Optional[str] = None,
+        target: Optional[str] = None,
+        action_type: Optional[str] = None
+    ) -> int:
         """
         Đếm tổng số actions
         
         Args:
             status_filter: Filter theo status (optional)
+            target: Filter theo thiết bị/link (optional)
+            action_type: Filter theo loại hành động (optional)
         
         Returns:
             int: Số lượng actions
         """
-        with self._lock:
-            if status_filter:
-                return len([a for a in self._actions if a.status == status_filter])
-            return len(self._actions)
+        return self._store.count(
+            status=status_filter,
+            target=target,
+            action_type=action_type
+        )
     
     def clear_history(self):
         """
@@ -285,7 +422,8 @@ class ActionLoggerService:
         ⚠️ DANGER: Chỉ dùng trong development/testing
         """
         with self._lock:
-            self._actions.clear()
+            self._store.clear()
+            self._index.clear()
             logger.warning("[ActionLogger] History CLEARED!")
     
     # ========================================
@@ -296,12 +434,33 @@ class ActionLoggerService:
         """
         Tìm action theo ID (internal use)
         
+        1. Hash index trong RAM (O(1)) - trường hợp thường gặp: command_result
+           của action vừa tạo
+        2. Fallback: PRIMARY KEY lookup trong SQLite (action cũ đã bị đẩy khỏi index)
+        
         ⚠️ Phải gọi trong context của self._lock
         """
-        for action in self._actions:
-            if action.action_id == action_id:
-                return action
-        return None
+        action = self._index.get(action_id)
+        if action is not None:
+            self._index.move_to_end(action_id)
+            return action
+        
+        action = self._store.get(action_id)
+        if action is not None:
+            self._index_action(action)
+        return action
+    
+    def _index_action(self, action: ActionLog):
+        """
+        Thêm action vào hash index, đẩy action ít dùng nhất ra khi đầy
+        
+        ⚠️ Phải gọi trong context của self._lock
+        """
+        self._index[action.action_id] = action
+        self._index.move_to_end(action.action_id)
+        
+        while len(self._index) > ACTION_INDEX_SIZE:
+            self._index.popitem(last=False)
     
     def _broadcast_action(
         self, 
@@ -310,7 +469,9 @@ class ActionLoggerService:
         result_data: Optional[Dict[str, Any]] = None
     ):
         """
-        Broadcast action qua WebSocket
+        Đưa event của action vào outbox (broadcaster thread sẽ emit sau)
+        
+        ⚠️ Được gọi trong context của self._lock → KHÔNG emit trực tiếp ở đây
         
         Args:
             action: ActionLog object
@@ -321,16 +482,61 @@ class ActionLoggerService:
             logger.debug("[ActionLogger] SocketIO not available, skip broadcast")
             return
         
-        try:
-            payload = action.to_dict()
-            if result_data:
-                payload['result'] = result_data
-            
-            self.socketio.emit(event_name, payload)
-            logger.debug(f"[ActionLogger] Broadcasted '{event_name}': {action.action_id}")
+        # Chụp payload NGAY BÂY GIỜ (action có thể bị update tiếp trước khi emit)
+        payload = action.to_dict()
+        if result_data:
+            payload['result'] = result_data
+        
+        self._outbox.put((event_name, payload))
+    
+    def _start_broadcaster(self):
+        """Khởi động broadcaster thread (chỉ 1 lần)"""
+        if self._broadcaster_thread and self._broadcaster_thread.is_alive():
+            return
+        
+        self._broadcaster_thread = threading.Thread(
+            target=self._broadcast_loop,
+            name="ActionBroadcaster",
+            daemon=True
+        )
+        self._broadcaster_thread.start()
+        logger.info(">>> ActionLogger broadcaster thread started")
+    
+    def _broadcast_loop(self):
+        """
+        Chạy vĩnh viễn: lấy event từ outbox và emit qua WebSocket
         
-        except Exception as e:
-            logger.error(f"[ActionLogger] Broadcast error: {e}")
+        - 1 event  → emit như cũ (action_started / action_completed / action_failed)
+        - N events → emit 1 lần 'action_batch' (giữ nguyên thứ tự FIFO)
+        """
+        while True:
+            batch = [self._outbox.get()]  # Block tới khi có event
+            
+            deadline = time.monotonic() + BROADCAST_TICK
+            while len(batch) < MAX_BROADCAST_BATCH:
+                try:
+                    remaining = deadline - time.monotonic()
+                    if remaining > 0:
+                        batch.append(self._outbox.get(timeout=remaining))
+                    else:
+                        batch.append(self._outbox.get_nowait())
+                except queue.Empty:
+                    break
+            
+            try:
+                if len(batch) == 1:
+                    event_name, payload = batch[0]
+                    self.socketio.emit(event_name, payload)
+                    logger.debug(f"[ActionLogger] Broadcasted '{event_name}': {payload['action_id']}")
+                else:
+                    self.socketio.emit('action_batch', [
+                        {'event': event_name, 'data': payload}
+                        for event_name, payload in batch
+                    ])
+                    logger.debug(f"[ActionLogger] Broadcasted 'action_batch' with {len(batch)} events")
+            
+            except Exception as e:
+                logger.error(f"[ActionLogger] Broadcast error: {e}")
 
 
 # ========================================
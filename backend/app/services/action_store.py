@@ -0,0 +1,318 @@
+# backend/app/services/action_store.py
+"""
+ACTION STORE (SQLite)
+---------------------
+MỤC ĐÍCH:
+- Lưu Action Logs bền vững trên đĩa (thay cho List trong RAM)
+- Khởi động lại Backend vẫn còn lịch sử, không cần load lại toàn bộ vào RAM
+- Chịu được hàng nghìn actions/phút từ các test campaign tự động
+
+THIẾT KẾ:
+- SQLite ở chế độ WAL (Write-Ahead Log): ghi không chặn đọc
+- synchronous=NORMAL: an toàn khi app crash, chỉ mất vài ms cuối nếu mất điện
+- Index theo: action_id (PRIMARY KEY), timestamp, target, action_type, status
+- Phân trang bằng cursor (keyset pagination): không phải quét OFFSET dòng
+- Giới hạn số dòng (retention): tự xóa các action cũ nhất khi vượt ngưỡng
+
+CURSOR:
+- Là chuỗi base64 của "timestamp|action_id" của action cuối cùng trang trước
+- Trang tiếp theo = các action có (timestamp, action_id) NHỎ HƠN cursor
+"""
+
+import base64
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from app.models.action_log import ActionLog, ActionStatus
+from app.utils.logger import get_logger
+
+logger = get_logger()
+
+
+# Đường dẫn mặc định: backend/storage/action_logs.db
+_BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+DEFAULT_DB_PATH = os.path.join(_BACKEND_DIR, 'storage', 'action_logs.db')
+
+# Số dòng tối đa giữ lại trong DB (0 = không giới hạn)
+DEFAULT_MAX_ROWS = 100000
+
+# Cứ sau bao nhiêu lần ghi mới thì kiểm tra retention 1 lần
+PRUNE_EVERY = 1000
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS actions (
+    action_id     TEXT PRIMARY KEY,
+    timestamp     TEXT NOT NULL,
+    action_type   TEXT NOT NULL,
+    target        TEXT,
+    status        TEXT NOT NULL,
+    parameters    TEXT,
+    error_message TEXT,
+    user          TEXT,
+    completed_at  TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_actions_time   ON actions (timestamp, action_id);
+CREATE INDEX IF NOT EXISTS idx_actions_target ON actions (target, timestamp);
+CREATE INDEX IF NOT EXISTS idx_actions_type   ON actions (action_type, timestamp);
+CREATE INDEX IF NOT EXISTS idx_actions_status ON actions (status, timestamp);
+"""
+
+_COLUMNS = (
+    "action_id, timestamp, action_type, target, status, "
+    "parameters, error_message, user, completed_at"
+)
+
+
+class SQLiteActionStore:
+    """
+    Storage backend cho ActionLoggerService
+
+    THREAD-SAFE: 1 connection dùng chung, bảo vệ bằng threading.Lock
+    (mỗi query đều đi qua index nên giữ lock rất ngắn)
+
+    Example Usage:
+    --------------
+    store = SQLiteActionStore("storage/action_logs.db")
+    store.save(action)
+
+    action = store.get("act_1736612345678")
+
+    actions, next_cursor = store.query(limit=20, status="FAILED")
+    more, _ = store.query(limit=20, status="FAILED", cursor=next_cursor)
+    """
+
+    def __init__(self, db_path=None, max_rows=None):
+        """
+        Mở (hoặc tạo mới) database
+
+        Args:
+            db_path (str): Đường dẫn file SQLite (":memory:" để test)
+            max_rows (int): Số dòng tối đa giữ lại (0 = không giới hạn)
+        """
+        self.db_path = db_path or os.getenv('ACTION_LOG_DB_PATH', DEFAULT_DB_PATH)
+        if max_rows is None:
+            max_rows = int(os.getenv('ACTION_LOG_MAX_ROWS', DEFAULT_MAX_ROWS))
+        self.max_rows = max_rows
+
+        if self.db_path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._writes_since_prune = 0
+
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+
+        logger.info(f">>> SQLiteActionStore opened: {self.db_path} (max_rows={self.max_rows})")
+
+    # ========================================
+    # WRITE
+    # ========================================
+
+    def save(self, action: ActionLog):
+        """
+        Insert hoặc update 1 action (UPSERT theo action_id)
+        """
+        row = self._to_row(action)
+
+        with self._lock:
+            self._conn.execute(
+                f"INSERT INTO actions ({_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(action_id) DO UPDATE SET "
+                "status=excluded.status, parameters=excluded.parameters, "
+                "error_message=excluded.error_message, completed_at=excluded.completed_at",
+                row
+            )
+            self._conn.commit()
+
+            self._writes_since_prune += 1
+            if self.max_rows and self._writes_since_prune >= PRUNE_EVERY:
+                self._writes_since_prune = 0
+                self._prune()
+
+    def clear(self):
+        """Xóa toàn bộ actions (dùng cho testing)"""
+        with self._lock:
+            self._conn.execute("DELETE FROM actions")
+            self._conn.commit()
+
+    def fail_pending(self, error_message: str) -> int:
+        """
+        Đánh dấu FAILED mọi action còn PENDING (dùng khi khởi động lại)
+
+        Sau khi Backend restart, kết quả của các lệnh đang chờ sẽ không bao giờ
+        tới nữa → không để chúng treo ở PENDING mãi mãi.
+
+        Returns:
+            int: Số action đã bị đánh dấu
+        """
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE actions SET status=?, error_message=?, completed_at=? WHERE status=?",
+                (ActionStatus.FAILED.value, error_message,
+                 datetime.now().isoformat(), ActionStatus.PENDING.value)
+            )
+            self._conn.commit()
+            return cursor.rowcount
+
+    # ========================================
+    # READ
+    # ========================================
+
+    def get(self, action_id: str) -> Optional[ActionLog]:
+        """Lấy 1 action theo ID (PRIMARY KEY lookup)"""
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {_COLUMNS} FROM actions WHERE action_id = ?", (action_id,)
+            ).fetchone()
+
+        return self._from_row(row) if row else None
+
+    def query(
+        self,
+        limit: int = 50,
+        offset: int = 0,
+        cursor: Optional[str] = None,
+        status: Optional[str] = None,
+        target: Optional[str] = None,
+        action_type: Optional[str] = None
+    ) -> Tuple[List[ActionLog], Optional[str]]:
+        """
+        Lấy danh sách actions (mới nhất trước)
+
+        Args:
+            limit: Số lượng tối đa
+            offset: Bỏ qua N dòng đầu (chỉ dùng khi KHÔNG có cursor)
+            cursor: Cursor trả về từ lần query trước
+            status / target / action_type: Các filter (optional)
+
+        Returns:
+            tuple: (list ActionLog, next_cursor hoặc None nếu hết dữ liệu)
+        """
+        where, params = self._build_filters(status, target, action_type)
+
+        if cursor:
+            cursor_ts, cursor_id = self.decode_cursor(cursor)
+            where.append("(timestamp, action_id) < (?, ?)")
+            params.extend([cursor_ts, cursor_id])
+            offset = 0
+
+        sql = f"SELECT {_COLUMNS} FROM actions"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY timestamp DESC, action_id DESC LIMIT ? OFFSET ?"
+        params.extend([limit + 1, offset])  # Lấy dư 1 dòng để biết còn trang sau không
+
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+
+        has_more = len(rows) > limit
+        actions = [self._from_row(r) for r in rows[:limit]]
+
+        next_cursor = None
+        if has_more and actions:
+            next_cursor = self.encode_cursor(actions[-1])
+
+        return actions, next_cursor
+
+    def count(
+        self,
+        status: Optional[str] = None,
+        target: Optional[str] = None,
+        action_type: Optional[str] = None
+    ) -> int:
+        """Đếm số actions (dùng index của filter tương ứng)"""
+        where, params = self._build_filters(status, target, action_type)
+
+        sql = "SELECT COUNT(*) FROM actions"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+
+        with self._lock:
+            return self._conn.execute(sql, params).fetchone()[0]
+
+    # ========================================
+    # CURSOR HELPERS
+    # ========================================
+
+    @staticmethod
+    def encode_cursor(action: ActionLog) -> str:
+        raw = f"{action.timestamp}|{action.action_id}".encode('utf-8')
+        return base64.urlsafe_b64encode(raw).decode('ascii')
+
+    @staticmethod
+    def decode_cursor(cursor: str) -> Tuple[str, str]:
+        """
+        Raises:
+            ValueError: Nếu cursor không hợp lệ
+        """
+        try:
+            raw = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8')
+            timestamp, action_id = raw.split('|', 1)
+            return timestamp, action_id
+        except Exception:
+            raise ValueError(f"Invalid cursor: {cursor}")
+
+    # ========================================
+    # PRIVATE METHODS
+    # ========================================
+
+    @staticmethod
+    def _build_filters(status, target, action_type):
+        where, params = [], []
+        if status:
+            where.append("status = ?")
+            params.append(status)
+        if target:
+            where.append("target = ?")
+            params.append(target)
+        if action_type:
+            where.append("action_type = ?")
+            params.append(action_type)
+        return where, params
+
+    def _prune(self):
+        """
+        Giữ lại max_rows action mới nhất, xóa phần còn lại
+
+        ⚠️ Phải gọi trong context của self._lock
+        """
+        cursor = self._conn.execute(
+            "DELETE FROM actions WHERE action_id IN ("
+            "  SELECT action_id FROM actions "
+            "  ORDER BY timestamp DESC, action_id DESC LIMIT -1 OFFSET ?"
+            ")",
+            (self.max_rows,)
+        )
+        self._conn.commit()
+        if cursor.rowcount:
+            logger.info(f"[ActionStore] Pruned {cursor.rowcount} old actions (max_rows={self.max_rows})")
+
+    @staticmethod
+    def _to_row(action: ActionLog):
+        return (
+            action.action_id,
+            action.timestamp,
+            action.action_type,
+            action.target,
+            action.status,
+            json.dumps(action.parameters, default=str),
+            action.error_message,
+            action.user,
+            action.completed_at
+        )
+
+    @staticmethod
+    def _from_row(row) -> ActionLog:
+        data = dict(row)
+        data['parameters'] = json.loads(data['parameters']) if data['parameters'] else {}
+        return ActionLog.from_dict(data)
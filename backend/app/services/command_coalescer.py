@@ -0,0 +1,177 @@
+# backend/app/services/command_coalescer.py
+"""
+COMMAND COALESCER (DEBOUNCE + LAST-WRITER-WINS)
+-----------------------------------------------
+MỤC ĐÍCH:
+- Kéo slider bandwidth/delay/loss → Frontend gửi hàng chục PUT /link/<id>/update mỗi giây
+- Trước đây: mỗi request = 1 execute_command → Mininet chạy lần lượt từng cái
+- Bây giờ: các update CÙNG link trong 1 cửa sổ thời gian được gộp thành 1 lệnh
+  mang giá trị MỚI NHẤT của từng tham số
+
+CƠ CHẾ:
+- Mỗi target (link_id) có tối đa 1 lệnh đang chờ
+- Update mới tới trong cửa sổ:
+    * Gộp conditions (key mới ghi đè key cũ, key cũ không bị mất)
+    * Action cũ → COALESCED (superseded_by = action mới)
+    * Hẹn giờ lại (debounce), nhưng không trễ quá max_delay kể từ update đầu tiên
+      (kéo slider liên tục vẫn thấy Mininet cập nhật đều đặn)
+- Hết cửa sổ → emit 1 execute_command với action mới nhất
+
+CẤU HÌNH:
+- LINK_UPDATE_COALESCE_MS: Cửa sổ debounce (0 = tắt, gửi ngay như cũ)
+- LINK_UPDATE_MAX_DELAY_MS: Độ trễ tối đa của 1 chuỗi update liên tục
+"""
+
+import os
+import threading
+import time
+from typing import Any, Callable, Dict
+
+from app.utils.logger import get_logger
+
+logger = get_logger()
+
+
+DEFAULT_WINDOW_MS = int(os.getenv('LINK_UPDATE_COALESCE_MS', 100))
+DEFAULT_MAX_DELAY_MS = int(os.getenv('LINK_UPDATE_MAX_DELAY_MS', 500))
+
+
+class _PendingCommand:
+    __slots__ = ('action_id', 'command', 'data', 'first_at', 'timer', 'merged_ids')
+
+    def __init__(self, action_id, command, data):
+        self.action_id = action_id
+        self.command = command
+        self.data = data
+        self.first_at = time.monotonic()
+        self.timer = None
+        self.merged_ids = []
+
+
+class CommandCoalescer:
+    """
+    Gộp các lệnh cùng target trong 1 cửa sổ debounce
+
+    THREAD-SAFE: self._lock bảo vệ self._pending
+
+    Example Usage:
+    --------------
+    coalescer = CommandCoalescer(
+        emit=lambda payload: socketio.emit('execute_command', payload),
+        on_superseded=lambda old_id, new_id: ...
+    )
+
+    coalescer.submit('h1-s1', 'act_1', 'update_link_conditions', {'conditions': {'bandwidth': 10}})
+    coalescer.submit('h1-s1', 'act_2', 'update_link_conditions', {'conditions': {'delay': '5ms'}})
+    # → act_1 COALESCED, 1 lệnh act_2 với conditions {'bandwidth': 10, 'delay': '5ms'}
+    """
+
+    def __init__(
+        self,
+        emit: Callable[[Dict[str, Any]], None],
+        on_superseded: Callable[[str, str], None],
+        window_ms: int = DEFAULT_WINDOW_MS,
+        max_delay_ms: int = DEFAULT_MAX_DELAY_MS
+    ):
+        """
+        Args:
+            emit: Hàm gửi payload execute_command tới Mininet
+            on_superseded: Gọi với (old_action_id, new_action_id) khi 1 action bị gộp
+            window_ms: Cửa sổ debounce (ms), 0 = tắt coalescing
+            max_delay_ms: Độ trễ tối đa tính từ update đầu tiên của chuỗi (ms)
+        """
+        self._emit = emit
+        self._on_superseded = on_superseded
+        self.window = window_ms / 1000.0
+        self.max_delay = max(max_delay_ms, window_ms) / 1000.0
+
+        self._pending: Dict[str, _PendingCommand] = {}
+        self._lock = threading.Lock()
+
+        logger.info(
+            f">>> CommandCoalescer initialized (window={window_ms}ms, max_delay={max_delay_ms}ms)"
+        )
+
+    def submit(self, key: str, action_id: str, command: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Đưa 1 lệnh vào cửa sổ coalescing của target `key`
+
+        Args:
+            key: Target (vd: link_id)
+            action_id: Action của request hiện tại
+            command: Tên command gửi Mininet
+            data: Payload, 'conditions' sẽ được gộp với lệnh đang chờ
+
+        Returns:
+            dict: {'coalesced': [action_id bị gộp], 'conditions': conditions sau khi gộp}
+        """
+        if self.window <= 0:
+            self._emit({'action_id': action_id, 'command': command, 'data': data})
+            return {'coalesced': [], 'conditions': data.get('conditions', {})}
+
+        superseded = None
+
+        with self._lock:
+            pending = self._pending.get(key)
+
+            if pending:
+                pending.timer.cancel()
+
+                conditions = dict(pending.data.get('conditions', {}))
+                conditions.update(data.get('conditions', {}))
+
+                superseded = pending.action_id
+                pending.merged_ids.append(superseded)
+                pending.action_id = action_id
+                pending.command = command
+                pending.data = {**data, 'conditions': conditions}
+            else:
+                pending = _PendingCommand(action_id, command, dict(data))
+                self._pending[key] = pending
+
+            # Debounce, nhưng không vượt quá first_at + max_delay
+            delay = min(self.window, pending.first_at + self.max_delay - time.monotonic())
+            pending.timer = threading.Timer(max(delay, 0.0), self._flush, args=(key, pending))
+            pending.timer.daemon = True
+            pending.timer.start()
+
+            result = {
+                'coalesced': list(pending.merged_ids),
+                'conditions': dict(pending.data.get('conditions', {}))
+            }
+
+        if superseded:
+            self._on_superseded(superseded, action_id)
+
+        return result
+
+    def flush_all(self):
+        """Gửi ngay mọi lệnh đang chờ (vd: khi shutdown)"""
+        with self._lock:
+            items = list(self._pending.items())
+        for key, pending in items:
+            pending.timer.cancel()
+            self._flush(key, pending)
+
+    def _flush(self, key, pending):
+        with self._lock:
+            # Lệnh đã được thay bằng chuỗi mới hoặc đã flush
+            if self._pending.get(key) is not pending:
+                return
+            del self._pending[key]
+
+            payload = {
+                'action_id': pending.action_id,
+                'command': pending.command,
+                'data': pending.data
+            }
+            merged = len(pending.merged_ids)
+
+        try:
+            self._emit(payload)
+            logger.info(
+                f"[COALESCER] Sent {pending.command} for {key} | "
+                f"Action: {pending.action_id} | Merged: {merged} earlier updates"
+            )
+        except Exception as e:
+            logger.error(f"[COALESCER] Error emitting command for {key}: {e}")
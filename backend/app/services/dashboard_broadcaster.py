@@ -0,0 +1,168 @@
+# backend/app/services/dashboard_broadcaster.py
+"""
+DASHBOARD BROADCASTER - SNAPSHOT ĐỊNH KỲ CHO DASHBOARD
+------------------------------------------------------
+MỤC ĐÍCH:
+- Trước đây mỗi batch telemetry → 1 'network_batch_update' → Mininet gửi dày (kênh
+  ingest, phát lại, nhiều nguồn) thì mọi dashboard nhận dày theo, chi phí serialize +
+  gửi trên hub tăng theo tốc độ ingest
+- Áp dụng batch chỉ ĐÁNH DẤU entity vừa có dữ liệu (publish); background task phát
+  1 snapshot gộp mỗi DASHBOARD_BROADCAST_INTERVAL, giá trị lấy từ Digital Twin tại lúc
+  phát → số event / giây và kích thước event không phụ thuộc tốc độ ingest
+- Định dạng giữ nguyên 'network_batch_update' (chỉ entity thay đổi, frontend merge theo tên)
+- Event chuyển trạng thái (host_updated / link_updated / switch_updated / fidelity_alarm
+  / emulator_load) vẫn emit ngay khi xảy ra, không chờ tới snapshot
+
+CẤU HÌNH:
+- DASHBOARD_BROADCAST_INTERVAL: Giây giữa 2 snapshot (mặc định 1.0 = SYNC_INTERVAL mặc định)
+"""
+
+import os
+import time
+
+from app.extensions import digital_twin, data_lock, socketio
+from app.utils.green import native_lock
+from app.utils.logger import get_logger
+
+logger = get_logger()
+
+DASHBOARD_BROADCAST_INTERVAL = float(os.getenv('DASHBOARD_BROADCAST_INTERVAL', 1.0))
+
+
+class DashboardBroadcaster:
+    """
+    Example Usage:
+    --------------
+    dashboard_broadcaster.publish(data, fidelity=report, emulator=data.get('emulator'))
+    dashboard_broadcaster.start()       # 1 'network_batch_update' / interval
+    """
+
+    def __init__(self, interval=DASHBOARD_BROADCAST_INTERVAL):
+        self.interval = interval
+        # metrics() được đọc trong offload (_apply_to_twin) → native lock
+        self._lock = native_lock()
+        self._pending = self._empty()
+        self._running = False
+        self.stats = {'published': 0, 'broadcasts': 0, 'broadcast_ms': None}
+
+    @staticmethod
+    def _empty():
+        # link: id → (node1, node2) để tra link trong twin
+        return {'timestamp': None, 'hosts': set(), 'links': {}, 'switches': set(),
+                'latency': set(), 'fidelity': None, 'emulator': None}
+
+    def publish(self, data, fidelity=None, emulator=None):
+        """
+        Đánh dấu entity có trong batch vừa áp dụng (gọi SAU khi twin đã cập nhật)
+
+        Args:
+            data (dict): Batch telemetry (JSON hoặc đã giải mã từ frame nhị phân)
+            fidelity (dict): Report fidelity của batch (None = batch không có ledger)
+            emulator (dict): Self-monitor của máy emulator trong batch
+        """
+        with self._lock:
+            pending = self._pending
+            pending['timestamp'] = data.get('timestamp') or pending['timestamp']
+            pending['hosts'].update(h['name'] for h in data.get('hosts', []))
+            for l_data in data.get('links', []):
+                pending['links'][l_data['id']] = l_data.get('nodes') or l_data['id'].split('-')
+            pending['switches'].update(
+                s if isinstance(s, str) else s.get('name') for s in data.get('switches', [])
+            )
+            pending['latency'].update(item['pair'] for item in data.get('latency', []) if item.get('pair'))
+            if fidelity:
+                pending['fidelity'] = fidelity
+            if emulator:
+                pending['emulator'] = emulator
+            self.stats['published'] += 1
+
+    def build(self):
+        """
+        Snapshot các entity đã đánh dấu kể từ lần phát trước (giá trị hiện tại trong twin)
+
+        Returns:
+            dict | None: Payload 'network_batch_update', None nếu không có gì mới
+        """
+        with self._lock:
+            pending, self._pending = self._pending, self._empty()
+        if pending['timestamp'] is None and not pending['fidelity'] and not pending['emulator']:
+            return None
+
+        with data_lock:
+            hosts = []
+            for name in pending['hosts']:
+                host = digital_twin.get_host(name)
+                if not host:
+                    continue
+                offline = host.status == 'offline'
+                hosts.append({'name': name,
+                              'cpu': 0.0 if offline else host.cpu_utilization,
+                              'mem': 0.0 if offline else host.memory_usage,
+                              'status': host.status})
+
+            links = []
+            for link_id, nodes in pending['links'].items():
+                link = digital_twin.get_link(*nodes) if len(nodes) == 2 else None
+                if link:
+                    links.append({'id': link_id, 'bw': link.current_throughput, 'status': link.status})
+
+            switches = []
+            for name in pending['switches']:
+                switch = digital_twin.get_switch(name)
+                if switch:
+                    switches.append({'name': name, 'status': switch.status, 'ports': switch.port_stats or {}})
+
+            latency = []
+            for pair in pending['latency']:
+                path = digital_twin.paths.get(pair)
+                if path:
+                    latency.append({'pair': pair, 'latency': path['latency'],
+                                    'loss': path['packet_loss'], 'jitter': path['jitter']})
+
+        return {
+            'timestamp': pending['timestamp'],
+            'hosts': hosts,
+            'links': links,
+            'switches': switches,
+            'latency': latency,
+            'fidelity': pending['fidelity'],
+            'emulator': pending['emulator']
+        }
+
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        socketio.start_background_task(self._broadcast_loop)
+        logger.info(f">>> Dashboard broadcaster: 1 network_batch_update / {self.interval}s")
+
+    def _broadcast_loop(self):
+        while self._running:
+            socketio.sleep(self.interval)
+            try:
+                started = time.perf_counter()
+                payload = self.build()
+                if payload is None:
+                    continue
+                socketio.emit('network_batch_update', payload)
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                with self._lock:
+                    self.stats['broadcasts'] += 1
+                    previous = self.stats['broadcast_ms']
+                    self.stats['broadcast_ms'] = round(
+                        elapsed_ms if previous is None else elapsed_ms * 0.2 + previous * 0.8, 3
+                    )
+            except Exception as e:
+                logger.error(f"[DASHBOARD] Broadcast error: {e}", exc_info=True)
+
+    def metrics(self):
+        with self._lock:
+            return {'interval': self.interval, **self.stats}
+
+
+dashboard_broadcaster = DashboardBroadcaster()
+
+
+def start_dashboard_broadcaster():
+    """Hàm khởi động background task, được gọi ở __init__.py"""
+    dashboard_broadcaster.start()
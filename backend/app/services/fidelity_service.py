@@ -0,0 +1,262 @@
+# backend/app/services/fidelity_service.py
+"""
+FIDELITY SERVICE (EXPECTED vs MEASURED)
+---------------------------------------
+MỤC ĐÍCH:
+- Throughput link đo từ counter, nhưng không ai biết traffic generator ĐỊNH gửi bao nhiêu
+  → máy chạy Mininet quá tải thì throughput đo được tụt xuống mà không ai hay
+- Mỗi tick telemetry:
+    1. Lấy ledger rate dự định của từng flow (telemetry_batch['traffic'])
+    2. Map flow lên link theo đường đi trong topology (BFS, chỉ đi qua switch)
+    3. Expected của link = tổng rate flow đi qua, đã chia theo capacity của
+       link nghẽn nhất trên đường (tc giới hạn bw là hành vi ĐÚNG của emulation)
+    4. So expected với measured (Mbps) từng link
+- Nhiều link cùng thiếu hụt liên tiếp nhiều tick → fidelity alarm (emulator không theo kịp)
+
+GIẢ ĐỊNH / GIỚI HẠN:
+- Switch chạy L2 learning (+ STP khi có vòng) → đường thật có thể khác BFS ở
+  topology nhiều đường; với cây / fat-tree 1 đường lên core là chính xác
+- Measured = rx + tx trên 1 interface của link (giống collector) → expected cộng
+  cả 2 chiều, nhân WIRE_OVERHEAD (header Ethernet/IP/UDP ngoài payload)
+- Measured đã làm mượt EMA ở Mininet → expected cũng EMA cùng ALPHA
+
+CẤU HÌNH:
+- FIDELITY_TOLERANCE        : Link thiếu hụt khi measured < expected × (1 - tolerance)
+- FIDELITY_MIN_EXPECTED_MBPS: Chỉ đánh giá link có expected ≥ mức này
+- FIDELITY_ALARM_FRACTION   : Tỉ lệ link thiếu hụt để tính là 1 tick xấu
+- FIDELITY_ALARM_TICKS      : Số tick xấu (hoặc tốt) liên tiếp để bật (hoặc tắt) alarm
+"""
+
+import os
+import time
+from collections import deque
+
+from app.utils.green import native_lock
+from app.utils.logger import get_logger
+
+logger = get_logger()
+
+FIDELITY_TOLERANCE = float(os.getenv('FIDELITY_TOLERANCE', 0.2))
+FIDELITY_MIN_EXPECTED_MBPS = float(os.getenv('FIDELITY_MIN_EXPECTED_MBPS', 1.0))
+FIDELITY_ALARM_FRACTION = float(os.getenv('FIDELITY_ALARM_FRACTION', 0.25))
+FIDELITY_ALARM_TICKS = int(os.getenv('FIDELITY_ALARM_TICKS', 3))
+
+# Payload UDP 1400 byte → 1442 byte trên dây (Ethernet 14 + IP 20 + UDP 8)
+WIRE_OVERHEAD = float(os.getenv('FIDELITY_WIRE_OVERHEAD', 1.03))
+
+# Giống ALPHA của collectors/link_stats.py bên Mininet
+EMA_ALPHA = 0.7
+
+# Số link tệ nhất đưa vào report
+WORST_LINKS = 5
+
+
+class FidelityService:
+    """
+    THREAD-SAFE: self._lock bảo vệ state giữa các tick (EMA, cache đường đi, alarm)
+
+    Example Usage:
+    --------------
+    report, transition = fidelity_service.evaluate(digital_twin, batch['traffic'], measured)
+    if transition:
+        fidelity_service.log_transition(report, transition)
+        socketio.emit('fidelity_alarm', report)
+    """
+
+    def __init__(self):
+        # evaluate() chạy trong offload (_apply_to_twin) → native lock
+        self._lock = native_lock()
+        # (src, dst) → list link_id (None = không có đường)
+        self._paths = {}
+        self._paths_key = None
+        # link_id → expected đã EMA
+        self._expected = {}
+        self._bad_ticks = 0
+        self._good_ticks = 0
+        self.alarm = False
+        self.history = deque(maxlen=120)
+
+    # ========================================
+    # PUBLIC API
+    # ========================================
+
+    def evaluate(self, network, ledger, measured, timestamp=None):
+        """
+        So expected vs measured cho 1 tick
+
+        Args:
+            network (NetworkModel): Digital twin (gọi trong data_lock)
+            ledger (dict): telemetry_batch['traffic'] = {'window', 'intended_mbps', 'flows': [...]}
+            measured (dict): link_id → Mbps đo được trong tick
+            timestamp (float): Thời điểm tick
+
+        Returns:
+            tuple: (report dict, transition: None | 'raised' | 'cleared')
+        """
+        with self._lock:
+            paths = self._paths_for(network)
+            raw = self._expected_loads(network, ledger.get('flows', []), paths)
+
+            for link_id in [lid for lid in self._expected if lid not in network.links]:
+                del self._expected[link_id]
+
+            for link_id in set(self._expected) | set(raw):
+                previous = self._expected.get(link_id)
+                current = raw.get(link_id, 0.0)
+                self._expected[link_id] = current if previous is None else (
+                    current * EMA_ALPHA + previous * (1 - EMA_ALPHA)
+                )
+
+            evaluated, deficits = 0, []
+            total_expected = total_measured = 0.0
+            for link_id, expected in self._expected.items():
+                link = network.links.get(link_id)
+                if link is None or link.status == 'down' or expected < FIDELITY_MIN_EXPECTED_MBPS:
+                    continue
+                got = float(measured.get(link_id, 0.0))
+                evaluated += 1
+                total_expected += expected
+                total_measured += got
+                deficit = (expected - got) / expected
+                if deficit > FIDELITY_TOLERANCE:
+                    deficits.append((deficit, link_id, expected, got))
+
+            bad_tick = evaluated > 0 and len(deficits) / evaluated >= FIDELITY_ALARM_FRACTION
+            transition = self._update_alarm(bad_tick)
+
+            deficits.sort(reverse=True)
+            report = {
+                'timestamp': timestamp or time.time(),
+                'alarm': self.alarm,
+                'flows': len(ledger.get('flows', [])),
+                'intended_mbps': ledger.get('intended_mbps', 0.0),
+                'links_evaluated': evaluated,
+                'links_underdelivering': len(deficits),
+                'expected_mbps': round(total_expected, 2),
+                'measured_mbps': round(total_measured, 2),
+                'delivery_ratio': round(total_measured / total_expected, 3) if total_expected else None,
+                'unrouted_pairs': sum(1 for p in paths.values() if p is None),
+                'worst_links': [
+                    {'id': link_id, 'expected': round(exp, 2), 'measured': round(got, 2),
+                     'deficit': round(deficit, 3)}
+                    for deficit, link_id, exp, got in deficits[:WORST_LINKS]
+                ]
+            }
+            self.history.append(report)
+
+        return report, transition
+
+    @staticmethod
+    def log_transition(report, transition):
+        """Log bật / tắt alarm (evaluate chạy trong offload → người gọi log trên hub)"""
+        if transition == 'raised':
+            logger.warning(
+                f"[FIDELITY] ALARM: {report['links_underdelivering']}/{report['links_evaluated']} links "
+                f"under-delivering (measured {report['measured_mbps']} / expected {report['expected_mbps']} Mbps)"
+            )
+        elif transition == 'cleared':
+            logger.info("[FIDELITY] Alarm cleared: emulator keeps up with intended traffic")
+
+    def reset(self):
+        with self._lock:
+            self._paths.clear()
+            self._paths_key = None
+            self._expected.clear()
+            self._bad_ticks = self._good_ticks = 0
+            self.alarm = False
+            self.history.clear()
+
+    # ========================================
+    # ROUTING
+    # ========================================
+
+    def _paths_for(self, network):
+        """Cache đường đi, tự xóa khi topology / tập link down thay đổi"""
+        key = (id(network.links), len(network.links),
+               frozenset(lid for lid, link in network.links.items() if link.status == 'down'))
+        if key != self._paths_key:
+            self._paths = {}
+            self._paths_key = key
+        return self._paths
+
+    def _route(self, network, src, dst):
+        """BFS từ src tới dst, chỉ đi xuyên qua switch (host không forward)"""
+        if src not in network.hosts or dst not in network.hosts:
+            return None
+
+        parents = {src: None}
+        frontier = deque([src])
+        while frontier:
+            node = frontier.popleft()
+            if node == dst:
+                break
+            if node != src and node not in network.switches:
+                continue
+            for link_id in sorted(network.adjacency.get(node, ())):
+                link = network.links.get(link_id)
+                if link is None or link.status == 'down':
+                    continue
+                neighbor = link.node2 if link.node1 == node else link.node1
+                if neighbor not in parents:
+                    parents[neighbor] = (node, link_id)
+                    frontier.append(neighbor)
+
+        if dst not in parents:
+            return None
+
+        path = []
+        node = dst
+        while parents[node] is not None:
+            node, link_id = parents[node]
+            path.append(link_id)
+        path.reverse()
+        return path
+
+    def _expected_loads(self, network, flows, paths):
+        """
+        Expected (Mbps trên dây) từng link:
+        rate flow được chia theo link nghẽn nhất trên đường (chia tỉ lệ, 1 lượt)
+        """
+        routed = []
+        offered = {}
+        for flow in flows:
+            pair = (flow['src'], flow['dst'])
+            if pair not in paths:
+                paths[pair] = self._route(network, *pair)
+            path = paths[pair]
+            if not path:
+                continue
+            rate = float(flow['rate_mbps']) * WIRE_OVERHEAD
+            routed.append((rate, path))
+            for link_id in path:
+                offered[link_id] = offered.get(link_id, 0.0) + rate
+
+        expected = {}
+        for rate, path in routed:
+            scale = 1.0
+            for link_id in path:
+                capacity = network.links[link_id].bandwidth_capacity
+                if capacity and offered[link_id] > capacity:
+                    scale = min(scale, capacity / offered[link_id])
+            for link_id in path:
+                expected[link_id] = expected.get(link_id, 0.0) + rate * scale
+        return expected
+
+    def _update_alarm(self, bad_tick):
+        if bad_tick:
+            self._bad_ticks += 1
+            self._good_ticks = 0
+        else:
+            self._good_ticks += 1
+            self._bad_ticks = 0
+
+        if not self.alarm and self._bad_ticks >= FIDELITY_ALARM_TICKS:
+            self.alarm = True
+            return 'raised'
+        if self.alarm and self._good_ticks >= FIDELITY_ALARM_TICKS:
+            self.alarm = False
+            return 'cleared'
+        return None
+
+
+fidelity_service = FidelityService()
@@ -2,6 +2,7 @@ from influxdb_client import InfluxDBClient, Point, WriteOptions
 from influxdb_client.client.write_api import WriteOptions
 from dotenv import load_dotenv
 import time
+from app.utils.green import offload
 from app.utils.logger import get_logger
 import os
 
@@ -18,6 +19,7 @@ class InfluxService:
         self.bucket = os.getenv('INFLUX_BUCKET', 'network_metrics')
         
         # Write Options từ .env
+        # (mỗi batch telemetry là 1 record đã nối → batch_size tính theo batch telemetry, không theo điểm)
         batch_size = int(os.getenv('INFLUX_BATCH_SIZE', 500))
         flush_interval = int(os.getenv('INFLUX_FLUSH_INTERVAL', 1000))
         retry_interval = int(os.getenv('INFLUX_RETRY_INTERVAL', 5000))
@@ -42,6 +44,21 @@ class InfluxService:
         if not self.write_api:
             return
 
+        # Dựng Point + line protocol (CPU-bound, ~1000 điểm / batch) trong native thread;
+        # đưa 1 chuỗi đã nối cho write_api → batching của client không xử lý từng Point trên hub
+        body = offload(self._to_line_protocol, data)
+        if not body:
+            return
+
+        # ==================== Ghi vào InfluxDB ====================
+        try:
+            self.write_api.write(bucket=self.bucket, org=self.org, record=body)
+        except Exception as e:
+            logger.error(f"Lỗi khi ghi InfluxDB: {e}")
+
+    @staticmethod
+    def _to_line_protocol(data):
+        """Chạy qua offload() → không logger ở đây (app/utils/green.py)"""
         timestamp_sec = data.get('timestamp', time.time())
         ts_ns = int(timestamp_sec * 1_000_000_000)  
 
@@ -82,12 +99,7 @@ class InfluxService:
                 .time(ts_ns)
             points.append(p)
 
-        # ==================== Ghi vào InfluxDB ====================
-        try:
-            self.write_api.write(bucket=self.bucket, org=self.org, record=points)
-            # logger.info(f"Ghi thành công {len(points)} points vào InfluxDB")
-        except Exception as e:
-            logger.error(f"Lỗi khi ghi InfluxDB: {e}")
+        return '\n'.join(p.to_line_protocol() for p in points)
 
     def close(self):
         if self.client:
@@ -0,0 +1,303 @@
+# backend/app/services/ingest_server.py
+"""
+INGEST SERVER - KÊNH TELEMETRY RIÊNG (UNIX SOCKET / TCP)
+--------------------------------------------------------
+MỤC ĐÍCH:
+- Telemetry đi chung server Flask-SocketIO với dashboard + REST: mỗi batch qua khung
+  engine.io / socket.io và dispatch handler → Mininet gửi dày thì dashboard bị chậm theo
+- Listener riêng nhận FRAME CÓ ĐỘ DÀI, thread đọc chỉ cắt frame rồi đưa vào queue có
+  giới hạn; worker giải mã rồi áp dụng thẳng vào Digital Twin qua CÙNG đường xử lý với
+  event Socket.IO (socket_events._apply_telemetry) → seq / ack / delta / spool giữ nguyên
+  ngữ nghĩa. Eventlet: giải mã + áp dụng đều chạy trong native thread pool (app/utils/green.py),
+  dashboard nhận snapshot gộp theo chu kỳ (dashboard_broadcaster) → không bị chặn theo ingest
+- Queue đầy → thread đọc dừng đọc socket → TCP tự đẩy ngược áp lực về Mininet
+  (cửa sổ AIMD bên đó giảm theo ack chậm)
+
+FRAME (2 chiều): length u32 | kind u8 | payload[length]
+    1  JSON      : batch telemetry JSON            (= 'mininet_telemetry')
+    2  BIN       : frame telemetry_codec            (= 'mininet_telemetry_bin')
+    3  REPLAY    : batch lịch sử JSON từ spool     (= 'mininet_telemetry_replay')
+                   → Backend trả CONTROL 'replay_ack' {'stored': bool}
+    16 CONTROL   : Backend → Mininet: JSON {'event': 'telemetry_ack' | 'telemetry_format'
+                   | 'telemetry_keyframe' | 'replay_ack', 'data': {...}}
+    Phía Mininet: mininet_twin/services/ingest_client.py (PHẢI khớp định dạng này)
+
+CẤU HÌNH:
+- INGEST_LISTEN      : '' (tắt) | unix:///run/twin-ingest.sock | tcp://0.0.0.0:5001
+- INGEST_QUEUE_SIZE  : Số frame tối đa chờ worker (mặc định 256)
+- INGEST_MAX_FRAME   : Byte tối đa của 1 frame (mặc định 64 MB)
+"""
+
+import json
+import os
+import queue
+import socket
+import struct
+import threading
+import time
+
+from app.services.telemetry_codec import telemetry_decoder
+from app.services.telemetry_ingest import ingest_tracker
+from app.utils.green import GREEN, native_lock, offload
+from app.utils.logger import get_logger
+
+logger = get_logger()
+
+INGEST_LISTEN = os.getenv('INGEST_LISTEN', '')
+INGEST_QUEUE_SIZE = int(os.getenv('INGEST_QUEUE_SIZE', 256))
+INGEST_MAX_FRAME = int(os.getenv('INGEST_MAX_FRAME', 64 * 1024 * 1024))
+
+FRAME = struct.Struct('<IB')
+
+KIND_JSON = 1
+KIND_BIN = 2
+KIND_REPLAY = 3
+KIND_CONTROL = 16
+
+def _decode_json(payload):
+    return json.loads(payload)
+
+
+def parse_listen(url):
+    """
+    Returns:
+        tuple: (family, address) cho socket.bind
+    """
+    if url.startswith('unix://'):
+        return socket.AF_UNIX, url[len('unix://'):]
+    if url.startswith('tcp://'):
+        host, _, port = url[len('tcp://'):].rpartition(':')
+        return socket.AF_INET, (host or '0.0.0.0', int(port))
+    raise ValueError(f"Unsupported INGEST_LISTEN '{url}' (unix:///path | tcp://host:port)")
+
+
+def _recv_exact(conn, size):
+    chunks = []
+    while size:
+        chunk = conn.recv(min(size, 1024 * 1024))
+        if not chunk:
+            return None
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b''.join(chunks)
+
+
+class IngestConnection:
+    """1 kết nối Mininet; send() gọi được từ worker lẫn thread đọc"""
+
+    def __init__(self, conn, label):
+        self.conn = conn
+        self.source = f"ingest:{label}"
+        self._send_lock = threading.Lock()
+        self.closed = False
+
+    def send(self, event, data):
+        payload = json.dumps({'event': event, 'data': data}, separators=(',', ':')).encode()
+        try:
+            with self._send_lock:
+                self.conn.sendall(FRAME.pack(len(payload), KIND_CONTROL) + payload)
+        except OSError as e:
+            if not self.closed:
+                logger.debug(f"[INGEST] Cannot reply to {self.source}: {e}")
+
+    def close(self):
+        self.closed = True
+        try:
+            self.conn.close()
+        except OSError:
+            pass
+
+
+class IngestServer:
+    """
+    Example Usage:
+    --------------
+    ingest_server.bind(apply_telemetry=_apply_telemetry, store_replay=_store_replay)
+    ingest_server.start('tcp://0.0.0.0:5001')
+    ingest_server.metrics()
+    """
+
+    def __init__(self, queue_size=INGEST_QUEUE_SIZE, max_frame=INGEST_MAX_FRAME):
+        self.max_frame = max_frame
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._apply_telemetry = None
+        self._store_replay = None
+        self._listener = None
+        self._listen_url = None
+        self._connections = set()
+        # metrics() được gọi trong offload (_apply_to_twin) → native lock
+        self._lock = native_lock()
+        self._running = False
+        self.stats = {
+            'connections': 0, 'frames': 0, 'bytes': 0, 'decode_errors': 0, 'apply_errors': 0,
+            'decode_ms': None, 'apply_ms': None, 'queue_full_waits': 0
+        }
+
+    def bind(self, apply_telemetry, store_replay):
+        """
+        Args:
+            apply_telemetry (callable): apply(data, source, reply) - socket_events._apply_telemetry
+            store_replay (callable): store(data) → bool - socket_events._store_replay
+        """
+        self._apply_telemetry = apply_telemetry
+        self._store_replay = store_replay
+
+    def start(self, url=INGEST_LISTEN):
+        """Mở listener (bỏ qua nếu url rỗng)"""
+        if not url or self._running:
+            return False
+        if not self._apply_telemetry:
+            logger.error("[INGEST] Handlers not bound (register_socket_events chưa chạy)")
+            return False
+
+        family, address = parse_listen(url)
+        listener = socket.socket(family, socket.SOCK_STREAM)
+        if family == socket.AF_UNIX:
+            # Socket file còn lại từ lần chạy trước
+            if os.path.exists(address):
+                os.unlink(address)
+        else:
+            listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        listener.bind(address)
+        listener.listen(16)
+
+        self._listener = listener
+        self._listen_url = url
+        self._running = True
+        threading.Thread(target=self._accept_loop, daemon=True, name='ingest-accept').start()
+        threading.Thread(target=self._work_loop, daemon=True, name='ingest-worker').start()
+        logger.info(f">>> Telemetry ingest listening on {url} (queue {self._queue.maxsize})")
+        return True
+
+    def stop(self):
+        self._running = False
+        if self._listener:
+            self._listener.close()
+        with self._lock:
+            connections = list(self._connections)
+        for connection in connections:
+            connection.close()
+        self._queue.put(None)
+
+    def _accept_loop(self):
+        while self._running:
+            try:
+                conn, peer = self._listener.accept()
+            except OSError:
+                if self._running:
+                    logger.error("[INGEST] Listener closed unexpectedly")
+                return
+            if conn.family != socket.AF_UNIX:
+                conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            with self._lock:
+                self.stats['connections'] += 1
+                # Unix socket không có địa chỉ peer → đánh số kết nối (seq theo dõi theo từng nguồn)
+                label = f"{peer[0]}:{peer[1]}" if isinstance(peer, tuple) else f"unix#{self.stats['connections']}"
+                connection = IngestConnection(conn, label)
+                self._connections.add(connection)
+            logger.info(f"[INGEST] Connected: {connection.source}")
+            threading.Thread(target=self._read_loop, args=(connection,), daemon=True,
+                             name='ingest-read').start()
+
+    def _read_loop(self, connection):
+        """Chỉ cắt frame → queue (không giải mã ở đây)"""
+        try:
+            while self._running:
+                header = _recv_exact(connection.conn, FRAME.size)
+                if header is None:
+                    break
+                length, kind = FRAME.unpack(header)
+                if length > self.max_frame:
+                    logger.error(f"[INGEST] Frame too large from {connection.source}: {length} bytes")
+                    break
+                payload = _recv_exact(connection.conn, length)
+                if payload is None:
+                    break
+                with self._lock:
+                    self.stats['frames'] += 1
+                    self.stats['bytes'] += FRAME.size + length
+                try:
+                    self._queue.put_nowait((connection, kind, payload))
+                except queue.Full:
+                    # Worker không theo kịp → ngừng đọc cho tới khi có chỗ (TCP backpressure)
+                    with self._lock:
+                        self.stats['queue_full_waits'] += 1
+                    self._queue.put((connection, kind, payload))
+        except OSError as e:
+            logger.debug(f"[INGEST] Read error from {connection.source}: {e}")
+        finally:
+            connection.close()
+            with self._lock:
+                self._connections.discard(connection)
+            ingest_tracker.forget(connection.source)
+            logger.info(f"[INGEST] Disconnected: {connection.source}")
+
+    def _work_loop(self):
+        """1 worker → batch của cùng nguồn được áp dụng đúng thứ tự seq"""
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            connection, kind, payload = item
+
+            started = time.perf_counter()
+            try:
+                if kind == KIND_BIN:
+                    data = offload(telemetry_decoder.decode, payload)
+                elif kind in (KIND_JSON, KIND_REPLAY):
+                    data = offload(_decode_json, payload)
+                else:
+                    raise ValueError(f"Unknown frame kind {kind}")
+            except (ValueError, TypeError) as e:
+                with self._lock:
+                    self.stats['decode_errors'] += 1
+                logger.warning(f"[INGEST] Cannot decode frame from {connection.source}: {e}")
+                if kind == KIND_BIN:
+                    connection.send('telemetry_format', {'format': 'json', 'reason': str(e)})
+                elif kind == KIND_REPLAY:
+                    connection.send('replay_ack', {'stored': False})
+                continue
+            decoded = time.perf_counter()
+
+            try:
+                if kind == KIND_REPLAY:
+                    connection.send('replay_ack', {'stored': self._store_replay(data)})
+                else:
+                    self._apply_telemetry(data, connection.source, connection.send)
+            except Exception as e:
+                with self._lock:
+                    self.stats['apply_errors'] += 1
+                logger.error(f"[INGEST] Error applying telemetry from {connection.source}: {e}", exc_info=True)
+                continue
+            self._record(decoded - started, time.perf_counter() - decoded)
+
+    def _record(self, decode_s, apply_s):
+        with self._lock:
+            for key, value in (('decode_ms', decode_s * 1000), ('apply_ms', apply_s * 1000)):
+                previous = self.stats[key]
+                self.stats[key] = round(value if previous is None else value * 0.2 + previous * 0.8, 3)
+
+    @property
+    def listening(self):
+        return self._running
+
+    def metrics(self):
+        with self._lock:
+            return {
+                'listen': self._listen_url,
+                'clients': len(self._connections),
+                'queue_depth': self._queue.qsize(),
+                'green': GREEN,
+                **self.stats
+            }
+
+
+ingest_server = IngestServer()
+
+
+def start_ingest_server():
+    """Hàm khởi động listener, được gọi ở __init__.py (INGEST_LISTEN rỗng → không làm gì)"""
+    try:
+        ingest_server.start(INGEST_LISTEN)
+    except (OSError, ValueError) as e:
+        logger.error(f"[INGEST] Cannot start ingest listener on '{INGEST_LISTEN}': {e}")
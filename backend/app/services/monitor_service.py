@@ -3,6 +3,7 @@ import threading
 import time
 from datetime import datetime, timedelta
 from app.extensions import digital_twin, data_lock, socketio
+from app.services.telemetry_delta import telemetry_delta
 from app.utils.logger import get_logger
 
 logger = get_logger()
@@ -22,6 +23,7 @@ def check_device_status_loop():
     while True:
         try:
             time.sleep(3) 
+            reaped = 0
             with data_lock:
                 now = datetime.now()
                 timeout_threshold = timedelta(seconds=TIMEOUT_SECONDS)
@@ -34,6 +36,7 @@ def check_device_status_loop():
                                 logger.warning(f"[Reaper] Host {host.name} timeout → OFFLINE")
                                 host.set_status('offline')
                                 broadcast_update('host_updated', host.to_json())
+                                reaped += 1
 
                 #  Kiểm tra Switches
                 for switch in digital_twin.switches.values():
@@ -43,6 +46,7 @@ def check_device_status_loop():
                                 logger.warning(f"[Reaper] Switch {switch.name} timeout → OFFLINE")
                                 switch.set_status('offline')
                                 broadcast_update('switch_updated', switch.to_json())
+                                reaped += 1
 
                 #  Kiểm tra Links
                 for link in digital_twin.links.values():
@@ -52,6 +56,12 @@ def check_device_status_loop():
                                 logger.warning(f"[Reaper] Link {link.id} timeout → DOWN")
                                 link.set_status('down')
                                 broadcast_update('link_updated', link.to_json())
+                                reaped += 1
+
+            # Delta telemetry: entity không đổi sẽ không được gửi lại → yêu cầu keyframe
+            # để trạng thái thật về ngay khi Mininet gửi tiếp
+            if reaped:
+                telemetry_delta.request_keyframe(f"reaper marked {reaped} entities offline/down")
 
         except Exception as e:
             logger.error(f"[Reaper Lỗi] {e}")
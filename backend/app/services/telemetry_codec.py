@@ -0,0 +1,223 @@
+# backend/app/services/telemetry_codec.py
+"""
+TELEMETRY CODEC (GIẢI MÃ PHÍA BACKEND)
+--------------------------------------
+MỤC ĐÍCH:
+- Giải mã frame nhị phân dạng cột của event 'mininet_telemetry_bin' về đúng dạng
+  telemetry JSON ('mininet_telemetry') → cùng 1 đường xử lý (_apply_telemetry)
+- Link có sẵn 'nodes' [node1, node2] từ dictionary → không cần split('-') link id
+- Định dạng PHẢI khớp mininet_twin/services/telemetry_codec.py (xem docstring bên đó)
+
+DICTIONARY:
+- Mininet gửi kèm POST /init/topology (và /init/topology/diff khi reload) dưới key
+  'telemetry_dictionary'; response trả 'telemetry_format': 'bin' khi đã nhận
+- Giữ KEEP_EPOCHS dictionary gần nhất: frame cũ còn trên đường truyền lúc đổi topology
+  vẫn giải mã được
+"""
+
+import json
+import struct
+import sys
+import zlib
+from array import array
+from collections import OrderedDict
+
+from app.utils.green import native_lock
+from app.utils.logger import get_logger
+
+logger = get_logger()
+
+MAGIC = b'TW'
+VERSION = 1
+FLAG_ZLIB = 0x01
+
+HEADER = struct.Struct('<2sBBI')
+SECTION = struct.Struct('<BI')
+
+TAG_HOSTS = 1
+TAG_LINKS = 2
+TAG_SWITCHES = 3
+TAG_PORTS = 4
+TAG_LATENCY = 5
+TAG_EXTRAS = 255
+
+PORT_COUNTERS = ('rx_packets', 'tx_packets', 'rx_bytes', 'tx_bytes', 'dropped', 'errors')
+
+KEEP_EPOCHS = 2
+
+_SWAP = sys.byteorder != 'little'
+
+
+def _unpack(typecode, buffer, offset, count):
+    column = array(typecode)
+    end = offset + column.itemsize * count
+    column.frombytes(buffer[offset:end])
+    if _SWAP:
+        column.byteswap()
+    return column, end
+
+
+class TelemetryDecoder:
+    """
+    THREAD-SAFE: self._lock bảo vệ self._dictionaries (HTTP thread ghi, socket thread đọc)
+
+    Example Usage:
+    --------------
+    telemetry_decoder.set_dictionary(data['telemetry_dictionary'])
+    batch = telemetry_decoder.decode(frame)     # ValueError nếu frame / epoch không hợp lệ
+    """
+
+    def __init__(self):
+        # decode() chạy qua offload (ingest_server) → native lock
+        self._lock = native_lock()
+        # epoch → dictionary (OrderedDict: bỏ epoch cũ nhất)
+        self._dictionaries = OrderedDict()
+
+    def set_dictionary(self, dictionary):
+        """
+        Nhận dictionary entity từ Mininet
+
+        Returns:
+            str: Định dạng telemetry đã thống nhất ('bin' | 'json')
+        """
+        try:
+            epoch = int(dictionary['epoch'])
+            compiled = {
+                'hosts': list(dictionary['hosts']),
+                'switches': list(dictionary['switches']),
+                'links': [(entry[0], [entry[1], entry[2]]) for entry in dictionary['links']],
+                'ports': [(int(sw), port) for sw, port in dictionary['ports']]
+            }
+        except (KeyError, TypeError, ValueError) as e:
+            logger.warning(f"[TELEMETRY] Invalid telemetry dictionary: {e}")
+            return 'json'
+
+        with self._lock:
+            self._dictionaries[epoch] = compiled
+            self._dictionaries.move_to_end(epoch)
+            while len(self._dictionaries) > KEEP_EPOCHS:
+                self._dictionaries.popitem(last=False)
+
+        logger.info(
+            f"[TELEMETRY] Dictionary epoch {epoch}: {len(compiled['hosts'])} hosts, "
+            f"{len(compiled['switches'])} switches, {len(compiled['links'])} links, "
+            f"{len(compiled['ports'])} ports"
+        )
+        return 'bin'
+
+    def decode(self, frame):
+        """
+        Args:
+            frame (bytes): Payload của 'mininet_telemetry_bin'
+
+        Returns:
+            dict: Cùng dạng telemetry JSON (link có thêm 'nodes')
+        """
+        if len(frame) < HEADER.size:
+            raise ValueError("Telemetry frame too short")
+        magic, version, flags, epoch = HEADER.unpack_from(frame, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"Unsupported telemetry frame ({magic!r} v{version})")
+
+        with self._lock:
+            dictionary = self._dictionaries.get(epoch)
+        if dictionary is None:
+            raise ValueError(f"Unknown dictionary epoch {epoch}")
+
+        body = frame[HEADER.size:]
+        if flags & FLAG_ZLIB:
+            body = zlib.decompress(body)
+
+        try:
+            return self._decode_body(body, dictionary)
+        except (IndexError, KeyError, struct.error) as e:
+            raise ValueError(f"Corrupt telemetry frame: {e}")
+
+    def _decode_body(self, body, dictionary):
+        hosts, switches = dictionary['hosts'], dictionary['switches']
+        links, ports = dictionary['links'], dictionary['ports']
+
+        batch = {'timestamp': struct.unpack_from('<d', body, 0)[0],
+                 'hosts': [], 'links': [], 'switches': [], 'latency': []}
+        switch_entries = {}
+        offset = 8
+        while offset < len(body):
+            tag, count = SECTION.unpack_from(body, offset)
+            offset += SECTION.size
+
+            if tag == TAG_HOSTS:
+                ids, offset = _unpack('I', body, offset, count)
+                cpu, offset = _unpack('f', body, offset, count)
+                mem, offset = _unpack('f', body, offset, count)
+                offline = body[offset:offset + count]
+                offset += count
+                for index, c, m, off in zip(ids, cpu, mem, offline):
+                    entry = {'name': hosts[index], 'cpu': round(c, 2), 'mem': round(m, 2)}
+                    if off:
+                        entry['status'] = 'offline'
+                    batch['hosts'].append(entry)
+
+            elif tag == TAG_LINKS:
+                ids, offset = _unpack('I', body, offset, count)
+                bw, offset = _unpack('f', body, offset, count)
+                batch['links'] = [
+                    {'id': links[index][0], 'nodes': links[index][1], 'bw': round(b, 2)}
+                    for index, b in zip(ids, bw)
+                ]
+
+            elif tag == TAG_SWITCHES:
+                ids, offset = _unpack('I', body, offset, count)
+                status = body[offset:offset + count]
+                offset += count
+                for index, st in zip(ids, status):
+                    entry = {'name': switches[index], 'ports': {}}
+                    if st:
+                        entry['status'] = 'up' if st == 1 else 'offline'
+                    switch_entries[index] = entry
+                    batch['switches'].append(entry)
+
+            elif tag == TAG_PORTS:
+                ids, offset = _unpack('I', body, offset, count)
+                columns = []
+                for _ in PORT_COUNTERS:
+                    column, offset = _unpack('Q', body, offset, count)
+                    columns.append(column)
+                for index, *values in zip(ids, *columns):
+                    sw_index, port_name = ports[index]
+                    stats = {'switch_name': switches[sw_index], 'port_name': port_name}
+                    stats.update(zip(PORT_COUNTERS, values))
+                    switch_entries[sw_index]['ports'][port_name] = stats
+
+            elif tag == TAG_LATENCY:
+                src, offset = _unpack('I', body, offset, count)
+                dst, offset = _unpack('I', body, offset, count)
+                lat, offset = _unpack('f', body, offset, count)
+                loss, offset = _unpack('f', body, offset, count)
+                jitter, offset = _unpack('f', body, offset, count)
+                batch['latency'] = [
+                    {'pair': f"{hosts[a]}-{hosts[b]}", 'latency': round(l, 3), 'loss': round(p, 2),
+                     'jitter': round(j, 3)}
+                    for a, b, l, p, j in zip(src, dst, lat, loss, jitter)
+                ]
+
+            elif tag == TAG_EXTRAS:
+                extras = json.loads(body[offset:offset + count])
+                offset += count
+                unknown = extras.pop('_unknown', {})
+                batch.update(extras)
+                batch['hosts'] += unknown.get('hosts', [])
+                batch['links'] += unknown.get('links', [])
+                batch['switches'] += unknown.get('switches', [])
+                batch['latency'] += unknown.get('latency', [])
+                by_name = {s['name']: s for s in batch['switches']}
+                for sw_name, extra_ports in unknown.get('ports', {}).items():
+                    if sw_name in by_name:
+                        by_name[sw_name]['ports'].update(extra_ports)
+
+            else:
+                raise ValueError(f"Unknown telemetry section {tag}")
+
+        return batch
+
+
+telemetry_decoder = TelemetryDecoder()
@@ -0,0 +1,111 @@
+# backend/app/services/telemetry_delta.py
+"""
+DELTA TELEMETRY (PHÍA BACKEND)
+------------------------------
+MỤC ĐÍCH:
+- Mininet (mininet_twin/services/delta_tracker.py) chỉ gửi entity đã thay đổi, kèm
+    'delta': {'keyframe': bool, 'base': id keyframe, 'missing': {...}}
+- Keyframe chốt ROSTER host / link / switch; batch delta thì:
+    KHÔNG ĐỔI = roster - entity có trong batch - 'missing'
+  → socket_events làm mới last_update_time của chúng để reaper không đánh offline
+- Entity 'missing' (hoặc ngoài roster) KHÔNG được làm mới → reaper xử lý như cũ
+- Entity không đổi (kể cả cặp latency) được bù bằng giá trị cuối trong twin trước
+  khi ghi InfluxDB → lịch sử liền mạch như khi gửi đủ
+- Batch không có 'delta' (DELTA_TELEMETRY=false, Mininet bản cũ) = gửi đủ, không cần roster
+
+MẤT ĐỒNG BỘ:
+- Delta có 'base' khác keyframe đã nhận (Backend restart, keyframe bị drop)
+  → resolve() trả need_keyframe → socket_events emit 'telemetry_keyframe' về Mininet
+- Reaper đánh offline / down entity (Mininet chậm quá TIMEOUT) → request_keyframe():
+  batch delta kế tiếp yêu cầu keyframe, không thì entity không đổi bị kẹt offline
+  tới keyframe định kỳ (DELTA_KEYFRAME_INTERVAL)
+"""
+
+
+from app.utils.green import native_lock
+from app.utils.logger import get_logger
+
+logger = get_logger()
+
+ROSTER_KEYS = {'hosts': 'name', 'links': 'id', 'switches': 'name', 'latency': 'pair'}
+
+
+class TelemetryDelta:
+    """
+    Example Usage:
+    --------------
+    unchanged, need_keyframe = telemetry_delta.resolve(data)
+    for name in unchanged['hosts']: ...                  # chỉ heartbeat
+    if need_keyframe: emit('telemetry_keyframe', {'reason': need_keyframe})
+    """
+
+    def __init__(self):
+        # resolve() chạy trong offload cùng _apply_to_twin → native lock
+        self._lock = native_lock()
+        self._base = None
+        # Lý do cần keyframe do Backend tự phát hiện (reaper...), None = không cần
+        self._resync = None
+        # key → {id: entry tối thiểu} (link giữ 'nodes' nếu có, để tra link trong twin)
+        self._roster = {key: {} for key in ROSTER_KEYS}
+        self.stats = {'keyframes': 0, 'deltas': 0, 'resync_requests': 0,
+                      'last_sent': 0, 'last_suppressed': 0}
+
+    def resolve(self, data):
+        """
+        Args:
+            data (dict): Telemetry batch (đã giải mã)
+
+        Returns:
+            tuple: (unchanged: {'hosts': [entry], 'links': [entry], 'switches': [entry]},
+                    need_keyframe: None | str lý do)
+        """
+        unchanged = {key: [] for key in ROSTER_KEYS}
+        delta = data.get('delta')
+        if not delta:
+            return unchanged, None
+
+        with self._lock:
+            self.stats['last_sent'] = delta.get('sent', 0)
+            self.stats['last_suppressed'] = delta.get('suppressed', 0)
+
+            if delta.get('keyframe'):
+                self._base = delta.get('base')
+                for key, field in ROSTER_KEYS.items():
+                    self._roster[key] = {
+                        entry[field]: {field: entry[field], **({'nodes': entry['nodes']} if 'nodes' in entry else {})}
+                        for entry in data.get(key, []) if isinstance(entry, dict)
+                    }
+                self.stats['keyframes'] += 1
+                self._resync = None
+                return unchanged, None
+
+            self.stats['deltas'] += 1
+            if self._base is None or delta.get('base') != self._base:
+                self.stats['resync_requests'] += 1
+                return unchanged, f"no roster for base {delta.get('base')} (have {self._base})"
+
+            missing = delta.get('missing', {})
+            for key, field in ROSTER_KEYS.items():
+                skip = set(missing.get(key, ()))
+                skip.update(entry[field] for entry in data.get(key, []) if isinstance(entry, dict))
+                unchanged[key] = [entry for ident, entry in self._roster[key].items() if ident not in skip]
+
+            reason, self._resync = self._resync, None
+            if reason:
+                self.stats['resync_requests'] += 1
+
+        return unchanged, reason
+
+    def request_keyframe(self, reason):
+        """Twin lệch khỏi giá trị Mininet đã gửi (vd: reaper đánh offline) → batch delta kế tiếp yêu cầu keyframe"""
+        with self._lock:
+            if self._base is not None and not self._resync:
+                self._resync = reason
+
+    def metrics(self):
+        with self._lock:
+            return {'base': self._base, **self.stats,
+                    'roster': {key: len(entries) for key, entries in self._roster.items()}}
+
+
+telemetry_delta = TelemetryDelta()
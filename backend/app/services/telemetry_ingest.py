@@ -0,0 +1,132 @@
+# backend/app/services/telemetry_ingest.py
+"""
+TELEMETRY INGEST - SEQ / GAP / LAG
+----------------------------------
+MỤC ĐÍCH:
+- Mininet (mininet_twin/services/flow_control.py) đánh 'seq' tăng dần cho mỗi batch
+- Backend theo dõi seq theo từng nguồn gửi → đếm batch bị thiếu (gap), trùng / đảo thứ tự
+- Lag end-to-end = lúc Backend áp dụng xong - 'timestamp' của batch (lúc Mininet bắt
+  đầu thu thập) → gồm thời gian thu thập, truyền, chờ trong buffer Socket.IO và xử lý
+- Kết quả ack về Mininet ('telemetry_ack') để bên gửi điều chỉnh cửa sổ, và nằm trong
+  /api/control/health → emulator.ingest
+
+LƯU Ý:
+- seq quay về 1 (Mininet restart) → bắt đầu lại, không tính là gap
+- Batch không có 'seq' (Mininet bản cũ) → không theo dõi gap
+- Batch phát lại từ spool ('mininet_telemetry_replay') chỉ được đếm, không tính gap / lag
+"""
+
+import time
+
+from app.utils.green import native_lock
+from app.utils.logger import get_logger
+
+logger = get_logger()
+
+EMA_ALPHA = 0.2
+
+
+class IngestTracker:
+    """
+    Example Usage:
+    --------------
+    ingest_tracker.observe(request.sid, data.get('seq'))
+    ack = ingest_tracker.complete(request.sid, data, stored=True, queue_ratio=0.1)
+    emit('telemetry_ack', ack)
+    """
+
+    def __init__(self):
+        # metrics() được gọi trong offload (_apply_to_twin) → native lock
+        self._lock = native_lock()
+        # nguồn gửi (sid / địa chỉ ingest) → seq lớn nhất đã nhận
+        self._last_seq = {}
+        self.stats = {
+            'received': 0, 'gaps': 0, 'missing_batches': 0, 'duplicates': 0,
+            'restarts': 0, 'unstored': 0, 'lag_ms': None, 'lag_ms_max': 0.0,
+            'replayed': 0, 'replay_rejected': 0
+        }
+
+    def observe(self, source, seq):
+        """
+        Ghi nhận seq của batch vừa tới (gọi TRƯỚC khi áp dụng)
+
+        Returns:
+            int: Số batch bị thiếu ngay trước batch này (0 nếu liền mạch)
+        """
+        if seq is None:
+            return 0
+        with self._lock:
+            self.stats['received'] += 1
+            last = self._last_seq.get(source)
+            self._last_seq[source] = seq if last is None else max(last, seq)
+
+            if last is None:
+                return 0
+            if seq <= last:
+                if seq == 1:
+                    self.stats['restarts'] += 1
+                    self._last_seq[source] = seq
+                else:
+                    self.stats['duplicates'] += 1
+                return 0
+
+            missing = seq - last - 1
+            if missing:
+                self.stats['gaps'] += 1
+                self.stats['missing_batches'] += missing
+        if missing:
+            logger.warning(f"[INGEST] Gap from {source}: {missing} batch(es) missing before seq {seq}")
+        return missing
+
+    def complete(self, source, data, stored=True, queue_ratio=0.0):
+        """
+        Batch đã áp dụng xong vào Digital Twin
+
+        Args:
+            stored (bool): False nếu bị bỏ khỏi queue ghi InfluxDB (queue đầy)
+            queue_ratio (float): Độ đầy queue ghi DB (0..1)
+
+        Returns:
+            dict | None: Payload 'telemetry_ack' (None nếu batch không có seq)
+        """
+        seq = data.get('seq')
+        timestamp = data.get('timestamp')
+        lag_ms = round((time.time() - timestamp) * 1000, 2) if timestamp else None
+
+        with self._lock:
+            if not stored:
+                self.stats['unstored'] += 1
+            if lag_ms is not None:
+                previous = self.stats['lag_ms']
+                self.stats['lag_ms'] = round(
+                    lag_ms if previous is None else lag_ms * EMA_ALPHA + previous * (1 - EMA_ALPHA), 2
+                )
+                self.stats['lag_ms_max'] = max(self.stats['lag_ms_max'], lag_ms)
+            gaps = self.stats['missing_batches']
+
+        if seq is None:
+            return None
+        return {
+            'seq': seq,
+            'stored': stored,
+            'queue_ratio': round(queue_ratio, 3),
+            'lag_ms': lag_ms,
+            'gaps': gaps
+        }
+
+    def record_replay(self, stored):
+        """Batch lịch sử từ spool của Mininet (không tính seq / lag)"""
+        with self._lock:
+            self.stats['replayed' if stored else 'replay_rejected'] += 1
+
+    def forget(self, source):
+        """Nguồn gửi ngắt kết nối"""
+        with self._lock:
+            self._last_seq.pop(source, None)
+
+    def metrics(self):
+        with self._lock:
+            return {**self.stats, 'sources': dict(self._last_seq)}
+
+
+ingest_tracker = IngestTracker()
@@ -0,0 +1,43 @@
+# backend/app/utils/green.py
+"""
+EVENTLET HELPERS - ĐẨY VIỆC CPU-BOUND RA KHỎI HUB
+-------------------------------------------------
+MỤC ĐÍCH:
+- run.py monkey-patch eventlet → mọi request / event Socket.IO / background task chạy
+  trên 1 hub duy nhất; 1 đoạn CPU-bound dài (giải mã, áp dụng batch telemetry lớn)
+  chặn luôn dashboard + REST trong lúc đó
+- offload(): chạy hàm trong native thread pool của eventlet (tpool), greenthread gọi
+  chỉ chờ kết quả → hub vẫn phục vụ greenthread khác. Không monkey-patch → gọi thẳng
+
+LƯU Ý (hàm chạy qua offload):
+- Lock / Queue / Event của module threading đã bị patch thành bản GREEN: KHÔNG an toàn
+  khi tranh chấp giữa native thread và hub → state dùng chung với code offload phải
+  khóa bằng native_lock()
+- native_lock() chỉ dùng cho đoạn khóa NGẮN, không yield (không I/O, không emit,
+  không logger) → greenthread chờ lock chỉ chặn hub trong vài micro/mili giây
+- Không logger / socketio.emit / ghi queue trong hàm offload: trả kết quả về rồi
+  greenthread gọi tự log / emit
+"""
+
+import threading
+
+try:
+    from eventlet import patcher, tpool
+    GREEN = patcher.is_monkey_patched('thread')
+    _native_threading = patcher.original('threading')
+except ImportError:
+    tpool = None
+    GREEN = False
+    _native_threading = threading
+
+
+def offload(fn, *args):
+    """fn(*args) trong native thread pool khi chạy eventlet, ngược lại gọi thẳng"""
+    if GREEN:
+        return tpool.execute(fn, *args)
+    return fn(*args)
+
+
+def native_lock():
+    """Lock của OS (không bị eventlet patch) - dùng chung được giữa hub và offload()"""
+    return _native_threading.Lock()
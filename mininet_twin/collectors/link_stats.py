@@ -70,10 +70,13 @@ _link_status_cache = {}  # {link_id: 'up'/'down'}
 
 #     return link_metrics
 
-def collect_link_metrics(net, link_byte_counters, prev_throughput_tracker, sync_interval):
+def collect_link_metrics(net, link_byte_counters, prev_throughput_tracker, sync_interval, read_bytes=None):
     """
     Thu thập dữ liệu các link với Fast Cut-off khi DOWN
     
+    read_bytes(node, intf_name) → (rx, tx) | None: counter đã được collector worker đọc sẵn
+    (collectors/worker_pool.py); None / thiếu → đọc qua shell của node như cũ
+    
     ✅ CHIẾN THUẬT:
     - Nếu link DOWN (status cache) → throughput = 0 ngay lập tức
     - Nếu link UP nhưng throughput = 0 → Áp dụng EMA
@@ -122,7 +125,8 @@ def collect_link_metrics(net, link_byte_counters, prev_throughput_tracker, sync_
 
         if not target_node: continue
 
-        rx, tx = get_switch_interface_bytes(target_node, target_intf)
+        counters = read_bytes(target_node, target_intf) if read_bytes else None
+        rx, tx = counters if counters is not None else get_switch_interface_bytes(target_node, target_intf)
         
         # ========================================
         # ✅ BƯỚC 3: TÍNH THROUGHPUT RAW
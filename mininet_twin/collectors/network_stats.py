@@ -13,6 +13,15 @@ _cache_lock = threading.Lock()
 _stop_event = threading.Event() #  Dùng Event để quản lý dừng thread an toàn
 _thread = None
 
+# Số cặp host đo mỗi vòng lặp (self-monitor giảm khi máy emulator quá tải)
+MAX_SAMPLES_PER_CYCLE = 10
+_probe_budget = MAX_SAMPLES_PER_CYCLE
+
+def set_probe_budget(budget):
+    """Đặt số cặp ping mỗi vòng (None = trở về MAX_SAMPLES_PER_CYCLE)"""
+    global _probe_budget
+    _probe_budget = MAX_SAMPLES_PER_CYCLE if budget is None else max(1, int(budget))
+
 def parse_ping_output(output):
     """
     Phân tích kết quả ping để lấy Latency, Loss và Jitter (mdev).
@@ -44,7 +53,6 @@ def _measurement_loop(net):
     
     # Tạo danh sách tất cả các cặp có thể có (Pair Generator)
     hosts = net.hosts
-    MAX_SAMPLES_PER_CYCLE = 10  # CHỈNH SỬA: Giới hạn số cặp đo mỗi vòng lặp
     # all_pairs = list(itertools.combinations(hosts, 2))
     
 
@@ -63,7 +71,7 @@ def _measurement_loop(net):
             # TƯ DUY MỚI: Chọn ngẫu nhiên các cặp thay vì duyệt toàn bộ
             # Tạo danh sách các cặp ngẫu nhiên cho vòng lặp này
             current_batch = []
-            for _ in range(MAX_SAMPLES_PER_CYCLE):
+            for _ in range(_probe_budget):
                 # Chọn 2 host ngẫu nhiên khác nhau
                 src, dst = random.sample(host_list, 2)
                 current_batch.append((src, dst))
@@ -0,0 +1,227 @@
+# mininet_twin/collectors/self_monitor.py
+"""
+EMULATOR SELF-MONITOR + LOAD SHEDDING
+-------------------------------------
+MỤC ĐÍCH:
+- Máy chạy Mininet bão hòa → ping latency, rate của traffic, nhịp vòng lặp thu thập
+  đều SAI mà không ai biết
+- Mỗi vòng lặp chính: đo tình trạng của CHÍNH máy emulator
+    * cpu_busy   : % CPU bận (100 - idle - iowait), psutil
+    * steal      : % CPU bị hypervisor lấy (VM bị oversubscribe)
+    * softirq    : % CPU xử lý softirq (veth / tc / OVS datapath)
+    * run_queue  : số process runnable / số CPU (/proc/loadavg, tức thời)
+    * overrun    : thời gian 1 vòng thu thập / SYNC_INTERVAL
+- Vượt ngưỡng → giảm tải (load shedding) theo cấp:
+    normal   : không đổi
+    degraded : traffic × 0.5, SYNC_INTERVAL × 1.5, probe budget 5
+    critical : traffic × 0.2, SYNC_INTERVAL × 2.5, probe budget 2
+- Trạng thái gửi kèm telemetry (telemetry_batch['emulator']) → dashboard đánh dấu
+  khoảng thời gian độ chính xác bị giảm
+
+HYSTERESIS:
+- Lên cấp khi SELF_MONITOR_ESCALATE_TICKS mẫu liên tiếp ở cấp cao hơn
+- Xuống 1 cấp khi SELF_MONITOR_RECOVERY_TICKS mẫu liên tiếp ở cấp thấp hơn
+  (không dao động bật/tắt mỗi giây)
+
+CẤU HÌNH (ngưỡng degraded / critical):
+- SELF_MONITOR_CPU_BUSY       : 85 / 95   (%)
+- SELF_MONITOR_STEAL          : 5 / 15    (%)
+- SELF_MONITOR_SOFTIRQ        : 15 / 30   (%)
+- SELF_MONITOR_RUN_QUEUE      : 1.5 / 3.0 (runnable / CPU)
+- SELF_MONITOR_OVERRUN        : 0.8 / 1.2 (vòng lặp / SYNC_INTERVAL)
+- Dạng "degraded,critical", vd: SELF_MONITOR_CPU_BUSY=80,90
+"""
+
+import os
+import time
+import psutil
+from utils.logger import setup_logger
+
+logger = setup_logger()
+
+SELF_MONITOR_ENABLED = os.getenv('SELF_MONITOR_ENABLED', 'true').lower() == 'true'
+
+ESCALATE_TICKS = int(os.getenv('SELF_MONITOR_ESCALATE_TICKS', 2))
+RECOVERY_TICKS = int(os.getenv('SELF_MONITOR_RECOVERY_TICKS', 5))
+
+LEVELS = ('normal', 'degraded', 'critical')
+
+
+def _thresholds(name, default):
+    raw = os.getenv(name)
+    if not raw:
+        return default
+    degraded, critical = (float(v) for v in raw.split(','))
+    return degraded, critical
+
+
+THRESHOLDS = {
+    'cpu_busy': _thresholds('SELF_MONITOR_CPU_BUSY', (85.0, 95.0)),
+    'steal': _thresholds('SELF_MONITOR_STEAL', (5.0, 15.0)),
+    'softirq': _thresholds('SELF_MONITOR_SOFTIRQ', (15.0, 30.0)),
+    'run_queue': _thresholds('SELF_MONITOR_RUN_QUEUE', (1.5, 3.0)),
+    'overrun': _thresholds('SELF_MONITOR_OVERRUN', (0.8, 1.2)),
+}
+
+# Knob theo cấp: (traffic scale, hệ số SYNC_INTERVAL, probe budget)
+SHEDDING = {
+    'normal': (1.0, 1.0, None),
+    'degraded': (
+        float(os.getenv('SELF_MONITOR_TRAFFIC_SCALE_DEGRADED', 0.5)),
+        float(os.getenv('SELF_MONITOR_INTERVAL_FACTOR_DEGRADED', 1.5)),
+        int(os.getenv('SELF_MONITOR_PROBE_BUDGET_DEGRADED', 5))
+    ),
+    'critical': (
+        float(os.getenv('SELF_MONITOR_TRAFFIC_SCALE_CRITICAL', 0.2)),
+        float(os.getenv('SELF_MONITOR_INTERVAL_FACTOR_CRITICAL', 2.5)),
+        int(os.getenv('SELF_MONITOR_PROBE_BUDGET_CRITICAL', 2))
+    ),
+}
+
+
+def read_run_queue():
+    """Số process đang runnable (trừ chính mình) / số CPU, từ /proc/loadavg"""
+    try:
+        with open('/proc/loadavg') as f:
+            running = int(f.read().split()[3].split('/')[0])
+    except (OSError, IndexError, ValueError):
+        return 0.0
+    return max(0, running - 1) / (psutil.cpu_count() or 1)
+
+
+class SelfMonitor:
+    """
+    Đo + quyết định cấp giảm tải; các thành phần bị điều chỉnh được gắn qua callback
+
+    Example Usage:
+    --------------
+    monitor = SelfMonitor(base_interval=SYNC_INTERVAL)
+    monitor.on_change(lambda state: traffic_gen.set_rate_scale(state['traffic_scale']))
+    ...
+    monitor.sample(loop_elapsed)
+    telemetry_batch['emulator'] = monitor.state()
+    time.sleep(monitor.sync_interval - loop_elapsed)
+    """
+
+    def __init__(self, base_interval, base_probe_budget=None, enabled=SELF_MONITOR_ENABLED):
+        self.base_interval = base_interval
+        self.base_probe_budget = base_probe_budget
+        self.enabled = enabled
+        self.level = 'normal'
+        self.metrics = {}
+        self.reasons = []
+        self.degraded_since = None
+        self._higher = 0
+        self._lower = 0
+        self._callbacks = []
+
+        # Lần gọi đầu của cpu_times_percent(None) luôn trả 0 → mồi trước
+        psutil.cpu_times_percent(interval=None)
+
+    def on_change(self, callback):
+        """callback(state) mỗi khi cấp giảm tải thay đổi"""
+        self._callbacks.append(callback)
+
+    # ========================================
+    # KNOBS
+    # ========================================
+
+    @property
+    def traffic_scale(self):
+        return SHEDDING[self.level][0]
+
+    @property
+    def sync_interval(self):
+        return self.base_interval * SHEDDING[self.level][1]
+
+    @property
+    def probe_budget(self):
+        return SHEDDING[self.level][2] or self.base_probe_budget
+
+    # ========================================
+    # ĐO + QUYẾT ĐỊNH
+    # ========================================
+
+    def sample(self, loop_elapsed):
+        """
+        Lấy 1 mẫu (gọi 1 lần / vòng lặp chính, sau khi thu thập xong)
+
+        Args:
+            loop_elapsed (float): Thời gian (giây) vòng lặp vừa rồi dùng để thu thập + gửi
+
+        Returns:
+            str: Cấp hiện tại ('normal' | 'degraded' | 'critical')
+        """
+        cpu = psutil.cpu_times_percent(interval=None)
+        self.metrics = {
+            'cpu_busy': round(100.0 - cpu.idle - getattr(cpu, 'iowait', 0.0), 1),
+            'steal': round(getattr(cpu, 'steal', 0.0), 1),
+            'softirq': round(getattr(cpu, 'softirq', 0.0), 1),
+            'run_queue': round(read_run_queue(), 2),
+            'overrun': round(loop_elapsed / self.base_interval, 2) if self.base_interval else 0.0
+        }
+
+        if not self.enabled:
+            return self.level
+
+        observed = 0
+        reasons = []
+        for name, (degraded, critical) in THRESHOLDS.items():
+            value = self.metrics[name]
+            if value >= critical:
+                observed = 2
+                reasons.append(f"{name}={value}≥{critical}")
+            elif value >= degraded:
+                observed = max(observed, 1)
+                reasons.append(f"{name}={value}≥{degraded}")
+        self.reasons = reasons
+
+        current = LEVELS.index(self.level)
+        if observed > current:
+            self._higher += 1
+            self._lower = 0
+            if self._higher >= ESCALATE_TICKS:
+                self._set_level(LEVELS[observed])
+        elif observed < current:
+            self._lower += 1
+            self._higher = 0
+            if self._lower >= RECOVERY_TICKS:
+                self._set_level(LEVELS[current - 1])
+        else:
+            self._higher = self._lower = 0
+
+        return self.level
+
+    def state(self):
+        """Trạng thái gửi kèm telemetry"""
+        return {
+            'level': self.level,
+            'reasons': self.reasons,
+            'degraded_since': self.degraded_since,
+            **self.metrics,
+            'traffic_scale': self.traffic_scale,
+            'sync_interval': round(self.sync_interval, 3),
+            'probe_budget': self.probe_budget
+        }
+
+    def _set_level(self, level):
+        previous, self.level = self.level, level
+        self._higher = self._lower = 0
+
+        if level == 'normal':
+            self.degraded_since = None
+        elif self.degraded_since is None:
+            self.degraded_since = time.time()
+
+        log = logger.info if LEVELS.index(level) < LEVELS.index(previous) else logger.warning
+        log(
+            f"[SELF-MONITOR] {previous} → {level} ({', '.join(self.reasons) or 'recovered'}) | "
+            f"traffic×{self.traffic_scale}, interval={self.sync_interval:.2f}s, probes={self.probe_budget}"
+        )
+
+        state = self.state()
+        for callback in self._callbacks:
+            try:
+                callback(state)
+            except Exception as e:
+                logger.error(f"[SELF-MONITOR] Callback error: {e}")
@@ -10,6 +10,56 @@ _switch_cache = {}
 _last_measure_time = 0
 MEASURE_INTERVAL = 5.0  
 
+def parse_dump_ports(sw_name, output):
+    """
+    Parse output `ovs-ofctl dump-ports <sw>` → {port: {rx/tx packets, bytes, dropped, errors}}
+
+    (Dùng chung cho process chính và collector worker - collectors/worker_pool.py)
+    """
+    ports = {}
+    current_port = None
+    for line in output.split('\n'):
+        line = line.strip()
+        port_match = re.search(r'port\s+"([^"]+)":', line, re.IGNORECASE)
+        if port_match:
+            current_port = port_match.group(1)
+            ports[current_port] = {
+                "switch_name": sw_name,  
+                "port_name": current_port,
+                "rx_packets": 0, "tx_packets": 0,
+                "rx_bytes": 0, "tx_bytes": 0,
+                "dropped": 0, "errors": 0
+            }
+            
+        if current_port:
+            if "rx pkts=" in line:
+                rx_match = re.search(r'rx pkts=(\d+).*bytes=(\d+).*drop=(\d+).*errs=(\d+)', line)
+                if rx_match:
+                    stats = ports[current_port]
+                    stats["rx_packets"] = int(rx_match.group(1))
+                    stats["rx_bytes"] = int(rx_match.group(2))
+                    stats["dropped"] += int(rx_match.group(3))
+                    stats["errors"] += int(rx_match.group(4))
+            elif "tx pkts=" in line:
+                tx_match = re.search(r'tx pkts=(\d+).*bytes=(\d+).*drop=(\d+).*errs=(\d+)', line)
+                if tx_match:
+                    stats = ports[current_port]
+                    stats["tx_packets"] = int(tx_match.group(1))
+                    stats["tx_bytes"] = int(tx_match.group(2))
+                    stats["dropped"] += int(tx_match.group(3))
+                    stats["errors"] += int(tx_match.group(4))
+    return ports
+
+def measurement_due():
+    """Đã tới lúc dump-ports lại chưa (cache MEASURE_INTERVAL)"""
+    return not _switch_cache or time.time() - _last_measure_time >= MEASURE_INTERVAL
+
+def store_port_stats(switch_metrics):
+    """Ghi kết quả dump-ports do collector worker trả về vào cache"""
+    global _last_measure_time
+    _switch_cache.update(switch_metrics)
+    _last_measure_time = time.time()
+
 def collect_switch_port_stats(net):
     """
     Thu thập thông số từng cổng của tất cả Switch trong mạng.
@@ -18,7 +68,7 @@ def collect_switch_port_stats(net):
     global _last_measure_time, _switch_cache
     current_time = time.time()
     # Nếu chưa đến lúc đo lại, trả về kết quả cũ (Cache)
-    if current_time - _last_measure_time < MEASURE_INTERVAL and _switch_cache:
+    if not measurement_due():
         return _switch_cache
 
     switch_metrics = {}
@@ -31,53 +81,7 @@ def collect_switch_port_stats(net):
             cmd = f"ovs-ofctl dump-ports {sw_name}"
             output = sw.cmd(cmd)
             #logger.info(f"[DEBUG OVS] {sw_name} Output:\n{output}")
-            
-            # # Xử lý text trả về (Parsing)
-            # current_port = None
-            
-            # for line in output.split('\n'):
-            #     line = line.strip()
-            #     port_match = re.search(r'port\s+"([^"]+)":', line, re.IGNORECASE)
-            #     if port_match:
-            #         current_port = port_match.group(1)
-            #         switch_metrics[sw_name][current_port] = {
-            #             "rx_packets": 0, "tx_packets": 0,
-            #             "rx_bytes": 0, "tx_bytes": 0,
-            #             "dropped": 0, "errors": 0
-            #         }
-                
-                # Nếu đang ở trong context của một port, bắt dữ liệu RX/TX
-            current_port = None
-            for line in output.split('\n'):
-                line = line.strip()
-                port_match = re.search(r'port\s+"([^"]+)":', line, re.IGNORECASE)
-                if port_match:
-                    current_port = port_match.group(1)
-                    switch_metrics[sw_name][current_port] = {
-                        "switch_name": sw_name,  
-                        "port_name": current_port,
-                        "rx_packets": 0, "tx_packets": 0,
-                        "rx_bytes": 0, "tx_bytes": 0,
-                        "dropped": 0, "errors": 0
-                    }
-                    
-                if current_port:
-                    if "rx pkts=" in line:
-                        rx_match = re.search(r'rx pkts=(\d+).*bytes=(\d+).*drop=(\d+).*errs=(\d+)', line)
-                        if rx_match:
-                            stats = switch_metrics[sw_name][current_port]
-                            stats["rx_packets"] = int(rx_match.group(1))
-                            stats["rx_bytes"] = int(rx_match.group(2))
-                            stats["dropped"] += int(rx_match.group(3))
-                            stats["errors"] += int(rx_match.group(4))
-                    elif "tx pkts=" in line:
-                        tx_match = re.search(r'tx pkts=(\d+).*bytes=(\d+).*drop=(\d+).*errs=(\d+)', line)
-                        if tx_match:
-                            stats = switch_metrics[sw_name][current_port]
-                            stats["tx_packets"] = int(tx_match.group(1))
-                            stats["tx_bytes"] = int(tx_match.group(2))
-                            stats["dropped"] += int(tx_match.group(3))
-                            stats["errors"] += int(tx_match.group(4))
+            switch_metrics[sw_name] = parse_dump_ports(sw_name, output)
 
         except Exception as e:
             logger.error(f"Lỗi lấy switch stats {sw_name}: {e}")
@@ -85,4 +89,4 @@ def collect_switch_port_stats(net):
     _switch_cache = switch_metrics
     _last_measure_time = current_time
 
-    return switch_metrics
\ No newline at end of file
+    return switch_metrics
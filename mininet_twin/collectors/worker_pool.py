@@ -0,0 +1,368 @@
+# mininet_twin/collectors/worker_pool.py
+"""
+COLLECTOR WORKER POOL (MULTIPROCESS)
+------------------------------------
+MỤC ĐÍCH:
+- Main loop, ping thread, traffic generator, Socket.IO client chung 1 interpreter (GIL)
+  → mỗi vòng lặp: N lần h.cmd('cat /proc/net/dev | grep ...') + parse text tuần tự,
+  tranh CPU với socket I/O
+- Pool COLLECTOR_WORKERS process đọc counter TRỰC TIẾP từ kernel, không qua shell Mininet:
+    * byte counter : /proc/<pid host>/net/dev (đọc được từ root, đúng namespace của host)
+                     + /proc/self/net/dev cho namespace gốc (interface của switch)
+    * host up/down : setns vào netns của host + ioctl SIOCGIFFLAGS (IFF_UP)
+    * port switch  : `ovs-ofctl dump-ports` + parse (switch_stats.parse_dump_ports)
+- Shard: namespace của host chia round-robin theo worker, switch chia round-robin theo worker
+  (shard gửi 1 lần, chỉ gửi lại khi topology đổi)
+- 1 aggregator (process chính, giữ socket): mỗi vòng gửi 'collect' tới mọi worker,
+  chờ kết quả qua Pipe (dict nhỏ các tuple) tới COLLECTOR_TIMEOUT
+- Worker trễ / chết → namespace của nó đọc lại bằng đường cũ (h.cmd) trong vòng đó,
+  worker chết được spawn lại ở vòng sau
+
+CẤU HÌNH:
+- COLLECTOR_WORKERS : Số worker process (0 = tắt, thu thập trong process chính như cũ)
+- COLLECTOR_TIMEOUT : Thời gian chờ kết quả tối đa mỗi vòng (giây)
+
+LƯU Ý:
+- Worker spawn từ process Python → kế thừa vùng CPU 'collector' (core/affinity.py);
+  nhiều worker thì tăng AFFINITY_COLLECTOR_SHARE cho tương xứng
+"""
+
+import ctypes
+import fcntl
+import multiprocessing
+import os
+import signal
+import socket
+import struct
+import subprocess
+import time
+from multiprocessing.connection import wait
+from utils.logger import setup_logger
+
+logger = setup_logger()
+
+COLLECTOR_WORKERS = int(os.getenv('COLLECTOR_WORKERS', 0))
+COLLECTOR_TIMEOUT = float(os.getenv('COLLECTOR_TIMEOUT', 0.5))
+
+# Key namespace gốc (interface của switch) trong kết quả
+ROOT_NS = ''
+
+CLONE_NEWNET = 0x40000000
+SIOCGIFFLAGS = 0x8913
+IFF_UP = 0x1
+
+
+# ========================================
+# ĐỌC COUNTER (CHẠY TRONG WORKER)
+# ========================================
+
+def read_net_dev(path):
+    """
+    /proc/<pid>/net/dev → {intf: (rx_bytes, tx_bytes)}
+    """
+    counters = {}
+    with open(path) as f:
+        for line in f.readlines()[2:]:
+            name, _, stats = line.partition(':')
+            parts = stats.split()
+            if len(parts) >= 9:
+                counters[name.strip()] = (int(parts[0]), int(parts[8]))
+    return counters
+
+
+_libc = None
+
+
+def _setns(fd):
+    global _libc
+    if hasattr(os, 'setns'):
+        os.setns(fd, CLONE_NEWNET)
+        return
+    if _libc is None:
+        _libc = ctypes.CDLL(None, use_errno=True)
+    if _libc.setns(fd, CLONE_NEWNET) != 0:
+        errno = ctypes.get_errno()
+        raise OSError(errno, os.strerror(errno))
+
+
+def interface_up(pid, intf, own_ns):
+    """
+    Cờ IFF_UP của interface trong netns của pid
+
+    Socket tạo SAU setns thuộc netns đó → ioctl thấy đúng interface của host
+    Host bị tắt giữa lúc chia shard và lúc đọc (netns / interface không còn) → False,
+    chỉ host đó bị đánh down, không làm hỏng kết quả cả shard
+    """
+    fd = None
+    try:
+        fd = os.open(f'/proc/{pid}/ns/net', os.O_RDONLY)
+        _setns(fd)
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+            request = struct.pack('16sH14s', intf.encode()[:15], 0, b'')
+            flags = struct.unpack('16sH14s', fcntl.ioctl(sock.fileno(), SIOCGIFFLAGS, request))[1]
+        return bool(flags & IFF_UP)
+    except OSError:
+        return False
+    finally:
+        if fd is not None:
+            os.close(fd)
+            _setns(own_ns)
+
+
+def collect_shard(shard, dump_ports, own_ns):
+    """
+    Thu thập 1 shard
+
+    Args:
+        shard (dict): {'root': bool, 'hosts': [(name, pid, default_intf)], 'switches': [name]}
+        dump_ports (bool): Có chạy ovs-ofctl dump-ports không (switch_stats cache 5s)
+        own_ns (int): fd netns gốc của worker (để setns quay về)
+
+    Returns:
+        dict: {'bytes': {ns: {intf: (rx, tx)}}, 'up': {host: bool}, 'ports': {sw: {...}}, 'failed': [host]}
+    """
+    from collectors.switch_stats import parse_dump_ports
+
+    result = {'bytes': {}, 'up': {}, 'ports': {}, 'failed': []}
+
+    if shard.get('root'):
+        result['bytes'][ROOT_NS] = read_net_dev('/proc/self/net/dev')
+
+    for name, pid, intf in shard.get('hosts', []):
+        try:
+            result['bytes'][name] = read_net_dev(f'/proc/{pid}/net/dev')
+        except (OSError, ValueError):
+            result['failed'].append(name)
+            continue
+        result['up'][name] = interface_up(pid, intf, own_ns)
+
+    if dump_ports:
+        for sw_name in shard.get('switches', []):
+            try:
+                output = subprocess.run(
+                    ['ovs-ofctl', 'dump-ports', sw_name],
+                    capture_output=True, text=True, timeout=2.0
+                ).stdout
+                result['ports'][sw_name] = parse_dump_ports(sw_name, output)
+            except (OSError, subprocess.SubprocessError):
+                continue
+
+    return result
+
+
+def _worker_main(conn):
+    """
+    Vòng lặp worker: ('shard', shard) | ('collect', seq, dump_ports) | ('quit',)
+    """
+    # Ctrl+C gửi tới cả process group → để process chính dừng worker
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    own_ns = os.open('/proc/self/ns/net', os.O_RDONLY)
+    shard = {}
+
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, OSError):
+            break
+
+        op = message[0]
+        if op == 'shard':
+            shard = message[1]
+        elif op == 'collect':
+            _, seq, dump_ports = message
+            start = time.perf_counter()
+            try:
+                result = collect_shard(shard, dump_ports, own_ns)
+            except Exception as e:
+                result = {'bytes': {}, 'up': {}, 'ports': {}, 'failed': [], 'error': str(e)}
+            result['ms'] = round((time.perf_counter() - start) * 1000, 2)
+            try:
+                conn.send(('result', seq, result))
+            except (BrokenPipeError, OSError):
+                break
+        elif op == 'quit':
+            break
+
+    os.close(own_ns)
+
+
+# ========================================
+# AGGREGATOR (PROCESS CHÍNH)
+# ========================================
+
+class CollectorSnapshot:
+    """Kết quả gộp của 1 vòng thu thập"""
+
+    def __init__(self, hosts):
+        self._hosts = hosts
+        self.bytes = {}
+        self.up = {}
+        self.ports = {}
+
+    def interface_bytes(self, node, intf):
+        """(rx, tx) của interface, None nếu worker không trả (link_stats đọc lại bằng shell)"""
+        ns = node.name if node.name in self._hosts else ROOT_NS
+        return self.bytes.get(ns, {}).get(intf)
+
+    def is_up(self, host_name):
+        """IFF_UP của interface mặc định của host, None nếu không có"""
+        return self.up.get(host_name)
+
+
+class CollectorPool:
+    """
+    Example Usage:
+    --------------
+    pool = CollectorPool(net, workers=4)
+    pool.start()
+    snapshot = pool.collect(dump_ports=switch_stats.measurement_due())
+    link_stats.collect_link_metrics(net, counters, tracker, interval, read_bytes=snapshot.interface_bytes)
+    pool.metrics()
+    # {'workers': 4, 'alive': 4, 'last_ms': 3.4, 'worker_ms_max': 2.9, 'timeouts': 0, 'respawns': 0}
+    pool.stop()
+    """
+
+    def __init__(self, net, workers=COLLECTOR_WORKERS, timeout=COLLECTOR_TIMEOUT):
+        self.net = net
+        self.size = max(1, workers)
+        self.timeout = timeout
+        # 'spawn': không fork process chính đang giữ thread + pipe của shell Mininet
+        self._ctx = multiprocessing.get_context('spawn')
+        self._workers = []  # [(Process, Connection)]
+        self._shards = []
+        self._hosts = set()
+        self._seq = 0
+        self._stats = {'last_ms': 0.0, 'worker_ms_max': 0.0, 'timeouts': 0, 'respawns': 0}
+
+    # ========================================
+    # VÒNG ĐỜI
+    # ========================================
+
+    def start(self):
+        self._workers = [self._spawn() for _ in range(self.size)]
+        self.reshard()
+        logger.info(f"[COLLECTOR] {self.size} worker process đang chạy ({len(self._hosts)} host namespaces)")
+
+    def _spawn(self):
+        parent, child = self._ctx.Pipe()
+        proc = self._ctx.Process(target=_worker_main, args=(child,), daemon=True, name='collector-worker')
+        proc.start()
+        child.close()
+        return proc, parent
+
+    def stop(self):
+        for proc, conn in self._workers:
+            try:
+                conn.send(('quit',))
+            except (BrokenPipeError, OSError):
+                pass
+        for proc, conn in self._workers:
+            proc.join(timeout=1.0)
+            if proc.is_alive():
+                proc.terminate()
+            conn.close()
+        self._workers = []
+
+    def reshard(self):
+        """Chia lại namespace / switch cho worker (gọi khi topology đổi)"""
+        hosts = [h for h in self.net.hosts if getattr(h, 'pid', None)]
+        self._hosts = {h.name for h in hosts}
+        self._shards = [
+            {'root': index == 0, 'hosts': [], 'switches': []}
+            for index in range(self.size)
+        ]
+        for index, host in enumerate(hosts):
+            self._shards[index % self.size]['hosts'].append((host.name, host.pid, host.defaultIntf().name))
+        for index, switch in enumerate(self.net.switches):
+            self._shards[index % self.size]['switches'].append(switch.name)
+
+        for index, (proc, conn) in enumerate(self._workers):
+            self._send(index, ('shard', self._shards[index]))
+
+    def on_topology_changed(self, net, diff):
+        """Hook sau reload_topology: chia shard lại theo host / switch mới"""
+        self.net = net
+        self.reshard()
+
+    # ========================================
+    # THU THẬP
+    # ========================================
+
+    def collect(self, dump_ports=False):
+        """
+        1 vòng thu thập song song trên mọi worker
+
+        Returns:
+            CollectorSnapshot: Namespace của worker trễ / lỗi vắng mặt (caller tự đọc lại)
+        """
+        start = time.perf_counter()
+        self._seq += 1
+        snapshot = CollectorSnapshot(self._hosts)
+
+        pending = {}
+        for index in range(len(self._workers)):
+            if self._send(index, ('collect', self._seq, dump_ports)):
+                pending[self._workers[index][1]] = index
+
+        worker_ms = 0.0
+        deadline = time.monotonic() + self.timeout
+        while pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            for conn in wait(list(pending), timeout=remaining):
+                try:
+                    kind, seq, result = conn.recv()
+                except (EOFError, OSError):
+                    pending.pop(conn, None)
+                    continue
+                if seq != self._seq:
+                    # Kết quả trễ của vòng trước
+                    continue
+                pending.pop(conn, None)
+                snapshot.bytes.update(result['bytes'])
+                snapshot.up.update(result['up'])
+                snapshot.ports.update(result['ports'])
+                worker_ms = max(worker_ms, result.get('ms', 0.0))
+                if result.get('error'):
+                    logger.warning(f"[COLLECTOR] Worker error: {result['error']}")
+
+        if pending:
+            self._stats['timeouts'] += len(pending)
+            logger.warning(f"[COLLECTOR] {len(pending)} worker không trả kết quả trong {self.timeout}s")
+
+        self._stats['last_ms'] = round((time.perf_counter() - start) * 1000, 2)
+        self._stats['worker_ms_max'] = worker_ms
+        return snapshot
+
+    def metrics(self):
+        return {
+            'workers': self.size,
+            'alive': sum(1 for proc, _ in self._workers if proc.is_alive()),
+            **self._stats
+        }
+
+    # ========================================
+    # PRIVATE
+    # ========================================
+
+    def _send(self, index, message):
+        """Gửi lệnh tới worker; worker chết → spawn lại + gửi lại shard"""
+        proc, conn = self._workers[index]
+        if not proc.is_alive():
+            logger.warning(f"[COLLECTOR] Worker {index} exited (code {proc.exitcode}), respawning")
+            conn.close()
+            self._workers[index] = self._spawn()
+            self._stats['respawns'] += 1
+            proc, conn = self._workers[index]
+            if message[0] != 'shard' and self._shards:
+                # Cùng guard với lệnh chính: 1 worker chết không làm sập vòng lặp collector
+                try:
+                    conn.send(('shard', self._shards[index]))
+                except (BrokenPipeError, OSError):
+                    return False
+        try:
+            conn.send(message)
+            return True
+        except (BrokenPipeError, OSError):
+            return False
@@ -0,0 +1,182 @@
+# mininet_twin/controllers/batch_plan.py
+"""
+BATCH PLAN - GOM LỆNH ip/tc THEO NAMESPACE
+-------------------------------------------
+MỤC ĐÍCH:
+- Disable 1 switch 48 port trước đây = ~150 lần node.cmd() (mỗi lần 1 round-trip
+  tới shell của node + 1 process tc/ip)
+- BatchPlan gom các lệnh theo namespace → chạy bằng `tc -force -batch` /
+  `ip -force -batch`: 1 round-trip cho mỗi namespace
+- Các namespace khác nhau chạy SONG SONG
+
+NAMESPACE:
+- Host: mỗi host 1 network namespace riêng → chạy qua node.cmd() (giữ node.lock)
+- Switch (OVSKernelSwitch): nằm chung root namespace → gom thành 1 plan,
+  chạy thẳng bằng subprocess từ process hiện tại
+
+THỨ TỰ:
+- Trong 1 namespace, lệnh chạy đúng thứ tự add
+- Các lệnh liên tiếp cùng tool (ip/tc) được gom vào 1 file batch
+
+Example Usage:
+--------------
+plan = BatchPlan()
+for intf in switch.intfList():
+    plan.tc(switch, f"qdisc replace dev {intf.name} root netem loss 100%")
+for h in hosts:
+    plan.ip(h, "neigh flush all")
+    plan.ip(h, f"link set dev {h.defaultIntf().name} down")
+    plan.ip(h, f"link set dev {h.defaultIntf().name} up")
+
+stats = plan.execute()
+# {'namespaces': 5, 'commands': 60, 'duration_ms': 18.3, 'errors': {}}
+"""
+
+import os
+import subprocess
+import tempfile
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from utils.logger import setup_logger
+
+logger = setup_logger()
+
+# Số namespace chạy song song tối đa
+BATCH_MAX_WORKERS = int(os.getenv('BATCH_MAX_WORKERS', 16))
+
+ROOT_NAMESPACE = '__root__'
+
+
+class BatchPlan:
+    """
+    Kế hoạch lệnh ip/tc, gom theo namespace, chạy 1 lần/namespace
+    """
+
+    def __init__(self):
+        # namespace key → {'node': node hoặc None, 'segments': [(tool, [lines])]}
+        self._namespaces = OrderedDict()
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    # ========================================
+    # BUILD PLAN
+    # ========================================
+
+    def ip(self, node, line):
+        """
+        Thêm 1 dòng `ip -batch` (không có chữ 'ip' ở đầu), vd: 'link set dev h1-eth0 up'
+
+        node=None → chạy ở root namespace (vd: tạo veth pair)
+        """
+        self._add(node, 'ip', line)
+        return self
+
+    def tc(self, node, line):
+        """Thêm 1 dòng `tc -batch` (không có chữ 'tc' ở đầu), vd: 'qdisc del dev s1-eth1 root'"""
+        self._add(node, 'tc', line)
+        return self
+
+    def _add(self, node, tool, line):
+        key = self._namespace_key(node)
+        entry = self._namespaces.get(key)
+        if entry is None:
+            entry = {'node': node if key != ROOT_NAMESPACE else None, 'segments': []}
+            self._namespaces[key] = entry
+
+        segments = entry['segments']
+        if segments and segments[-1][0] == tool:
+            segments[-1][1].append(line)
+        else:
+            segments.append((tool, [line]))
+        self._count += 1
+
+    @staticmethod
+    def _namespace_key(node):
+        # node=None hoặc Switch của Mininet (inNamespace=False) → root namespace
+        if node is None or not getattr(node, 'inNamespace', True):
+            return ROOT_NAMESPACE
+        return node.name
+
+    # ========================================
+    # EXECUTE
+    # ========================================
+
+    def execute(self, max_workers=None):
+        """
+        Chạy toàn bộ plan: 1 round-trip mỗi namespace, các namespace song song
+
+        Returns:
+            dict: {
+                'namespaces': int,
+                'commands': int,
+                'duration_ms': float,
+                'errors': {namespace: output lỗi}   # tc/ip -force vẫn chạy tiếp khi lỗi
+            }
+        """
+        start = time.monotonic()
+        errors = {}
+
+        if self._namespaces:
+            workers = max(1, min(max_workers or BATCH_MAX_WORKERS, len(self._namespaces)))
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='batch') as pool:
+                outputs = pool.map(self._run_namespace, self._namespaces.items())
+                for key, output in outputs:
+                    if output:
+                        errors[key] = output
+
+        stats = {
+            'namespaces': len(self._namespaces),
+            'commands': self._count,
+            'duration_ms': round((time.monotonic() - start) * 1000, 1),
+            'errors': errors
+        }
+
+        for key, output in errors.items():
+            logger.debug(f"[BATCH] {key}: {output}")
+
+        logger.info(
+            f"[BATCH] Executed {stats['commands']} commands in "
+            f"{stats['namespaces']} namespaces ({stats['duration_ms']}ms)"
+        )
+        return stats
+
+    def _run_namespace(self, item):
+        key, entry = item
+        files = []
+
+        try:
+            parts = []
+            for tool, lines in entry['segments']:
+                fd, path = tempfile.mkstemp(prefix=f'twin-{tool}-', suffix='.batch')
+                with os.fdopen(fd, 'w') as f:
+                    f.write('\n'.join(lines) + '\n')
+                files.append(path)
+                parts.append(f'{tool} -force -batch {path} 2>&1')
+
+            shell_cmd = '; '.join(parts)
+            node = entry['node']
+
+            if node is None:
+                result = subprocess.run(shell_cmd, shell=True, capture_output=True, text=True)
+                output = result.stdout
+            elif hasattr(node, 'lock'):
+                with node.lock:
+                    output = node.cmd(shell_cmd)
+            else:
+                output = node.cmd(shell_cmd)
+
+            return key, output.strip()
+
+        except Exception as e:
+            logger.error(f"[BATCH] Error executing plan for {key}: {e}")
+            return key, str(e)
+
+        finally:
+            for path in files:
+                try:
+                    os.unlink(path)
+                except OSError:
+                    pass
@@ -0,0 +1,411 @@
+# mininet_twin/controllers/checkpoint.py
+"""
+CHECKPOINT / FAST RESET
+-----------------------
+MỤC ĐÍCH:
+- Giữa các lần test phải restart Mininet để đưa mọi link về bw/delay/loss ban đầu
+  và bật lại mọi thiết bị → mất vài phút
+- Checkpoint chụp lại trạng thái emulation, restore CHỈ áp phần khác biệt
+  bằng lệnh batch → reset lab 500 link trong vài giây
+
+TRẠNG THÁI ĐƯỢC CHỤP:
+- tc       : state shaping (bw/delay/jitter/loss) của từng interface (LinkShaper)
+- admin    : interface UP/DOWN (host disable, toggle_link) — `ip -o link show`
+- blackhole: switch đang bị disable (root netem loss 100% trên mọi port) — `tc qdisc show`
+- flows    : flow table của từng switch — `ovs-ofctl dump-flows --no-stats`
+
+ĐỌC TRẠNG THÁI THẬT (1 lệnh / namespace, song song):
+- Mỗi host: 1 `ip -o link show` qua shell của host
+- Root namespace (mọi switch): 1 `ip -o link show` + 1 `tc qdisc show`
+- Mỗi switch: 1 `ovs-ofctl dump-flows`
+
+RESTORE:
+1. Chụp trạng thái hiện tại, so với checkpoint
+2. Flow table khác → `ovs-ofctl replace-flows` (OVS chỉ sửa flow khác biệt)
+3. Admin / blackhole / tc khác → 1 BatchPlan (1 ip/tc -batch mỗi namespace)
+
+Example Usage:
+--------------
+manager = CheckpointManager(net)
+manager.capture('baseline')
+...
+result = manager.restore('baseline')
+# {'changes': {'flows': 1, 'admin': 4, 'blackhole_on': 0, 'blackhole_off': 1, 'tc': 12}, ...}
+"""
+
+import os
+import re
+import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from controllers.batch_plan import BatchPlan, BATCH_MAX_WORKERS
+from controllers.link_shaper import link_shaper, ROOT_NETEM
+from utils.logger import setup_logger
+
+logger = setup_logger()
+
+# Số checkpoint tối đa giữ trong RAM (baseline luôn được giữ)
+MAX_CHECKPOINTS = int(os.getenv('MAX_CHECKPOINTS', 20))
+
+BASELINE = 'baseline'
+
+BLACKHOLE_QDISC = 'netem loss 100%'
+
+# Trường thống kê bỏ đi khi so sánh flow (dump-flows của OVS cũ không có --no-stats)
+_FLOW_STATS = re.compile(r'\b(duration|n_packets|n_bytes|idle_age|hard_age)=[^,\s]*,?\s*')
+
+
+# ========================================
+# ĐỌC TRẠNG THÁI THẬT
+# ========================================
+
+def parse_link_show(output):
+    """
+    `ip -o link show` → {intf name: admin up}
+
+    Dòng mẫu: '2: h1-eth0@if5: <BROADCAST,MULTICAST,UP,LOWER_UP> mtu 1500 ...'
+    """
+    states = {}
+    for line in output.splitlines():
+        parts = line.split(':', 2)
+        if len(parts) < 3 or '<' not in parts[2]:
+            continue
+        name = parts[1].strip().split('@')[0]
+        flags = parts[2][parts[2].index('<') + 1:parts[2].index('>')].split(',')
+        states[name] = 'UP' in flags
+    return states
+
+
+def parse_blackholed(output):
+    """`tc qdisc show` → set interface đang có root netem loss 100%"""
+    blackholed = set()
+    for line in output.splitlines():
+        fields = line.split()
+        if len(fields) > 4 and fields[1] == 'netem' and 'root' in fields and 'loss 100%' in line:
+            blackholed.add(fields[fields.index('dev') + 1])
+    return blackholed
+
+
+def normalize_flows(output):
+    """`ovs-ofctl dump-flows` → list flow (bỏ header + thống kê), đã sort"""
+    flows = []
+    for line in output.splitlines():
+        if 'actions=' not in line:
+            continue
+        flows.append(_FLOW_STATS.sub('', line.strip()).strip())
+    return sorted(flows)
+
+
+def _run_root(cmd):
+    return subprocess.run(cmd, shell=True, capture_output=True, text=True).stdout
+
+
+class Checkpoint:
+    """Trạng thái emulation tại 1 thời điểm"""
+
+    def __init__(self, name, intfs, blackholed, flows):
+        self.name = name
+        self.created_at = time.time()
+        # intf name → {'node': str, 'up': bool, 'shaping': dict}
+        self.intfs = intfs
+        # switch name đang bị disable (blackhole)
+        self.blackholed = set(blackholed)
+        # switch name → list flow đã normalize
+        self.flows = flows
+
+    def summary(self):
+        return {
+            'name': self.name,
+            'created_at': self.created_at,
+            'interfaces': len(self.intfs),
+            'interfaces_down': sum(1 for i in self.intfs.values() if not i['up']),
+            'shaped_interfaces': sum(1 for i in self.intfs.values() if i['shaping']),
+            'blackholed_switches': sorted(self.blackholed),
+            'switches': len(self.flows)
+        }
+
+
+class CheckpointManager:
+    """
+    Chụp / restore trạng thái emulation
+
+    THREAD-SAFE: self._lock bảo vệ self._checkpoints
+    (CommandEngine chạy checkpoint_* độc quyền toàn mạng nên không có lệnh nào
+    đổi trạng thái trong lúc chụp/restore)
+    """
+
+    def __init__(self, net, max_workers=None):
+        self.net = net
+        self.max_workers = max_workers or BATCH_MAX_WORKERS
+        self._checkpoints = {}
+        self._lock = threading.Lock()
+
+    # ========================================
+    # PUBLIC API
+    # ========================================
+
+    def capture(self, name):
+        """
+        Chụp trạng thái hiện tại và lưu với tên `name` (ghi đè nếu đã có)
+
+        Returns:
+            dict: Checkpoint.summary() + 'duration_ms'
+        """
+        start = time.monotonic()
+        checkpoint = self._snapshot(name)
+
+        with self._lock:
+            self._checkpoints[name] = checkpoint
+            self._evict_locked()
+
+        summary = checkpoint.summary()
+        summary['duration_ms'] = round((time.monotonic() - start) * 1000, 1)
+        logger.info(
+            f"[CHECKPOINT] Captured '{name}': {summary['interfaces']} interfaces, "
+            f"{summary['switches']} switches ({summary['duration_ms']}ms)"
+        )
+        return summary
+
+    def list(self):
+        with self._lock:
+            return [cp.summary() for cp in self._checkpoints.values()]
+
+    def delete(self, name):
+        with self._lock:
+            return self._checkpoints.pop(name, None) is not None
+
+    def restore(self, name):
+        """
+        Đưa mạng về checkpoint `name`, chỉ áp phần khác biệt
+
+        Returns:
+            dict: {
+                'changes': {'flows', 'admin', 'blackhole_on', 'blackhole_off', 'tc'},
+                'devices': {node name: 'up' | 'offline'},  # node đổi trạng thái
+                'links': {link_id: {'node1', 'node2', 'status': 'up' | 'down'}},
+                'skipped_interfaces': int,                  # không còn trong net
+                'errors': {...},
+                'timings': {'capture_ms', 'flows_ms', 'apply_ms'},
+                'duration_ms': float
+            }
+
+        Raises:
+            KeyError: Không có checkpoint `name`
+        """
+        with self._lock:
+            target = self._checkpoints[name]
+
+        timings = {}
+        start = time.monotonic()
+
+        current = self._snapshot('current')
+        timings['capture_ms'] = round((time.monotonic() - start) * 1000, 1)
+
+        # --- Flow table ---
+        phase = time.monotonic()
+        flow_changes = [
+            sw for sw, flows in target.flows.items()
+            if sw in current.flows and current.flows[sw] != flows
+        ]
+        flow_errors = self._replace_flows({sw: target.flows[sw] for sw in flow_changes})
+        timings['flows_ms'] = round((time.monotonic() - phase) * 1000, 1)
+
+        # --- Admin / blackhole / tc ---
+        phase = time.monotonic()
+        plan = BatchPlan()
+        changes = {'flows': len(flow_changes), 'admin': 0, 'blackhole_on': 0, 'blackhole_off': 0, 'tc': 0}
+        nodes = {n.name: n for n in self.net.hosts + self.net.switches}
+        intfs = {intf.name: intf for n in nodes.values() for intf in n.intfList() if intf.name != 'lo'}
+
+        blackhole_on = (target.blackholed - current.blackholed) & set(nodes)
+        blackhole_off = (current.blackholed - target.blackholed) & set(nodes)
+        changes['blackhole_on'] = len(blackhole_on)
+        changes['blackhole_off'] = len(blackhole_off)
+
+        flush_hosts = set()
+        skipped = 0
+
+        for intf_name, want in target.intfs.items():
+            intf = intfs.get(intf_name)
+            have = current.intfs.get(intf_name)
+            if intf is None or have is None:
+                skipped += 1
+                continue
+            node = intf.node
+            is_host = node in self.net.hosts
+
+            # Admin state
+            if want['up'] != have['up']:
+                plan.ip(node, f"link set dev {intf_name} {'up' if want['up'] else 'down'}")
+                changes['admin'] += 1
+                if is_host and want['up']:
+                    flush_hosts.add(node)
+
+            # tc
+            if node.name in target.blackholed:
+                # Switch vẫn/bị disable: giữ state mong muốn để enable sau dựng lại
+                link_shaper.set_state(intf_name, want['shaping'])
+                link_shaper.invalidate(intf_name, actual=ROOT_NETEM)
+                if node.name in blackhole_on:
+                    plan.tc(node, f"qdisc replace dev {intf_name} root {BLACKHOLE_QDISC}")
+            elif is_host and not want['up']:
+                # Host disable: xóa qdisc như _toggle_device
+                link_shaper.set_state(intf_name, want['shaping'])
+                if have['up']:
+                    plan.tc(node, f"qdisc del dev {intf_name} root")
+                link_shaper.invalidate(intf_name, actual={})
+            else:
+                if node.name in blackhole_off:
+                    # qdisc thật đã bị thay bằng netem loss 100% khi disable → dựng lại
+                    link_shaper.invalidate(intf_name, actual=ROOT_NETEM)
+                elif is_host and not have['up']:
+                    # root qdisc đã bị xóa khi disable host
+                    link_shaper.invalidate(intf_name, actual={})
+                mode, _ = link_shaper.plan_set(intf, want['shaping'], plan)
+                if mode != 'noop':
+                    changes['tc'] += 1
+
+        # Switch hết blackhole → host nối trực tiếp flush ARP (giống enable switch)
+        for link in self.net.links:
+            for a, b in ((link.intf1.node, link.intf2.node), (link.intf2.node, link.intf1.node)):
+                if a.name in blackhole_off and b in self.net.hosts:
+                    flush_hosts.add(b)
+        for host in flush_hosts:
+            plan.ip(host, 'neigh flush all')
+
+        stats = plan.execute(self.max_workers)
+        timings['apply_ms'] = round((time.monotonic() - phase) * 1000, 1)
+
+        result = {
+            'changes': changes,
+            'devices': self._changed_devices(target, current, blackhole_on, blackhole_off),
+            'links': self._changed_links(target, current),
+            'skipped_interfaces': skipped,
+            'errors': {**flow_errors, **stats['errors']},
+            'timings': timings,
+            'duration_ms': round((time.monotonic() - start) * 1000, 1)
+        }
+
+        logger.info(
+            f"[CHECKPOINT] Restored '{name}': {changes} in {result['duration_ms']}ms | {timings}"
+        )
+        return result
+
+    # ========================================
+    # SNAPSHOT
+    # ========================================
+
+    def _snapshot(self, name):
+        hosts = list(self.net.hosts)
+        switches = list(self.net.switches)
+
+        def read_host(host):
+            with host.lock:
+                return parse_link_show(host.cmd('ip -o link show'))
+
+        def read_flows(switch):
+            return switch.name, normalize_flows(_run_root(f"ovs-ofctl dump-flows --no-stats {switch.name}"))
+
+        workers = max(1, min(self.max_workers, len(hosts) + len(switches)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='checkpoint') as pool:
+            host_states = pool.map(read_host, hosts)
+            flow_results = pool.map(read_flows, switches)
+            root_links = pool.submit(_run_root, 'ip -o link show')
+            root_qdiscs = pool.submit(_run_root, 'tc qdisc show')
+
+            admin = {}
+            for states in host_states:
+                admin.update(states)
+            admin.update(parse_link_show(root_links.result()))
+            blackholed_intfs = parse_blackholed(root_qdiscs.result())
+            flows = dict(flow_results)
+
+        intfs = {}
+        for node in hosts + switches:
+            for intf in node.intfList():
+                if intf.name == 'lo' or intf.name not in admin:
+                    continue
+                intfs[intf.name] = {
+                    'node': node.name,
+                    'up': admin[intf.name],
+                    'shaping': link_shaper.get_state(intf)
+                }
+
+        blackholed = set()
+        for switch in switches:
+            ports = [intf.name for intf in switch.intfList() if intf.name != 'lo']
+            if ports and all(p in blackholed_intfs for p in ports):
+                blackholed.add(switch.name)
+
+        return Checkpoint(name, intfs, blackholed, flows)
+
+    # ========================================
+    # APPLY HELPERS
+    # ========================================
+
+    def _replace_flows(self, flows_by_switch):
+        """`ovs-ofctl replace-flows` song song cho các switch có flow table khác"""
+        if not flows_by_switch:
+            return {}
+
+        def replace(item):
+            switch, flows = item
+            fd, path = tempfile.mkstemp(prefix=f'twin-flows-{switch}-', suffix='.txt')
+            try:
+                with os.fdopen(fd, 'w') as f:
+                    f.write('\n'.join(flows) + '\n')
+                result = subprocess.run(
+                    ['ovs-ofctl', 'replace-flows', switch, path],
+                    capture_output=True, text=True
+                )
+                return switch, (result.stderr or '').strip()
+            finally:
+                os.unlink(path)
+
+        workers = max(1, min(self.max_workers, len(flows_by_switch)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='checkpoint') as pool:
+            return {sw: err for sw, err in pool.map(replace, flows_by_switch.items()) if err}
+
+    def _changed_devices(self, target, current, blackhole_on, blackhole_off):
+        devices = {name: 'offline' for name in blackhole_on}
+        devices.update({name: 'up' for name in blackhole_off})
+
+        # Host: up nếu còn ít nhất 1 interface UP
+        for host in self.net.hosts:
+            names = [i.name for i in host.intfList() if i.name in target.intfs and i.name in current.intfs]
+            if not names:
+                continue
+            want_up = any(target.intfs[n]['up'] for n in names)
+            have_up = any(current.intfs[n]['up'] for n in names)
+            if want_up != have_up:
+                devices[host.name] = 'up' if want_up else 'offline'
+
+        return devices
+
+    def _changed_links(self, target, current):
+        links = {}
+        for link in self.net.links:
+            names = (link.intf1.name, link.intf2.name)
+            if not all(n in target.intfs and n in current.intfs for n in names):
+                continue
+            want_up = all(target.intfs[n]['up'] for n in names)
+            have_up = all(current.intfs[n]['up'] for n in names)
+            if want_up != have_up:
+                node1, node2 = sorted([link.intf1.node.name, link.intf2.node.name])
+                links[f"{node1}-{node2}"] = {
+                    'node1': node1,
+                    'node2': node2,
+                    'status': 'up' if want_up else 'down'
+                }
+        return links
+
+    def _evict_locked(self):
+        """Giữ tối đa MAX_CHECKPOINTS, bỏ cái cũ nhất (trừ baseline)"""
+        while len(self._checkpoints) > MAX_CHECKPOINTS:
+            candidates = [cp for cp in self._checkpoints.values() if cp.name != BASELINE]
+            if not candidates:
+                return
+            oldest = min(candidates, key=lambda cp: cp.created_at)
+            del self._checkpoints[oldest.name]
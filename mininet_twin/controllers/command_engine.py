@@ -0,0 +1,390 @@
+# mininet_twin/controllers/command_engine.py
+"""
+COMMAND ENGINE
+--------------
+MỤC ĐÍCH:
+- Không chạy CommandExecutor.execute() ngay trong event thread của Socket.IO
+  (1 lệnh switch disable ~2s sẽ chặn mọi lệnh/event khác)
+- Worker pool: các lệnh trên target ĐỘC LẬP chạy song song
+- Các lệnh trên CÙNG target chạy tuần tự, đúng thứ tự nhận được
+- Priority: lệnh ưu tiên cao (số nhỏ) được lấy ra trước
+- Timeout từng lệnh: quá hạn → trả FAILED về Backend ngay
+
+TARGET:
+- Tập tên node mà lệnh sẽ chạy shell lên (do CommandExecutor.command_targets() tính)
+- '*' = độc quyền toàn mạng (reload_topology, checkpoint_*): chờ mọi lệnh khác xong,
+  và chặn mọi lệnh khác tới khi nó xong
+
+TIMEOUT:
+- Python không kill được thread đang chạy → target vẫn bị giữ tới khi lệnh
+  thật sự xong (tránh 2 lệnh cùng đụng 1 node)
+- Kết quả đến muộn sau khi đã báo timeout sẽ bị bỏ (chỉ log + đếm)
+
+ARCHITECTURE:
+    SocketClient (execute_command)
+         ↓ submit()
+    Pending heap (priority, seq)
+         ↓ worker lấy job đầu tiên có target rảnh
+    CommandExecutor.execute()
+         ↓
+    result_callback → command_result
+"""
+
+import os
+import heapq
+import threading
+import time
+from collections import deque
+from utils.logger import setup_logger
+
+logger = setup_logger()
+
+# Số worker thread chạy lệnh song song
+COMMAND_WORKERS = int(os.getenv('COMMAND_WORKERS', 4))
+
+# Timeout mặc định của 1 lệnh (giây)
+COMMAND_TIMEOUT = float(os.getenv('COMMAND_TIMEOUT', 30.0))
+
+# Priority mặc định theo loại lệnh (số nhỏ = ưu tiên cao)
+DEFAULT_PRIORITIES = {
+    'reload_topology': 0,
+    'checkpoint_restore': 0,
+    'checkpoint_create': 0,
+    'checkpoint_delete': 0,
+    'toggle_device': 1,
+    'toggle_link': 1,
+    'update_link_conditions': 2,
+    'bulk': 3,
+}
+
+# Số mẫu execution time giữ lại để tính p95
+_TIMING_WINDOW = 200
+
+EXCLUSIVE_TARGET = '*'
+
+
+class _Job:
+    """1 lệnh trong hàng đợi của CommandEngine"""
+
+    __slots__ = (
+        'seq', 'priority', 'command_data', 'targets', 'timeout',
+        'submitted_at', 'started_at', 'timer', 'done', 'timed_out'
+    )
+
+    def __init__(self, seq, priority, command_data, targets, timeout):
+        self.seq = seq
+        self.priority = priority
+        self.command_data = command_data
+        self.targets = targets
+        self.timeout = timeout
+        self.submitted_at = time.monotonic()
+        self.started_at = None
+        self.timer = None
+        self.done = False
+        self.timed_out = False
+
+    def __lt__(self, other):
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+    @property
+    def action_id(self):
+        return self.command_data.get('action_id', 'unknown')
+
+    @property
+    def command(self):
+        return self.command_data.get('command')
+
+
+def _conflicts(targets_a, targets_b):
+    """2 tập target có đụng nhau không ('*' đụng với mọi thứ)"""
+    if EXCLUSIVE_TARGET in targets_a or EXCLUSIVE_TARGET in targets_b:
+        return True
+    return not targets_a.isdisjoint(targets_b)
+
+
+class CommandEngine:
+    """
+    Hàng đợi + worker pool cho lệnh điều khiển từ Backend
+
+    THREAD-SAFE: mọi state dùng chung được bảo vệ bởi self._cond
+
+    Example Usage:
+    --------------
+    engine = CommandEngine(executor, result_callback=lambda r: sio.emit('command_result', r))
+    engine.start()
+
+    engine.submit({'action_id': 'act_1', 'command': 'toggle_link', 'data': {...}})
+
+    print(engine.get_metrics())
+    # {'queue_depth': 0, 'in_flight': 1, 'completed': 10, ...}
+
+    engine.stop()
+    """
+
+    def __init__(self, executor, result_callback, workers=None, default_timeout=None):
+        """
+        Args:
+            executor: CommandExecutor instance
+            result_callback (callable): Gọi với result dict khi lệnh xong/timeout
+            workers (int): Số worker thread (mặc định COMMAND_WORKERS)
+            default_timeout (float): Timeout mặc định (giây)
+        """
+        self.executor = executor
+        self.result_callback = result_callback
+        self.workers = workers or COMMAND_WORKERS
+        self.default_timeout = default_timeout or COMMAND_TIMEOUT
+
+        self._cond = threading.Condition()
+        self._pending = []        # heap các _Job chờ chạy
+        self._running = {}        # seq → _Job đang chạy
+        self._seq = 0
+        self._stopped = False
+        self._threads = []
+
+        # Metrics
+        self._submitted = 0
+        self._completed = 0
+        self._failed = 0
+        self._timeouts = 0
+        self._late_results = 0
+        self._exec_times = deque(maxlen=_TIMING_WINDOW)
+        self._wait_times = deque(maxlen=_TIMING_WINDOW)
+
+        logger.info(f">>> CommandEngine initialized ({self.workers} workers, timeout={self.default_timeout}s)")
+
+    # ========================================
+    # LIFECYCLE
+    # ========================================
+
+    def start(self):
+        """Khởi động worker threads"""
+        for i in range(self.workers):
+            t = threading.Thread(target=self._worker_loop, name=f"cmd-worker-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def stop(self, timeout=2.0):
+        """Dừng workers (lệnh đang chạy được chạy tiếp tới khi xong)"""
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+
+        for t in self._threads:
+            t.join(timeout=timeout)
+        self._threads = []
+
+    # ========================================
+    # PUBLIC API
+    # ========================================
+
+    def submit(self, command_data):
+        """
+        Đưa 1 lệnh vào hàng đợi (không chặn)
+
+        Args:
+            command_data (dict): {
+                'action_id': 'act_...',
+                'command': 'toggle_link',
+                'data': {...},
+                'priority': 1,       # optional, số nhỏ = ưu tiên cao
+                'timeout': 10.0      # optional, giây
+            }
+        """
+        command = command_data.get('command')
+
+        try:
+            targets = frozenset(self.executor.command_targets(command_data))
+        except Exception as e:
+            logger.warning(f"[ENGINE] Cannot resolve targets for {command}: {e}")
+            targets = frozenset([EXCLUSIVE_TARGET])
+
+        priority = command_data.get('priority', DEFAULT_PRIORITIES.get(command, 5))
+        timeout = command_data.get('timeout') or self._default_timeout_for(command_data)
+
+        with self._cond:
+            self._seq += 1
+            job = _Job(self._seq, priority, command_data, targets, timeout)
+            heapq.heappush(self._pending, job)
+            self._submitted += 1
+            depth = len(self._pending)
+            self._cond.notify()
+
+        logger.info(
+            f"[ENGINE] Queued {command} | Action: {job.action_id} | "
+            f"Targets: {sorted(targets)} | Priority: {priority} | Queue: {depth}"
+        )
+
+    def get_metrics(self):
+        """
+        Snapshot metrics (gửi kèm telemetry_batch['executor'])
+
+        Returns:
+            dict: queue_depth, in_flight, submitted, completed, failed, timeouts,
+                  late_results, exec_ms_avg, exec_ms_p95, exec_ms_max, wait_ms_avg
+        """
+        with self._cond:
+            exec_times = sorted(self._exec_times)
+            wait_times = list(self._wait_times)
+            metrics = {
+                'workers': self.workers,
+                'queue_depth': len(self._pending),
+                'in_flight': len(self._running),
+                'submitted': self._submitted,
+                'completed': self._completed,
+                'failed': self._failed,
+                'timeouts': self._timeouts,
+                'late_results': self._late_results
+            }
+
+        if exec_times:
+            metrics['exec_ms_avg'] = round(sum(exec_times) / len(exec_times), 1)
+            metrics['exec_ms_p95'] = round(exec_times[int(0.95 * (len(exec_times) - 1))], 1)
+            metrics['exec_ms_max'] = round(exec_times[-1], 1)
+        else:
+            metrics['exec_ms_avg'] = metrics['exec_ms_p95'] = metrics['exec_ms_max'] = 0.0
+
+        metrics['wait_ms_avg'] = round(sum(wait_times) / len(wait_times), 1) if wait_times else 0.0
+
+        return metrics
+
+    # ========================================
+    # PRIVATE METHODS
+    # ========================================
+
+    def _default_timeout_for(self, command_data):
+        """Bulk / reload / restore được timeout dài hơn theo kích thước"""
+        if command_data.get('command') == 'checkpoint_restore':
+            return self.default_timeout * 2
+        if command_data.get('command') == 'reload_topology':
+            topology = (command_data.get('data') or {}).get('topology') or {}
+            return self.default_timeout + len(topology.get('links') or []) * 0.1
+        if command_data.get('command') == 'bulk':
+            count = len((command_data.get('data') or {}).get('operations') or [])
+            return self.default_timeout + count * 2.0
+        return self.default_timeout
+
+    def _next_runnable(self):
+        """
+        Lấy job ưu tiên cao nhất có thể chạy ngay
+
+        Job chạy được khi:
+        - Không đụng target của job đang chạy
+        - Không đụng target của job CŨ HƠN còn đang chờ (giữ thứ tự trên cùng target)
+
+        ⚠️ Phải gọi trong context của self._cond
+        """
+        if not self._pending:
+            return None
+
+        busy = [job.targets for job in self._running.values()]
+
+        for job in sorted(self._pending):
+            if any(_conflicts(job.targets, b) for b in busy):
+                continue
+            if any(other.seq < job.seq and _conflicts(job.targets, other.targets)
+                   for other in self._pending):
+                continue
+
+            self._pending.remove(job)
+            heapq.heapify(self._pending)
+            return job
+
+        return None
+
+    def _worker_loop(self):
+        while True:
+            with self._cond:
+                job = self._next_runnable()
+                while job is None:
+                    if self._stopped:
+                        return
+                    self._cond.wait()
+                    job = self._next_runnable()
+
+                job.started_at = time.monotonic()
+                self._running[job.seq] = job
+                self._wait_times.append((job.started_at - job.submitted_at) * 1000)
+
+                job.timer = threading.Timer(job.timeout, self._on_timeout, args=(job,))
+                job.timer.daemon = True
+                job.timer.start()
+
+            self._run_job(job)
+
+    def _run_job(self, job):
+        try:
+            result = self.executor.execute(job.command_data)
+        except Exception as e:
+            logger.error(f"[ENGINE] Error executing {job.command}: {e}", exc_info=True)
+            result = {
+                'success': False,
+                'action_id': job.action_id,
+                'command': job.command,
+                'error': str(e)
+            }
+        finished_at = time.monotonic()
+        job.timer.cancel()
+
+        with self._cond:
+            job.done = True
+            self._running.pop(job.seq, None)
+            self._exec_times.append((finished_at - job.started_at) * 1000)
+
+            timed_out = job.timed_out
+            if timed_out:
+                self._late_results += 1
+            elif result.get('success'):
+                self._completed += 1
+            else:
+                self._failed += 1
+
+            # Target được giải phóng → đánh thức worker khác
+            self._cond.notify_all()
+
+        if timed_out:
+            logger.warning(
+                f"[ENGINE] Dropping late result of {job.command} | Action: {job.action_id} | "
+                f"Finished after {finished_at - job.started_at:.1f}s (timeout {job.timeout}s)"
+            )
+            return
+
+        self._deliver(result)
+
+    def _on_timeout(self, job):
+        with self._cond:
+            if job.done:
+                return
+            job.timed_out = True
+            self._timeouts += 1
+
+        logger.error(
+            f"[ENGINE] Command timed out: {job.command} | Action: {job.action_id} | "
+            f"Timeout: {job.timeout}s (targets stay busy until it finishes)"
+        )
+
+        error = f"Command timed out after {job.timeout}s"
+        result = {
+            'success': False,
+            'action_id': job.action_id,
+            'command': job.command,
+            'error': error,
+            'timed_out': True
+        }
+        if job.command == 'bulk':
+            # Kết quả muộn bị bỏ → child action chưa có command_progress sẽ PENDING mãi:
+            # chốt FAILED cùng parent (Backend bỏ qua item đã chốt từ command_progress)
+            operations = (job.command_data.get('data') or {}).get('operations') or []
+            result['result'] = {
+                'items': [
+                    {'action_id': op.get('action_id'), 'command': op.get('command'),
+                     'success': False, 'error': error}
+                    for op in operations
+                ]
+            }
+        self._deliver(result)
+
+    def _deliver(self, result):
+        try:
+            self.result_callback(result)
+        except Exception as e:
+            logger.error(f"[ENGINE] Error delivering result: {e}", exc_info=True)
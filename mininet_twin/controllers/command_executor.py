@@ -8,10 +8,13 @@ MỤC ĐÍCH:
 - Trả kết quả về Backend (success/failed)
 
 COMMANDS SUPPORTED:
-1. reload_topology: Reload toàn bộ mạng từ JSON
+1. reload_topology: Đổi topology tại chỗ (chỉ áp phần khác biệt)
 2. toggle_device: Bật/tắt host hoặc switch
 3. toggle_link: Bật/tắt link
 4. update_link_conditions: Thay đổi bandwidth/delay/loss
+5. bulk: Nhiều lệnh (2-4) trong 1 lần gửi, chạy song song theo nhóm target
+6. checkpoint_create / checkpoint_restore / checkpoint_delete: Chụp / reset nhanh
+   trạng thái emulation (tc, link, switch, flow) — chỉ áp phần khác biệt
 
 ARCHITECTURE:
     Backend (WebSocket)
@@ -28,10 +31,27 @@ ARCHITECTURE:
 import os
 import time
 import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from utils.logger import setup_logger
+from controllers.batch_plan import BatchPlan
+from controllers.checkpoint import CheckpointManager
+from controllers.link_shaper import link_shaper, ROOT_NETEM
+from controllers.topology_reload import diff_topology, apply_diff
+from controllers.verifier import (
+    Convergence, intf_admin_down, intf_oper_up,
+    netem_restored, flow_installed, bridge_exists
+)
 
 logger = setup_logger()
 
+# Số thread tối đa khi fan-out lệnh bulk
+BULK_MAX_WORKERS = int(os.getenv('BULK_MAX_WORKERS', 8))
+
+# Các command được phép nằm trong 1 lệnh bulk
+BULK_ALLOWED_COMMANDS = ('toggle_device', 'toggle_link', 'update_link_conditions')
+
 
 class CommandExecutor:
     """
@@ -64,6 +84,13 @@ class CommandExecutor:
             net: Mininet network instance
         """
         self.net = net
+        
+        # Callback (net, diff) sau mỗi lần reload_topology thành công
+        self.topology_hooks = []
+        
+        # Checkpoint trạng thái emulation (main.py chụp 'baseline' sau khi start)
+        self.checkpoints = CheckpointManager(net)
+        
         logger.info(">>> CommandExecutor initialized")
     
     def execute(self, command_data):
@@ -103,6 +130,14 @@ class CommandExecutor:
                 result = self._toggle_link(data)
             elif command == 'update_link_conditions':
                 result = self._update_link_conditions(data)
+            elif command == 'bulk':
+                result = self._execute_bulk(data, action_id)
+            elif command == 'checkpoint_create':
+                result = self._checkpoint_create(data)
+            elif command == 'checkpoint_restore':
+                result = self._checkpoint_restore(data)
+            elif command == 'checkpoint_delete':
+                result = self._checkpoint_delete(data)
             else:
                 return {
                     'success': False,
@@ -132,7 +167,7 @@ class CommandExecutor:
     
     def _reload_topology(self, data):
         """
-        Reload toàn bộ topology từ JSON
+        Reload topology TẠI CHỖ: chỉ thêm/xóa phần khác so với net đang chạy
         
         Args:
             data (dict): {
@@ -144,20 +179,57 @@ class CommandExecutor:
             }
         
         Returns:
-            dict: Result với success/error
+            dict: Result với success/error + diff summary + thời gian từng phase
         
-        ⚠️ WARNING: Tính năng này phức tạp, cần:
-        - Stop net hiện tại
-        - Parse JSON → Rebuild topology
-        - Start net mới
-        - Re-establish WebSocket connections
-        
-        TODO: Implement sau khi các tính năng khác hoạt động ổn định
+        Sau khi áp xong, gọi các topology_hooks(net, diff) (vd: đẩy diff lên Backend,
+        khởi động iperf server trên host mới)
         """
+        topology = data.get('topology')
+        
+        if not topology:
+            return {
+                'success': False,
+                'error': 'Missing topology'
+            }
+        
+        start = time.time()
+        
+        try:
+            diff = diff_topology(self.net, topology)
+        except (KeyError, ValueError) as e:
+            return {
+                'success': False,
+                'error': f"Invalid topology: {e}"
+            }
+        
+        if diff.is_empty():
+            return {
+                'success': True,
+                'message': 'Topology unchanged',
+                'result': {'changes': diff.summary(), 'duration_ms': 0.0}
+            }
+        
+        logger.info(f"[EXECUTOR] Reloading topology: {diff.summary()}")
+        
+        timings = apply_diff(self.net, diff)
+        
+        for hook in self.topology_hooks:
+            try:
+                hook(self.net, diff)
+            except Exception as e:
+                logger.error(f"[EXECUTOR] Topology hook error: {e}", exc_info=True)
+        
+        duration_ms = round((time.time() - start) * 1000, 1)
+        logger.info(f"[EXECUTOR] Topology reloaded in {duration_ms}ms ({diff.size()} changes) | {timings}")
+        
         return {
-            'success': False,
-            'message': 'Reload topology not implemented yet',
-            'error': 'This feature requires stopping and restarting Mininet'
+            'success': True,
+            'message': f"Topology reloaded: {diff.size()} changes applied",
+            'result': {
+                'changes': diff.summary(),
+                'duration_ms': duration_ms,
+                'timings': timings
+            }
         }
     
     def _toggle_device(self, data):
@@ -187,6 +259,9 @@ class CommandExecutor:
             is_host = device_name.startswith('h')
             is_switch = device_name.startswith('s')
             
+            # Chờ điều kiện thật thay vì sleep cố định (xem controllers/verifier.py)
+            conv = Convergence()
+            
             if is_host:
                 # ========================================
                 # HOST TOGGLE
@@ -208,55 +283,41 @@ class CommandExecutor:
                     # except Exception as e:
                     #     logger.warning(f"[EXECUTOR] Error killing iperf: {e}")
                     
-                    # Down interfaces
+                    # Down interfaces (1 round-trip: ip -batch + tc -batch)
+                    plan = BatchPlan()
+                    for intf in interfaces:
+                        plan.ip(device, f'link set dev {intf.name} down')
+                    for intf in interfaces:
+                        plan.tc(device, f'qdisc del dev {intf.name} root')
+                        link_shaper.invalidate(intf.name, actual={})
+                    plan.execute()
+                    
                     for intf in interfaces:
-                        try:
-                            if hasattr(device, 'lock'):
-                                with device.lock:
-                                    device.cmd(f'ifconfig {intf.name} down')
-                                    device.cmd(f'tc qdisc del dev {intf.name} root 2>/dev/null')
-                            else:
-                                device.cmd(f'ifconfig {intf.name} down')
-                                device.cmd(f'tc qdisc del dev {intf.name} root 2>/dev/null')
-                        except Exception as e:
-                            logger.error(f"[EXECUTOR] Error disabling {intf.name}: {e}")
+                        conv.wait(f"{intf.name} down", lambda i=intf: intf_admin_down(device, i.name))
                     
-                    time.sleep(0.3)
                     message = f"Host {device_name} disabled successfully"
                 
                 elif action == 'enable':
                     logger.info(f"[EXECUTOR] Enabling {device_name}...")
                     
-                    # Up interfaces
+                    # Up interfaces + recovery procedure trong 1 ip -batch
+                    # (ip link down/up là lệnh đồng bộ → không cần sleep giữa 2 lệnh)
+                    plan = BatchPlan()
                     for intf in interfaces:
-                        if hasattr(device, 'lock'):
-                            with device.lock:
-                                device.cmd(f'ifconfig {intf.name} up')
-                        else:
-                            device.cmd(f'ifconfig {intf.name} up')
-                    
-                    # Recovery procedure
-                    time.sleep(0.3)
+                        plan.ip(device, f'link set dev {intf.name} up')
+                    plan.ip(device, 'neigh flush all')
+                    plan.ip(device, 'route flush cache')
+                    for intf in interfaces:
+                        plan.ip(device, f'link set dev {intf.name} down')
+                        plan.ip(device, f'link set dev {intf.name} up')
+                    # Dựng lại bw/delay/loss đã bị xóa lúc disable
+                    for intf in interfaces:
+                        link_shaper.plan_restore(intf, plan)
+                    plan.execute()
                     
                     for intf in interfaces:
-                        try:
-                            if hasattr(device, 'lock'):
-                                with device.lock:
-                                    device.cmd('ip neigh flush all')
-                                    device.cmd('ip route flush cache')
-                                    device.cmd(f'ip link set {intf.name} down')
-                                    time.sleep(0.1)
-                                    device.cmd(f'ip link set {intf.name} up')
-                            else:
-                                device.cmd('ip neigh flush all')
-                                device.cmd('ip route flush cache')
-                                device.cmd(f'ip link set {intf.name} down')
-                                time.sleep(0.1)
-                                device.cmd(f'ip link set {intf.name} up')
-                        except Exception as e:
-                            logger.warning(f"[EXECUTOR] Recovery warning: {e}")
+                        conv.wait(f"{intf.name} carrier", lambda i=intf: intf_oper_up(device, i.name))
                     
-                    time.sleep(0.5)
                     message = f"Host {device_name} enabled successfully"
                     
                     # ========================================
@@ -287,22 +348,15 @@ class CommandExecutor:
                         # ========================================
                         # ✅ BƯỚC 2: ÁP DỤNG TC LOSS 100% CHO TẤT CẢ PORTS
                         # ========================================
+                        # 'replace' = del + add trong 1 dòng; cả switch = 1 lần tc -batch
+                        plan = BatchPlan()
                         for intf in device.intfList():
-                            try:
-                                # Skip loopback
-                                if intf.name == 'lo':
-                                    continue
-                                
-                                # Xóa qdisc cũ (nếu có)
-                                device.cmd(f'tc qdisc del dev {intf.name} root 2>/dev/null')
-                                
-                                # Thêm qdisc netem với loss 100%
-                                device.cmd(f'tc qdisc add dev {intf.name} root netem loss 100%')
-                                
-                                logger.info(f"[EXECUTOR] Applied tc loss 100% on {intf.name}")
-                            
-                            except Exception as e:
-                                logger.warning(f"[EXECUTOR] Error applying tc on {intf.name}: {e}")
+                            if intf.name == 'lo':
+                                continue
+                            plan.tc(device, f'qdisc replace dev {intf.name} root netem loss 100%')
+                            link_shaper.invalidate(intf.name, actual=ROOT_NETEM)
+                        plan.execute()
+                        logger.info(f"[EXECUTOR] Applied tc loss 100% on {len(plan)} ports of {device_name}")
                         
                         logger.info(f"[EXECUTOR] Switch {device_name} disabled (flows + tc loss 100%)")
                         
@@ -331,7 +385,7 @@ class CommandExecutor:
                             # Switch thực sự bị tắt → Start lại
                             logger.info(f"[EXECUTOR] Switch {device_name} was stopped, restarting...")
                             device.start([])
-                            time.sleep(0.5)
+                            conv.wait(f"{device_name} bridge", lambda: bridge_exists(device))
                         else:
                             # Switch vẫn chạy → Restore
                             logger.info(f"[EXECUTOR] Switch {device_name} was blocked, restoring...")
@@ -339,34 +393,34 @@ class CommandExecutor:
                             # ========================================
                             # ✅ BƯỚC 1: XÓA TC LOSS 100% TRÊN TẤT CẢ PORTS
                             # ========================================
+                            plan = BatchPlan()
+                            restored = []
                             for intf in device.intfList():
-                                try:
-                                    if intf.name == 'lo':
-                                        continue
-                                    
-                                    # Xóa qdisc netem (loss 100%)
-                                    device.cmd(f'tc qdisc del dev {intf.name} root 2>/dev/null')
-                                    
-                                    logger.info(f"[EXECUTOR] Removed tc loss from {intf.name}")
-                                
-                                except Exception as e:
-                                    logger.warning(f"[EXECUTOR] Error removing tc on {intf.name}: {e}")
+                                if intf.name == 'lo':
+                                    continue
+                                # Thay netem loss 100% bằng bw/delay/loss mong muốn của port
+                                restored.append((intf, link_shaper.plan_restore(intf, plan)))
+                            plan.execute()
+                            logger.info(f"[EXECUTOR] Removed tc loss from {len(plan)} ports of {device_name}")
                             
-                            time.sleep(0.3)  # Đợi kernel apply
+                            # Port có delay/jitter/loss được dựng lại netem → chờ netem MONG MUỐN,
+                            # không phải chờ hết netem
+                            for intf, state in restored:
+                                conv.wait(f"{intf.name} netem restored",
+                                          lambda i=intf, st=state: netem_restored(device, i.name, st))
                             
                             # ========================================
                             # ✅ BƯỚC 2: RESTORE DEFAULT FLOW
                             # ========================================
                             device.cmd(f'ovs-ofctl add-flow {device_name} action=normal')
+                            conv.wait(f"{device_name} flow", lambda: flow_installed(device))
                             logger.info(f"[EXECUTOR] Restored default flow on {device_name}")
                         
-                        time.sleep(0.3)
-                        
                     except Exception as e:
                         logger.error(f"[EXECUTOR] Error enabling switch: {e}")
                         # Fallback
                         device.start([])
-                        time.sleep(0.5)
+                        conv.wait(f"{device_name} bridge", lambda: bridge_exists(device))
                     
                     # Recovery
                     connected_hosts = []
@@ -376,26 +430,20 @@ class CommandExecutor:
                             if other_node.name.startswith('h'):
                                 connected_hosts.append(other_node)
                     
+                    # 1 ip -batch mỗi host, các host chạy song song
+                    plan = BatchPlan()
                     for h in connected_hosts:
-                        try:
-                            intf = h.defaultIntf()
-                            if hasattr(h, 'lock'):
-                                with h.lock:
-                                    h.cmd('ip neigh flush all')
-                                    h.cmd('ip route flush cache')
-                                    h.cmd(f'ip link set {intf.name} down')
-                                    time.sleep(0.1)
-                                    h.cmd(f'ip link set {intf.name} up')
-                            else:
-                                h.cmd('ip neigh flush all')
-                                h.cmd('ip route flush cache')
-                                h.cmd(f'ip link set {intf.name} down')
-                                time.sleep(0.1)
-                                h.cmd(f'ip link set {intf.name} up')
-                        except Exception as e:
-                            logger.warning(f"[EXECUTOR] Recovery error: {e}")
+                        intf = h.defaultIntf()
+                        plan.ip(h, 'neigh flush all')
+                        plan.ip(h, 'route flush cache')
+                        plan.ip(h, f'link set dev {intf.name} down')
+                        plan.ip(h, f'link set dev {intf.name} up')
+                    plan.execute()
+                    
+                    for h in connected_hosts:
+                        intf = h.defaultIntf()
+                        conv.wait(f"{intf.name} carrier", lambda h=h, i=intf: intf_oper_up(h, i.name))
                     
-                    time.sleep(1.0)
                     message = f"Switch {device_name} enabled successfully"
                     
                     # ========================================
@@ -421,7 +469,8 @@ class CommandExecutor:
                 'result': {
                     'device_name': device_name,
                     'device_type': 'host' if is_host else 'switch',
-                    'action': action
+                    'action': action,
+                    **conv.to_dict()
                 }
             }
         
@@ -484,7 +533,8 @@ class CommandExecutor:
             # SỬ DỤNG MININET API: configLinkStatus
             # ========================================
             if action == 'down':
-                self.net.configLinkStatus(node1_name, node2_name, 'down')
+                with self._node_lock(node1, node2):
+                    self.net.configLinkStatus(node1_name, node2_name, 'down')
                 logger.info(f"[EXECUTOR] Link {link_id} set to DOWN")
                 # ========================================
                 # ✅ THÊM: CẬP NHẬT STATUS CACHE
@@ -504,7 +554,8 @@ class CommandExecutor:
                 self._send_link_status_update(link_id, node1_name, node2_name, 'down')
                 
             elif action == 'up':
-                self.net.configLinkStatus(node1_name, node2_name, 'up')
+                with self._node_lock(node1, node2):
+                    self.net.configLinkStatus(node1_name, node2_name, 'up')
                 logger.info(f"[EXECUTOR] Link {link_id} set to UP")
                 # ========================================
                 # ✅ THÊM: CẬP NHẬT STATUS CACHE
@@ -540,20 +591,14 @@ class CommandExecutor:
                     'error': f"Invalid action: {action}. Use 'up' or 'down'"
                 }
             
-            # Verify bằng cách check interface status
-            time.sleep(0.1)  # Wait cho command apply
-            
-            # Lấy interface từ một trong 2 nodes
+            # Verify: chờ interface đạt trạng thái mong muốn (không sleep cố định)
             intf = link.intf1 if link.intf1.node == node1 else link.intf2
-            verify_cmd = f'ip link show {intf.name}'
             
-            if hasattr(intf.node, 'lock'):
-                with intf.node.lock:
-                    status_output = intf.node.cmd(verify_cmd)
+            conv = Convergence()
+            if action == 'down':
+                is_up = not conv.wait(f"{intf.name} down", lambda: intf_admin_down(intf.node, intf.name))
             else:
-                status_output = intf.node.cmd(verify_cmd)
-            
-            is_up = 'state UP' in status_output
+                is_up = conv.wait(f"{intf.name} carrier", lambda: intf_oper_up(intf.node, intf.name))
             
             return {
                 'success': True,
@@ -563,7 +608,8 @@ class CommandExecutor:
                     'node1': node1_name,
                     'node2': node2_name,
                     'action': action,
-                    'verified_status': 'up' if is_up else 'down'
+                    'verified_status': 'up' if is_up else 'down',
+                    **conv.to_dict()
                 }
             }
         
@@ -633,7 +679,7 @@ class CommandExecutor:
             link = links[0]
             
             # ========================================
-            # SỬ DỤNG MININET TCIntf.config()
+            # LINK SHAPER: tc change TẠI CHỖ (không dựng lại qdisc)
             # ========================================
             # Lấy interface (thường config trên cả 2 interfaces)
             intf1 = link.intf1
@@ -671,19 +717,20 @@ class CommandExecutor:
                 config_params['loss'] = loss
             
             # Apply config to both interfaces
+            # Không dùng TCIntf.config() (luôn xóa + dựng lại toàn bộ tc):
+            # LinkShaper chỉ 'change' phần khác biệt, 1 tc -batch mỗi namespace
             logger.info(f"[EXECUTOR] Applying config to {link_id}: {config_params}")
             
-            # Config intf1
-            try:
-                intf1.config(**config_params)
-            except Exception as e:
-                logger.warning(f"[EXECUTOR] Error configuring {intf1.name}: {e}")
+            plan = BatchPlan()
+            mode1, _ = link_shaper.plan_update(intf1, config_params, plan)
+            mode2, _ = link_shaper.plan_update(intf2, config_params, plan)
+            stats = plan.execute()
             
-            # Config intf2 (symmetric)
-            try:
-                intf2.config(**config_params)
-            except Exception as e:
-                logger.warning(f"[EXECUTOR] Error configuring {intf2.name}: {e}")
+            if stats['errors']:
+                # tc lỗi → không chắc trạng thái thật, lần sau dựng lại
+                link_shaper.invalidate(intf1.name)
+                link_shaper.invalidate(intf2.name)
+                logger.warning(f"[EXECUTOR] tc errors on {link_id}: {stats['errors']}")
             
             logger.info(f"[EXECUTOR] Link {link_id} conditions updated successfully")
             
@@ -694,7 +741,9 @@ class CommandExecutor:
                     'link_id': link_id,
                     'node1': node1_name,
                     'node2': node2_name,
-                    'applied_conditions': config_params
+                    'applied_conditions': config_params,
+                    'tc_mode': [mode1, mode2],
+                    'tc_ms': stats['duration_ms']
                 }
             }
         
@@ -705,6 +754,329 @@ class CommandExecutor:
                 'error': f"Failed to update link conditions: {str(e)}"
             }
         
+    # ========================================
+    # BULK: FAN-OUT SONG SONG
+    # ========================================
+    def _execute_bulk(self, data, action_id):
+        """
+        Thực thi nhiều lệnh trong 1 lần (do Backend gửi từ /api/control/bulk)
+        
+        - Các lệnh đụng tới CÙNG node được gom chung 1 nhóm → chạy tuần tự
+          (đúng thứ tự trong request)
+        - Các nhóm độc lập chạy song song trên ThreadPoolExecutor
+        - Mỗi item xong → gửi 'command_progress' về Backend ngay
+        
+        Args:
+            data (dict): {
+                'operations': [
+                    {'action_id': 'act_...', 'command': 'toggle_link', 'data': {...}},
+                    ...
+                ]
+            }
+            action_id (str): ID của parent (bulk) action
+        
+        Returns:
+            dict: Result với 'items' = kết quả từng operation (theo thứ tự request)
+        """
+        operations = data.get('operations') or []
+        
+        if not operations:
+            return {
+                'success': False,
+                'error': 'No operations provided'
+            }
+        
+        total = len(operations)
+        items = [None] * total
+        progress = {'completed': 0}
+        progress_lock = threading.Lock()
+        
+        def run_group(indexes):
+            for index in indexes:
+                op = operations[index]
+                item = self._execute_bulk_item(op)
+                items[index] = item
+                
+                with progress_lock:
+                    progress['completed'] += 1
+                    completed = progress['completed']
+                
+                self._send_command_progress(action_id, item, completed, total)
+        
+        groups = self._group_bulk_operations(operations)
+        workers = max(1, min(BULK_MAX_WORKERS, len(groups)))
+        
+        logger.info(
+            f"[EXECUTOR] Bulk {action_id}: {total} operations in "
+            f"{len(groups)} groups ({workers} workers)"
+        )
+        
+        start = time.time()
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='bulk') as pool:
+            # list() để raise exception (nếu có) của từng group
+            list(pool.map(run_group, groups))
+        duration_ms = round((time.time() - start) * 1000, 1)
+        
+        failed = sum(1 for item in items if not item['success'])
+        
+        logger.info(
+            f"[EXECUTOR] Bulk {action_id} done in {duration_ms}ms | "
+            f"Success: {total - failed}/{total}"
+        )
+        
+        result = {
+            'success': failed == 0,
+            'message': f"Bulk operation completed: {total - failed}/{total} succeeded",
+            'result': {
+                'total': total,
+                'succeeded': total - failed,
+                'failed': failed,
+                'duration_ms': duration_ms,
+                'items': items
+            }
+        }
+        if failed:
+            result['error'] = f"{failed}/{total} operations failed"
+        
+        return result
+    
+    def _execute_bulk_item(self, op):
+        """Chạy 1 operation của lệnh bulk, luôn trả về dict (không raise)"""
+        child_id = op.get('action_id')
+        command = op.get('command')
+        
+        if command not in BULK_ALLOWED_COMMANDS:
+            return {
+                'action_id': child_id,
+                'command': command,
+                'success': False,
+                'error': f"Command not allowed in bulk: {command}"
+            }
+        
+        try:
+            if command == 'toggle_device':
+                result = self._toggle_device(op.get('data', {}))
+            elif command == 'toggle_link':
+                result = self._toggle_link(op.get('data', {}))
+            else:
+                result = self._update_link_conditions(op.get('data', {}))
+        except Exception as e:
+            logger.error(f"[EXECUTOR] Bulk item {child_id} error: {e}", exc_info=True)
+            result = {'success': False, 'error': str(e)}
+        
+        return {
+            'action_id': child_id,
+            'command': command,
+            'success': result.get('success', False),
+            'message': result.get('message'),
+            'error': result.get('error'),
+            'result': result.get('result')
+        }
+    
+    # ========================================
+    # CHECKPOINT
+    # ========================================
+    
+    def _checkpoint_create(self, data):
+        """
+        Chụp trạng thái emulation hiện tại
+        
+        Args:
+            data (dict): {'name': 'before-test-3'}
+        """
+        name = data.get('name')
+        if not name:
+            return {'success': False, 'error': 'Missing checkpoint name'}
+        
+        summary = self.checkpoints.capture(name)
+        
+        return {
+            'success': True,
+            'message': f"Checkpoint '{name}' created",
+            'result': summary
+        }
+    
+    def _checkpoint_restore(self, data):
+        """
+        Đưa mạng về checkpoint (chỉ áp phần khác biệt), rồi báo trạng thái
+        device/link thay đổi lên Backend giống toggle_device/toggle_link
+        
+        Args:
+            data (dict): {'name': 'baseline'}
+        """
+        name = data.get('name')
+        if not name:
+            return {'success': False, 'error': 'Missing checkpoint name'}
+        
+        try:
+            result = self.checkpoints.restore(name)
+        except KeyError:
+            return {'success': False, 'error': f"Checkpoint '{name}' not found"}
+        
+        host_names = {h.name for h in self.net.hosts}
+        for device_name, status in result['devices'].items():
+            self._send_device_status_update(device_name, status, is_host=device_name in host_names)
+        
+        try:
+            from collectors.link_stats import update_link_status, reset_link_counter
+            for link_id, link in result['links'].items():
+                update_link_status(link_id, link['status'])
+                if link['status'] == 'up':
+                    reset_link_counter(link_id)
+        except Exception as e:
+            logger.warning(f"[EXECUTOR] Cannot update cache: {e}")
+        
+        for link_id, link in result['links'].items():
+            self._send_link_status_update(link_id, link['node1'], link['node2'], link['status'])
+        
+        if result['errors']:
+            return {
+                'success': False,
+                'error': f"Checkpoint '{name}' restored with errors: {result['errors']}",
+                'result': result
+            }
+        
+        return {
+            'success': True,
+            'message': f"Checkpoint '{name}' restored in {result['duration_ms']}ms",
+            'result': result
+        }
+    
+    def _checkpoint_delete(self, data):
+        name = data.get('name')
+        if not self.checkpoints.delete(name):
+            return {'success': False, 'error': f"Checkpoint '{name}' not found"}
+        
+        return {
+            'success': True,
+            'message': f"Checkpoint '{name}' deleted",
+            'result': {'name': name}
+        }
+    
+    def command_targets(self, command_data):
+        """
+        Tập node mà 1 lệnh sẽ chạy shell lên (dùng để serialize theo target)
+        
+        - Switch enable còn flush ARP trên các host nối trực tiếp → tính cả chúng
+        - bulk = hợp của mọi operation
+        - reload_topology, checkpoint_* = '*' (độc quyền toàn mạng)
+        
+        Returns:
+            set: Tên các node (hoặc {'*'})
+        """
+        command = command_data.get('command')
+        data = command_data.get('data') or {}
+        
+        if command in ('reload_topology', 'checkpoint_create', 'checkpoint_restore', 'checkpoint_delete'):
+            return {'*'}
+        
+        if command == 'bulk':
+            nodes = set()
+            for op in data.get('operations') or []:
+                nodes |= self.command_targets(op)
+            return nodes
+        
+        if command in ('toggle_link', 'update_link_conditions'):
+            return {data.get('node1'), data.get('node2')} - {None}
+        
+        if command != 'toggle_device':
+            return set()
+        
+        device_name = data.get('device_name')
+        nodes = {device_name} - {None}
+        
+        if device_name and device_name.startswith('s') and data.get('action') == 'enable':
+            for link in self.net.links:
+                n1, n2 = link.intf1.node.name, link.intf2.node.name
+                if n1 == device_name and n2.startswith('h'):
+                    nodes.add(n2)
+                elif n2 == device_name and n1.startswith('h'):
+                    nodes.add(n1)
+        
+        return nodes
+    
+    def _group_bulk_operations(self, operations):
+        """
+        Gom các operations dùng chung node vào cùng nhóm (union-find)
+        
+        Returns:
+            list[list[int]]: Mỗi nhóm là list index (giữ thứ tự trong request)
+        """
+        parent = list(range(len(operations)))
+        
+        def find(i):
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+        
+        owner = {}  # node name → index đầu tiên dùng node đó
+        for index, op in enumerate(operations):
+            for node in self.command_targets(op):
+                if node in owner:
+                    parent[find(index)] = find(owner[node])
+                else:
+                    owner[node] = index
+        
+        groups = {}
+        for index in range(len(operations)):
+            groups.setdefault(find(index), []).append(index)
+        
+        return list(groups.values())
+    
+    @contextmanager
+    def _node_lock(self, *nodes):
+        """
+        Giữ lock shell của 1 hoặc nhiều node (theo thứ tự tên → không deadlock)
+        
+        Node không có thuộc tính 'lock' thì bỏ qua.
+        """
+        locks = []
+        for node in sorted(set(nodes), key=lambda n: n.name):
+            if hasattr(node, 'lock'):
+                locks.append(node.lock)
+        
+        for lock in locks:
+            lock.acquire()
+        try:
+            yield
+        finally:
+            for lock in reversed(locks):
+                lock.release()
+    
+    def _send_command_progress(self, action_id, item, completed, total):
+        """
+        Gửi kết quả 1 item của lệnh bulk về Backend qua SocketIO
+        
+        Args:
+            action_id (str): ID của parent (bulk) action
+            item (dict): Kết quả item (từ _execute_bulk_item)
+            completed (int): Số item đã xong
+            total (int): Tổng số item
+        """
+        try:
+            from services.socket_client import socket_client_instance
+            
+            if not socket_client_instance:
+                logger.warning(f"[EXECUTOR] SocketClient not initialized yet")
+                return
+            
+            if not socket_client_instance.is_connected():
+                logger.warning(f"[EXECUTOR] Socket not connected")
+                return
+            
+            socket_client_instance.sio.emit('command_progress', {
+                'action_id': action_id,
+                'item': item,
+                'completed': completed,
+                'total': total
+            })
+        
+        except ImportError as e:
+            logger.error(f"[EXECUTOR] Import error: {e}")
+        except Exception as e:
+            logger.error(f"[EXECUTOR] Error sending command progress: {e}")
+    
     # ========================================
     # ✅ HÀM MỚI: GỬI STATUS UPDATE
     # ========================================
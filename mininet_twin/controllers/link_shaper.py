@@ -0,0 +1,307 @@
+# mininet_twin/controllers/link_shaper.py
+"""
+LINK SHAPER - THAY ĐỔI tc TẠI CHỖ (IN-PLACE)
+---------------------------------------------
+MỤC ĐÍCH:
+- TCIntf.config(**params) của Mininet luôn `tc qdisc del root` rồi dựng lại
+  toàn bộ → gói đang nằm trong queue bị drop, tốn nhiều lần gọi tc
+- LinkShaper nhớ tham số tc hiện tại của từng interface và chỉ áp phần khác biệt:
+    * Đổi bandwidth → `tc class change`
+    * Đổi delay/jitter/loss → `tc qdisc change` (netem)
+    * Chỉ dựng lại khi CẤU TRÚC thay đổi (thêm/bỏ htb hoặc netem)
+- Slider của NetworkConditionEditor kéo 10 lần/giây không làm gián đoạn traffic
+
+CẤU TRÚC tc (giống Mininet TCIntf, htb mặc định):
+    root 5:0 htb default 1
+      └─ class 5:1 htb rate <bw>Mbit burst 15k
+           └─ qdisc 10: netem delay <d> [<jitter>] loss <l>%
+    (không có bw → netem gắn thẳng vào root, handle 10:)
+
+GENERATOR DÙNG LẠI:
+- build_commands(intf_name, state): lệnh dựng từ đầu (không cần biết tc thật đang có gì)
+- diff_commands(intf_name, old, new): lệnh chuyển old → new
+  (dùng chung cho fast bring-up và checkpoint/restore)
+"""
+
+import threading
+from utils.logger import setup_logger
+
+logger = setup_logger()
+
+# Các tham số tc mà LinkShaper quản lý
+SHAPING_KEYS = ('bw', 'delay', 'jitter', 'loss')
+
+# Handle giống Mininet TCIntf để vẫn tương thích nếu intf đã được TCLink dựng sẵn
+HTB_ROOT = '5:0'
+HTB_CLASS = '5:1'
+NETEM_HANDLE = '10:'
+
+# State "thật" (không phải mong muốn) khi root là 1 qdisc netem bất kỳ, vd: netem
+# loss 100% của switch disable → invalidate(intf, actual=ROOT_NETEM)
+ROOT_NETEM = {'loss': 100}
+
+
+def normalize_state(params):
+    """
+    Lọc + chuẩn hóa tham số shaping (bỏ giá trị rỗng/0 không có tác dụng)
+
+    Returns:
+        dict: Chỉ gồm các key trong SHAPING_KEYS có giá trị
+    """
+    state = {}
+    for key in SHAPING_KEYS:
+        value = params.get(key)
+        if value in (None, '', 0, 0.0, '0ms'):
+            continue
+        state[key] = value
+    return state
+
+
+def _has_netem(state):
+    return any(key in state for key in ('delay', 'jitter', 'loss'))
+
+
+def structure_of(state):
+    """Cấu trúc hierarchy: (có htb, có netem)"""
+    return ('bw' in state, _has_netem(state))
+
+
+def _netem_args(state):
+    args = []
+    if 'delay' in state:
+        args.append(f"delay {state['delay']}")
+        if 'jitter' in state:
+            args.append(str(state['jitter']))
+    elif 'jitter' in state:
+        args.append(f"delay 0ms {state['jitter']}")
+    if 'loss' in state:
+        args.append(f"loss {state['loss']}%")
+    return ' '.join(args)
+
+
+def _netem_parent(state):
+    return f"parent {HTB_CLASS}" if 'bw' in state else 'root'
+
+
+def build_commands(intf_name, state):
+    """
+    Lệnh tc (dạng -batch, không có chữ 'tc') dựng hierarchy từ đầu khi KHÔNG rõ tc thật
+
+    Không dùng `qdisc del root` (lỗi nếu interface chưa có root qdisc → tc báo lỗi
+    → invalidate → lần sau lại dựng lại): 'replace' root thành netem 10: trước
+    (tạo mới hoặc thay mọi thứ đang có, không bao giờ lỗi) rồi chuyển sang state
+    như khi đã biết state cũ
+    """
+    cmds = [f"qdisc replace dev {intf_name} root handle {NETEM_HANDLE} netem"]
+    return cmds + _replace_commands(intf_name, ROOT_NETEM, state)
+
+
+def _replace_commands(intf_name, old, new):
+    """
+    Đổi cấu trúc khi ĐÃ BIẾT state cũ: dùng 'replace' (tạo mới hoặc thay tại chỗ)
+    thay vì xóa root → htb giữ nguyên handle thì kernel chỉ change, không drop queue
+    """
+    if not new:
+        # Không có root qdisc nào để xóa → del sẽ lỗi
+        return [f"qdisc del dev {intf_name} root"] if old else []
+
+    if 'bw' not in new:
+        # netem gắn thẳng vào root (thay luôn htb cũ nếu có)
+        return [f"qdisc replace dev {intf_name} root handle {NETEM_HANDLE} netem {_netem_args(new)}"]
+
+    cmds = [
+        f"qdisc replace dev {intf_name} root handle {HTB_ROOT} htb default 1",
+        f"class replace dev {intf_name} parent {HTB_ROOT} classid {HTB_CLASS} "
+        f"htb rate {float(new['bw'])}Mbit burst 15k"
+    ]
+
+    if _has_netem(new):
+        cmds.append(
+            f"qdisc replace dev {intf_name} parent {HTB_CLASS} "
+            f"handle {NETEM_HANDLE} netem {_netem_args(new)}"
+        )
+    elif 'bw' in old and _has_netem(old):
+        # Bỏ netem, giữ htb
+        cmds.append(f"qdisc del dev {intf_name} parent {HTB_CLASS} handle {NETEM_HANDLE}")
+
+    return cmds
+
+
+def diff_commands(intf_name, old, new):
+    """
+    Lệnh tc tối thiểu để chuyển interface từ state old → new
+
+    Args:
+        old (dict | None): State hiện tại (None = không rõ → dựng lại từ đầu)
+        new (dict): State mong muốn
+
+    Returns:
+        tuple: (mode: 'noop' | 'change' | 'rebuild', list lệnh tc)
+    """
+    if old is None:
+        return 'rebuild', build_commands(intf_name, new)
+
+    if old == new:
+        return 'noop', []
+
+    if structure_of(old) != structure_of(new):
+        return 'rebuild', _replace_commands(intf_name, old, new)
+
+    cmds = []
+    if new.get('bw') != old.get('bw'):
+        cmds.append(
+            f"class change dev {intf_name} parent {HTB_ROOT} classid {HTB_CLASS} "
+            f"htb rate {float(new['bw'])}Mbit burst 15k"
+        )
+
+    old_netem = {k: old.get(k) for k in ('delay', 'jitter', 'loss')}
+    new_netem = {k: new.get(k) for k in ('delay', 'jitter', 'loss')}
+    if old_netem != new_netem:
+        # netem change phải mang ĐỦ tham số (thiếu = về mặc định)
+        cmds.append(
+            f"qdisc change dev {intf_name} {_netem_parent(new)} "
+            f"handle {NETEM_HANDLE} netem {_netem_args(new)}"
+        )
+
+    return 'change', cmds
+
+
+class LinkShaper:
+    """
+    Nhớ state tc MONG MUỐN của từng interface, sinh lệnh thay đổi tối thiểu
+
+    - Interface "dirty": tc thật đã bị đổi ngoài LinkShaper (vd: switch disable
+      dùng netem loss 100%, host disable xóa root qdisc) → lần áp tiếp theo
+      dựng lại từ state mong muốn thay vì 'change'. Biết tc thật đang là gì
+      (invalidate(..., actual=...)) thì chỉ 'replace' từ đó, không thì build_commands
+
+    THREAD-SAFE: self._lock bảo vệ self._state / self._dirty
+
+    Example Usage:
+    --------------
+    shaper = LinkShaper()
+    plan = BatchPlan()
+    shaper.plan_update(link.intf1, {'delay': '20ms'}, plan)
+    shaper.plan_update(link.intf2, {'delay': '20ms'}, plan)
+    plan.execute()
+    """
+
+    def __init__(self):
+        # intf name → state dict mong muốn (xem normalize_state)
+        self._state = {}
+        # intf name có tc thật KHÔNG khớp state → state tc thật (None = không rõ)
+        self._dirty = {}
+        self._lock = threading.Lock()
+
+    def get_state(self, intf):
+        """
+        State mong muốn của interface
+
+        Lần đầu: lấy từ intf.params nếu intf là TCIntf (Mininet đã dựng tc theo params),
+        ngược lại coi như chưa có shaping
+        """
+        with self._lock:
+            return dict(self._get_state_locked(intf))
+
+    def _get_state_locked(self, intf):
+        state = self._state.get(intf.name)
+        if state is None:
+            params = getattr(intf, 'params', None) or {}
+            state = normalize_state(params) if hasattr(intf, 'bwCmds') else {}
+            self._state[intf.name] = state
+        return state
+
+    def plan_update(self, intf, conditions, plan):
+        """
+        Thêm lệnh tc áp `conditions` lên interface vào BatchPlan
+
+        Args:
+            intf: Mininet interface
+            conditions (dict): Tham số MỚI (bw/delay/jitter/loss), giữ nguyên các key không có
+            plan (BatchPlan): Plan để thêm lệnh
+
+        Returns:
+            tuple: (mode: 'noop' | 'change' | 'rebuild', state mới)
+        """
+        with self._lock:
+            merged = dict(self._get_state_locked(intf))
+            merged.update({k: v for k, v in conditions.items() if k in SHAPING_KEYS})
+            new = normalize_state(merged)
+            mode, cmds = self._transition_locked(intf, new)
+
+        for cmd in cmds:
+            plan.tc(intf.node, cmd)
+
+        return mode, new
+
+    def plan_set(self, intf, state, plan):
+        """
+        Như plan_update nhưng THAY TOÀN BỘ state (key không có trong `state` bị bỏ)
+        (dùng khi restore checkpoint)
+        """
+        with self._lock:
+            new = normalize_state(state)
+            mode, cmds = self._transition_locked(intf, new)
+
+        for cmd in cmds:
+            plan.tc(intf.node, cmd)
+
+        return mode, new
+
+    def plan_restore(self, intf, plan):
+        """
+        Dựng lại tc của interface theo state mong muốn
+        (dùng khi enable lại switch/host sau khi tc bị thay/xóa)
+        """
+        with self._lock:
+            state = dict(self._get_state_locked(intf))
+            if intf.name not in self._dirty:
+                # Không được báo tc thật đã bị đổi → vẫn dựng lại cho chắc
+                self._dirty[intf.name] = None
+            _, cmds = self._transition_locked(intf, state)
+
+        for cmd in cmds:
+            plan.tc(intf.node, cmd)
+
+        return state
+
+    def _transition_locked(self, intf, new):
+        """
+        Lệnh chuyển tc thật → state `new` (gọi khi đang giữ self._lock), ghi nhận state mới
+
+        Returns:
+            tuple: (mode: 'noop' | 'change' | 'rebuild', list lệnh tc)
+        """
+        if intf.name in self._dirty:
+            actual = self._dirty.pop(intf.name)
+            if actual is None:
+                mode, cmds = 'rebuild', build_commands(intf.name, new)
+            else:
+                cmds = _replace_commands(intf.name, actual, new)
+                mode = 'rebuild' if cmds else 'noop'
+        else:
+            mode, cmds = diff_commands(intf.name, self._get_state_locked(intf), new)
+
+        self._state[intf.name] = new
+        return mode, cmds
+
+    def set_state(self, intf_name, state):
+        """Ghi đè state đã áp thật (vd: sau khi restore checkpoint)"""
+        with self._lock:
+            self._state[intf_name] = normalize_state(state)
+            self._dirty.pop(intf_name, None)
+
+    def invalidate(self, intf_name, actual=None):
+        """
+        Đánh dấu tc thật của interface không còn khớp state mong muốn
+
+        Args:
+            actual (dict | None): tc thật hiện giờ nếu biết ({} = không có root qdisc,
+                ROOT_NETEM = root là netem, vd: loss 100%); None = không rõ
+        """
+        with self._lock:
+            self._dirty[intf_name] = actual
+
+
+# Instance dùng chung (CommandExecutor, checkpoint...)
+link_shaper = LinkShaper()
@@ -0,0 +1,268 @@
+# mininet_twin/controllers/topology_reload.py
+"""
+LIVE TOPOLOGY RELOAD (INCREMENTAL)
+----------------------------------
+MỤC ĐÍCH:
+- Đổi topology KHÔNG cần restart Mininet (restart mất vài phút với mạng lớn,
+  và mất toàn bộ lịch sử)
+- So sánh topology mới (JSON import) với `net` đang chạy → chỉ thêm/xóa phần khác
+- Link chỉ đổi `bw` → đổi bandwidth tại chỗ qua LinkShaper (không xóa link)
+- Thời gian reload tỉ lệ với KÍCH THƯỚC THAY ĐỔI, không phải kích thước mạng
+
+FORMAT TOPOLOGY (giống topology.json):
+    {
+        "hosts":    [{"name": "h1", "ip": "10.0.0.1/24", "mac": "00:00:00:00:00:01"}],
+        "switches": [{"name": "s1", "dpid": "0000000000000001"}],
+        "links":    [{"from": "h1", "to": "s1", "bw": 100}]
+    }
+
+THỨ TỰ ÁP DỤNG:
+1. Xóa link (detach port OVS trước) → xóa host/switch
+2. Thêm host/switch → thêm link → start switch mới / config host mới
+3. Đổi bw các link giữ nguyên (1 tc -batch mỗi namespace)
+"""
+
+import threading
+import time
+from controllers.batch_plan import BatchPlan
+from controllers.link_shaper import link_shaper
+from utils.logger import setup_logger
+
+logger = setup_logger()
+
+
+def _link_key(n1, n2):
+    return "-".join(sorted([n1, n2]))
+
+
+def default_bw(n1, n2):
+    """Bandwidth mặc định giống ConfigTopo: switch-switch 1000, còn lại 100"""
+    return 1000 if n1.startswith('s') and n2.startswith('s') else 100
+
+
+class TopologyDiff:
+    """Kết quả so sánh topology mới với net đang chạy"""
+
+    def __init__(self):
+        self.hosts_added = []       # [host dict]
+        self.hosts_removed = []     # [name]
+        self.hosts_updated = []     # [host dict] (đổi IP/MAC)
+        self.switches_added = []    # [switch dict]
+        self.switches_removed = []  # [name]
+        self.links_added = []       # [{'node1', 'node2', 'bandwidth'}]
+        self.links_removed = []     # [{'node1', 'node2'}]
+        self.links_updated = []     # [{'node1', 'node2', 'bandwidth'}]
+
+    def is_empty(self):
+        return not any(self.to_dict().values())
+
+    def size(self):
+        return sum(len(v) for v in self.to_dict().values())
+
+    def to_dict(self):
+        """Format gửi Backend (/api/init/topology/diff)"""
+        return {
+            'hosts_added': self.hosts_added,
+            'hosts_removed': self.hosts_removed,
+            'hosts_updated': self.hosts_updated,
+            'switches_added': self.switches_added,
+            'switches_removed': self.switches_removed,
+            'links_added': self.links_added,
+            'links_removed': self.links_removed,
+            'links_updated': self.links_updated
+        }
+
+    def summary(self):
+        return {key: len(value) for key, value in self.to_dict().items()}
+
+
+def _current_bw(link):
+    return link.intf1.params.get('bw', default_bw(link.intf1.node.name, link.intf2.node.name))
+
+
+def diff_topology(net, topology):
+    """
+    So sánh topology JSON với net đang chạy
+
+    Raises:
+        ValueError: Topology không hợp lệ (link tới node không tồn tại, trùng tên...)
+    """
+    diff = TopologyDiff()
+
+    new_hosts = {h['name']: h for h in topology.get('hosts', [])}
+    new_switches = {s['name']: s for s in topology.get('switches', [])}
+
+    overlap = set(new_hosts) & set(new_switches)
+    if overlap:
+        raise ValueError(f"Names used for both host and switch: {sorted(overlap)}")
+
+    new_links = {}
+    for link in topology.get('links', []):
+        n1, n2 = link['from'], link['to']
+        if n1 not in new_hosts and n1 not in new_switches:
+            raise ValueError(f"Link {n1}-{n2}: node '{n1}' not defined")
+        if n2 not in new_hosts and n2 not in new_switches:
+            raise ValueError(f"Link {n1}-{n2}: node '{n2}' not defined")
+        new_links[_link_key(n1, n2)] = {
+            'node1': n1,
+            'node2': n2,
+            'bandwidth': link.get('bw', default_bw(n1, n2))
+        }
+
+    # --- Hosts ---
+    current_hosts = {h.name: h for h in net.hosts}
+    for name, spec in new_hosts.items():
+        host = current_hosts.get(name)
+        if host is None:
+            diff.hosts_added.append(spec)
+        else:
+            ip_changed = spec.get('ip') and spec['ip'].split('/')[0] != host.IP()
+            mac_changed = spec.get('mac') and spec['mac'].lower() != (host.MAC() or '').lower()
+            if ip_changed or mac_changed:
+                diff.hosts_updated.append({**spec, 'previous_ip': host.IP()})
+    diff.hosts_removed = [name for name in current_hosts if name not in new_hosts]
+
+    # --- Switches (đổi dpid = xóa + thêm) ---
+    current_switches = {s.name: s for s in net.switches}
+    for name, spec in new_switches.items():
+        switch = current_switches.get(name)
+        if switch is None:
+            diff.switches_added.append(spec)
+        elif spec.get('dpid') and spec['dpid'].lstrip('0') != str(switch.dpid).lstrip('0'):
+            diff.switches_removed.append(name)
+            diff.switches_added.append(spec)
+    diff.switches_removed += [name for name in current_switches if name not in new_switches]
+
+    # --- Links ---
+    recreated = set(diff.hosts_removed) | set(diff.switches_removed)
+    current_links = {}
+    for link in net.links:
+        current_links[_link_key(link.intf1.node.name, link.intf2.node.name)] = link
+
+    for key, link in current_links.items():
+        n1, n2 = link.intf1.node.name, link.intf2.node.name
+        if key not in new_links or n1 in recreated or n2 in recreated:
+            diff.links_removed.append({'node1': n1, 'node2': n2})
+
+    removed_keys = {_link_key(l['node1'], l['node2']) for l in diff.links_removed}
+    for key, spec in new_links.items():
+        if key not in current_links or key in removed_keys:
+            diff.links_added.append(spec)
+        elif float(spec['bandwidth']) != float(_current_bw(current_links[key])):
+            diff.links_updated.append(spec)
+
+    return diff
+
+
+def apply_diff(net, diff):
+    """
+    Áp TopologyDiff lên net đang chạy
+
+    Returns:
+        dict: Thời gian từng phase (ms)
+    """
+    timings = {}
+    removed_nodes = set(diff.hosts_removed) | set(diff.switches_removed)
+
+    # ========================================
+    # PHASE 1: XÓA LINK + NODE
+    # ========================================
+    start = time.monotonic()
+    removed_keys = {_link_key(l['node1'], l['node2']) for l in diff.links_removed}
+
+    for link in list(net.links):
+        n1, n2 = link.intf1.node, link.intf2.node
+        if _link_key(n1.name, n2.name) not in removed_keys:
+            continue
+
+        # Switch còn sống → gỡ port khỏi OVS trước khi xóa veth
+        for intf in (link.intf1, link.intf2):
+            node = intf.node
+            if node.name not in removed_nodes and hasattr(node, 'detach') and node in net.switches:
+                try:
+                    node.detach(intf)
+                except Exception as e:
+                    logger.warning(f"[RELOAD] Cannot detach {intf.name} from {node.name}: {e}")
+            link_shaper.invalidate(intf.name)
+
+        net.delLink(link)
+
+    for name in diff.hosts_removed:
+        net.delHost(net.get(name))
+    for name in diff.switches_removed:
+        net.delSwitch(net.get(name))
+
+    timings['remove_ms'] = round((time.monotonic() - start) * 1000, 1)
+
+    # ========================================
+    # PHASE 2: THÊM NODE + LINK
+    # ========================================
+    start = time.monotonic()
+    new_hosts = []
+    new_switches = []
+
+    for spec in diff.hosts_added:
+        host = net.addHost(spec['name'], ip=spec.get('ip'), mac=spec.get('mac'))
+        host.lock = threading.Lock()
+        new_hosts.append(host)
+
+    for spec in diff.switches_added:
+        opts = {'stp': True} if spec.get('stp') else {}
+        switch = net.addSwitch(spec['name'], dpid=spec.get('dpid'), **opts)
+        switch.lock = threading.Lock()
+        new_switches.append(switch)
+
+    new_names = {n.name for n in new_hosts + new_switches}
+    plan = BatchPlan()
+
+    for spec in diff.links_added:
+        node1, node2 = net.get(spec['node1']), net.get(spec['node2'])
+        link = net.addLink(node1, node2)
+
+        for intf in (link.intf1, link.intf2):
+            node = intf.node
+            if node.name in new_names:
+                continue  # Node mới → config ở bước start bên dưới
+            if node in net.switches:
+                node.attach(intf)
+            else:
+                plan.ip(node, f"link set dev {intf.name} up")
+
+        for intf in (link.intf1, link.intf2):
+            # plan_update TRƯỚC: TCIntf chưa có state thì LinkShaper lấy state ban đầu
+            # từ intf.params → đổi params trước thì diff ra 'noop', bw không được áp
+            link_shaper.plan_update(intf, {'bw': spec['bandwidth']}, plan)
+            intf.params['bw'] = spec['bandwidth']
+
+    for host in new_hosts:
+        host.configDefault()
+
+    for switch in new_switches:
+        switch.start(net.controllers)
+
+    timings['add_ms'] = round((time.monotonic() - start) * 1000, 1)
+
+    # ========================================
+    # PHASE 3: ĐỔI BANDWIDTH TẠI CHỖ
+    # ========================================
+    start = time.monotonic()
+
+    for spec in diff.links_updated:
+        node1, node2 = net.get(spec['node1']), net.get(spec['node2'])
+        for link in net.linksBetween(node1, node2):
+            for intf in (link.intf1, link.intf2):
+                link_shaper.plan_update(intf, {'bw': spec['bandwidth']}, plan)
+                intf.params['bw'] = spec['bandwidth']
+
+    for host in diff.hosts_updated:
+        node = net.get(host['name'])
+        if host.get('ip'):
+            ip, _, prefix = host['ip'].partition('/')
+            node.setIP(ip, int(prefix) if prefix else 8)
+        if host.get('mac'):
+            node.setMAC(host['mac'])
+
+    plan.execute()
+    timings['configure_ms'] = round((time.monotonic() - start) * 1000, 1)
+
+    return timings
@@ -0,0 +1,189 @@
+# mininet_twin/controllers/verifier.py
+"""
+VERIFIER - CHỜ ĐIỀU KIỆN THẬT THAY VÌ SLEEP CỐ ĐỊNH
+----------------------------------------------------
+MỤC ĐÍCH:
+- Thay các time.sleep(0.1 ... 1.0) trong CommandExecutor bằng việc chờ
+  đúng điều kiện cần (interface UP/DOWN, qdisc đã xóa, flow đã cài)
+- Trả về ngay khi điều kiện đúng, có deadline rõ ràng
+- Đo thời gian hội tụ (convergence_ms) để gửi kèm command_result
+
+CÁCH CHỜ:
+- Poll với backoff: 5ms → 10ms → 20ms ... tối đa 100ms/lần
+- Thay đổi thường xong trong vài ms → chỉ tốn 1-2 lần poll
+
+Example Usage:
+--------------
+ok, elapsed_ms = wait_until(lambda: intf_is_up(h1, 'h1-eth0'), timeout=2.0)
+if not ok:
+    logger.warning(f"h1-eth0 chưa UP sau {elapsed_ms}ms")
+"""
+
+import time
+from controllers.link_shaper import NETEM_HANDLE
+from utils.logger import setup_logger
+
+logger = setup_logger()
+
+# Deadline mặc định (giây)
+DEFAULT_TIMEOUT = 2.0
+
+# Khoảng poll đầu tiên và tối đa (giây)
+_FIRST_INTERVAL = 0.005
+_MAX_INTERVAL = 0.1
+
+
+def wait_until(predicate, timeout=DEFAULT_TIMEOUT, interval=_FIRST_INTERVAL, max_interval=_MAX_INTERVAL):
+    """
+    Chờ tới khi predicate() trả về True hoặc hết timeout
+
+    Args:
+        predicate (callable): Hàm không tham số, trả về bool
+        timeout (float): Deadline (giây)
+        interval (float): Khoảng poll đầu tiên (giây), nhân đôi sau mỗi lần
+        max_interval (float): Khoảng poll tối đa (giây)
+
+    Returns:
+        tuple: (ok: bool, elapsed_ms: float)
+    """
+    start = time.monotonic()
+    deadline = start + timeout
+
+    while True:
+        try:
+            if predicate():
+                return True, round((time.monotonic() - start) * 1000, 1)
+        except Exception as e:
+            logger.debug(f"[VERIFIER] Predicate error: {e}")
+
+        now = time.monotonic()
+        if now >= deadline:
+            return False, round((now - start) * 1000, 1)
+
+        time.sleep(min(interval, deadline - now))
+        interval = min(interval * 2, max_interval)
+
+
+class Convergence:
+    """
+    Gom nhiều lần wait_until của 1 lệnh → 1 kết quả cho command_result
+
+    Example:
+        conv = Convergence()
+        conv.wait('h1-eth0 up', lambda: intf_is_up(h1, 'h1-eth0'))
+        result['convergence_ms'] = conv.total_ms
+        result['converged'] = conv.ok
+    """
+
+    def __init__(self):
+        self.start = time.monotonic()
+        self.ok = True
+        self.failed = []
+
+    def wait(self, label, predicate, timeout=DEFAULT_TIMEOUT):
+        ok, elapsed_ms = wait_until(predicate, timeout=timeout)
+        if not ok:
+            self.ok = False
+            self.failed.append(label)
+            logger.warning(f"[VERIFIER] Not converged after {elapsed_ms}ms: {label}")
+        return ok
+
+    @property
+    def total_ms(self):
+        return round((time.monotonic() - self.start) * 1000, 1)
+
+    def to_dict(self):
+        data = {
+            'convergence_ms': self.total_ms,
+            'converged': self.ok
+        }
+        if self.failed:
+            data['not_converged'] = self.failed
+        return data
+
+
+# ========================================
+# CÁC ĐIỀU KIỆN (PREDICATES)
+# ========================================
+
+def _node_cmd(node, cmd):
+    """Chạy lệnh trên node, giữ node.lock nếu có"""
+    if hasattr(node, 'lock'):
+        with node.lock:
+            return node.cmd(cmd)
+    return node.cmd(cmd)
+
+
+def _link_flags(node, intf_name):
+    """
+    Đọc flags + operstate của interface trong namespace của node
+
+    Returns:
+        tuple: (flags: set, operstate: str)
+        vd: ({'BROADCAST', 'UP', 'LOWER_UP'}, 'UP')
+    """
+    output = _node_cmd(node, f'ip -o link show dev {intf_name}')
+
+    flags = set()
+    start, end = output.find('<'), output.find('>')
+    if start != -1 and end > start:
+        flags = set(output[start + 1:end].split(','))
+
+    operstate = ''
+    parts = output.split()
+    if 'state' in parts:
+        idx = parts.index('state')
+        if idx + 1 < len(parts):
+            operstate = parts[idx + 1]
+
+    return flags, operstate
+
+
+def intf_admin_down(node, intf_name):
+    """Interface đã bị set DOWN (cờ UP đã tắt)"""
+    flags, _ = _link_flags(node, intf_name)
+    return 'UP' not in flags
+
+
+def intf_admin_up(node, intf_name):
+    """Interface đã được set UP (chưa chắc có carrier)"""
+    flags, _ = _link_flags(node, intf_name)
+    return 'UP' in flags
+
+
+def intf_oper_up(node, intf_name):
+    """Interface UP và có carrier (operstate UP)"""
+    flags, operstate = _link_flags(node, intf_name)
+    return 'UP' in flags and 'LOWER_UP' in flags and operstate in ('UP', 'UNKNOWN')
+
+
+def qdisc_absent(node, intf_name, kind='netem'):
+    """Không còn qdisc loại 'kind' trên interface"""
+    output = _node_cmd(node, f'tc qdisc show dev {intf_name}')
+    return kind not in output
+
+
+def netem_restored(node, intf_name, state):
+    """
+    Đã gỡ netem loss 100% (switch disable) và dựng lại tc theo state mong muốn
+    - state không có delay/jitter/loss → không còn netem nào
+    - ngược lại → netem handle 10: đã có, không còn 'loss 100%' (trừ khi chính state muốn loss 100%)
+    """
+    output = _node_cmd(node, f'tc qdisc show dev {intf_name}')
+    if not any(key in state for key in ('delay', 'jitter', 'loss')):
+        return 'netem' not in output
+    if f'qdisc netem {NETEM_HANDLE}' not in output:
+        return False
+    return float(state.get('loss') or 0) >= 100 or 'loss 100%' not in output
+
+
+def flow_installed(switch, pattern='actions=NORMAL'):
+    """Switch đã có flow khớp pattern (không phân biệt hoa/thường)"""
+    output = _node_cmd(switch, f'ovs-ofctl dump-flows {switch.name} 2>&1')
+    return pattern.lower() in output.lower()
+
+
+def bridge_exists(switch):
+    """OVS bridge của switch đã sẵn sàng nhận lệnh ovs-ofctl"""
+    output = _node_cmd(switch, f'ovs-ofctl show {switch.name} 2>&1').lower()
+    return 'cannot connect' not in output and 'unknown bridge' not in output and 'dpid' in output
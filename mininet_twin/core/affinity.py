@@ -0,0 +1,336 @@
+# mininet_twin/core/affinity.py
+"""
+CPU AFFINITY PLANNER
+--------------------
+MỤC ĐÍCH:
+- Shell của host, ovs-vswitchd, iperf / traffic agent, vòng lặp thu thập, thread ping,
+  Socket.IO client đều tranh nhau MỌI core → đo đạc bị jitter khi máy có tải
+- Chia core thành 3 vùng tách biệt:
+    * collector : process Python của twin (main loop, ping thread, socket, command engine)
+    * ovs       : ovs-vswitchd + ovsdb-server (mọi thread: handler, revalidator...)
+    * hosts     : shell của host + mọi process con (iperf, ping) + traffic agent
+- Core được chia theo NHÓM SMT (các hyperthread cùng 1 core vật lý luôn chung 1 vùng)
+  → thread đo không bị hyperthread hàng xóm đang sinh traffic làm chậm
+- collector lấy các core CUỐI (core 0 thường gánh nhiều IRQ), ovs lấy các core ĐẦU
+
+CPULimitedHost:
+- Host có `cores` (cgroup cpuset) → GIỮ NGUYÊN, chỉ báo cáo (cpuset ưu tiên hơn affinity)
+- Host có `cpu` (CFS quota = period × frac × số core của MÁY) → quota tính lại theo số
+  core vùng hosts, để frac vẫn là tỉ lệ của phần CPU host thực sự được chạy
+
+GIỚI HẠN:
+- Softirq của veth / datapath OVS chạy trên core của process gửi → không pin được
+- Lệnh tc / ip / ovs-vsctl mà twin tự spawn chạy trên vùng collector
+- Thread/process tạo SAU khi apply kế thừa affinity của process cha (Linux) nên chỉ cần
+  pin 1 lần; traffic agent spawn từ Python nên AgentPool tự pin sang vùng hosts
+
+CẤU HÌNH:
+- CPU_AFFINITY                : auto (mặc định, chỉ bật khi ≥ AFFINITY_MIN_CORES) | true | false
+- AFFINITY_MIN_CORES          : 8
+- AFFINITY_COLLECTOR_SHARE    : Tỉ lệ core cho collector (0.0625 → 2/32 core)
+- AFFINITY_OVS_SHARE          : Tỉ lệ core cho OVS (0.25)
+- AFFINITY_COLLECTOR_CPUS / AFFINITY_OVS_CPUS / AFFINITY_HOST_CPUS:
+    chỉ định tay dạng cpulist ("30-31", "0-7,16-23"), bỏ qua tỉ lệ
+"""
+
+import os
+from utils.logger import setup_logger
+
+logger = setup_logger()
+
+CPU_AFFINITY = os.getenv('CPU_AFFINITY', 'auto').lower()
+AFFINITY_MIN_CORES = int(os.getenv('AFFINITY_MIN_CORES', 8))
+AFFINITY_COLLECTOR_SHARE = float(os.getenv('AFFINITY_COLLECTOR_SHARE', 0.0625))
+AFFINITY_OVS_SHARE = float(os.getenv('AFFINITY_OVS_SHARE', 0.25))
+
+OVS_PROCESSES = ('ovs-vswitchd', 'ovsdb-server')
+
+
+# ========================================
+# CPULIST
+# ========================================
+
+def parse_cpulist(text):
+    """'0-3,8,10-11' → {0, 1, 2, 3, 8, 10, 11}"""
+    cpus = set()
+    for part in text.strip().split(','):
+        if not part:
+            continue
+        if '-' in part:
+            low, high = part.split('-')
+            cpus.update(range(int(low), int(high) + 1))
+        else:
+            cpus.add(int(part))
+    return cpus
+
+
+def format_cpulist(cpus):
+    """{0, 1, 2, 3, 8} → '0-3,8'"""
+    ranges = []
+    for cpu in sorted(cpus):
+        if ranges and cpu == ranges[-1][1] + 1:
+            ranges[-1][1] = cpu
+        else:
+            ranges.append([cpu, cpu])
+    return ','.join(str(low) if low == high else f"{low}-{high}" for low, high in ranges)
+
+
+def cpu_groups(available):
+    """
+    Nhóm CPU theo core vật lý (thread_siblings_list), sắp theo CPU nhỏ nhất
+
+    Returns:
+        list: [[0, 16], [1, 17], ...] (không đọc được sysfs → mỗi CPU 1 nhóm)
+    """
+    groups = {}
+    for cpu in sorted(available):
+        path = f'/sys/devices/system/cpu/cpu{cpu}/topology/thread_siblings_list'
+        try:
+            with open(path) as f:
+                siblings = parse_cpulist(f.read()) & available
+        except (OSError, ValueError):
+            siblings = {cpu}
+        groups.setdefault(min(siblings), sorted(siblings))
+    return [groups[key] for key in sorted(groups)]
+
+
+def _cores_param(cores):
+    """Tham số `cores` của CPULimitedHost (int | list | '0-3') → set"""
+    if isinstance(cores, str):
+        return parse_cpulist(cores)
+    if isinstance(cores, (list, tuple, set)):
+        return {int(c) for c in cores}
+    return {int(cores)}
+
+
+# ========================================
+# PROCESS / THREAD
+# ========================================
+
+def thread_ids(pid):
+    """Mọi thread (tid) của 1 process (sched_setaffinity chỉ áp cho đúng tid được gọi)"""
+    try:
+        return [int(tid) for tid in os.listdir(f'/proc/{pid}/task')]
+    except OSError:
+        return []
+
+
+def child_pids(pid):
+    """Mọi process con cháu đang chạy của pid (iperf server đã start trước khi pin)"""
+    children, frontier = [], [pid]
+    while frontier:
+        parent = frontier.pop()
+        for tid in thread_ids(parent):
+            try:
+                with open(f'/proc/{parent}/task/{tid}/children') as f:
+                    found = [int(p) for p in f.read().split()]
+            except (OSError, ValueError):
+                continue
+            children.extend(found)
+            frontier.extend(found)
+    return children
+
+
+def find_pids(names):
+    """pid của các process có comm thuộc `names` (quét /proc)"""
+    pids = []
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/comm') as f:
+                if f.read().strip() in names:
+                    pids.append(int(entry))
+        except OSError:
+            continue
+    return pids
+
+
+def pin(pid, cpus, threads=True):
+    """
+    Pin process (mặc định kèm mọi thread của nó)
+
+    Returns:
+        int: Số tid đã pin thành công
+    """
+    pinned = 0
+    for tid in thread_ids(pid) if threads else [pid]:
+        try:
+            os.sched_setaffinity(tid, cpus)
+            pinned += 1
+        except (OSError, ValueError):
+            # Thread vừa thoát / nằm trong cpuset không chứa cpus
+            continue
+    return pinned
+
+
+# ========================================
+# PLANNER
+# ========================================
+
+class AffinityPlanner:
+    """
+    Example Usage:
+    --------------
+    planner = AffinityPlanner(net)
+    report = planner.apply()
+    # {'enabled': True, 'cpus': 32, 'smt': True,
+    #  'partitions': {'collector': '15,31', 'ovs': '0-3,16-19', 'hosts': '4-14,20-30'},
+    #  'pinned': {'collector_threads': 9, 'ovs_threads': 41, 'hosts': 64, 'host_children': 64},
+    #  'cgroup_hosts': [], 'quota_rescaled': 0, 'errors': []}
+    traffic_gen.agents.cpu_set = planner.partitions['hosts']
+    """
+
+    def __init__(self, net, mode=CPU_AFFINITY):
+        self.net = net
+        self.mode = mode
+        self.partitions = {}
+        self.report = {'enabled': False}
+
+    def plan(self, available=None):
+        """
+        Chia core (không áp dụng gì)
+
+        Returns:
+            dict | None: {'collector': set, 'ovs': set, 'hosts': set}
+                         (None nếu không đủ core để tách vùng)
+        """
+        available = set(available if available is not None else os.sched_getaffinity(0))
+
+        overrides = {
+            name: parse_cpulist(os.getenv(env)) & available
+            for name, env in (('collector', 'AFFINITY_COLLECTOR_CPUS'),
+                              ('ovs', 'AFFINITY_OVS_CPUS'),
+                              ('hosts', 'AFFINITY_HOST_CPUS'))
+            if os.getenv(env)
+        }
+        if overrides:
+            rest = available - set().union(*overrides.values())
+            partitions = {name: overrides.get(name) or set(rest) for name in ('collector', 'ovs', 'hosts')}
+            return partitions if all(partitions.values()) else None
+
+        groups = cpu_groups(available)
+        if len(groups) < 3:
+            return None
+
+        collector_n = max(1, round(len(groups) * AFFINITY_COLLECTOR_SHARE))
+        ovs_n = max(1, round(len(groups) * AFFINITY_OVS_SHARE))
+        if collector_n + ovs_n >= len(groups):
+            collector_n, ovs_n = 1, 1
+
+        return {
+            'ovs': {cpu for group in groups[:ovs_n] for cpu in group},
+            'hosts': {cpu for group in groups[ovs_n:len(groups) - collector_n] for cpu in group},
+            'collector': {cpu for group in groups[len(groups) - collector_n:] for cpu in group}
+        }
+
+    def apply(self):
+        """
+        Chia core + pin collector / OVS / host (gọi sau khi net đã start, TRƯỚC khi sinh traffic)
+
+        Returns:
+            dict: Báo cáo (log + gửi Backend, hiển thị ở /control/health → emulator.affinity)
+        """
+        available = os.sched_getaffinity(0)
+        if self.mode == 'false' or (self.mode == 'auto' and len(available) < AFFINITY_MIN_CORES):
+            self.report = {'enabled': False, 'cpus': len(available),
+                           'reason': f"CPU_AFFINITY={self.mode}, {len(available)} cores"}
+            logger.info(f"[AFFINITY] Không pin CPU ({self.report['reason']})")
+            return self.report
+
+        partitions = self.plan(available)
+        if partitions is None:
+            self.report = {'enabled': False, 'cpus': len(available), 'reason': 'not enough cores to partition'}
+            logger.warning(f"[AFFINITY] Không đủ core để chia vùng ({len(available)})")
+            return self.report
+
+        self.partitions = partitions
+        errors = []
+
+        # Collector: mọi thread hiện có của process Python (thread tạo sau kế thừa)
+        collector_threads = pin(os.getpid(), partitions['collector'])
+
+        ovs_threads = 0
+        for pid in find_pids(OVS_PROCESSES):
+            ovs_threads += pin(pid, partitions['ovs'])
+        if not ovs_threads:
+            errors.append('ovs-vswitchd not found')
+
+        host_report = self.pin_hosts(self.net.hosts)
+
+        self.report = {
+            'enabled': True,
+            'cpus': len(available),
+            'smt': len(cpu_groups(available)) < len(available),
+            'partitions': {name: format_cpulist(cpus) for name, cpus in partitions.items()},
+            'pinned': {
+                'collector_threads': collector_threads,
+                'ovs_threads': ovs_threads,
+                'hosts': host_report['hosts'],
+                'host_children': host_report['children']
+            },
+            'cgroup_hosts': host_report['cgroup_hosts'],
+            'quota_rescaled': host_report['quota_rescaled'],
+            'errors': errors + host_report['errors']
+        }
+
+        logger.info(
+            f"[AFFINITY] collector={self.report['partitions']['collector']} "
+            f"ovs={self.report['partitions']['ovs']} hosts={self.report['partitions']['hosts']} | "
+            f"pinned {collector_threads} collector threads, {ovs_threads} OVS threads, "
+            f"{host_report['hosts']} hosts ({len(host_report['cgroup_hosts'])} giữ cpuset cgroup)"
+        )
+        for error in self.report['errors']:
+            logger.warning(f"[AFFINITY] {error}")
+        return self.report
+
+    def pin_hosts(self, hosts):
+        """
+        Pin shell (+ process con) của các host vào vùng hosts
+
+        Returns:
+            dict: {'hosts', 'children', 'cgroup_hosts', 'quota_rescaled', 'errors'}
+        """
+        result = {'hosts': 0, 'children': 0, 'cgroup_hosts': [], 'quota_rescaled': 0, 'errors': []}
+        cpus = self.partitions.get('hosts')
+        if not cpus:
+            return result
+
+        for host in hosts:
+            params = getattr(host, 'params', {}) or {}
+
+            # cpuset cgroup của CPULimitedHost → người dùng đã chọn core, không ghi đè
+            if params.get('cores') is not None:
+                result['cgroup_hosts'].append(host.name)
+                overlap = _cores_param(params['cores']) & self.partitions['collector']
+                if overlap:
+                    result['errors'].append(
+                        f"{host.name} cpuset overlaps collector cores {format_cpulist(overlap)}"
+                    )
+                continue
+
+            if not getattr(host, 'pid', None) or not pin(host.pid, cpus, threads=False):
+                result['errors'].append(f"Cannot pin {host.name}")
+                continue
+            result['hosts'] += 1
+            for child in child_pids(host.pid):
+                result['children'] += pin(child, cpus)
+
+            # CFS quota = period × frac × numCores() của CẢ MÁY → tính lại theo vùng hosts
+            frac = params.get('cpu', -1)
+            if frac and frac > 0 and hasattr(host, 'cgroupSet') and getattr(host, 'sched', 'cfs') == 'cfs':
+                quota = max(1000, int(host.period_us * frac * len(cpus)))
+                try:
+                    host.cgroupSet('cfs_quota_us', quota)
+                    result['quota_rescaled'] += 1
+                except Exception as e:
+                    result['errors'].append(f"{host.name} quota: {e}")
+
+        return result
+
+    def on_topology_changed(self, net, diff):
+        """Hook sau reload_topology: pin host MỚI (đăng ký TRƯỚC hook của traffic generator)"""
+        if not self.partitions or not diff.hosts_added:
+            return
+        result = self.pin_hosts([net.get(spec['name']) for spec in diff.hosts_added])
+        logger.info(f"[AFFINITY] Pinned {result['hosts']} new hosts to {format_cpulist(self.partitions['hosts'])}")
@@ -0,0 +1,227 @@
+# mininet_twin/core/fast_bringup.py
+"""
+FAST BRING-UP (TOPOLOGY LỚN)
+----------------------------
+MỤC ĐÍCH:
+- Mininet(topo=...).start() dựng mạng TỪNG LỆNH MỘT:
+    * mỗi link: 1 process `ip link add ... type veth` (+ `ip link del` dọn trước)
+    * mỗi interface: 1 `ifconfig up` qua shell của node
+    * mỗi host: tạo shell/cgroup + cấu hình IP/MAC tuần tự
+  → 1000 node mất vài phút
+- Fast bring-up dựng CÙNG mạng đó (cùng tên interface, port, IP/MAC, dpid) nhưng gom lệnh:
+    * nodes   : shell của host được tạo song song (BRINGUP_WORKERS)
+    * veth    : TOÀN BỘ veth pair tạo bằng 1 `ip -batch` ở root namespace,
+                đầu bên host tạo thẳng trong namespace của host (netns <pid>)
+    * links   : đối tượng Link/Intf của Mininet được dựng KHÔNG chạy lệnh nào
+    * up      : mọi interface up bằng 1 ip -batch mỗi namespace (switch: root namespace)
+    * hosts   : IP/MAC/lo của từng host cấu hình song song
+    * switches: OVS batch startup của Mininet (transaction ovs-vsctl của từng bridge
+                được gom vào ít lần gọi nhất)
+    * tc      : bandwidth của link áp bằng LinkShaper + BatchPlan (1 tc -batch / namespace)
+- Thời gian từng phase được trả về để log + gửi Backend
+
+LƯU Ý:
+- Chế độ thường dùng Intf thường nên `bw` chỉ là metadata; fast bring-up áp `bw`
+  thật bằng tc (giống TCLink), LinkShaper biết sẵn state nên update sau đó là 'change'
+
+CẤU HÌNH:
+- FAST_BRINGUP=true    : Bật (main.py)
+- BRINGUP_WORKERS      : Số thread tạo/cấu hình host song song
+"""
+
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from mininet.link import Link
+from mininet.net import Mininet
+from mininet.topo import Topo
+from controllers.batch_plan import BatchPlan
+from controllers.link_shaper import link_shaper
+from controllers.topology_reload import default_bw
+from utils.logger import setup_logger
+
+logger = setup_logger()
+
+FAST_BRINGUP = os.getenv('FAST_BRINGUP', 'false').lower() == 'true'
+BRINGUP_WORKERS = int(os.getenv('BRINGUP_WORKERS', 16))
+
+
+class PrebuiltLink(Link):
+    """Link có veth pair đã được tạo sẵn (ip -batch) → không chạy `ip link add`"""
+
+    @classmethod
+    def makeIntfPair(cls, *args, **kwargs):
+        return None
+
+
+class _PhaseTimer:
+    def __init__(self):
+        self.timings = {}
+        self._start = time.monotonic()
+        self._phase_start = self._start
+
+    def lap(self, phase):
+        now = time.monotonic()
+        self.timings[f"{phase}_ms"] = round((now - self._phase_start) * 1000, 1)
+        self._phase_start = now
+
+    def finish(self):
+        self.timings['total_ms'] = round((time.monotonic() - self._start) * 1000, 1)
+        return self.timings
+
+
+def _parallel(fn, items, workers):
+    """Chạy fn trên từng item song song, giữ nguyên thứ tự kết quả"""
+    if not items:
+        return []
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(items))),
+                            thread_name_prefix='bringup') as pool:
+        return list(pool.map(fn, items))
+
+
+def fast_bringup(config, switch, host, workers=None):
+    """
+    Dựng + start mạng Mininet từ topology config (format topology.json)
+
+    Args:
+        config (dict): {'hosts': [...], 'switches': [...], 'links': [...]}
+        switch: Class switch (vd: OVSKernelSwitch)
+        host: Class host (vd: CPULimitedHost)
+        workers (int): Số thread song song (mặc định BRINGUP_WORKERS)
+
+    Returns:
+        tuple: (net đã start, timings dict {'<phase>_ms', 'total_ms', 'mode', ...})
+    """
+    workers = workers or BRINGUP_WORKERS
+    timer = _PhaseTimer()
+
+    net = Mininet(topo=None, build=False, switch=switch, host=host)
+
+    # ========================================
+    # PHASE 1: NODES (controller + host song song + switch)
+    # ========================================
+    net.buildFromTopo(Topo())  # Topo rỗng → chỉ thêm controller mặc định như build()
+
+    host_specs = config.get('hosts', [])
+    if host_specs:
+        # Host đầu tiên tạo tuần tự: class init (mount cgroup...) chỉ chạy 1 lần
+        net.addHost(host_specs[0]['name'], ip=host_specs[0]['ip'], mac=host_specs[0].get('mac'))
+        others = _parallel(
+            lambda spec: host(spec['name'], ip=spec['ip'], mac=spec.get('mac')),
+            host_specs[1:], workers
+        )
+        # Đăng ký theo đúng thứ tự config (giống Mininet.addHost)
+        for h in others:
+            net.hosts.append(h)
+            net.nameToNode[h.name] = h
+
+    for spec in config.get('switches', []):
+        opts = {'stp': True} if spec.get('stp') else {}
+        # batch=True: OVS gom lệnh của mọi bridge, chạy trong batchStartup
+        net.addSwitch(spec['name'], dpid=spec.get('dpid'), batch=True, **opts)
+
+    timer.lap('nodes')
+
+    # ========================================
+    # PHASE 2: VETH (1 ip -batch ở root namespace)
+    # ========================================
+    next_port = {}
+    link_plan = []
+    veth = BatchPlan()
+
+    for link in config.get('links', []):
+        node1, node2 = net.get(link['from']), net.get(link['to'])
+        ports = []
+        for node in (node1, node2):
+            port = next_port.get(node.name, node.portBase)
+            next_port[node.name] = port + 1
+            ports.append(port)
+
+        name1, name2 = f"{node1.name}-eth{ports[0]}", f"{node2.name}-eth{ports[1]}"
+        ns1 = f" netns {node1.pid}" if node1.inNamespace else ''
+        ns2 = f" netns {node2.pid}" if node2.inNamespace else ''
+        veth.ip(None, f"link add name {name1}{ns1} type veth peer name {name2}{ns2}")
+
+        bw = link.get('bw', default_bw(node1.name, node2.name))
+        link_plan.append((node1, node2, ports, (name1, name2), bw))
+
+    veth_stats = veth.execute()
+    timer.lap('veth')
+
+    # ========================================
+    # PHASE 3: LINK OBJECTS (không chạy lệnh)
+    # ========================================
+    for node1, node2, ports, names, bw in link_plan:
+        net.addLink(
+            node1, node2, ports[0], ports[1], cls=PrebuiltLink,
+            intfName1=names[0], intfName2=names[1],
+            # addr=None: Mininet.addLink mặc định randMac() → Intf.config chạy setMAC
+            # (ifconfig down / hw ether / up qua shell của node, 6 lệnh / link) → bỏ qua
+            addr1=None, addr2=None,
+            # up=None: Intf.config bỏ qua `ifconfig up` (gom ở phase up)
+            params1={'up': None}, params2={'up': None},
+            bw=bw
+        )
+    timer.lap('links')
+
+    # ========================================
+    # PHASE 4: INTERFACE UP (1 ip -batch / namespace)
+    # ========================================
+    intfs_up = BatchPlan()
+    for node in net.hosts + net.switches:
+        for intf in node.intfList():
+            if intf.name != 'lo':
+                intfs_up.ip(node, f"link set dev {intf.name} up")
+    intfs_up.execute(workers)
+    timer.lap('up')
+
+    # ========================================
+    # PHASE 5: HOSTS (IP/MAC/lo song song)
+    # ========================================
+    def config_host(h):
+        if h.defaultIntf():
+            h.configDefault()
+        else:
+            h.configDefault(ip=None, mac=None)
+
+    _parallel(config_host, list(net.hosts), workers)
+    timer.lap('hosts')
+
+    # ========================================
+    # PHASE 6: SWITCHES (controller + OVS batch startup)
+    # ========================================
+    net.built = True
+    net.start()
+    timer.lap('switches')
+
+    # ========================================
+    # PHASE 7: TC (bandwidth, 1 tc -batch / namespace)
+    # ========================================
+    tc = BatchPlan()
+    for link in net.links:
+        bw = link.intf1.params.get('bw')
+        if bw:
+            link_shaper.plan_update(link.intf1, {'bw': bw}, tc)
+            link_shaper.plan_update(link.intf2, {'bw': bw}, tc)
+    tc_stats = tc.execute(workers)
+    timer.lap('tc')
+
+    timings = timer.finish()
+    timings.update({
+        'mode': 'fast',
+        'hosts': len(net.hosts),
+        'switches': len(net.switches),
+        'links': len(net.links),
+        'errors': len(veth_stats['errors']) + len(tc_stats['errors'])
+    })
+
+    logger.info(
+        f"[BRINGUP] Fast bring-up: {len(net.hosts)} hosts, {len(net.switches)} switches, "
+        f"{len(net.links)} links in {timings['total_ms']}ms | "
+        + ' | '.join(f"{k[:-3]}={v}ms" for k, v in timings.items()
+                     if k.endswith('_ms') and k != 'total_ms')
+    )
+    if veth_stats['errors']:
+        logger.error(f"[BRINGUP] veth errors: {veth_stats['errors']}")
+
+    return net, timings
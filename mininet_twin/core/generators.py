@@ -0,0 +1,369 @@
+# mininet_twin/core/generators.py
+"""
+TOPOLOGY GENERATORS (LARGE-SCALE)
+---------------------------------
+MỤC ĐÍCH:
+- topology.json viết tay chỉ có 5 host / 2 switch → không đo được khả năng scale
+- Sinh topology chuẩn theo tham số, CÙNG format với topology.json:
+    * fat_tree(k)                        : k pod, k³/4 host
+    * leaf_spine(leaves, spines, hosts_per_leaf)
+    * linear(switches, hosts_per_switch)
+    * ring(switches, hosts_per_switch)
+    * random_regular(switches, degree, hosts_per_switch, seed)
+- Dùng làm input chuẩn cho các lần chạy benchmark / scale
+
+ĐỊNH DANH (DETERMINISTIC):
+- Host thứ i (từ 1): name h<i>, IP 10.0.0.0 + i, MAC = i (48 bit)
+  prefix /24 nếu ≤ 254 host, /16 nếu ≤ 65534, ngược lại /8
+- Switch thứ j (từ 1): name s<j>, DPID = j (16 hex)
+- Cùng tham số (+ seed) → cùng file, từng byte
+
+STREAMING:
+- Mỗi generator là 1 iterator phần tử ('host' | 'switch' | 'link', dict),
+  theo thứ tự hosts → switches → links
+- write_topology() ghi JSON dần dần, không giữ toàn bộ topology trong RAM
+
+VÒNG (LOOP):
+- fat_tree / leaf_spine / ring / random_regular có vòng → switch được đánh dấu
+  "stp": true để ConfigTopo bật STP trên OVS (tránh broadcast storm)
+
+CLI:
+    python -m core.generators fat_tree k=8 -o ../topology.json
+    python -m core.generators random_regular switches=200 degree=4 seed=7
+"""
+
+import argparse
+import json
+import random
+import sys
+from collections import defaultdict
+
+# Bandwidth mặc định giống ConfigTopo
+HOST_BW = 100
+FABRIC_BW = 1000
+
+SECTIONS = ('hosts', 'switches', 'links')
+_SECTION_OF = {'host': 'hosts', 'switch': 'switches', 'link': 'links'}
+
+
+# ========================================
+# ĐỊNH DANH
+# ========================================
+
+def _prefix_for(host_count):
+    if host_count <= 254:
+        return 24
+    if host_count <= 65534:
+        return 16
+    return 8
+
+
+def host_spec(index, host_count):
+    """Host thứ index (từ 1) trong topology có host_count host"""
+    if not 1 <= index < 2 ** 24 - 1:
+        raise ValueError(f"Host index out of range: {index}")
+    addr = (10 << 24) + index
+    ip = '.'.join(str((addr >> shift) & 0xFF) for shift in (24, 16, 8, 0))
+    mac = ':'.join(f"{(index >> shift) & 0xFF:02x}" for shift in (40, 32, 24, 16, 8, 0))
+    return {'name': f"h{index}", 'ip': f"{ip}/{_prefix_for(host_count)}", 'mac': mac}
+
+
+def switch_spec(index, stp=False):
+    """Switch thứ index (từ 1)"""
+    spec = {'name': f"s{index}", 'dpid': f"{index:016x}"}
+    if stp:
+        spec['stp'] = True
+    return spec
+
+
+def _link(node1, node2, bw):
+    return {'from': node1, 'to': node2, 'bw': bw}
+
+
+def _emit(host_count, switch_count, links, stp=False):
+    """Phát phần tử theo thứ tự hosts → switches → links"""
+    for i in range(1, host_count + 1):
+        yield 'host', host_spec(i, host_count)
+    for j in range(1, switch_count + 1):
+        yield 'switch', switch_spec(j, stp)
+    for link in links:
+        yield 'link', link
+
+
+def _attach_hosts(switch_indices, hosts_per_switch, host_bw):
+    """Gắn hosts_per_switch host vào mỗi switch, đánh số host liên tục"""
+    host = 0
+    for j in switch_indices:
+        for _ in range(hosts_per_switch):
+            host += 1
+            yield _link(f"h{host}", f"s{j}", host_bw)
+
+
+# ========================================
+# GENERATORS
+# ========================================
+
+def fat_tree(k=4, host_bw=HOST_BW, fabric_bw=FABRIC_BW):
+    """
+    Fat-tree k-ary (Al-Fares et al.)
+
+    - (k/2)² core, k pod × (k/2 aggregation + k/2 edge), k/2 host mỗi edge
+    - Đánh số switch: core → aggregation → edge
+    """
+    if k < 2 or k % 2:
+        raise ValueError("fat_tree: k must be an even number >= 2")
+
+    half = k // 2
+    cores = half * half
+    aggs = k * half
+    edges = k * half
+    core_ids = range(1, cores + 1)
+
+    def agg_id(pod, i):
+        return cores + pod * half + i + 1
+
+    def edge_id(pod, i):
+        return cores + aggs + pod * half + i + 1
+
+    def links():
+        # Edge → host
+        yield from _attach_hosts(
+            (edge_id(pod, i) for pod in range(k) for i in range(half)), half, host_bw
+        )
+        for pod in range(k):
+            for a in range(half):
+                # Aggregation → mọi edge trong pod
+                for e in range(half):
+                    yield _link(f"s{agg_id(pod, a)}", f"s{edge_id(pod, e)}", fabric_bw)
+                # Aggregation thứ a → nhóm core thứ a
+                for c in range(half):
+                    yield _link(f"s{core_ids[a * half + c]}", f"s{agg_id(pod, a)}", fabric_bw)
+
+    return _emit(edges * half, cores + aggs + edges, links(), stp=True)
+
+
+def leaf_spine(leaves=4, spines=2, hosts_per_leaf=4, host_bw=HOST_BW, fabric_bw=FABRIC_BW):
+    """
+    Leaf-spine 2 tầng: mỗi leaf nối tới mọi spine
+
+    - Đánh số switch: spine (s1..sS) → leaf
+    """
+    if leaves < 1 or spines < 1 or hosts_per_leaf < 0:
+        raise ValueError("leaf_spine: leaves/spines must be >= 1, hosts_per_leaf >= 0")
+
+    def links():
+        leaf_ids = range(spines + 1, spines + leaves + 1)
+        yield from _attach_hosts(leaf_ids, hosts_per_leaf, host_bw)
+        for leaf in leaf_ids:
+            for spine in range(1, spines + 1):
+                yield _link(f"s{spine}", f"s{leaf}", fabric_bw)
+
+    return _emit(leaves * hosts_per_leaf, spines + leaves, links(), stp=spines > 1)
+
+
+def linear(switches=4, hosts_per_switch=1, host_bw=HOST_BW, fabric_bw=FABRIC_BW):
+    """Chuỗi s1 - s2 - ... - sN, mỗi switch hosts_per_switch host"""
+    if switches < 1 or hosts_per_switch < 0:
+        raise ValueError("linear: switches must be >= 1, hosts_per_switch >= 0")
+
+    def links():
+        yield from _attach_hosts(range(1, switches + 1), hosts_per_switch, host_bw)
+        for j in range(1, switches):
+            yield _link(f"s{j}", f"s{j + 1}", fabric_bw)
+
+    return _emit(switches * hosts_per_switch, switches, links())
+
+
+def ring(switches=4, hosts_per_switch=1, host_bw=HOST_BW, fabric_bw=FABRIC_BW):
+    """Vòng s1 - s2 - ... - sN - s1"""
+    if switches < 3 or hosts_per_switch < 0:
+        raise ValueError("ring: switches must be >= 3, hosts_per_switch >= 0")
+
+    def links():
+        yield from _attach_hosts(range(1, switches + 1), hosts_per_switch, host_bw)
+        for j in range(1, switches + 1):
+            yield _link(f"s{j}", f"s{j % switches + 1}", fabric_bw)
+
+    return _emit(switches * hosts_per_switch, switches, links(), stp=True)
+
+
+def _regular_edges(n, degree, rng):
+    """
+    1 lần thử ghép cặp stub (Steger-Wormald): chỉ ghép cặp hợp lệ,
+    dừng sớm nếu phần còn lại không thể ghép → None
+    """
+    edges = set()
+    stubs = list(range(n)) * degree
+
+    while stubs:
+        potential = defaultdict(int)
+        rng.shuffle(stubs)
+        it = iter(stubs)
+        for a, b in zip(it, it):
+            if a > b:
+                a, b = b, a
+            if a != b and (a, b) not in edges:
+                edges.add((a, b))
+            else:
+                potential[a] += 1
+                potential[b] += 1
+
+        if potential and not any(
+            (min(a, b), max(a, b)) not in edges
+            for a in potential for b in potential if a != b
+        ):
+            return None
+
+        stubs = [node for node, count in potential.items() for _ in range(count)]
+
+    return edges
+
+
+def _is_connected(n, edges):
+    neighbors = defaultdict(list)
+    for a, b in edges:
+        neighbors[a].append(b)
+        neighbors[b].append(a)
+    seen = {0}
+    stack = [0]
+    while stack:
+        for nxt in neighbors[stack.pop()]:
+            if nxt not in seen:
+                seen.add(nxt)
+                stack.append(nxt)
+    return len(seen) == n
+
+
+def random_regular(switches=8, degree=3, hosts_per_switch=1, seed=0,
+                   host_bw=HOST_BW, fabric_bw=FABRIC_BW, max_attempts=100):
+    """
+    Đồ thị switch d-regular ngẫu nhiên, LIÊN THÔNG (kiểu Jellyfish)
+
+    - Cùng seed → cùng topology
+    """
+    if not 1 <= degree < switches or (switches * degree) % 2:
+        raise ValueError("random_regular: need 1 <= degree < switches and switches*degree even")
+
+    rng = random.Random(seed)
+    for _ in range(max_attempts):
+        edges = _regular_edges(switches, degree, rng)
+        if edges is not None and _is_connected(switches, edges):
+            break
+    else:
+        raise ValueError(f"random_regular: no connected graph after {max_attempts} attempts")
+
+    def links():
+        yield from _attach_hosts(range(1, switches + 1), hosts_per_switch, host_bw)
+        for a, b in sorted(edges):
+            yield _link(f"s{a + 1}", f"s{b + 1}", fabric_bw)
+
+    return _emit(switches * hosts_per_switch, switches, links(), stp=True)
+
+
+GENERATORS = {
+    'fat_tree': fat_tree,
+    'leaf_spine': leaf_spine,
+    'linear': linear,
+    'ring': ring,
+    'random_regular': random_regular
+}
+
+
+# ========================================
+# BUILD / WRITE
+# ========================================
+
+def parse_spec(spec):
+    """
+    'fat_tree:k=4' / 'leaf_spine:leaves=8,spines=4' → ('fat_tree', {'k': 4})
+    """
+    name, _, args = spec.partition(':')
+    return name.strip(), parse_params(p for p in args.split(',') if p.strip())
+
+
+def parse_params(pairs):
+    params = {}
+    for pair in pairs:
+        key, sep, value = pair.partition('=')
+        if not sep:
+            raise ValueError(f"Invalid generator parameter '{pair}' (expected key=value)")
+        try:
+            params[key.strip()] = int(value)
+        except ValueError:
+            params[key.strip()] = float(value)
+    return params
+
+
+def generate(name, **params):
+    """Iterator phần tử của generator `name`"""
+    if name not in GENERATORS:
+        raise ValueError(f"Unknown generator '{name}' (available: {', '.join(GENERATORS)})")
+    return GENERATORS[name](**params)
+
+
+def build_topology(name, **params):
+    """Topology đầy đủ dạng dict (giống nội dung topology.json)"""
+    topology = {section: [] for section in SECTIONS}
+    for kind, item in generate(name, **params):
+        topology[_SECTION_OF[kind]].append(item)
+    return topology
+
+
+def write_topology(elements, fp):
+    """
+    Ghi JSON dần dần từ iterator phần tử (không giữ toàn bộ trong RAM)
+
+    Returns:
+        dict: Số phần tử đã ghi {'hosts', 'switches', 'links'}
+    """
+    counts = dict.fromkeys(SECTIONS, 0)
+    current = -1
+
+    def advance(to):
+        nonlocal current
+        while current < to:
+            if current >= 0:
+                fp.write('\n  ]')
+            current += 1
+            fp.write((',' if current else '') + f'\n  "{SECTIONS[current]}": [')
+
+    fp.write('{')
+    for kind, item in elements:
+        section = SECTIONS.index(_SECTION_OF[kind])
+        if section < current:
+            raise ValueError(f"Element '{kind}' out of order (expected hosts → switches → links)")
+        advance(section)
+
+        fp.write((',' if counts[SECTIONS[current]] else '') + '\n    ' + json.dumps(item))
+        counts[SECTIONS[current]] += 1
+
+    advance(len(SECTIONS) - 1)
+    fp.write('\n  ]\n}\n')
+
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a topology.json for the digital twin")
+    parser.add_argument('generator', choices=sorted(GENERATORS))
+    parser.add_argument('params', nargs='*', help="key=value, vd: k=8 / leaves=16 spines=4")
+    parser.add_argument('-o', '--output', help="Output file (mặc định: stdout)")
+    args = parser.parse_args(argv)
+
+    elements = generate(args.generator, **parse_params(args.params))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            counts = write_topology(elements, f)
+    else:
+        counts = write_topology(elements, sys.stdout)
+
+    print(
+        f"{args.generator}: {counts['hosts']} hosts, {counts['switches']} switches, "
+        f"{counts['links']} links",
+        file=sys.stderr
+    )
+
+
+if __name__ == '__main__':
+    main()
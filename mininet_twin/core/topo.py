@@ -1,23 +1,55 @@
 import os
 import json
 from mininet.topo import Topo
+from core.generators import build_topology, parse_spec
 from utils.logger import setup_logger
 
 logger = setup_logger()
 
+# File topology (mặc định: topology.json ở thư mục gốc project)
+TOPOLOGY_FILE = os.getenv('TOPOLOGY_FILE')
+# Sinh topology thay vì đọc file, vd: "fat_tree:k=4", "leaf_spine:leaves=8,spines=4"
+TOPOLOGY_GENERATOR = os.getenv('TOPOLOGY_GENERATOR')
+
+
+def load_topology_config():
+    """
+    Cấu hình topology theo thứ tự ưu tiên: TOPOLOGY_GENERATOR → TOPOLOGY_FILE → topology.json
+
+    Returns:
+        dict: {'hosts': [...], 'switches': [...], 'links': [...]} hoặc None nếu lỗi
+    """
+    if TOPOLOGY_GENERATOR:
+        try:
+            name, params = parse_spec(TOPOLOGY_GENERATOR)
+            config = build_topology(name, **params)
+            logger.info(
+                f"[TOPO] Generated '{TOPOLOGY_GENERATOR}': {len(config['hosts'])} hosts, "
+                f"{len(config['switches'])} switches, {len(config['links'])} links"
+            )
+            return config
+        except (TypeError, ValueError) as e:
+            logger.error(f"[LỖI] TOPOLOGY_GENERATOR không hợp lệ '{TOPOLOGY_GENERATOR}': {e}")
+            return None
+
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    config_path = TOPOLOGY_FILE or os.path.abspath(os.path.join(current_dir, '..', '..', 'topology.json'))
+
+    try:
+        with open(config_path) as f:
+            return json.load(f)
+    except Exception as e:
+        logger.error(f"[LỖI] Không thể đọc file {config_path}: {e}")
+        return None
+
+
 class ConfigTopo(Topo):  # Kế thừa topo của mininet
     """
-    lấy file cấu hình topology 
+    lấy file cấu hình topology (hoặc sinh từ TOPOLOGY_GENERATOR, xem core/generators.py)
     """
     def build(self):
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        config_path = os.path.abspath(os.path.join(current_dir, '..', '..', 'topology.json'))
-
-        try:
-            with open(config_path) as f:
-                config = json.load(f)
-        except Exception as e:
-            logger.error(f"[LỖI] Không thể đọc file topology.json: {e}")
+        config = load_topology_config()
+        if config is None:
             return
 
         host_nodes = {}
@@ -30,7 +62,9 @@ class ConfigTopo(Topo):  # Kế thừa topo của mininet
 
         #  switches
         for switch in config.get('switches', []):
-            s = self.addSwitch(switch['name'], dpid=switch.get('dpid'))
+            # Topology có vòng (fat-tree, ring...) → bật STP trên OVS
+            opts = {'stp': True} if switch.get('stp') else {}
+            s = self.addSwitch(switch['name'], dpid=switch.get('dpid'), **opts)
             switch_nodes[switch['name']] = s
 
         # links
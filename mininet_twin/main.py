@@ -2,7 +2,6 @@ import time
 import sys
 import threading
 import os
-import psutil 
 
 from mininet.net import Mininet
 from mininet.node import RemoteController, OVSKernelSwitch, CPULimitedHost
@@ -10,13 +9,22 @@ from mininet.link import TCLink
 
 
 from utils.logger import setup_logger
-from core.topo import ConfigTopo
+from core.topo import ConfigTopo, load_topology_config
+from core.fast_bringup import FAST_BRINGUP, fast_bringup
+from core.affinity import AffinityPlanner
 from collectors import host_stats
 from collectors import link_stats
 from collectors import network_stats
 from collectors import switch_stats
+from collectors.self_monitor import SelfMonitor
+from collectors.worker_pool import COLLECTOR_WORKERS, CollectorPool
 from services.api_client import TopologyApiClient
 from services.socket_client import SocketClient
+from services.delta_tracker import DELTA_TELEMETRY, DeltaTracker
+from services.flow_control import TelemetryWindow
+from services.ingest_client import INGEST_URL, IngestClient
+from services.telemetry_spool import TELEMETRY_SPOOL, TelemetrySpool
+from services.telemetry_codec import TELEMETRY_FORMAT, TelemetryEncoder, build_dictionary
 from traffic.generator import TrafficGenerator
 from dotenv import load_dotenv
 # [MỚI] Import Command Executor
@@ -109,10 +117,19 @@ def is_switch_running(sw):
 def run_simulation():
     #  Khởi tạo Mininet
     logger.info(" Khởi tạo mạng Mininet...")
-    topo = ConfigTopo() # Tạo một đối tường topology 
-    net = Mininet(topo=topo, switch=OVSKernelSwitch, host=CPULimitedHost) # Khởi tạo mạng mininet
-    net.start() # Khơi tạo mininet 
-    logger.info(f" Mininet started with {len(net.hosts)} hosts, {len(net.switches)} switches")
+    if FAST_BRINGUP:
+        # Gom lệnh ip/ovs-vsctl/tc theo batch, đo thời gian từng phase
+        config = load_topology_config()
+        if config is None:
+            return
+        net, bringup = fast_bringup(config, switch=OVSKernelSwitch, host=CPULimitedHost)
+    else:
+        start = time.monotonic()
+        topo = ConfigTopo() # Tạo một đối tường topology 
+        net = Mininet(topo=topo, switch=OVSKernelSwitch, host=CPULimitedHost) # Khởi tạo mạng mininet
+        net.start() # Khơi tạo mininet 
+        bringup = {'mode': 'standard', 'total_ms': round((time.monotonic() - start) * 1000, 1)}
+    logger.info(f" Mininet started with {len(net.hosts)} hosts, {len(net.switches)} switches ({bringup['total_ms']}ms)")
    
    
    # tạo khóa 
@@ -128,12 +145,63 @@ def run_simulation():
     command_executor = CommandExecutor(net)
     logger.info("✅ CommandExecutor initialized")
 
+    # Checkpoint 'baseline' = trạng thái ngay sau khi start → reset lab không cần restart
+    command_executor.checkpoints.capture('baseline')
+
+    # Chia core: collector / OVS / host (trước khi sinh traffic để process con kế thừa)
+    affinity = AffinityPlanner(net)
+    affinity_report = affinity.apply()
+
     # ✅ KHỞI TẠO SOCKET CLIENT VỚI EXECUTOR
     socket_client = SocketClient(SOCKET_URL, command_executor=command_executor)
     logger.info("✅ SocketClient initialized with CommandExecutor")
 
     #  Khởi tạo Traffic Generator
     traffic_gen = TrafficGenerator(net)
+    if traffic_gen.agents and affinity.partitions:
+        traffic_gen.agents.cpu_set = affinity.partitions['hosts']
+
+    # Telemetry nhị phân dạng cột: dictionary entity gửi 1 lần kèm topology, frame chỉ còn index
+    telemetry_encoder = TelemetryEncoder(build_dictionary(net)) if TELEMETRY_FORMAT != 'json' else None
+
+    def push_diff(net, diff):
+        # Topology đổi → dictionary epoch mới; encoder chỉ chuyển epoch khi Backend đã nhận
+        dictionary = build_dictionary(net, epoch=telemetry_encoder.epoch + 1) if telemetry_encoder else None
+        if api_client.push_topology_diff(diff, telemetry_dictionary=dictionary) and dictionary:
+            if api_client.telemetry_format == 'bin':
+                telemetry_encoder.use(dictionary)
+                socket_client.set_telemetry_encoder(telemetry_encoder)
+            else:
+                socket_client.set_telemetry_encoder(None)
+
+    # Sau reload_topology tại chỗ: đẩy diff lên Backend + iperf server cho host mới
+    command_executor.topology_hooks.append(push_diff)
+    command_executor.topology_hooks.append(affinity.on_topology_changed)
+
+    # Collector worker process: đọc counter / dump-ports song song, ngoài GIL của process chính
+    collector_pool = None
+    if COLLECTOR_WORKERS > 0:
+        collector_pool = CollectorPool(net, workers=COLLECTOR_WORKERS)
+        collector_pool.start()
+        command_executor.topology_hooks.append(collector_pool.on_topology_changed)
+    command_executor.topology_hooks.append(traffic_gen.on_topology_changed)
+
+    # Spool đĩa: batch lúc mất kết nối Backend được phát lại sau khi reconnect
+    if TELEMETRY_SPOOL:
+        socket_client.set_telemetry_spool(TelemetrySpool())
+
+    # Seq + ack: giới hạn số batch Backend chưa xử lý (Backend chậm → hoãn bớt batch)
+    socket_client.set_telemetry_window(TelemetryWindow())
+
+    # Delta telemetry: chỉ gửi entity lệch quá deadband + keyframe định kỳ
+    if DELTA_TELEMETRY:
+        delta_tracker = DeltaTracker()
+        socket_client.set_delta_tracker(delta_tracker)
+        command_executor.topology_hooks.append(delta_tracker.on_topology_changed)
+
+    # Kênh ingest riêng (INGEST_URL): telemetry không đi chung Socket.IO với dashboard
+    if INGEST_URL:
+        socket_client.set_ingest_client(IngestClient(INGEST_URL))
 
     #  Kết nối WebSocket
     if not socket_client.connect():
@@ -141,10 +209,14 @@ def run_simulation():
         return
 
     #  Gửi Topology
-    if not api_client.push_topology(net):
+    if not api_client.push_topology(net, bringup=bringup, checkpoints=command_executor.checkpoints.list(),
+                                    affinity=affinity_report,
+                                    telemetry_dictionary=telemetry_encoder.dictionary if telemetry_encoder else None):
         logger.error(" Không thể gửi topology, dừng chương trình")
         net.stop()
         return
+    if telemetry_encoder and api_client.telemetry_format == 'bin':
+        socket_client.set_telemetry_encoder(telemetry_encoder)
     
     time.sleep(2) # Đợi backend xử lý
 
@@ -153,6 +225,11 @@ def run_simulation():
 
     network_stats.start_background_measurement(net)
 
+    # Self-monitor: máy emulator quá tải → giảm traffic, giãn SYNC_INTERVAL, bớt ping
+    self_monitor = SelfMonitor(SYNC_INTERVAL, base_probe_budget=network_stats.MAX_SAMPLES_PER_CYCLE)
+    self_monitor.on_change(lambda state: traffic_gen.set_rate_scale(state['traffic_scale']))
+    self_monitor.on_change(lambda state: network_stats.set_probe_budget(state['probe_budget']))
+
     logger.info("Đang làm nóng hệ thống (Warm-up 3s) để thu thập metrics đầu tiên...")
     time.sleep(3.0) 
 
@@ -166,6 +243,7 @@ def run_simulation():
     link_throughput_tracker = {}
     loop_count = 0
     last_check_time = time.monotonic()
+    last_timestamp = time.time()
     try:
         while True:
             loop_count += 1
@@ -188,9 +266,24 @@ def run_simulation():
                 "hosts": [],
                 "links": [],
                 "switches": [],
-                "latency": []
+                "latency": [],
+                # Metrics của CommandEngine (queue depth, exec time...)
+                "executor": socket_client.command_engine.get_metrics()
             }
 
+            # Ledger rate dự định của traffic trong cùng cửa sổ đo (Backend so expected vs measured)
+            traffic_ledger = traffic_gen.flow_ledger(last_timestamp, current_timestamp)
+            if traffic_ledger is not None:
+                telemetry_batch["traffic"] = traffic_ledger
+
+            # Counter của mọi namespace + port switch do worker đọc song song (None = tắt)
+            snapshot = None
+            if collector_pool:
+                snapshot = collector_pool.collect(dump_ports=switch_stats.measurement_due())
+                if snapshot.ports:
+                    switch_stats.store_port_stats(snapshot.ports)
+                telemetry_batch["collectors"] = collector_pool.metrics()
+
             # Host Metrics
             for h in net.hosts:
                 # ========================================
@@ -201,19 +294,24 @@ def run_simulation():
                 intf_name = h.defaultIntf().name
                 
                 try:
-                    # Chỉ check interface có bị DOWN THỦ CÔNG không
-                    # (do lệnh ifconfig down từ toggle_device)
-                    if hasattr(h, 'lock'):
-                        with h.lock:
-                            intf_status = h.cmd(f'ip link show {intf_name}')
+                    # Worker đã đọc cờ IFF_UP (admin up/down, không phụ thuộc carrier)
+                    is_up = snapshot.is_up(h.name) if snapshot else None
+                    if is_up is not None:
+                        is_interface_down = not is_up
                     else:
-                        intf_status = h.cmd(f'ip link show {intf_name}')
-                    
-                    # ========================================
-                    # ✅ LOGIC MỚI: CHỈ OFFLINE KHI INTERFACE DOWN
-                    # KHÔNG QUAN TÂM CARRIER (NO-CARRIER khi switch tắt là BÌnh THƯỜNG)
-                    # ========================================
-                    is_interface_down = 'state DOWN' in intf_status  # ← CHỈ CHECK DOWN, không check UP
+                        # Chỉ check interface có bị DOWN THỦ CÔNG không
+                        # (do lệnh ifconfig down từ toggle_device)
+                        if hasattr(h, 'lock'):
+                            with h.lock:
+                                intf_status = h.cmd(f'ip link show {intf_name}')
+                        else:
+                            intf_status = h.cmd(f'ip link show {intf_name}')
+                        
+                        # ========================================
+                        # ✅ LOGIC MỚI: CHỈ OFFLINE KHI INTERFACE DOWN
+                        # KHÔNG QUAN TÂM CARRIER (NO-CARRIER khi switch tắt là BÌnh THƯỜNG)
+                        # ========================================
+                        is_interface_down = 'state DOWN' in intf_status  # ← CHỈ CHECK DOWN, không check UP
                     
                     if is_interface_down:
                         # Interface bị DOWN thủ công (toggle_device disable)
@@ -275,7 +373,8 @@ def run_simulation():
 
             # Link Metrics
             current_link_metrics = link_stats.collect_link_metrics(
-                net, link_counters, link_throughput_tracker, real_interval
+                net, link_counters, link_throughput_tracker, real_interval,
+                read_bytes=snapshot.interface_bytes if snapshot else None
             )
             for lid, throughput in current_link_metrics.items():
                 telemetry_batch["links"].append({"id": lid, "bw": throughput})
@@ -300,12 +399,19 @@ def run_simulation():
                 avg_cpu = sum(h['cpu'] for h in telemetry_batch['hosts']) / len(telemetry_batch['hosts'])
 
             logger.info(f"[Loop #{loop_count:04d}] Total BW: {total_bw:6.2f} Mbps | Avg CPU: {avg_cpu:5.1f}%")
+
+            # Tình trạng máy emulator (dashboard đánh dấu giai đoạn fidelity bị giảm)
+            self_monitor.sample(time.monotonic() - loop_start_time)
+            telemetry_batch["emulator"] = self_monitor.state()
             
-            socket_client.send_telemetry(telemetry_batch)
+            # Batch bị hoãn (cửa sổ đầy) / không gửi được → cửa sổ ledger KHÔNG tiến,
+            # batch gửi được kế tiếp mang luôn traffic dự định của khoảng này
+            if socket_client.send_telemetry(telemetry_batch):
+                last_timestamp = current_timestamp
 
-            # Sleep giữ nhịp
+            # Sleep giữ nhịp (self-monitor giãn chu kỳ khi quá tải)
             elapsed = time.monotonic() - loop_start_time
-            sleep_time = max(0.1, SYNC_INTERVAL - elapsed)
+            sleep_time = max(0.1, self_monitor.sync_interval - elapsed)
             time.sleep(sleep_time)
 
     except KeyboardInterrupt:
@@ -323,6 +429,13 @@ def run_simulation():
         except Exception as e:
             logger.error(f"  └─ Error stopping traffic: {e}")
         
+        try:
+            if collector_pool:
+                logger.info("  └─ Stopping collector workers...")
+                collector_pool.stop()
+        except Exception as e:
+            logger.error(f"  └─ Error stopping collector workers: {e}")
+        
         try:
             logger.info("  └─ Stopping background measurement...")
             network_stats.stop_background_measurement()
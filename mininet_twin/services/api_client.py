@@ -9,14 +9,32 @@ class TopologyApiClient:
     """
     def __init__(self, base_url):
         self.base_url = base_url
+        # Định dạng telemetry Backend đã chấp nhận lúc push topology ('bin' | 'json')
+        self.telemetry_format = 'json'
 
-    def push_topology(self, net):
+    def push_topology(self, net, bringup=None, checkpoints=None, affinity=None, telemetry_dictionary=None):
         """
         Gửi cấu trúc mininet lên 
+        
+        Args:
+            net: Mininet đã start
+            bringup (dict): Thời gian khởi động từng phase (hiển thị ở /control/health)
+            checkpoints (list): Checkpoint đang có (CheckpointManager.list())
+            affinity (dict): Báo cáo chia core (AffinityPlanner.apply())
+            telemetry_dictionary (dict): Dictionary entity của telemetry nhị phân
+                (services/telemetry_codec.py); Backend chấp nhận → self.telemetry_format = 'bin'
         """
         logger.info(" Đang gửi topology lên Backend...")
         
         topology_data = { "hosts": [], "switches": [], "links": [] } # chuẩn bị cấu trúc json 
+        if bringup:
+            topology_data["bringup"] = bringup
+        if checkpoints is not None:
+            topology_data["checkpoints"] = checkpoints
+        if affinity:
+            topology_data["affinity"] = affinity
+        if telemetry_dictionary:
+            topology_data["telemetry_dictionary"] = telemetry_dictionary
         
         # Hosts
         for h in net.hosts:
@@ -60,8 +78,38 @@ class TopologyApiClient:
             )
 
             response.raise_for_status()
-            logger.info(f" Gửi Topology thành công: {len(net.hosts)} hosts, {len(net.switches)} switches")
+            self.telemetry_format = response.json().get('telemetry_format', 'json')
+            logger.info(
+                f" Gửi Topology thành công: {len(net.hosts)} hosts, {len(net.switches)} switches "
+                f"(telemetry: {self.telemetry_format})"
+            )
             return True
         except Exception as e:
             logger.error(f" Lỗi gửi Topology: {e}")
-            return False
\ No newline at end of file
+            return False
+
+    def push_topology_diff(self, diff, telemetry_dictionary=None):
+        """
+        Gửi PHẦN THAY ĐỔI topology (sau reload_topology) thay vì gửi lại toàn bộ
+        
+        Args:
+            diff (TopologyDiff): Kết quả diff_topology
+            telemetry_dictionary (dict): Dictionary entity mới (epoch mới) sau khi topology đổi
+        """
+        payload = diff.to_dict()
+        if telemetry_dictionary:
+            payload['telemetry_dictionary'] = telemetry_dictionary
+        try:
+            response = requests.post(
+                f"{self.base_url}/init/topology/diff",
+                json=payload,
+                timeout=5
+            )
+
+            response.raise_for_status()
+            self.telemetry_format = response.json().get('telemetry_format', 'json')
+            logger.info(f" Gửi Topology diff thành công: {diff.summary()}")
+            return True
+        except Exception as e:
+            logger.error(f" Lỗi gửi Topology diff: {e}")
+            return False
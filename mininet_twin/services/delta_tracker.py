@@ -0,0 +1,173 @@
+# mininet_twin/services/delta_tracker.py
+"""
+DELTA TELEMETRY - CHỈ GỬI ENTITY ĐÃ THAY ĐỔI
+--------------------------------------------
+MỤC ĐÍCH:
+- Mỗi tick run_simulation gửi lại TOÀN BỘ host / link / switch / port / latency dù
+  port stats lấy từ cache 5s, link rảnh luôn 0.0, cặp latency lặp lại tới khi đo lại
+- DeltaTracker nhớ giá trị Backend ĐÃ NHẬN của từng entity, tick sau chỉ gửi entity
+  lệch quá deadband của từng metric (so với giá trị đã gửi, không phải tick trước
+  → không trôi dần qua nhiều bước nhỏ)
+- Keyframe định kỳ (gửi đủ) để Backend đồng bộ lại
+
+PHÂN BIỆT "KHÔNG ĐỔI" VÀ "MẤT" (Backend reaper):
+- Keyframe chốt ROSTER (danh sách host / link / switch / cặp latency); mọi batch có
+    'delta': {'keyframe': bool, 'base': id keyframe, 'sent': n, 'suppressed': n,
+              'missing': {'hosts': [...], ...}}    # chỉ có khi thiếu entity
+- Entity thuộc roster, không có trong batch, không nằm trong 'missing' = KHÔNG ĐỔI
+  → Backend chỉ làm mới last_update_time, reaper không đánh offline
+- Entity không thu thập được ở tick này → 'missing' → Backend để reaper xử lý
+- Backend mất roster (restart, lệch base) → event 'telemetry_keyframe' → keyframe ngay
+
+CẤU HÌNH:
+- DELTA_TELEMETRY          : true | false (false = luôn gửi đủ như cũ)
+- DELTA_KEYFRAME_INTERVAL  : Giây giữa 2 keyframe (mặc định 30)
+- DELTA_DEADBAND_CPU / _MEM            : Điểm % (mặc định 1.0 / 0.5)
+- DELTA_DEADBAND_BW                    : Mbps (mặc định 0.5)
+- DELTA_DEADBAND_LATENCY / _JITTER     : ms (mặc định 0.5 / 0.2)
+- DELTA_DEADBAND_LOSS                  : Điểm % (mặc định 0.5)
+  Giá trị về 0 / rời khỏi 0 luôn được gửi (link vừa rảnh không bị kẹt ở 0.3 Mbps)
+"""
+
+import os
+import threading
+import time
+
+from utils.logger import setup_logger
+
+logger = setup_logger()
+
+DELTA_TELEMETRY = os.getenv('DELTA_TELEMETRY', 'true').lower() == 'true'
+DELTA_KEYFRAME_INTERVAL = float(os.getenv('DELTA_KEYFRAME_INTERVAL', 30))
+
+DEADBANDS = {
+    'cpu': float(os.getenv('DELTA_DEADBAND_CPU', 1.0)),
+    'mem': float(os.getenv('DELTA_DEADBAND_MEM', 0.5)),
+    'bw': float(os.getenv('DELTA_DEADBAND_BW', 0.5)),
+    'latency': float(os.getenv('DELTA_DEADBAND_LATENCY', 0.5)),
+    'loss': float(os.getenv('DELTA_DEADBAND_LOSS', 0.5)),
+    'jitter': float(os.getenv('DELTA_DEADBAND_JITTER', 0.2)),
+}
+
+# Danh sách entity trong telemetry_batch → field định danh
+ENTITY_KEYS = {'hosts': 'name', 'links': 'id', 'switches': 'name', 'latency': 'pair'}
+
+# Entity có roster: Backend suy ra entity không đổi (heartbeat cho reaper, bù giá trị
+# khi ghi InfluxDB) → cặp latency cũng cần
+ROSTER_KEYS = ('hosts', 'links', 'switches', 'latency')
+
+
+class DeltaTracker:
+    """
+    THREAD-SAFE: force_keyframe() gọi từ event thread Socket.IO, filter() từ vòng lặp chính
+
+    Example Usage:
+    --------------
+    tracker = DeltaTracker()
+    socket_client.send_telemetry(tracker.filter(telemetry_batch))
+    tracker.force_keyframe('topology changed')
+    """
+
+    def __init__(self, keyframe_interval=DELTA_KEYFRAME_INTERVAL, deadbands=None):
+        self.keyframe_interval = keyframe_interval
+        self.deadbands = {**DEADBANDS, **(deadbands or {})}
+
+        self._lock = threading.Lock()
+        # Giá trị Backend đã nhận: key → {id: entry}
+        self._sent = {key: {} for key in ENTITY_KEYS}
+        self._roster = {key: set() for key in ROSTER_KEYS}
+        self._keyframe_id = 0
+        self._last_keyframe = 0.0
+        self._pending_reason = 'start'
+
+    def force_keyframe(self, reason):
+        """Tick kế tiếp gửi keyframe (reconnect, topology đổi, Backend yêu cầu...)"""
+        with self._lock:
+            if not self._pending_reason:
+                self._pending_reason = reason
+
+    def on_topology_changed(self, net, diff):
+        """Hook của CommandExecutor: roster đổi → keyframe"""
+        self.force_keyframe('topology changed')
+
+    def filter(self, batch):
+        """
+        Args:
+            batch (dict): telemetry_batch đầy đủ của tick
+
+        Returns:
+            dict: Batch để gửi (cùng dạng, thêm key 'delta'); key ngoài ENTITY_KEYS
+                  (timestamp, executor, traffic, emulator...) giữ nguyên
+        """
+        now = time.monotonic()
+        with self._lock:
+            reason = self._pending_reason
+            if not reason and now - self._last_keyframe >= self.keyframe_interval:
+                reason = 'interval'
+            self._pending_reason = None
+
+            out = {key: value for key, value in batch.items() if key not in ENTITY_KEYS}
+            if reason:
+                return self._keyframe(batch, out, now, reason)
+
+            sent_count = suppressed = 0
+            missing = {}
+            for key, field in ENTITY_KEYS.items():
+                sent = self._sent[key]
+                roster = self._roster.get(key)
+                changed, present = [], set()
+                for entry in batch.get(key, []):
+                    ident = entry[field]
+                    present.add(ident)
+                    # Entity ngoài roster (chưa có keyframe) luôn gửi: Backend không suy ra được
+                    if (roster is not None and ident not in roster) or self._changed(sent.get(ident), entry):
+                        sent[ident] = entry
+                        changed.append(entry)
+                    else:
+                        suppressed += 1
+                out[key] = changed
+                sent_count += len(changed)
+
+                if roster is not None:
+                    gone = roster - present
+                    if gone:
+                        missing[key] = sorted(gone)
+                        # Quay lại sau khi mất → gửi lại ngay (Backend có thể đã đánh offline)
+                        for ident in gone:
+                            sent.pop(ident, None)
+
+            out['delta'] = {'keyframe': False, 'base': self._keyframe_id,
+                            'sent': sent_count, 'suppressed': suppressed}
+            if missing:
+                out['delta']['missing'] = missing
+            return out
+
+    def _keyframe(self, batch, out, now, reason):
+        self._keyframe_id += 1
+        self._last_keyframe = now
+        sent_count = 0
+        for key, field in ENTITY_KEYS.items():
+            entries = list(batch.get(key, []))
+            self._sent[key] = {entry[field]: entry for entry in entries}
+            out[key] = entries
+            sent_count += len(entries)
+        self._roster = {key: set(self._sent[key]) for key in ROSTER_KEYS}
+
+        out['delta'] = {'keyframe': True, 'base': self._keyframe_id,
+                        'sent': sent_count, 'suppressed': 0}
+        if reason != 'interval':
+            logger.info(f"[DELTA] Keyframe #{self._keyframe_id} ({reason}): {sent_count} entities")
+        return out
+
+    def _changed(self, previous, entry):
+        if previous is None or previous.keys() != entry.keys():
+            return True
+        for field, value in entry.items():
+            old = previous[field]
+            band = self.deadbands.get(field)
+            if band is not None and isinstance(value, (int, float)) and isinstance(old, (int, float)):
+                if abs(value - old) > band or (value == 0) != (old == 0):
+                    return True
+            elif value != old:
+                return True
+        return False
@@ -0,0 +1,153 @@
+# mininet_twin/services/flow_control.py
+"""
+TELEMETRY FLOW CONTROL - SEQ + ACK + CỬA SỔ AIMD
+------------------------------------------------
+MỤC ĐÍCH:
+- send_telemetry trước đây fire-and-forget: Backend chậm → batch dồn trong buffer
+  python-socketio, Backend đầy queue thì bỏ im lặng, 2 bên không thấy được lỗ hổng
+- Mỗi batch mang 'seq' tăng dần; Backend trả 'telemetry_ack' sau khi áp dụng
+    {'seq': 42, 'stored': true, 'queue_ratio': 0.1, 'lag_ms': 35.2, 'gaps': 0}
+- Giới hạn số batch đang bay (chưa ack) theo cửa sổ AIMD:
+    ack đúng hạn, Backend không nghẽn → cửa sổ += 1/cửa sổ (tối đa TELEMETRY_WINDOW)
+    ack quá hạn / Backend nghẽn (queue gần đầy, bỏ ghi DB) → cửa sổ / 2 (tối thiểu 1)
+- Cửa sổ đầy → HOÃN batch của tick này (không gửi). Với delta telemetry, thay đổi
+  của tick bị hoãn vẫn được gửi ở tick sau (tracker so với giá trị đã gửi)
+
+CẤU HÌNH:
+- TELEMETRY_WINDOW       : Số batch tối đa đang bay (mặc định 4)
+- TELEMETRY_ACK_TIMEOUT  : Giây chờ ack trước khi coi batch là mất (mặc định 5)
+- TELEMETRY_CONGESTION   : queue_ratio của Backend từ mức này → coi là nghẽn (mặc định 0.8)
+"""
+
+import os
+import threading
+import time
+
+from utils.logger import setup_logger
+
+logger = setup_logger()
+
+TELEMETRY_WINDOW = int(os.getenv('TELEMETRY_WINDOW', 4))
+TELEMETRY_ACK_TIMEOUT = float(os.getenv('TELEMETRY_ACK_TIMEOUT', 5.0))
+TELEMETRY_CONGESTION = float(os.getenv('TELEMETRY_CONGESTION', 0.8))
+
+EMA_ALPHA = 0.2
+
+
+class TelemetryWindow:
+    """
+    THREAD-SAFE: next_seq() / expire() từ vòng lặp chính, on_ack() từ event thread Socket.IO
+
+    Example Usage:
+    --------------
+    window = TelemetryWindow()
+    window.expire()                     # > 0 = có batch mất → delta cần keyframe
+    seq = window.next_seq()             # None = cửa sổ đầy → hoãn batch
+    if seq is not None:
+        batch['seq'] = seq; sio.emit(...)
+    window.on_ack(ack)                  # event 'telemetry_ack'
+    """
+
+    def __init__(self, max_window=TELEMETRY_WINDOW, ack_timeout=TELEMETRY_ACK_TIMEOUT):
+        self.max_window = max(1, max_window)
+        self.ack_timeout = ack_timeout
+
+        self._lock = threading.Lock()
+        self._seq = 0
+        self._window = float(min(2, self.max_window))
+        # seq → monotonic lúc gửi
+        self._in_flight = {}
+        self.stats = {
+            'sent': 0, 'acked': 0, 'lost': 0, 'deferred': 0, 'late_acks': 0,
+            'congestion_events': 0, 'rtt_ms': None, 'rtt_ms_max': 0.0,
+            'backend_lag_ms': None, 'backend_gaps': 0, 'backend_unstored': 0
+        }
+
+    def next_seq(self):
+        """
+        Returns:
+            int | None: Seq cho batch sắp gửi; None nếu cửa sổ đầy (batch bị hoãn)
+        """
+        with self._lock:
+            if len(self._in_flight) >= int(self._window):
+                self.stats['deferred'] += 1
+                return None
+            self._seq += 1
+            self._in_flight[self._seq] = time.monotonic()
+            self.stats['sent'] += 1
+            return self._seq
+
+    def cancel(self, seq):
+        """Emit lỗi → batch không rời process, không tính là đang bay"""
+        with self._lock:
+            if self._in_flight.pop(seq, None) is not None:
+                self.stats['sent'] -= 1
+
+    def expire(self):
+        """
+        Batch chờ ack quá TELEMETRY_ACK_TIMEOUT → coi là mất, giảm cửa sổ 1 lần
+
+        Returns:
+            int: Số batch vừa bị coi là mất
+        """
+        now = time.monotonic()
+        with self._lock:
+            expired = [seq for seq, sent_at in self._in_flight.items() if now - sent_at > self.ack_timeout]
+            for seq in expired:
+                del self._in_flight[seq]
+            if expired:
+                self.stats['lost'] += len(expired)
+                self._decrease()
+        if expired:
+            logger.warning(f"[FLOW] {len(expired)} telemetry batch(es) not acked in {self.ack_timeout}s "
+                           f"(seq {expired[0]}..{expired[-1]}) → window {int(self._window)}")
+        return len(expired)
+
+    def reset(self):
+        """Mất kết nối: batch đang bay không còn ack → bỏ, không tính là mất do nghẽn"""
+        with self._lock:
+            self._in_flight.clear()
+
+    def on_ack(self, ack):
+        """
+        Args:
+            ack (dict): Payload 'telemetry_ack' của Backend
+        """
+        seq = ack.get('seq')
+        now = time.monotonic()
+        with self._lock:
+            sent_at = self._in_flight.pop(seq, None)
+            if sent_at is None:
+                # Đã bị expire (ack về muộn) hoặc từ trước khi reconnect
+                self.stats['late_acks'] += 1
+                return
+            self.stats['acked'] += 1
+
+            rtt = (now - sent_at) * 1000
+            previous = self.stats['rtt_ms']
+            self.stats['rtt_ms'] = round(rtt if previous is None else rtt * EMA_ALPHA + previous * (1 - EMA_ALPHA), 2)
+            self.stats['rtt_ms_max'] = round(max(self.stats['rtt_ms_max'], rtt), 2)
+            self.stats['backend_lag_ms'] = ack.get('lag_ms')
+            self.stats['backend_gaps'] = ack.get('gaps', self.stats['backend_gaps'])
+
+            congested = (ack.get('queue_ratio') or 0.0) >= TELEMETRY_CONGESTION or ack.get('stored') is False
+            if ack.get('stored') is False:
+                self.stats['backend_unstored'] += 1
+            if congested:
+                self._decrease()
+            else:
+                self._window = min(self.max_window, self._window + 1.0 / self._window)
+
+    def _decrease(self):
+        self._window = max(1.0, self._window / 2)
+        self.stats['congestion_events'] += 1
+
+    def metrics(self):
+        with self._lock:
+            return {
+                'seq': self._seq,
+                'window': round(self._window, 2),
+                'max_window': self.max_window,
+                'in_flight': len(self._in_flight),
+                **self.stats
+            }
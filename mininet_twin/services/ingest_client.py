@@ -0,0 +1,277 @@
+# mininet_twin/services/ingest_client.py
+"""
+INGEST CLIENT - GỬI TELEMETRY QUA KÊNH RIÊNG (UNIX SOCKET / TCP)
+----------------------------------------------------------------
+MỤC ĐÍCH:
+- INGEST_URL được đặt → telemetry (live, nhị phân, replay spool) KHÔNG đi qua Socket.IO
+  nữa mà qua listener riêng của Backend (backend/app/services/ingest_server.py);
+  Socket.IO chỉ còn lệnh điều khiển (execute_command / command_result...)
+- Cùng giao diện với socketio.Client mà SocketClient đang dùng cho telemetry:
+    .connected | emit(event, data) | call(event, data, timeout) | on(event, handler)
+  → flow control / delta / spool giữ nguyên
+- Tự kết nối lại (1s → 5s) trong thread nền; handler 'connect' chạy mỗi lần nối được
+
+FRAME: length u32 | kind u8 | payload (PHẢI khớp ingest_server.py)
+    1 JSON ('mininet_telemetry') | 2 BIN ('mininet_telemetry_bin')
+    3 REPLAY ('mininet_telemetry_replay', chờ 'replay_ack') | 16 CONTROL (Backend → Mininet)
+
+CẤU HÌNH:
+- INGEST_URL : '' (telemetry qua Socket.IO như cũ) | unix:///run/twin-ingest.sock | tcp://backend:5001
+
+BENCHMARK (Backend đang chạy với INGEST_LISTEN):
+    python -m services.ingest_client --url tcp://127.0.0.1:5001 --count 2000 --entities 1000
+"""
+
+import argparse
+import json
+import os
+import queue
+import socket
+import struct
+import threading
+import time
+
+from utils.logger import setup_logger
+
+logger = setup_logger()
+
+INGEST_URL = os.getenv('INGEST_URL', '')
+
+FRAME = struct.Struct('<IB')
+
+KIND_JSON = 1
+KIND_BIN = 2
+KIND_REPLAY = 3
+KIND_CONTROL = 16
+
+EVENT_KINDS = {
+    'mininet_telemetry': KIND_JSON,
+    'mininet_telemetry_bin': KIND_BIN,
+    'mininet_telemetry_replay': KIND_REPLAY,
+}
+
+RECONNECT_DELAY = 1.0
+RECONNECT_DELAY_MAX = 5.0
+
+
+def parse_url(url):
+    """
+    Returns:
+        tuple: (family, address) cho socket.connect
+    """
+    if url.startswith('unix://'):
+        return socket.AF_UNIX, url[len('unix://'):]
+    if url.startswith('tcp://'):
+        host, _, port = url[len('tcp://'):].rpartition(':')
+        return socket.AF_INET, (host or '127.0.0.1', int(port))
+    raise ValueError(f"Unsupported INGEST_URL '{url}' (unix:///path | tcp://host:port)")
+
+
+def _recv_exact(sock, size):
+    chunks = []
+    while size:
+        chunk = sock.recv(min(size, 1024 * 1024))
+        if not chunk:
+            return None
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b''.join(chunks)
+
+
+class IngestClient:
+    """
+    Example Usage:
+    --------------
+    client = IngestClient('tcp://backend:5001')
+    client.on('telemetry_ack', window.on_ack)
+    client.start()                                       # kết nối + tự reconnect
+    client.emit('mininet_telemetry_bin', frame)
+    client.call('mininet_telemetry_replay', batch, timeout=5)   # → {'stored': bool}
+    """
+
+    def __init__(self, url):
+        self.url = url
+        self.family, self.address = parse_url(url)
+        self._sock = None
+        self._send_lock = threading.Lock()
+        # call() tuần tự (1 thread replay) → ack về theo đúng thứ tự gửi
+        self._call_lock = threading.Lock()
+        self._replies = queue.Queue()
+        self._handlers = {}
+        self._running = False
+        self._connected = threading.Event()
+        self.stats = {'frames': 0, 'bytes': 0, 'connects': 0, 'send_errors': 0}
+
+    @property
+    def connected(self):
+        return self._connected.is_set()
+
+    def on(self, event, handler):
+        """Đăng ký handler cho event từ Backend ('connect' = mỗi lần kết nối được)"""
+        self._handlers[event] = handler
+
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        threading.Thread(target=self._run, daemon=True, name='ingest-client').start()
+
+    def stop(self):
+        self._running = False
+        self._close()
+
+    def _run(self):
+        delay = RECONNECT_DELAY
+        while self._running:
+            sock = socket.socket(self.family, socket.SOCK_STREAM)
+            try:
+                sock.connect(self.address)
+            except OSError as e:
+                sock.close()
+                logger.debug(f"[INGEST] Connect {self.url} failed: {e}")
+                time.sleep(delay)
+                delay = min(delay * 2, RECONNECT_DELAY_MAX)
+                continue
+
+            if self.family != socket.AF_UNIX:
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            self._sock = sock
+            self._connected.set()
+            self.stats['connects'] += 1
+            delay = RECONNECT_DELAY
+            logger.info(f"✅ Telemetry ingest connected: {self.url}")
+            self._dispatch('connect')
+
+            self._read_loop(sock)
+
+            self._close()
+            logger.warning(f"⚠️ Telemetry ingest disconnected: {self.url}")
+            self._dispatch('disconnect')
+
+    def _read_loop(self, sock):
+        try:
+            while True:
+                header = _recv_exact(sock, FRAME.size)
+                if header is None:
+                    return
+                length, kind = FRAME.unpack(header)
+                payload = _recv_exact(sock, length)
+                if payload is None:
+                    return
+                if kind != KIND_CONTROL:
+                    continue
+                message = json.loads(payload)
+                if message.get('event') == 'replay_ack':
+                    self._replies.put(message.get('data'))
+                else:
+                    self._dispatch(message.get('event'), message.get('data'))
+        except (OSError, ValueError) as e:
+            logger.debug(f"[INGEST] Read error: {e}")
+
+    def _dispatch(self, event, *args):
+        handler = self._handlers.get(event)
+        if not handler:
+            return
+        try:
+            handler(*args)
+        except Exception as e:
+            logger.error(f"[INGEST] Handler '{event}' error: {e}")
+
+    def _close(self):
+        self._connected.clear()
+        sock, self._sock = self._sock, None
+        if sock:
+            try:
+                sock.close()
+            except OSError:
+                pass
+        # call() đang chờ → trả None ngay thay vì chờ hết timeout
+        self._replies.put(None)
+
+    def emit(self, event, data):
+        """Gửi 1 frame; ném OSError / ConnectionError nếu chưa kết nối"""
+        kind = EVENT_KINDS[event]
+        payload = data if kind == KIND_BIN else json.dumps(data, separators=(',', ':')).encode()
+        sock = self._sock
+        if sock is None:
+            raise ConnectionError("ingest not connected")
+        try:
+            with self._send_lock:
+                sock.sendall(FRAME.pack(len(payload), kind) + payload)
+        except OSError:
+            self.stats['send_errors'] += 1
+            # Đánh thức reader (recv lỗi) → reconnect
+            self._close()
+            raise
+        self.stats['frames'] += 1
+        self.stats['bytes'] += FRAME.size + len(payload)
+
+    def call(self, event, data, timeout=5):
+        """
+        Gửi rồi chờ ack của Backend (hiện chỉ 'mininet_telemetry_replay')
+
+        Returns:
+            dict | None: Ack ({'stored': bool}); None nếu mất kết nối
+        """
+        with self._call_lock:
+            # Bỏ ack / tín hiệu cũ còn sót
+            while not self._replies.empty():
+                self._replies.get_nowait()
+            self.emit(event, data)
+            try:
+                return self._replies.get(timeout=timeout)
+            except queue.Empty:
+                raise TimeoutError(f"No ack for '{event}' in {timeout}s")
+
+
+# ========================================
+# BENCHMARK: batch/s Backend áp dụng được qua kênh ingest
+# ========================================
+def benchmark(url, count, entities, window):
+    """Gửi count batch (mỗi batch ~entities host + link), giữ tối đa window batch chưa ack"""
+    client = IngestClient(url)
+    acked = threading.Semaphore(0)
+    lags = []
+
+    def on_ack(ack):
+        lags.append(ack.get('lag_ms') or 0.0)
+        acked.release()
+
+    client.on('telemetry_ack', on_ack)
+    client.start()
+    deadline = time.time() + 5
+    while not client.connected and time.time() < deadline:
+        time.sleep(0.05)
+    if not client.connected:
+        raise SystemExit(f"Cannot connect to {url}")
+
+    hosts = [{'name': f'h{i}', 'cpu': 1.0, 'mem': 2.0} for i in range(entities // 2)]
+    links = [{'id': f'h{i}-s{i // 20}', 'bw': 0.5} for i in range(entities - len(hosts))]
+    started = time.perf_counter()
+    for seq in range(1, count + 1):
+        if seq > window:
+            acked.acquire()
+        client.emit('mininet_telemetry', {'timestamp': time.time(), 'seq': seq, 'hosts': hosts,
+                                          'links': links, 'switches': [], 'latency': []})
+    for _ in range(min(window, count)):
+        acked.acquire(timeout=10)
+    elapsed = time.perf_counter() - started
+    client.stop()
+
+    lags.sort()
+    print(f"{count} batches x {entities} entities in {elapsed:.2f}s → {count / elapsed:.1f} batch/s, "
+          f"lag p50 {lags[len(lags) // 2]:.1f} ms, p99 {lags[int(len(lags) * 0.99) - 1]:.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Telemetry ingest throughput benchmark")
+    parser.add_argument('--url', default=INGEST_URL or 'tcp://127.0.0.1:5001')
+    parser.add_argument('--count', type=int, default=2000)
+    parser.add_argument('--entities', type=int, default=1000)
+    parser.add_argument('--window', type=int, default=4)
+    args = parser.parse_args()
+    benchmark(args.url, args.count, args.entities, args.window)
+
+
+if __name__ == '__main__':
+    main()
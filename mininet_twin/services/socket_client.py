@@ -5,6 +5,7 @@ SOCKET CLIENT - CẬP NHẬT VỚI GLOBAL INSTANCE
 
 import socketio
 from utils.logger import setup_logger
+from controllers.command_engine import CommandEngine
 
 logger = setup_logger()
 
@@ -21,7 +22,16 @@ class SocketClient:
         global socket_client_instance
         
         self.server_url = server_url
-        self.command_executor = command_executor
+        self.command_executor = None
+        self.command_engine = None
+        # TelemetryEncoder (services/telemetry_codec.py); None = gửi JSON
+        self.telemetry_encoder = None
+        # DeltaTracker (services/delta_tracker.py); None = luôn gửi đủ
+        self.delta_tracker = None
+        # TelemetryWindow (services/flow_control.py): seq + ack + cửa sổ AIMD
+        self.telemetry_window = None
+        # TelemetrySpool (services/telemetry_spool.py): ghi đĩa lúc mất kết nối
+        self.telemetry_spool = None
         
         self.sio = socketio.Client(
             reconnection=True,
@@ -29,34 +39,144 @@ class SocketClient:
             reconnection_delay=1,
             reconnection_delay_max=5
         )
+        # Kênh gửi telemetry: Socket.IO (mặc định) hoặc IngestClient (INGEST_URL)
+        self.telemetry_transport = self.sio
         
         self._register_events()
         
+        if command_executor:
+            self.set_command_executor(command_executor)
+        
         # ✅ LƯU INSTANCE GLOBAL
         socket_client_instance = self
 
     def set_command_executor(self, command_executor):
+        if self.command_engine:
+            self.command_engine.stop()
+        
         self.command_executor = command_executor
-        logger.info(">>> CommandExecutor attached")
+        
+        # Lệnh chạy trên worker pool của CommandEngine,
+        # KHÔNG chạy trong event thread của Socket.IO
+        self.command_engine = CommandEngine(command_executor, self._emit_command_result)
+        self.command_engine.start()
+        logger.info(">>> CommandExecutor attached (via CommandEngine)")
+    
+    def set_telemetry_encoder(self, encoder):
+        """Bật telemetry nhị phân (sau khi Backend đã nhận dictionary); None = quay về JSON"""
+        self.telemetry_encoder = encoder
+        logger.info(f">>> Telemetry format: {'bin (epoch %d)' % encoder.epoch if encoder else 'json'}")
+
+    def set_delta_tracker(self, tracker):
+        """Chỉ gửi entity thay đổi; keyframe khi reconnect / Backend yêu cầu"""
+        self.delta_tracker = tracker
+
+    def set_telemetry_window(self, window):
+        """Đánh seq cho batch, giới hạn số batch chưa được Backend ack"""
+        self.telemetry_window = window
+
+    def set_telemetry_spool(self, spool):
+        """Batch lúc mất kết nối → đĩa; reconnect → phát lại dạng lịch sử"""
+        self.telemetry_spool = spool
+
+    def set_ingest_client(self, client):
+        """
+        Telemetry đi qua listener ingest riêng của Backend (services/ingest_client.py);
+        Socket.IO chỉ còn lệnh điều khiển
+        """
+        client.on('connect', self._on_telemetry_connected)
+        client.on('disconnect', self._on_telemetry_disconnected)
+        client.on('telemetry_format', self._on_telemetry_format)
+        client.on('telemetry_ack', self._on_telemetry_ack)
+        client.on('telemetry_keyframe', self._on_telemetry_keyframe)
+        self.telemetry_transport = client
+        client.start()
+        logger.info(f">>> Telemetry via ingest channel: {client.url}")
+
+    def _spool(self, batch):
+        if self.telemetry_spool:
+            self.telemetry_spool.append(batch)
+
+    def _send_replay(self, batch):
+        """Gửi 1 batch lịch sử, chờ Backend xác nhận đã đưa vào queue ghi DB"""
+        ack = self.telemetry_transport.call('mininet_telemetry_replay', batch, timeout=5)
+        return bool(ack and ack.get('stored'))
+
+    def _force_keyframe(self, reason):
+        if self.delta_tracker:
+            self.delta_tracker.force_keyframe(reason)
+
+    def _emit_command_result(self, result):
+        """Callback của CommandEngine: gửi kết quả lệnh về Backend"""
+        try:
+            self.sio.emit('command_result', result)
+        except Exception as e:
+            logger.error(f"[SOCKET] Error sending command_result: {e}")
+            return
+        
+        if result.get('success'):
+            logger.info(f"[SOCKET] Command OK: {result.get('action_id')}")
+        else:
+            logger.warning(f"[SOCKET] Command failed: {result.get('error')}")
+
+    # ========================================
+    # EVENT CỦA KÊNH TELEMETRY (Socket.IO hoặc IngestClient)
+    # ========================================
+    def _on_telemetry_connected(self):
+        # Backend có thể vừa restart → đồng bộ lại toàn bộ
+        self._force_keyframe('connected')
+        # Phát lại batch đã spool lúc mất kết nối (thread nền, giới hạn tốc độ)
+        if self.telemetry_spool:
+            transport = self.telemetry_transport
+            self.telemetry_spool.start_replay(self._send_replay, lambda: transport.connected)
+
+    def _on_telemetry_disconnected(self):
+        if self.telemetry_window:
+            self.telemetry_window.reset()
+
+    def _on_telemetry_format(self, data):
+        # Backend không giải mã được frame nhị phân (restart, mất dictionary...) → JSON
+        if data.get('format') == 'json' and self.telemetry_encoder:
+            logger.warning(f"[SOCKET] Backend requested JSON telemetry: {data.get('reason')}")
+            self.set_telemetry_encoder(None)
+            # Frame vừa rồi bị bỏ → đồng bộ lại bằng keyframe
+            self._force_keyframe('format fallback')
+
+    def _on_telemetry_ack(self, data):
+        if self.telemetry_window:
+            self.telemetry_window.on_ack(data)
+
+    def _on_telemetry_keyframe(self, data):
+        # Backend không có roster của base hiện tại (restart, mất keyframe)
+        logger.info(f"[SOCKET] Backend requested telemetry keyframe: {data.get('reason')}")
+        self._force_keyframe('requested')
 
     def _register_events(self):
         @self.sio.event
         def connect():
             logger.info("✅ Đã kết nối WebSocket!")
+            if self.telemetry_transport is self.sio:
+                self._on_telemetry_connected()
 
         @self.sio.event
         def connect_error(data):
             logger.error(f"❌ Lỗi kết nối: {data}")
 
+        self.sio.on('telemetry_format', self._on_telemetry_format)
+        self.sio.on('telemetry_ack', self._on_telemetry_ack)
+        self.sio.on('telemetry_keyframe', self._on_telemetry_keyframe)
+
         @self.sio.event
         def disconnect():
             logger.warning("⚠️ Mất kết nối WebSocket!")
+            if self.telemetry_transport is self.sio:
+                self._on_telemetry_disconnected()
 
         @self.sio.on('execute_command')
         def on_execute_command(data):
             logger.info(f"[SOCKET] Received command: {data.get('command')}")
             
-            if not self.command_executor:
+            if not self.command_engine:
                 logger.error("[SOCKET] CommandExecutor not set!")
                 self.sio.emit('command_result', {
                     'success': False,
@@ -66,13 +186,8 @@ class SocketClient:
                 return
             
             try:
-                result = self.command_executor.execute(data)
-                self.sio.emit('command_result', result)
-                
-                if result.get('success'):
-                    logger.info(f"[SOCKET] Command OK: {data.get('action_id')}")
-                else:
-                    logger.warning(f"[SOCKET] Command failed: {result.get('error')}")
+                # Chỉ xếp hàng, trả event thread về ngay
+                self.command_engine.submit(data)
             
             except Exception as e:
                 logger.error(f"[SOCKET] Error: {e}", exc_info=True)
@@ -126,15 +241,55 @@ class SocketClient:
             return False
 
     def disconnect(self):
+        if self.command_engine:
+            self.command_engine.stop()
         if self.sio.connected:
             self.sio.disconnect()
 
     def send_telemetry(self, data):
+        """
+        Gửi 1 batch telemetry
+
+        Returns:
+            bool: False nếu batch không được gửi (mất kết nối, cửa sổ đầy, lỗi emit)
+        """
+        seq = None
+        window = self.telemetry_window
+        transport = self.telemetry_transport
+        batch = data
         try:
-            if self.sio.connected:
-                self.sio.emit('mininet_telemetry', data)
+            if not transport.connected:
+                # Batch này không tới Backend → giữ trên đĩa, tick sau gửi keyframe
+                self._spool(batch)
+                self._force_keyframe('disconnected')
+                return False
+            if window:
+                # Batch quá hạn ack có thể chứa thay đổi Backend chưa áp dụng
+                if window.expire():
+                    self._force_keyframe('batch lost')
+                seq = window.next_seq()
+                if seq is None:
+                    logger.debug("[SOCKET] Telemetry window full → batch deferred")
+                    return False
+                data['seq'] = seq
+                data['transport'] = window.metrics()
+            if self.telemetry_spool:
+                data['spool'] = self.telemetry_spool.metrics()
+            if self.delta_tracker:
+                data = self.delta_tracker.filter(data)
+            encoder = self.telemetry_encoder
+            if encoder:
+                transport.emit('mininet_telemetry_bin', encoder.encode(data))
+            else:
+                transport.emit('mininet_telemetry', data)
+            return True
         except Exception as e:
             logger.error(f"❌ Lỗi gửi: {e}")
+            if seq is not None:
+                window.cancel(seq)
+            self._spool(batch)
+            self._force_keyframe('send failed')
+            return False
 
     def is_connected(self):
         return self.sio.connected
\ No newline at end of file
@@ -0,0 +1,424 @@
+# mininet_twin/services/telemetry_codec.py
+"""
+TELEMETRY CODEC - ĐỊNH DẠNG NHỊ PHÂN DẠNG CỘT
+--------------------------------------------
+MỤC ĐÍCH:
+- JSON telemetry lặp lại key "name"/"cpu"/"mem" cho từng host, dict port đầy đủ cho
+  từng switch, pair id dạng chuỗi "h1-h2" → 10.000 entity ≈ 1 MB / tick,
+  Backend còn phải split('-') link id
+- Dictionary entity (host / switch / link / port → số nguyên) thống nhất 1 lần lúc
+  push topology, mỗi tick chỉ gửi các MẢNG CỘT (struct-packed, little-endian)
+  + zlib (tùy chọn) khi frame đủ lớn
+- Backend giải mã: backend/app/services/telemetry_codec.py (PHẢI khớp định dạng này)
+
+FRAME (version 1):
+    header : magic 'TW' | version u8 | flags u8 (bit0 = zlib) | epoch u32
+    body   : timestamp f64 | các section: tag u8 + count u32 + các cột
+        1 HOSTS    : id u32[n] | cpu f32[n] | mem f32[n] | offline u8[n]
+        2 LINKS    : id u32[n] | bw f32[n]
+        3 SWITCHES : id u32[n] | status u8[n] (0 = không gửi, 1 = up, 2 = offline)
+        4 PORTS    : id u32[m] | rx_packets, tx_packets, rx_bytes, tx_bytes,
+                     dropped, errors: u64[m] mỗi cột
+        5 LATENCY  : src u32[k] | dst u32[k] | latency f32[k] | loss f32[k] | jitter f32[k]
+      255 EXTRAS   : độ dài u32 + JSON (executor, traffic, emulator... và entity
+                     chưa có trong dictionary, vd host vừa thêm khi reload)
+
+DICTIONARY:
+    {'epoch': 3, 'hosts': ['h1', ...], 'switches': ['s1', ...],
+     'links': [['h1-s1', 'h1', 's1'], ...], 'ports': [[switch_index, 's1-eth1'], ...]}
+    id = vị trí trong list; epoch tăng mỗi lần topology đổi (reload)
+
+CẤU HÌNH:
+- TELEMETRY_FORMAT       : auto (bin nếu Backend chấp nhận dictionary) | json (luôn JSON)
+- TELEMETRY_COMPRESS_MIN : Nén zlib khi body ≥ số byte này (mặc định 0 = không nén:
+                           Backend cùng máy thì zlib tốn CPU hơn số byte tiết kiệm được;
+                           bật khi Backend ở máy khác, vd 16384)
+
+BENCHMARK:
+    python -m services.telemetry_codec --entities 1000 10000
+"""
+
+import argparse
+import json
+import os
+import random
+import struct
+import sys
+import time
+import zlib
+from array import array
+
+TELEMETRY_FORMAT = os.getenv('TELEMETRY_FORMAT', 'auto').lower()
+TELEMETRY_COMPRESS_MIN = int(os.getenv('TELEMETRY_COMPRESS_MIN', 0))
+
+MAGIC = b'TW'
+VERSION = 1
+FLAG_ZLIB = 0x01
+
+HEADER = struct.Struct('<2sBBI')
+SECTION = struct.Struct('<BI')
+
+TAG_HOSTS = 1
+TAG_LINKS = 2
+TAG_SWITCHES = 3
+TAG_PORTS = 4
+TAG_LATENCY = 5
+TAG_EXTRAS = 255
+
+PORT_COUNTERS = ('rx_packets', 'tx_packets', 'rx_bytes', 'tx_bytes', 'dropped', 'errors')
+SWITCH_STATUS = {None: 0, 'up': 1, 'offline': 2}
+
+# Các key đã có section riêng (còn lại đi vào EXTRAS)
+COLUMN_KEYS = ('timestamp', 'hosts', 'links', 'switches', 'latency')
+
+_SWAP = sys.byteorder != 'little'
+
+
+def _pack(typecode, values):
+    column = array(typecode, values)
+    if _SWAP:
+        column.byteswap()
+    return column.tobytes()
+
+
+def _unpack(typecode, buffer, offset, count):
+    column = array(typecode)
+    end = offset + column.itemsize * count
+    column.frombytes(buffer[offset:end])
+    if _SWAP:
+        column.byteswap()
+    return column, end
+
+
+def build_dictionary(net, epoch=1):
+    """Dictionary entity của mạng đang chạy (gửi kèm push_topology)"""
+    switches = [sw.name for sw in net.switches]
+    ports = []
+    for index, sw in enumerate(net.switches):
+        for intf_name in sw.intfNames():
+            if intf_name != 'lo':
+                ports.append([index, intf_name])
+
+    links, seen = [], set()
+    for link in net.links:
+        n1, n2 = link.intf1.node.name, link.intf2.node.name
+        link_id = "-".join(sorted([n1, n2]))
+        if link_id not in seen:
+            seen.add(link_id)
+            links.append([link_id, n1, n2])
+
+    return {
+        'epoch': epoch,
+        'hosts': [h.name for h in net.hosts],
+        'switches': switches,
+        'links': links,
+        'ports': ports
+    }
+
+
+class TelemetryEncoder:
+    """
+    Example Usage:
+    --------------
+    encoder = TelemetryEncoder(build_dictionary(net))
+    frame = encoder.encode(telemetry_batch)     # bytes → sio.emit('mininet_telemetry_bin', frame)
+    decode(frame, encoder.dictionary) == telemetry_batch (float32 làm tròn)
+    """
+
+    def __init__(self, dictionary, compress_min=TELEMETRY_COMPRESS_MIN):
+        self.compress_min = compress_min
+        self.use(dictionary)
+
+    def use(self, dictionary):
+        """Đổi sang dictionary mới (sau khi Backend đã nhận nó)"""
+        switches = dictionary['switches']
+        # Gán 1 lần cả bộ index → encode() ở thread khác không thấy epoch mới + index cũ
+        self._index = (
+            dictionary['epoch'],
+            {name: i for i, name in enumerate(dictionary['hosts'])},
+            {name: i for i, name in enumerate(switches)},
+            {entry[0]: i for i, entry in enumerate(dictionary['links'])},
+            {(switches[sw], port): i for i, (sw, port) in enumerate(dictionary['ports'])}
+        )
+        self.dictionary = dictionary
+
+    @property
+    def epoch(self):
+        return self._index[0]
+
+    def encode(self, batch):
+        """
+        Returns:
+            bytes: Frame nhị phân
+        """
+        epoch, host_index, switch_index, link_index, port_index_of = self._index
+        parts = [struct.pack('<d', batch.get('timestamp') or time.time())]
+        extras = {key: value for key, value in batch.items() if key not in COLUMN_KEYS}
+        unknown = {}
+
+        # HOSTS
+        ids, cpu, mem, offline = [], [], [], []
+        for h in batch.get('hosts', []):
+            index = host_index.get(h['name'])
+            if index is None:
+                unknown.setdefault('hosts', []).append(h)
+                continue
+            ids.append(index)
+            cpu.append(h.get('cpu', 0.0))
+            mem.append(h.get('mem', 0.0))
+            offline.append(1 if h.get('status') == 'offline' else 0)
+        if ids:
+            parts += [SECTION.pack(TAG_HOSTS, len(ids)),
+                      _pack('I', ids), _pack('f', cpu), _pack('f', mem), bytes(offline)]
+
+        # LINKS
+        ids, bw = [], []
+        for l in batch.get('links', []):
+            index = link_index.get(l['id'])
+            if index is None:
+                unknown.setdefault('links', []).append(l)
+                continue
+            ids.append(index)
+            bw.append(l['bw'])
+        if ids:
+            parts += [SECTION.pack(TAG_LINKS, len(ids)), _pack('I', ids), _pack('f', bw)]
+
+        # SWITCHES + PORTS
+        ids, status = [], []
+        port_ids, counters = [], [[] for _ in PORT_COUNTERS]
+        for s in batch.get('switches', []):
+            index = switch_index.get(s['name'])
+            if index is None:
+                unknown.setdefault('switches', []).append(s)
+                continue
+            ids.append(index)
+            status.append(SWITCH_STATUS.get(s.get('status'), 0))
+            for port_name, stats in (s.get('ports') or {}).items():
+                port_index = port_index_of.get((s['name'], port_name))
+                if port_index is None:
+                    unknown.setdefault('ports', {}).setdefault(s['name'], {})[port_name] = stats
+                    continue
+                port_ids.append(port_index)
+                for column, key in zip(counters, PORT_COUNTERS):
+                    column.append(stats.get(key, 0))
+        if ids:
+            parts += [SECTION.pack(TAG_SWITCHES, len(ids)), _pack('I', ids), bytes(status)]
+        if port_ids:
+            parts += [SECTION.pack(TAG_PORTS, len(port_ids)), _pack('I', port_ids)]
+            parts += [_pack('Q', column) for column in counters]
+
+        # LATENCY
+        src, dst, lat, loss, jitter = [], [], [], [], []
+        for item in batch.get('latency', []):
+            pair = item['pair'].split('-')
+            if len(pair) != 2 or pair[0] not in host_index or pair[1] not in host_index:
+                unknown.setdefault('latency', []).append(item)
+                continue
+            src.append(host_index[pair[0]])
+            dst.append(host_index[pair[1]])
+            lat.append(item['latency'])
+            loss.append(item['loss'])
+            jitter.append(item['jitter'])
+        if src:
+            parts += [SECTION.pack(TAG_LATENCY, len(src)), _pack('I', src), _pack('I', dst),
+                      _pack('f', lat), _pack('f', loss), _pack('f', jitter)]
+
+        if unknown:
+            extras['_unknown'] = unknown
+        if extras:
+            blob = json.dumps(extras, separators=(',', ':')).encode()
+            parts += [SECTION.pack(TAG_EXTRAS, len(blob)), blob]
+
+        body = b''.join(parts)
+        flags = 0
+        if self.compress_min and len(body) >= self.compress_min:
+            body = zlib.compress(body, 1)
+            flags |= FLAG_ZLIB
+        return HEADER.pack(MAGIC, VERSION, flags, epoch) + body
+
+
+def decode(frame, dictionary):
+    """
+    Giải mã frame về đúng dạng telemetry_batch JSON (dùng cho benchmark / kiểm tra
+    round-trip; Backend có bản riêng trả thêm 'nodes' của link)
+    """
+    magic, version, flags, epoch = HEADER.unpack_from(frame, 0)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"Unsupported telemetry frame ({magic!r} v{version})")
+    if epoch != dictionary['epoch']:
+        raise ValueError(f"Unknown dictionary epoch {epoch}")
+
+    body = frame[HEADER.size:]
+    if flags & FLAG_ZLIB:
+        body = zlib.decompress(body)
+
+    hosts, switches = dictionary['hosts'], dictionary['switches']
+    links, ports = dictionary['links'], dictionary['ports']
+
+    batch = {'timestamp': struct.unpack_from('<d', body, 0)[0],
+             'hosts': [], 'links': [], 'switches': [], 'latency': []}
+    switch_entries = {}
+    offset = 8
+    while offset < len(body):
+        tag, count = SECTION.unpack_from(body, offset)
+        offset += SECTION.size
+
+        if tag == TAG_HOSTS:
+            ids, offset = _unpack('I', body, offset, count)
+            cpu, offset = _unpack('f', body, offset, count)
+            mem, offset = _unpack('f', body, offset, count)
+            offline = body[offset:offset + count]
+            offset += count
+            for index, c, m, off in zip(ids, cpu, mem, offline):
+                entry = {'name': hosts[index], 'cpu': round(c, 2), 'mem': round(m, 2)}
+                if off:
+                    entry['status'] = 'offline'
+                batch['hosts'].append(entry)
+
+        elif tag == TAG_LINKS:
+            ids, offset = _unpack('I', body, offset, count)
+            bw, offset = _unpack('f', body, offset, count)
+            batch['links'] = [{'id': links[index][0], 'bw': round(b, 2)} for index, b in zip(ids, bw)]
+
+        elif tag == TAG_SWITCHES:
+            ids, offset = _unpack('I', body, offset, count)
+            status = body[offset:offset + count]
+            offset += count
+            for index, st in zip(ids, status):
+                entry = {'name': switches[index], 'ports': {}}
+                if st:
+                    entry['status'] = 'up' if st == 1 else 'offline'
+                switch_entries[index] = entry
+                batch['switches'].append(entry)
+
+        elif tag == TAG_PORTS:
+            ids, offset = _unpack('I', body, offset, count)
+            columns = []
+            for _ in PORT_COUNTERS:
+                column, offset = _unpack('Q', body, offset, count)
+                columns.append(column)
+            for index, *values in zip(ids, *columns):
+                sw_index, port_name = ports[index]
+                stats = {'switch_name': switches[sw_index], 'port_name': port_name}
+                stats.update(zip(PORT_COUNTERS, values))
+                switch_entries[sw_index]['ports'][port_name] = stats
+
+        elif tag == TAG_LATENCY:
+            src, offset = _unpack('I', body, offset, count)
+            dst, offset = _unpack('I', body, offset, count)
+            lat, offset = _unpack('f', body, offset, count)
+            loss, offset = _unpack('f', body, offset, count)
+            jitter, offset = _unpack('f', body, offset, count)
+            batch['latency'] = [
+                {'pair': f"{hosts[a]}-{hosts[b]}", 'latency': round(l, 3), 'loss': round(p, 2), 'jitter': round(j, 3)}
+                for a, b, l, p, j in zip(src, dst, lat, loss, jitter)
+            ]
+
+        elif tag == TAG_EXTRAS:
+            extras = json.loads(body[offset:offset + count])
+            offset += count
+            unknown = extras.pop('_unknown', {})
+            batch.update(extras)
+            batch['hosts'] += unknown.get('hosts', [])
+            batch['links'] += unknown.get('links', [])
+            batch['switches'] += unknown.get('switches', [])
+            batch['latency'] += unknown.get('latency', [])
+            by_name = {s['name']: s for s in batch['switches']}
+            for sw_name, extra_ports in unknown.get('ports', {}).items():
+                if sw_name in by_name:
+                    by_name[sw_name]['ports'].update(extra_ports)
+
+        else:
+            raise ValueError(f"Unknown telemetry section {tag}")
+
+    return batch
+
+
+# ========================================
+# BENCHMARK
+# ========================================
+
+def synthetic(entities, seed=1):
+    """
+    Topology + batch giả lập cỡ `entities` (≈ 60% host, 10% switch, link theo host,
+    4 port / switch, 10 cặp latency như network_stats)
+    """
+    rng = random.Random(seed)
+    n_hosts = int(entities * 0.6)
+    n_switches = max(1, int(entities * 0.1))
+    hosts = [f"h{i + 1}" for i in range(n_hosts)]
+    switches = [f"s{i + 1}" for i in range(n_switches)]
+    links = [[f"{h}-{switches[i % n_switches]}", h, switches[i % n_switches]] for i, h in enumerate(hosts)]
+    links += [[f"{switches[i]}-{switches[i + 1]}", switches[i], switches[i + 1]] for i in range(n_switches - 1)]
+    ports = [[i, f"{sw}-eth{p}"] for i, sw in enumerate(switches) for p in range(1, 5)]
+    dictionary = {'epoch': 1, 'hosts': hosts, 'switches': switches, 'links': links, 'ports': ports}
+
+    batch = {
+        'timestamp': time.time(),
+        'hosts': [{'name': h, 'cpu': round(rng.uniform(0, 100), 2), 'mem': round(rng.uniform(10, 90), 2)}
+                  for h in hosts],
+        'links': [{'id': entry[0], 'bw': round(rng.uniform(0, 120), 2)} for entry in links],
+        'switches': [
+            {'name': sw, 'status': 'up', 'ports': {
+                port: {'switch_name': sw, 'port_name': port,
+                       'rx_packets': rng.randrange(10 ** 7), 'tx_packets': rng.randrange(10 ** 7),
+                       'rx_bytes': rng.randrange(10 ** 10), 'tx_bytes': rng.randrange(10 ** 10),
+                       'dropped': rng.randrange(100), 'errors': 0}
+                for i, port in ports if switches[i] == sw}}
+            for sw in switches
+        ],
+        'latency': [{'pair': f"{a}-{b}", 'latency': round(rng.uniform(0.01, 5), 3),
+                     'loss': 0.0, 'jitter': round(rng.uniform(0, 1), 3)}
+                    for a, b in (rng.sample(hosts, 2) for _ in range(10))],
+        'executor': {'queue_depth': 0, 'in_flight': 0}
+    }
+    return dictionary, batch
+
+
+def _timed(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return result, (time.perf_counter() - start) / repeat * 1000
+
+
+def benchmark(entities, repeat=20):
+    dictionary, batch = synthetic(entities)
+    raw = TelemetryEncoder(dictionary, compress_min=0)
+    packed = TelemetryEncoder(dictionary, compress_min=1)
+
+    json_frame, json_enc = _timed(lambda: json.dumps(batch).encode(), repeat)
+    _, json_dec = _timed(lambda: json.loads(json_frame), repeat)
+    bin_frame, bin_enc = _timed(lambda: raw.encode(batch), repeat)
+    _, bin_dec = _timed(lambda: decode(bin_frame, dictionary), repeat)
+    zip_frame, zip_enc = _timed(lambda: packed.encode(batch), repeat)
+    _, zip_dec = _timed(lambda: decode(zip_frame, dictionary), repeat)
+
+    json_zip = len(zlib.compress(json_frame, 1))
+    return {
+        'entities': entities,
+        'json': {'bytes': len(json_frame), 'encode_ms': round(json_enc, 2), 'decode_ms': round(json_dec, 2)},
+        'json+zlib': {'bytes': json_zip},
+        'bin': {'bytes': len(bin_frame), 'encode_ms': round(bin_enc, 2), 'decode_ms': round(bin_dec, 2)},
+        'bin+zlib': {'bytes': len(zip_frame), 'encode_ms': round(zip_enc, 2), 'decode_ms': round(zip_dec, 2)}
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark JSON vs binary telemetry')
+    parser.add_argument('--entities', type=int, nargs='+', default=[1000, 10000])
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args(argv)
+
+    print(f"{'entities':>8} {'format':>9} {'bytes':>10} {'ratio':>6} {'enc ms':>8} {'dec ms':>8}")
+    for entities in args.entities:
+        result = benchmark(entities, args.repeat)
+        base = result['json']['bytes']
+        for name in ('json', 'json+zlib', 'bin', 'bin+zlib'):
+            row = result[name]
+            print(f"{entities:>8} {name:>9} {row['bytes']:>10} {row['bytes'] / base:>6.2f} "
+                  f"{row.get('encode_ms', ''):>8} {row.get('decode_ms', ''):>8}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,278 @@
+# mininet_twin/services/telemetry_spool.py
+"""
+TELEMETRY SPOOL - GHI ĐĨA KHI MẤT KẾT NỐI, PHÁT LẠI SAU KHI RECONNECT
+---------------------------------------------------------------------
+MỤC ĐÍCH:
+- Mất kết nối (Backend restart...) thì send_telemetry bỏ batch → lịch sử InfluxDB bị thủng
+- Spool ghi batch ĐẦY ĐỦ (trước delta) ra các segment nhị phân trên đĩa, có giới hạn
+  dung lượng; reconnect → phát lại theo đúng thứ tự, giới hạn tốc độ, qua event
+  'mininet_telemetry_replay' (Backend chỉ ghi DB, không cập nhật Digital Twin / broadcast)
+- Spool còn lại từ lần chạy trước (Mininet crash) cũng được phát lại ở lần connect đầu
+
+SEGMENT (telemetry-<số thứ tự>.spool):
+    record = length u32 | timestamp f64 | zlib(JSON batch)
+    - Tự chứa, KHÔNG dùng dictionary của telemetry_codec (Backend có thể đã mất dictionary)
+    - Record cuối bị cắt dở (crash lúc ghi) → dừng đọc segment tại đó
+    - Segment phát lại xong → xóa; vượt SPOOL_MAX_BYTES → xóa segment CŨ NHẤT
+    - Phát lại trùng vài batch (Mininet restart giữa chừng) vô hại: point InfluxDB cùng
+      tag + timestamp ghi đè nhau
+
+CẤU HÌNH:
+- TELEMETRY_SPOOL        : true | false
+- SPOOL_DIR              : Thư mục segment (mặc định 'spool', cùng chỗ với 'logs')
+- SPOOL_MAX_BYTES        : Tổng dung lượng tối đa (mặc định 64 MB)
+- SPOOL_SEGMENT_BYTES    : Kích thước 1 segment trước khi sang file mới (mặc định 1 MB)
+- SPOOL_REPLAY_RATE      : Batch / giây khi phát lại (mặc định 20)
+"""
+
+import json
+import os
+import struct
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+from utils.logger import setup_logger
+
+logger = setup_logger()
+
+TELEMETRY_SPOOL = os.getenv('TELEMETRY_SPOOL', 'true').lower() == 'true'
+SPOOL_DIR = os.getenv('SPOOL_DIR', 'spool')
+SPOOL_MAX_BYTES = int(os.getenv('SPOOL_MAX_BYTES', 64 * 1024 * 1024))
+SPOOL_SEGMENT_BYTES = int(os.getenv('SPOOL_SEGMENT_BYTES', 1024 * 1024))
+SPOOL_REPLAY_RATE = float(os.getenv('SPOOL_REPLAY_RATE', 20))
+
+RECORD = struct.Struct('<Id')
+SEGMENT_PREFIX = 'telemetry-'
+SEGMENT_SUFFIX = '.spool'
+
+# Backend báo queue ghi DB đầy → chờ rồi gửi lại đúng record đó
+REPLAY_BACKOFF = 1.0
+
+
+def read_records(path):
+    """
+    Đọc tuần tự các record của 1 segment
+
+    Yields:
+        tuple: (offset sau record, timestamp, batch dict)
+    """
+    with open(path, 'rb') as f:
+        offset = 0
+        while True:
+            header = f.read(RECORD.size)
+            if len(header) < RECORD.size:
+                return
+            length, timestamp = RECORD.unpack(header)
+            payload = f.read(length)
+            if len(payload) < length:
+                logger.warning(f"[SPOOL] Truncated record in {os.path.basename(path)} at {offset}")
+                return
+            offset += RECORD.size + length
+            try:
+                batch = json.loads(zlib.decompress(payload))
+            except (zlib.error, ValueError) as e:
+                logger.warning(f"[SPOOL] Corrupt record in {os.path.basename(path)}: {e}")
+                return
+            yield offset, timestamp, batch
+
+
+class TelemetrySpool:
+    """
+    THREAD-SAFE: append() từ vòng lặp chính, replay chạy trong thread riêng
+
+    Example Usage:
+    --------------
+    spool = TelemetrySpool()
+    spool.append(batch)                                     # lúc mất kết nối
+    spool.start_replay(send, is_connected=lambda: sio.connected)
+        # send(batch) → True (đã lưu) | False / raise (Backend bận, thử lại sau)
+    """
+
+    def __init__(self, directory=SPOOL_DIR, max_bytes=SPOOL_MAX_BYTES,
+                 segment_bytes=SPOOL_SEGMENT_BYTES, replay_rate=SPOOL_REPLAY_RATE):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.segment_bytes = segment_bytes
+        self.replay_rate = replay_rate
+
+        self._lock = threading.Lock()
+        # tên segment → {'bytes', 'records'}; theo thứ tự ghi
+        self._segments = OrderedDict()
+        self._active = None
+        self._active_file = None
+        self._next_index = 1
+        # Vị trí đã phát lại trong segment cũ nhất (giữ qua các lần mất kết nối)
+        self._replay_offset = 0
+        self._replay_thread = None
+        self.stats = {'spooled': 0, 'replayed': 0, 'dropped_records': 0, 'dropped_segments': 0,
+                      'replay_retries': 0}
+
+        os.makedirs(self.directory, exist_ok=True)
+        self._scan()
+
+    def _scan(self):
+        """Nạp segment còn lại từ lần chạy trước"""
+        names = sorted(
+            name for name in os.listdir(self.directory)
+            if name.startswith(SEGMENT_PREFIX) and name.endswith(SEGMENT_SUFFIX)
+        )
+        for name in names:
+            path = os.path.join(self.directory, name)
+            records = sum(1 for _ in read_records(path))
+            self._segments[name] = {'bytes': os.path.getsize(path), 'records': records}
+            self._next_index = max(self._next_index, int(name[len(SEGMENT_PREFIX):-len(SEGMENT_SUFFIX)]) + 1)
+        if names:
+            logger.info(f"[SPOOL] Found {len(names)} segment(s) / "
+                        f"{sum(s['records'] for s in self._segments.values())} batches from a previous run")
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    def append(self, batch):
+        """Ghi 1 batch vào segment đang mở"""
+        payload = zlib.compress(json.dumps(batch, separators=(',', ':')).encode())
+        record = RECORD.pack(len(payload), batch.get('timestamp') or time.time()) + payload
+
+        with self._lock:
+            if self._active is None or self._segments[self._active]['bytes'] >= self.segment_bytes:
+                self._open_segment()
+            try:
+                self._active_file.write(record)
+                self._active_file.flush()
+            except OSError as e:
+                logger.error(f"[SPOOL] Cannot write {self._active}: {e}")
+                return False
+            self._segments[self._active]['bytes'] += len(record)
+            self._segments[self._active]['records'] += 1
+            self.stats['spooled'] += 1
+            self._enforce_cap()
+        return True
+
+    def _open_segment(self):
+        self._close_active()
+        name = f"{SEGMENT_PREFIX}{self._next_index:08d}{SEGMENT_SUFFIX}"
+        self._next_index += 1
+        self._active_file = open(self._path(name), 'ab')
+        self._active = name
+        self._segments[name] = {'bytes': 0, 'records': 0}
+
+    def _close_active(self):
+        if self._active_file:
+            self._active_file.close()
+        self._active_file = None
+        self._active = None
+
+    def _enforce_cap(self):
+        """Vượt SPOOL_MAX_BYTES → bỏ segment cũ nhất (giữ lại segment đang ghi)"""
+        while sum(s['bytes'] for s in self._segments.values()) > self.max_bytes and len(self._segments) > 1:
+            name, info = self._segments.popitem(last=False)
+            self._replay_offset = 0
+            self.stats['dropped_segments'] += 1
+            self.stats['dropped_records'] += info['records']
+            try:
+                os.remove(self._path(name))
+            except FileNotFoundError:
+                pass
+            logger.warning(f"[SPOOL] Size cap reached → dropped {name} ({info['records']} batches)")
+
+    def seal(self):
+        """Đóng segment đang ghi (lúc reconnect) → phát lại được"""
+        with self._lock:
+            self._close_active()
+
+    def pending(self):
+        with self._lock:
+            return sum(s['records'] for s in self._segments.values())
+
+    def start_replay(self, send, is_connected):
+        """Phát lại các segment đã đóng trong thread nền (bỏ qua nếu đang phát)"""
+        self.seal()
+        if self._replay_thread and self._replay_thread.is_alive():
+            return
+        if not self.pending():
+            return
+        self._replay_thread = threading.Thread(
+            target=self._replay, args=(send, is_connected), daemon=True, name='telemetry-spool-replay'
+        )
+        self._replay_thread.start()
+
+    def _replay(self, send, is_connected):
+        interval = 1.0 / self.replay_rate if self.replay_rate > 0 else 0.0
+        total = self.pending()
+        started = time.monotonic()
+        logger.info(f"[SPOOL] Replaying {total} spooled batches at {self.replay_rate}/s")
+
+        while is_connected():
+            with self._lock:
+                sealed = [name for name in self._segments if name != self._active]
+                if not sealed:
+                    break
+                name, offset = sealed[0], self._replay_offset
+
+            if not self._replay_segment(name, offset, send, is_connected, interval):
+                logger.info(f"[SPOOL] Replay paused ({self.pending()} batches left)")
+                return
+
+            with self._lock:
+                info = self._segments.pop(name, None)
+                self._replay_offset = 0
+            if info is not None:
+                try:
+                    os.remove(self._path(name))
+                except FileNotFoundError:
+                    pass
+
+        logger.info(f"[SPOOL] Replay finished: {self.stats['replayed']} batches total "
+                    f"in {time.monotonic() - started:.1f}s")
+
+    def _replay_segment(self, name, start, send, is_connected, interval):
+        """
+        Returns:
+            bool: True nếu phát hết segment; False nếu mất kết nối giữa chừng
+        """
+        try:
+            records = list(read_records(self._path(name)))
+        except FileNotFoundError:
+            # Bị _enforce_cap xóa trong lúc đang phát
+            return True
+
+        for end, _, batch in records:
+            if end <= start:
+                continue
+            batch['historical'] = True
+            while True:
+                if not is_connected():
+                    return False
+                try:
+                    stored = send(batch)
+                except Exception as e:
+                    # Hết thời gian chờ ack... → vòng sau kiểm tra lại kết nối
+                    logger.warning(f"[SPOOL] Replay send failed: {e}")
+                    stored = False
+                if stored:
+                    break
+                # Backend đầy queue ghi DB / không ack → lùi lại, gửi lại đúng batch này
+                self.stats['replay_retries'] += 1
+                time.sleep(REPLAY_BACKOFF)
+
+            with self._lock:
+                if name not in self._segments:
+                    return True
+                self._replay_offset = end
+                self._segments[name]['records'] -= 1
+                self.stats['replayed'] += 1
+            if interval:
+                time.sleep(interval)
+        return True
+
+    def metrics(self):
+        with self._lock:
+            return {
+                'segments': len(self._segments),
+                'bytes': sum(s['bytes'] for s in self._segments.values()),
+                'pending': sum(s['records'] for s in self._segments.values()),
+                'replaying': bool(self._replay_thread and self._replay_thread.is_alive()),
+                **self.stats
+            }
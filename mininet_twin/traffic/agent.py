@@ -0,0 +1,374 @@
+# mininet_twin/traffic/agent.py
+"""
+TRAFFIC AGENT (CHẠY TRONG NAMESPACE CỦA HOST)
+---------------------------------------------
+MỤC ĐÍCH:
+- Thay `iperf -c ... &` mỗi flow (1 process / flow) bằng 1 process sống lâu / host
+- Nhận lệnh qua control pipe (stdin), sinh tải UDP/TCP với pacing chính xác
+  (token bucket trên 1 event loop, không fork, không thread / flow)
+- Đếm byte gửi/nhận của TỪNG flow → báo về qua stdout
+
+CHỈ DÙNG THƯ VIỆN CHUẨN: file này được chạy độc lập bằng `mnexec` trong namespace
+của host (python3 agent.py --port 5201), không import gì từ mininet_twin
+
+CONTROL PIPE (JSON lines):
+    stdin  ← {"op": "start", "id": 7, "dst": "10.0.0.2", "proto": "udp",
+              "rate_mbps": 20, "duration": 3}
+             {"op": "stop", "id": 7}
+             {"op": "stats"}
+             {"op": "quit"}
+    stdout → {"event": "ready", "port": 5201}
+             {"event": "flow_done", "id": 7, "sent_bytes": 7500000, "duration": 3.0, "error": null}
+             {"event": "stats", "sending": {"7": 120000}, "received": {"7": 118600}}
+
+WIRE FORMAT:
+- UDP: mỗi datagram bắt đầu bằng flow id (8 byte, network order)
+- TCP: 8 byte flow id ngay sau khi connect, sau đó là payload
+→ Agent bên nhận đếm byte theo flow id, không cần biết trước flow
+"""
+
+import argparse
+import errno
+import json
+import os
+import selectors
+import socket
+import struct
+import sys
+import time
+
+FLOW_HEADER = struct.Struct('!Q')
+
+# Kích thước datagram UDP (vừa MTU 1500 sau IP/UDP header)
+UDP_PAYLOAD = 1400
+
+# Kích thước mỗi lần send() TCP
+TCP_CHUNK = 16384
+
+# TCP chỉ gửi khi credit đủ ~1 segment (tránh event loop thức dậy cho từng byte)
+TCP_QUANTUM = 1448
+
+# Credit tối đa của token bucket (giây) → không bắn dồn sau 1 lần loop bị trễ
+MAX_BURST_SECONDS = 0.005
+
+# Bước lặp tối đa của event loop khi không có flow (giây)
+IDLE_TICK = 0.5
+
+# Bộ đếm nhận của flow không còn gói mới sau thời gian này sẽ bị bỏ (giây)
+RECEIVE_IDLE_EXPIRY = 30.0
+
+
+class Flow:
+    """1 flow gửi đi: token bucket + socket"""
+
+    def __init__(self, flow_id, dst, port, proto, rate_mbps, duration):
+        self.id = flow_id
+        self.dst = dst
+        self.port = port
+        self.proto = proto
+        self.rate_bytes = float(rate_mbps) * 1e6 / 8
+        self.started = time.monotonic()
+        self.deadline = self.started + float(duration) if duration else None
+        self.last_refill = self.started
+        self.credit = 0.0
+        self.sent_bytes = 0
+        self.error = None
+        self.quantum = UDP_PAYLOAD if proto == 'udp' else TCP_QUANTUM
+        self.connected = proto == 'udp'
+        self.header_sent = False
+        self.sock = None
+
+    def refill(self, now):
+        burst = max(self.rate_bytes * MAX_BURST_SECONDS, self.quantum if self.proto == 'udp' else TCP_CHUNK)
+        self.credit = min(self.credit + (now - self.last_refill) * self.rate_bytes, burst)
+        self.last_refill = now
+
+    def next_due(self, now):
+        """Thời điểm đủ credit cho lần gửi kế tiếp"""
+        if self.rate_bytes <= 0:
+            # Rate 0 (traffic bị scale về 0): không bao giờ đủ credit → không được thức
+            # dậy ngay (loop quay 100% CPU tới hết duration), chỉ chờ như khi rảnh
+            return now + IDLE_TICK
+        need = self.quantum - self.credit
+        if need <= 0:
+            return now
+        return now + need / self.rate_bytes
+
+
+class TrafficAgent:
+    def __init__(self, port):
+        self.port = port
+        self.selector = selectors.DefaultSelector()
+        self.flows = {}
+        # flow id → [byte nhận, lần cuối nhận]
+        self.received = {}
+        self.running = True
+        self._stdin_buffer = b''
+
+        self.udp_sink = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.udp_sink.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4 * 1024 * 1024)
+        self.udp_sink.bind(('0.0.0.0', port))
+        self.udp_sink.setblocking(False)
+        self.selector.register(self.udp_sink, selectors.EVENT_READ, ('udp_sink', None))
+
+        self.tcp_listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.tcp_listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.tcp_listener.bind(('0.0.0.0', port))
+        self.tcp_listener.listen(128)
+        self.tcp_listener.setblocking(False)
+        self.selector.register(self.tcp_listener, selectors.EVENT_READ, ('tcp_accept', None))
+
+        os.set_blocking(sys.stdin.fileno(), False)
+        self.selector.register(sys.stdin.fileno(), selectors.EVENT_READ, ('control', None))
+
+        self._udp_buffer = bytearray(UDP_PAYLOAD)
+        self._tcp_buffer = bytes(TCP_CHUNK)
+
+    # ========================================
+    # OUTPUT
+    # ========================================
+
+    def emit(self, event, **fields):
+        fields['event'] = event
+        try:
+            sys.stdout.write(json.dumps(fields) + '\n')
+            sys.stdout.flush()
+        except BrokenPipeError:
+            # Controller đã thoát → agent cũng thoát
+            self.running = False
+
+    # ========================================
+    # CONTROL
+    # ========================================
+
+    def _read_control(self):
+        try:
+            chunk = os.read(sys.stdin.fileno(), 65536)
+        except BlockingIOError:
+            return
+        if not chunk:
+            self.running = False
+            return
+
+        self._stdin_buffer += chunk
+        while b'\n' in self._stdin_buffer:
+            line, self._stdin_buffer = self._stdin_buffer.split(b'\n', 1)
+            if not line.strip():
+                continue
+            try:
+                self._handle(json.loads(line))
+            except (ValueError, KeyError, TypeError) as e:
+                self.emit('error', message=f"Bad command: {e}")
+
+    def _handle(self, command):
+        op = command['op']
+        if op == 'start':
+            self._start_flow(command)
+        elif op == 'stop':
+            flow = self.flows.get(command['id'])
+            if flow:
+                self._finish_flow(flow)
+        elif op == 'stats':
+            self._report_stats()
+        elif op == 'quit':
+            self.running = False
+        else:
+            self.emit('error', message=f"Unknown op: {op}")
+
+    def _start_flow(self, command):
+        flow = Flow(
+            command['id'], command['dst'], command.get('port', self.port),
+            command.get('proto', 'udp'), command['rate_mbps'], command.get('duration')
+        )
+        if flow.id in self.flows:
+            self._finish_flow(self.flows[flow.id])
+
+        try:
+            if flow.proto == 'udp':
+                flow.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+                flow.sock.setblocking(False)
+                flow.sock.connect((flow.dst, flow.port))
+            else:
+                flow.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+                flow.sock.setblocking(False)
+                flow.sock.connect_ex((flow.dst, flow.port))
+                self.selector.register(flow.sock, selectors.EVENT_WRITE, ('tcp_connect', flow))
+        except OSError as e:
+            flow.error = str(e)
+            self.flows[flow.id] = flow
+            self._finish_flow(flow)
+            return
+
+        self.flows[flow.id] = flow
+
+    def _finish_flow(self, flow):
+        self.flows.pop(flow.id, None)
+        if flow.sock is not None:
+            try:
+                self.selector.unregister(flow.sock)
+            except (KeyError, ValueError):
+                pass
+            flow.sock.close()
+        self.emit(
+            'flow_done', id=flow.id, sent_bytes=flow.sent_bytes,
+            duration=round(time.monotonic() - flow.started, 3), error=flow.error
+        )
+
+    def _report_stats(self):
+        now = time.monotonic()
+        for flow_id in [fid for fid, (_, last) in self.received.items()
+                        if now - last > RECEIVE_IDLE_EXPIRY]:
+            del self.received[flow_id]
+        self.emit(
+            'stats',
+            sending={str(f.id): f.sent_bytes for f in self.flows.values()},
+            received={str(fid): count for fid, (count, _) in self.received.items()}
+        )
+
+    # ========================================
+    # RECEIVE
+    # ========================================
+
+    def _count(self, flow_id, nbytes):
+        entry = self.received.get(flow_id)
+        if entry is None:
+            self.received[flow_id] = [nbytes, time.monotonic()]
+        else:
+            entry[0] += nbytes
+            entry[1] = time.monotonic()
+
+    def _read_udp(self):
+        for _ in range(256):
+            try:
+                data = self.udp_sink.recv(65535)
+            except BlockingIOError:
+                return
+            if len(data) >= FLOW_HEADER.size:
+                self._count(FLOW_HEADER.unpack_from(data)[0], len(data))
+
+    def _accept_tcp(self):
+        try:
+            conn, _ = self.tcp_listener.accept()
+        except BlockingIOError:
+            return
+        conn.setblocking(False)
+        self.selector.register(conn, selectors.EVENT_READ, ('tcp_recv', [None, b'']))
+
+    def _read_tcp(self, conn, state):
+        try:
+            data = conn.recv(65536)
+        except BlockingIOError:
+            return
+        except OSError:
+            data = b''
+        if not data:
+            self.selector.unregister(conn)
+            conn.close()
+            return
+
+        if state[0] is None:
+            # Chưa đủ 8 byte flow id
+            state[1] += data
+            if len(state[1]) < FLOW_HEADER.size:
+                return
+            state[0] = FLOW_HEADER.unpack_from(state[1])[0]
+            data, state[1] = state[1], b''
+        self._count(state[0], len(data))
+
+    # ========================================
+    # SEND
+    # ========================================
+
+    def _tcp_connected(self, flow):
+        err = flow.sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+        self.selector.unregister(flow.sock)
+        if err:
+            flow.error = os.strerror(err)
+            self._finish_flow(flow)
+            return
+        flow.connected = True
+        flow.last_refill = time.monotonic()
+
+    def _send(self, flow, now):
+        flow.refill(now)
+        try:
+            if flow.proto == 'udp':
+                while flow.credit >= UDP_PAYLOAD:
+                    FLOW_HEADER.pack_into(self._udp_buffer, 0, flow.id)
+                    flow.sock.send(self._udp_buffer)
+                    flow.sent_bytes += UDP_PAYLOAD
+                    flow.credit -= UDP_PAYLOAD
+            else:
+                if not flow.header_sent:
+                    flow.sock.sendall(FLOW_HEADER.pack(flow.id))
+                    flow.sent_bytes += FLOW_HEADER.size
+                    flow.credit -= FLOW_HEADER.size
+                    flow.header_sent = True
+                while flow.credit >= flow.quantum:
+                    sent = flow.sock.send(self._tcp_buffer[:int(min(flow.credit, TCP_CHUNK))])
+                    flow.sent_bytes += sent
+                    flow.credit -= sent
+        except BlockingIOError:
+            # Socket buffer đầy (TCP cwnd / UDP qdisc) → chờ lượt sau, bỏ credit thừa
+            flow.credit = min(flow.credit, 0.0)
+        except OSError as e:
+            if e.errno in (errno.ENETUNREACH, errno.ENETDOWN, errno.ECONNREFUSED, errno.EHOSTUNREACH):
+                # Link đang down: không tính là đã gửi, flow vẫn tiếp tục tới hết duration
+                flow.credit = 0.0
+                if flow.proto == 'udp':
+                    return
+            flow.error = str(e)
+            self._finish_flow(flow)
+
+    # ========================================
+    # EVENT LOOP
+    # ========================================
+
+    def run(self):
+        self.emit('ready', port=self.port)
+
+        while self.running:
+            now = time.monotonic()
+
+            # Flow hết hạn
+            for flow in [f for f in self.flows.values() if f.deadline and now >= f.deadline]:
+                self._finish_flow(flow)
+
+            # Gửi theo token bucket, tính thời điểm phải thức dậy lần tới
+            wakeups = [now + IDLE_TICK]
+            for flow in list(self.flows.values()):
+                if not flow.connected:
+                    continue
+                self._send(flow, now)
+                if flow.id in self.flows:
+                    wakeups.append(flow.next_due(now))
+                    if flow.deadline:
+                        wakeups.append(flow.deadline)
+
+            timeout = max(0.0, min(wakeups) - time.monotonic())
+            for key, _ in self.selector.select(timeout):
+                kind, ctx = key.data
+                if kind == 'udp_sink':
+                    self._read_udp()
+                elif kind == 'tcp_accept':
+                    self._accept_tcp()
+                elif kind == 'tcp_recv':
+                    self._read_tcp(key.fileobj, ctx)
+                elif kind == 'tcp_connect':
+                    self._tcp_connected(ctx)
+                elif kind == 'control':
+                    self._read_control()
+
+        for flow in list(self.flows.values()):
+            self._finish_flow(flow)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Persistent traffic agent (1 per host namespace)')
+    parser.add_argument('--port', type=int, default=5201)
+    args = parser.parse_args(argv)
+    TrafficAgent(args.port).run()
+
+
+if __name__ == '__main__':
+    main()
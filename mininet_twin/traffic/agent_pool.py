@@ -0,0 +1,324 @@
+# mininet_twin/traffic/agent_pool.py
+"""
+AGENT POOL - QUẢN LÝ TRAFFIC AGENT CỦA MỌI HOST
+-----------------------------------------------
+MỤC ĐÍCH:
+- Mỗi host 1 process traffic/agent.py sống suốt phiên (host.popen trong namespace)
+- Gửi lệnh start/stop/stats qua stdin của agent (ghi 1 dòng, không fork)
+- 1 thread duy nhất đọc stdout của MỌI agent (selectors) → cập nhật sổ flow:
+    * sent_bytes     : agent nguồn báo (flow_done / stats)
+    * received_bytes : agent đích báo (stats, đếm theo flow id)
+- ledger(): rate DỰ ĐỊNH của từng flow trong 1 cửa sổ thời gian (gửi kèm telemetry
+  để Backend so expected vs measured trên từng link)
+
+Example Usage:
+--------------
+pool = AgentPool(net)
+pool.start()
+flow_id = pool.start_flow(h1, h2, rate_mbps=20, duration=3)
+pool.poll_stats()
+pool.flow_stats()[flow_id]
+# {'src': 'h1', 'dst': 'h2', 'proto': 'udp', 'rate_mbps': 20, 'state': 'done',
+#  'sent_bytes': 7500000, 'received_bytes': 7481400, ...}
+pool.stop()
+"""
+
+import itertools
+import json
+import os
+import selectors
+import sys
+import threading
+import time
+from collections import OrderedDict
+from subprocess import PIPE, DEVNULL
+from utils.logger import setup_logger
+
+logger = setup_logger()
+
+AGENT_PORT = int(os.getenv('TRAFFIC_AGENT_PORT', 5201))
+
+# Số flow đã kết thúc giữ lại trong sổ (để đối chiếu received_bytes về sau)
+FLOW_HISTORY = int(os.getenv('TRAFFIC_FLOW_HISTORY', 2000))
+
+AGENT_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'agent.py')
+
+
+class AgentPool:
+    """
+    THREAD-SAFE: self._lock bảo vệ self._flows và self._agents
+    (traffic loop ghi lệnh, reader thread cập nhật sổ flow)
+    """
+
+    def __init__(self, net, port=AGENT_PORT):
+        self.net = net
+        self.port = port
+        # host name → Popen
+        self._agents = {}
+        # flow id → dict (OrderedDict: bỏ flow cũ nhất khi vượt FLOW_HISTORY)
+        self._flows = OrderedDict()
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        # Nhiều thread cùng ghi 1 pipe → không để 2 dòng lệnh chen vào nhau
+        self._write_lock = threading.Lock()
+        self._selector = selectors.DefaultSelector()
+        self._reader = None
+        self._running = False
+        # Vùng CPU của host (core/affinity.py): agent spawn từ Python nên không kế thừa
+        # affinity của shell host → pin ngay khi spawn
+        self.cpu_set = None
+
+    # ========================================
+    # VÒNG ĐỜI AGENT
+    # ========================================
+
+    def start(self, hosts=None):
+        """Khởi động agent trên các host (mặc định: mọi host) + reader thread"""
+        for host in hosts if hosts is not None else self.net.hosts:
+            self._spawn(host)
+
+        if not self._running:
+            self._running = True
+            self._reader = threading.Thread(target=self._read_loop, daemon=True, name='traffic-agents')
+            self._reader.start()
+
+        logger.info(f" Traffic agent đang chạy trên {len(self._agents)} host (port {self.port})")
+
+    def _spawn(self, host):
+        with self._lock:
+            if host.name in self._agents:
+                return
+            proc = host.popen(
+                [sys.executable, AGENT_SCRIPT, '--port', str(self.port)],
+                stdin=PIPE, stdout=PIPE, stderr=DEVNULL
+            )
+            self._agents[host.name] = proc
+        if self.cpu_set:
+            try:
+                os.sched_setaffinity(proc.pid, self.cpu_set)
+            except OSError as e:
+                logger.debug(f"[TRAFFIC] Cannot pin agent on {host.name}: {e}")
+        os.set_blocking(proc.stdout.fileno(), False)
+        self._selector.register(proc.stdout, selectors.EVENT_READ, [host.name, b''])
+
+    def stop(self):
+        self._running = False
+        with self._lock:
+            agents = dict(self._agents)
+            self._agents.clear()
+
+        for name, proc in agents.items():
+            self._write(proc, {'op': 'quit'})
+        for name, proc in agents.items():
+            try:
+                proc.wait(timeout=2.0)
+            except Exception:
+                proc.kill()
+            try:
+                self._selector.unregister(proc.stdout)
+            except (KeyError, ValueError):
+                pass
+
+        if self._reader and self._reader.is_alive():
+            self._reader.join(timeout=2.0)
+
+    def stop_host(self, host_name):
+        """Dừng agent của 1 host (host bị xóa khi reload topology)"""
+        with self._lock:
+            proc = self._agents.pop(host_name, None)
+            for flow in self._flows.values():
+                if flow['src'] == host_name and flow['state'] == 'active':
+                    flow['state'] = 'done'
+                    flow['ended_at'] = time.time()
+        if proc is None:
+            return
+        self._write(proc, {'op': 'quit'})
+        try:
+            proc.wait(timeout=1.0)
+        except Exception:
+            proc.kill()
+        try:
+            self._selector.unregister(proc.stdout)
+        except (KeyError, ValueError):
+            pass
+
+    def has_agent(self, host_name):
+        with self._lock:
+            proc = self._agents.get(host_name)
+            return proc is not None and proc.poll() is None
+
+    # ========================================
+    # FLOW
+    # ========================================
+
+    def start_flow(self, src, dst, rate_mbps, duration=None, proto='udp'):
+        """
+        Yêu cầu agent của `src` gửi tới agent của `dst`
+
+        Returns:
+            int | None: flow id (None nếu src không có agent)
+        """
+        flow_id = next(self._ids)
+        command = {
+            'op': 'start', 'id': flow_id, 'dst': dst.IP(), 'port': self.port,
+            'proto': proto, 'rate_mbps': rate_mbps, 'duration': duration
+        }
+
+        with self._lock:
+            proc = self._agents.get(src.name)
+            if proc is None:
+                return None
+            self._flows[flow_id] = {
+                'id': flow_id, 'src': src.name, 'dst': dst.name, 'proto': proto,
+                'rate_mbps': rate_mbps, 'duration': duration, 'state': 'active',
+                'started_at': time.time(), 'ended_at': None, 'sent_bytes': 0,
+                'received_bytes': 0, 'error': None
+            }
+            while len(self._flows) > FLOW_HISTORY:
+                self._flows.popitem(last=False)
+
+        if not self._write(proc, command):
+            with self._lock:
+                flow = self._flows.get(flow_id)
+                if flow:
+                    flow.update(state='error', error='Agent not running')
+            return None
+        return flow_id
+
+    def stop_flow(self, flow_id):
+        with self._lock:
+            flow = self._flows.get(flow_id)
+            proc = self._agents.get(flow['src']) if flow else None
+        if proc:
+            self._write(proc, {'op': 'stop', 'id': flow_id})
+
+    def poll_stats(self):
+        """Yêu cầu mọi agent báo byte gửi/nhận (kết quả về qua reader thread)"""
+        with self._lock:
+            agents = list(self._agents.values())
+        for proc in agents:
+            self._write(proc, {'op': 'stats'})
+
+    def flow_stats(self, active_only=False):
+        """
+        Returns:
+            dict: flow id → {'src', 'dst', 'proto', 'rate_mbps', 'state',
+                             'sent_bytes', 'received_bytes', ...}
+        """
+        with self._lock:
+            return {
+                fid: dict(flow) for fid, flow in self._flows.items()
+                if not active_only or flow['state'] == 'active'
+            }
+
+    def ledger(self, window_start, window_end):
+        """
+        Rate dự định của các flow chạy trong cửa sổ [window_start, window_end] (epoch giây)
+
+        Flow chỉ chạy 1 phần cửa sổ được tính theo tỉ lệ thời gian
+        → so sánh trực tiếp được với throughput trung bình đo trong cùng cửa sổ
+
+        Returns:
+            list: [{'id', 'src', 'dst', 'rate_mbps'}]
+        """
+        span = window_end - window_start
+        if span <= 0:
+            return []
+
+        entries = []
+        with self._lock:
+            for flow in self._flows.values():
+                start = flow['started_at']
+                if flow['ended_at'] is not None:
+                    end = flow['ended_at']
+                elif flow['duration']:
+                    end = start + flow['duration']
+                else:
+                    end = window_end
+                overlap = min(end, window_end) - max(start, window_start)
+                if overlap <= 0:
+                    continue
+                entries.append({
+                    'id': flow['id'],
+                    'src': flow['src'],
+                    'dst': flow['dst'],
+                    'rate_mbps': round(flow['rate_mbps'] * overlap / span, 3)
+                })
+        return entries
+
+    def active_count(self):
+        with self._lock:
+            return sum(1 for flow in self._flows.values() if flow['state'] == 'active')
+
+    # ========================================
+    # PRIVATE
+    # ========================================
+
+    def _write(self, proc, command):
+        try:
+            with self._write_lock:
+                proc.stdin.write((json.dumps(command) + '\n').encode())
+                proc.stdin.flush()
+            return True
+        except (BrokenPipeError, ValueError, OSError) as e:
+            logger.debug(f"[TRAFFIC] Cannot write to agent: {e}")
+            return False
+
+    def _read_loop(self):
+        while self._running:
+            try:
+                events = self._selector.select(timeout=0.5)
+            except (OSError, ValueError):
+                time.sleep(0.5)
+                continue
+
+            for key, _ in events:
+                state = key.data
+                try:
+                    chunk = os.read(key.fileobj.fileno(), 65536)
+                except BlockingIOError:
+                    continue
+                except (OSError, ValueError):
+                    chunk = b''
+                if not chunk:
+                    # Agent đã thoát
+                    try:
+                        self._selector.unregister(key.fileobj)
+                    except (KeyError, ValueError):
+                        pass
+                    if self._running:
+                        logger.warning(f"[TRAFFIC] Agent on {state[0]} exited")
+                    continue
+
+                state[1] += chunk
+                while b'\n' in state[1]:
+                    line, state[1] = state[1].split(b'\n', 1)
+                    try:
+                        self._handle_event(state[0], json.loads(line))
+                    except ValueError:
+                        logger.debug(f"[TRAFFIC] Bad agent output from {state[0]}: {line[:100]}")
+
+    def _handle_event(self, host_name, event):
+        kind = event.get('event')
+
+        with self._lock:
+            if kind == 'flow_done':
+                flow = self._flows.get(event['id'])
+                if flow:
+                    flow['state'] = 'error' if event.get('error') else 'done'
+                    flow['ended_at'] = time.time()
+                    flow['sent_bytes'] = event['sent_bytes']
+                    flow['error'] = event.get('error')
+
+            elif kind == 'stats':
+                for fid, sent in event.get('sending', {}).items():
+                    flow = self._flows.get(int(fid))
+                    if flow:
+                        flow['sent_bytes'] = sent
+                for fid, received in event.get('received', {}).items():
+                    flow = self._flows.get(int(fid))
+                    if flow and flow['dst'] == host_name:
+                        flow['received_bytes'] = received
+
+        if kind == 'error':
+            logger.warning(f"[TRAFFIC] Agent {host_name}: {event.get('message')}")
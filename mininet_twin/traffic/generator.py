@@ -1,21 +1,92 @@
+import os
 import time
 import random
 import threading
+from traffic.agent_pool import AgentPool
+from traffic.scenario import ScenarioRunner, compile_scenario, load_scenario
 from utils.logger import setup_logger
 
 logger = setup_logger()
 
+# 'agent': 1 traffic agent sống lâu / host (không fork mỗi flow, có byte gửi/nhận từng flow)
+# 'iperf': cách cũ, mỗi flow 1 process `iperf -c ... &`
+TRAFFIC_BACKEND = os.getenv('TRAFFIC_BACKEND', 'agent').lower()
+
+# Giao thức flow của agent ('udp' | 'tcp')
+TRAFFIC_PROTO = os.getenv('TRAFFIC_PROTO', 'udp').lower()
+
+# Chu kỳ hỏi byte gửi/nhận từ các agent (giây)
+TRAFFIC_STATS_INTERVAL = float(os.getenv('TRAFFIC_STATS_INTERVAL', 2.0))
+
+# File scenario JSON (traffic/scenario.py) → thay vòng lặp ngẫu nhiên bằng lịch cố định
+TRAFFIC_SCENARIO = os.getenv('TRAFFIC_SCENARIO')
+
+# Seed cho vòng lặp ngẫu nhiên (không đặt = ngẫu nhiên mỗi lần chạy)
+TRAFFIC_SEED = os.getenv('TRAFFIC_SEED')
+
+BW_OPTIONS = [5, 10, 20, 50, 80, 120]
+
 class TrafficGenerator:
-    def __init__(self, net):
+    def __init__(self, net, backend=None):
         """
         Khởi tạo bộ sinh lưu lượng.
         """
         self.net = net
         self.running = False
         self.thread = None
+        self.backend = (backend or TRAFFIC_BACKEND).lower()
+        self.agents = AgentPool(net) if self.backend == 'agent' else None
+        self.rng = random.Random(int(TRAFFIC_SEED)) if TRAFFIC_SEED is not None else random.Random()
+        self.scenario = load_scenario(TRAFFIC_SCENARIO) if TRAFFIC_SCENARIO else None
+        self.runner = None
+        # Hệ số rate do self-monitor đặt (1.0 = không giảm tải)
+        self.rate_scale = 1.0
+        
+        if self.scenario and not self.agents:
+            logger.warning("[TRAFFIC] TRAFFIC_SCENARIO cần TRAFFIC_BACKEND=agent → bỏ qua scenario")
+            self.scenario = None
+
+    def set_rate_scale(self, scale):
+        """Self-monitor giảm tải: mọi flow bắt đầu từ giờ gửi rate × scale"""
+        self.rate_scale = max(0.0, min(1.0, float(scale)))
+        if self.runner:
+            self.runner.rate_scale = self.rate_scale
+        logger.info(f"[TRAFFIC] Rate scale = {self.rate_scale}")
+
+    def flow_stats(self, active_only=False):
+        """Byte gửi/nhận của từng flow (chỉ có với backend 'agent')"""
+        if not self.agents:
+            return {}
+        return self.agents.flow_stats(active_only=active_only)
+
+    def flow_ledger(self, window_start, window_end):
+        """
+        Ledger rate dự định của các flow trong cửa sổ telemetry (None nếu backend 'iperf':
+        không biết iperf thật sự được yêu cầu gửi bao nhiêu)
+
+        Returns:
+            dict: {'window': [start, end], 'intended_mbps': float, 'flows': [...]}
+        """
+        if not self.agents:
+            return None
+        flows = self.agents.ledger(window_start, window_end)
+        return {
+            'window': [window_start, window_end],
+            'intended_mbps': round(sum(f['rate_mbps'] for f in flows), 2),
+            'flows': flows
+        }
+
+    def scenario_stats(self):
+        """Tiến độ / độ chính xác thời gian của scenario đang chạy (None nếu không có)"""
+        return self.runner.stats() if self.runner else None
 
     def _start_servers(self):
         """Khởi động iPerf Server trên tất cả các Host để sẵn sàng nhận gói tin."""
+        if self.agents:
+            # Agent vừa gửi vừa nhận (UDP + TCP sink) → không cần server riêng
+            self.agents.start()
+            return
+
         logger.info(" Khởi động iPerf Server trên toàn bộ Host...")
         for h in self.net.hosts:
             # Kill process cũ nếu có
@@ -23,6 +94,80 @@ class TrafficGenerator:
             # Chạy server ở chế độ UDP (-u), background (&)
             h.cmd('iperf -s -u &')
 
+    def on_topology_changed(self, net, diff):
+        """Hook sau reload_topology: chỉ khởi động iPerf Server trên các host MỚI"""
+        if self.agents:
+            for name in diff.hosts_removed:
+                self.agents.stop_host(name)
+            if diff.hosts_added and self.running:
+                self.agents.start(hosts=[net.get(spec['name']) for spec in diff.hosts_added])
+            return
+
+        for spec in diff.hosts_added:
+            h = net.get(spec['name'])
+            with h.lock:
+                h.cmd('iperf -s -u &')
+        if diff.hosts_added:
+            logger.info(f" Khởi động iPerf Server trên {len(diff.hosts_added)} host mới")
+
+    def _agent_loop(self):
+        """
+        Giống _traffic_loop nhưng mỗi flow chỉ là 1 dòng lệnh gửi vào pipe của agent
+        (không kiểm tra carrier bằng shell: link down thì agent không đếm byte gửi được)
+        """
+        logger.info("🔄 Bắt đầu vòng lặp sinh traffic ngẫu nhiên (traffic agent)...")
+        last_poll = time.monotonic()
+        
+        while self.running:
+            try:
+                host_list = list(self.net.hosts)
+                if len(host_list) < 2:
+                    time.sleep(1)
+                    continue
+                
+                src, dst = self.rng.sample(host_list, 2)
+                
+                if self.agents.has_agent(src.name) and self.agents.has_agent(dst.name):
+                    self.agents.start_flow(
+                        src, dst,
+                        rate_mbps=self.rng.choice(BW_OPTIONS) * self.rate_scale,
+                        duration=self.rng.randint(2, 5),
+                        proto=TRAFFIC_PROTO
+                    )
+                
+                if time.monotonic() - last_poll >= TRAFFIC_STATS_INTERVAL:
+                    self.agents.poll_stats()
+                    last_poll = time.monotonic()
+                
+                time.sleep(self.rng.uniform(0.5, 2.0))
+            
+            except Exception as e:
+                logger.error(f"[TRAFFIC] Loop error: {e}")
+                time.sleep(1)
+
+    def _scenario_loop(self):
+        """
+        Chạy scenario đã biên dịch (lặp lại nếu scenario có "repeat": true),
+        định kỳ hỏi byte gửi/nhận từ agent
+        """
+        while self.running:
+            try:
+                schedule = compile_scenario(self.scenario, [h.name for h in self.net.hosts])
+            except (ValueError, KeyError, IndexError, OSError) as e:
+                logger.error(f"[TRAFFIC] Invalid scenario: {e}")
+                return
+            
+            self.runner = ScenarioRunner(self.net, self.agents, schedule)
+            self.runner.rate_scale = self.rate_scale
+            self.runner.start()
+            
+            while self.running and self.runner.is_running():
+                time.sleep(TRAFFIC_STATS_INTERVAL)
+                self.agents.poll_stats()
+            
+            if not self.scenario.get('repeat'):
+                return
+
     def _traffic_loop(self):
         logger.info("🔄 Bắt đầu vòng lặp sinh traffic ngẫu nhiên...")
         
@@ -33,7 +178,7 @@ class TrafficGenerator:
                     time.sleep(1)
                     continue
 
-                src, dst = random.sample(host_list, 2)
+                src, dst = self.rng.sample(host_list, 2)
 
                 # ✅ FIX: KIỂM TRA CẢ CARRIER STATUS
                 src_intf_name = src.defaultIntf().name
@@ -87,9 +232,8 @@ class TrafficGenerator:
                     continue
                 
                 # CHỈ GỬI TRAFFIC NẾU CẢ 2 ĐỀU CÓ CARRIER
-                bw_options = [5, 10, 20, 50, 80, 120]
-                bandwidth = random.choice(bw_options)
-                duration = random.randint(2, 5)
+                bandwidth = round(self.rng.choice(BW_OPTIONS) * self.rate_scale, 2)
+                duration = self.rng.randint(2, 5)
                 
                 cmd = f'iperf -c {dst.IP()} -u -b {bandwidth}M -t {duration} &'
                 
@@ -105,7 +249,7 @@ class TrafficGenerator:
                 except Exception as e:
                     logger.error(f"[TRAFFIC] Error sending: {e}")
                 
-                time.sleep(random.uniform(0.5, 2.0))
+                time.sleep(self.rng.uniform(0.5, 2.0))
             
             except Exception as e:
                 logger.error(f"[TRAFFIC] Loop error: {e}")
@@ -122,7 +266,11 @@ class TrafficGenerator:
         self.running = True
         
         # Chạy vòng lặp sinh traffic trong một luồng riêng biệt (Daemon Thread)
-        self.thread = threading.Thread(target=self._traffic_loop, daemon=True)
+        if self.scenario:
+            loop = self._scenario_loop
+        else:
+            loop = self._agent_loop if self.agents else self._traffic_loop
+        self.thread = threading.Thread(target=loop, daemon=True)
         self.thread.start()
 
     def stop(self):
@@ -130,9 +278,17 @@ class TrafficGenerator:
         logger.info(" Đang dừng Traffic Generator...")
         self.running = False
         
+        if self.runner:
+            self.runner.stop()
+        
         if self.thread and self.thread.is_alive():
             self.thread.join(timeout=2.0)
             
+        if self.agents:
+            self.agents.stop()
+            logger.info(" Đã dừng traffic agent.")
+            return
+            
         # Dọn dẹp các tiến trình iperf còn sót lại
         for h in self.net.hosts:
             try:
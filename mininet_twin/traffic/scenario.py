@@ -0,0 +1,411 @@
+# mininet_twin/traffic/scenario.py
+"""
+TRAFFIC SCENARIO ENGINE (REPRODUCIBLE)
+--------------------------------------
+MỤC ĐÍCH:
+- TrafficGenerator chọn cặp host / bandwidth / duration ngẫu nhiên → 2 lần benchmark
+  không so sánh được với nhau
+- Scenario khai báo (JSON) + seed → biên dịch thành lịch flow CỐ ĐỊNH:
+  cùng scenario + cùng danh sách host → cùng lịch, từng flow (fingerprint giống nhau)
+- Scheduler chạy hàng nghìn lần start flow đúng thời điểm (sai lệch cỡ ms) qua
+  AgentPool; stop do chính agent thực hiện theo duration của flow
+
+SCENARIO:
+    {
+      "seed": 42,
+      "duration": 300,                      # giây
+      "total_rate_mbps": 400,               # tổng tải trung bình của cả ma trận
+      "proto": "udp",
+      "matrix": {"type": "gravity", "sigma": 1.0},
+      "diurnal": {"period": 120, "curve": [[0, 0.3], [0.5, 1.0], [1, 0.3]]},
+      "flows": {"model": "onoff", "on_mean": 2.0, "off_mean": 3.0, "distribution": "pareto", "shape": 1.5}
+    }
+
+TRAFFIC MATRIX (demand trung bình src → dst, Mbps):
+- all_to_all : mọi cặp bằng nhau
+- gravity    : weight w_i ~ lognormal(0, sigma) (hoặc "weights": {host: w}), d_ij ∝ w_i·w_j
+- hotspot    : "hotspots" (tên host) hoặc "count" host ngẫu nhiên nhận "fraction" tổng tải
+- csv        : file "path" (src,dst,rate_mbps); total_rate_mbps (nếu có) để scale lại
+
+FLOW MODEL (mỗi cặp có demand là 1 nguồn on/off độc lập):
+- Thời gian ON / OFF ~ distribution (exponential | pareto | constant) với mean cho trước
+- Rate khi ON = demand · (on_mean + off_mean) / on_mean · diurnal(t_start)
+  → trung bình dài hạn đúng bằng demand × đường cong diurnal
+
+CLI (kiểm tra lịch mà không cần Mininet):
+    python -m traffic.scenario scenario.json --hosts 16
+"""
+
+import argparse
+import bisect
+import csv
+import hashlib
+import json
+import math
+import random
+import sys
+import threading
+import time
+from utils.logger import setup_logger
+
+logger = setup_logger()
+
+# Demand nhỏ hơn mức này (Mbps) bị bỏ (tránh hàng nghìn flow vài kbps)
+MIN_PAIR_RATE_MBPS = 0.01
+
+# Scheduler ngủ tới (thời điểm - SPIN_WINDOW) rồi spin → sai lệch < 1ms
+SPIN_WINDOW = 0.002
+
+
+# ========================================
+# TRAFFIC MATRIX
+# ========================================
+
+def _matrix_all_to_all(hosts, rng, spec):
+    return {(s, d): 1.0 for s in hosts for d in hosts if s != d}
+
+
+def _matrix_gravity(hosts, rng, spec):
+    weights = spec.get('weights') or {}
+    sigma = float(spec.get('sigma', 1.0))
+    w = {h: float(weights[h]) if h in weights else rng.lognormvariate(0.0, sigma) for h in hosts}
+    return {(s, d): w[s] * w[d] for s in hosts for d in hosts if s != d}
+
+
+def _matrix_hotspot(hosts, rng, spec):
+    hotspots = [h for h in spec.get('hotspots', []) if h in hosts]
+    if not hotspots:
+        hotspots = rng.sample(hosts, min(int(spec.get('count', 1)), len(hosts)))
+    fraction = float(spec.get('fraction', 0.8))
+
+    hot_pairs = [(s, d) for s in hosts for d in hotspots if s != d]
+    cold_pairs = [(s, d) for s in hosts for d in hosts if s != d and d not in hotspots]
+
+    matrix = {}
+    for pair in hot_pairs:
+        matrix[pair] = fraction / len(hot_pairs)
+    for pair in cold_pairs:
+        matrix[pair] = (1.0 - fraction) / len(cold_pairs)
+    return matrix
+
+
+def _matrix_csv(hosts, rng, spec):
+    known = set(hosts)
+    matrix = {}
+    with open(spec['path'], newline='') as f:
+        for row in csv.reader(f):
+            if not row or row[0].startswith('#') or row[0] == 'src':
+                continue
+            # Dòng thiếu cột / chỉ có dấu phẩy → bỏ qua thay vì IndexError
+            if len(row) < 3 or not any(cell.strip() for cell in row):
+                continue
+            src, dst, rate = row[0].strip(), row[1].strip(), float(row[2])
+            if src in known and dst in known and src != dst:
+                matrix[(src, dst)] = matrix.get((src, dst), 0.0) + rate
+    return matrix
+
+
+MATRICES = {
+    'all_to_all': _matrix_all_to_all,
+    'gravity': _matrix_gravity,
+    'hotspot': _matrix_hotspot,
+    'csv': _matrix_csv,
+}
+
+
+def build_matrix(hosts, spec, rng, total_rate_mbps=None):
+    """
+    Ma trận demand (Mbps) giữa các host
+
+    Args:
+        hosts (list): Tên host (đã sort → kết quả không phụ thuộc thứ tự net.hosts)
+        spec (dict): {'type': 'gravity' | 'hotspot' | 'all_to_all' | 'csv', ...}
+        rng (random.Random): RNG của scenario
+        total_rate_mbps (float): Scale tổng demand về giá trị này (None = giữ nguyên)
+
+    Returns:
+        dict: (src, dst) → Mbps
+
+    Raises:
+        ValueError: Loại matrix không hỗ trợ
+    """
+    kind = spec.get('type', 'all_to_all')
+    if kind not in MATRICES:
+        raise ValueError(f"Unknown traffic matrix '{kind}' (supported: {sorted(MATRICES)})")
+
+    matrix = MATRICES[kind](hosts, rng, spec)
+    total = sum(matrix.values())
+    if total_rate_mbps is not None and total > 0:
+        scale = float(total_rate_mbps) / total
+        matrix = {pair: demand * scale for pair, demand in matrix.items()}
+    return {pair: demand for pair, demand in matrix.items() if demand >= MIN_PAIR_RATE_MBPS}
+
+
+# ========================================
+# DIURNAL CURVE + FLOW MODEL
+# ========================================
+
+class DiurnalCurve:
+    """Hệ số nhân theo thời gian: nội suy tuyến tính trên curve [[phase 0..1, multiplier], ...]"""
+
+    def __init__(self, spec=None):
+        spec = spec or {}
+        self.period = float(spec.get('period', 0)) or None
+        points = sorted((float(p), float(m)) for p, m in spec.get('curve', [[0, 1.0], [1, 1.0]]))
+        self._phases = [p for p, _ in points]
+        self._values = [m for _, m in points]
+
+    def at(self, t):
+        if not self.period:
+            return 1.0
+        if len(self._phases) == 1:
+            return self._values[0]
+        phase = (t % self.period) / self.period
+        i = bisect.bisect_right(self._phases, phase)
+        if i == 0:
+            return self._values[0]
+        if i == len(self._phases):
+            return self._values[-1]
+        p0, p1 = self._phases[i - 1], self._phases[i]
+        v0, v1 = self._values[i - 1], self._values[i]
+        return v0 + (v1 - v0) * (phase - p0) / (p1 - p0)
+
+
+def _sampler(distribution, mean, shape, rng):
+    if distribution == 'constant':
+        return lambda: mean
+    if distribution == 'pareto':
+        if shape <= 1:
+            raise ValueError("pareto shape must be > 1 (finite mean)")
+        scale = mean * (shape - 1) / shape
+        return lambda: scale * rng.paretovariate(shape)
+    if distribution == 'exponential':
+        return lambda: rng.expovariate(1.0 / mean)
+    raise ValueError(f"Unknown distribution '{distribution}'")
+
+
+# ========================================
+# COMPILE: SCENARIO → LỊCH FLOW
+# ========================================
+
+class Schedule:
+    """
+    Lịch flow đã biên dịch, sort theo thời điểm start
+
+    flows: list (start_s, src, dst, rate_mbps, duration_s), mọi số đã làm tròn
+    → fingerprint ổn định giữa các máy / lần chạy
+    """
+
+    def __init__(self, name, seed, duration, proto, flows):
+        self.name = name
+        self.seed = seed
+        self.duration = duration
+        self.proto = proto
+        self.flows = flows
+
+    def fingerprint(self):
+        digest = hashlib.sha256()
+        digest.update(f"{self.seed}|{self.duration}|{self.proto}\n".encode())
+        for flow in self.flows:
+            digest.update(("%.3f|%s|%s|%.3f|%.3f\n" % flow).encode())
+        return digest.hexdigest()[:16]
+
+    def summary(self):
+        offered = sum(rate * dur for _, _, _, rate, dur in self.flows)
+        return {
+            'name': self.name,
+            'seed': self.seed,
+            'duration': self.duration,
+            'proto': self.proto,
+            'flows': len(self.flows),
+            'pairs': len({(src, dst) for _, src, dst, _, _ in self.flows}),
+            'mean_offered_mbps': round(offered / self.duration, 2) if self.duration else 0.0,
+            'fingerprint': self.fingerprint()
+        }
+
+
+def compile_scenario(scenario, hosts):
+    """
+    Biên dịch scenario thành Schedule (không chạy gì)
+
+    Args:
+        scenario (dict): Xem docstring module
+        hosts (list): Tên host đang có
+
+    Returns:
+        Schedule
+
+    Raises:
+        ValueError: Scenario không hợp lệ
+    """
+    seed = scenario.get('seed', 0)
+    duration = float(scenario.get('duration', 60))
+    if duration <= 0:
+        raise ValueError("duration must be > 0")
+
+    hosts = sorted(hosts)
+    if len(hosts) < 2:
+        raise ValueError("Scenario needs at least 2 hosts")
+
+    rng = random.Random(seed)
+    matrix = build_matrix(hosts, scenario.get('matrix', {}), rng, scenario.get('total_rate_mbps'))
+    diurnal = DiurnalCurve(scenario.get('diurnal'))
+
+    model = scenario.get('flows', {})
+    on_mean = float(model.get('on_mean', 2.0))
+    off_mean = float(model.get('off_mean', 3.0))
+    distribution = model.get('distribution', 'exponential')
+    shape = float(model.get('shape', 1.5))
+    duty = on_mean / (on_mean + off_mean)
+
+    flows = []
+    for src, dst in sorted(matrix):
+        demand = matrix[(src, dst)]
+        # Mỗi cặp có RNG con riêng → thêm/bớt 1 cặp không làm xáo lịch của cặp khác
+        pair_rng = random.Random(f"{seed}:{src}:{dst}")
+        on_time = _sampler(distribution, on_mean, shape, pair_rng)
+        off_time = _sampler(distribution, off_mean, shape, pair_rng)
+
+        # Pha ban đầu ngẫu nhiên: không phải mọi cặp cùng bật lúc t=0
+        t = pair_rng.uniform(0, on_mean + off_mean)
+        while t < duration:
+            on = min(on_time(), duration - t)
+            rate = demand / duty * diurnal.at(t)
+            if on >= 0.001 and rate >= MIN_PAIR_RATE_MBPS:
+                flows.append((round(t, 3), src, dst, round(rate, 3), round(on, 3)))
+            t += on + off_time()
+
+    flows.sort()
+    return Schedule(scenario.get('name', 'scenario'), seed, duration, scenario.get('proto', 'udp'), flows)
+
+
+def load_scenario(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+# ========================================
+# RUNNER
+# ========================================
+
+class ScenarioRunner:
+    """
+    Chạy Schedule trên AgentPool: 1 thread, ngủ tới đúng thời điểm từng flow
+
+    Example Usage:
+    --------------
+    schedule = compile_scenario(load_scenario('scenario.json'), [h.name for h in net.hosts])
+    runner = ScenarioRunner(net, pool, schedule)
+    runner.start()
+    ...
+    runner.stats()
+    # {'started': 5231, 'skipped': 0, 'lateness_ms': {'mean': 0.21, 'p99': 0.9, 'max': 3.1}, ...}
+    """
+
+    def __init__(self, net, agents, schedule, on_finished=None):
+        self.net = net
+        self.agents = agents
+        self.schedule = schedule
+        self.on_finished = on_finished
+        # Self-monitor giảm tải → rate mỗi flow × rate_scale (lịch start/src/dst giữ nguyên)
+        self.rate_scale = 1.0
+        self.thread = None
+        self._stop = threading.Event()
+        self._lateness = []
+        self._started = 0
+        self._skipped = 0
+        self._throttled = 0
+        self._t0 = None
+
+    def start(self):
+        summary = self.schedule.summary()
+        logger.info(
+            f"[SCENARIO] Running '{summary['name']}' seed={summary['seed']}: {summary['flows']} flows, "
+            f"{summary['pairs']} pairs, ~{summary['mean_offered_mbps']} Mbps, "
+            f"fingerprint={summary['fingerprint']}"
+        )
+        self.thread = threading.Thread(target=self._run, daemon=True, name='traffic-scenario')
+        self.thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self.thread and self.thread.is_alive():
+            self.thread.join(timeout=2.0)
+
+    def is_running(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    def stats(self):
+        lateness = sorted(self._lateness)
+        result = {
+            **self.schedule.summary(),
+            'started': self._started,
+            'skipped': self._skipped,
+            'throttled': self._throttled,
+            'elapsed_s': round(time.monotonic() - self._t0, 3) if self._t0 else 0.0,
+            'lateness_ms': {}
+        }
+        if lateness:
+            result['lateness_ms'] = {
+                'mean': round(sum(lateness) / len(lateness), 3),
+                'p99': round(lateness[min(len(lateness) - 1, math.ceil(len(lateness) * 0.99) - 1)], 3),
+                'max': round(lateness[-1], 3)
+            }
+        return result
+
+    def _run(self):
+        self._t0 = time.monotonic()
+        proto = self.schedule.proto
+
+        for start_s, src_name, dst_name, rate, duration in self.schedule.flows:
+            due = self._t0 + start_s
+            remaining = due - time.monotonic()
+            if remaining > SPIN_WINDOW and self._stop.wait(remaining - SPIN_WINDOW):
+                break
+            if self._stop.is_set():
+                break
+            while time.monotonic() < due:
+                pass
+
+            self._lateness.append((time.monotonic() - due) * 1000)
+
+            scale = self.rate_scale
+            if scale < 1.0:
+                rate = round(rate * scale, 3)
+                self._throttled += 1
+
+            src, dst = self.net.nameToNode.get(src_name), self.net.nameToNode.get(dst_name)
+            if src is None or dst is None or self.agents.start_flow(
+                    src, dst, rate_mbps=rate, duration=duration, proto=proto) is None:
+                self._skipped += 1
+                continue
+            self._started += 1
+
+        # Chờ flow cuối kết thúc (tới hết duration của scenario)
+        remaining = self._t0 + self.schedule.duration - time.monotonic()
+        if remaining > 0:
+            self._stop.wait(remaining)
+
+        stats = self.stats()
+        logger.info(f"[SCENARIO] Finished '{stats['name']}': {stats}")
+        if self.on_finished:
+            self.on_finished(stats)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compile a traffic scenario and print its schedule summary")
+    parser.add_argument('scenario', help="Scenario JSON file")
+    parser.add_argument('--hosts', type=int, default=16, help="Số host h1..hN (giống core.generators)")
+    parser.add_argument('--dump', action='store_true', help="In toàn bộ lịch flow (CSV)")
+    args = parser.parse_args(argv)
+
+    schedule = compile_scenario(load_scenario(args.scenario), [f"h{i}" for i in range(1, args.hosts + 1)])
+    if args.dump:
+        writer = csv.writer(sys.stdout)
+        writer.writerow(['start_s', 'src', 'dst', 'rate_mbps', 'duration_s'])
+        writer.writerows(schedule.flows)
+    print(json.dumps(schedule.summary(), indent=2), file=sys.stderr if args.dump else sys.stdout)
+
+
+if __name__ == '__main__':
+    main()